@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import asyncio
 import base64
 import json
 import time
@@ -47,6 +48,8 @@ class ModelFileManager:
             if not folder in folder_paths.folder_names_and_paths:
                 return web.Response(status=404)
             files = self.get_model_file_list(folder)
+            if request.rel_url.query.get("info", "false") == "true":
+                files = await asyncio.get_running_loop().run_in_executor(None, self.get_model_file_info, folder, files)
             return web.json_response(files)
 
         @routes.get("/experiment/models/preview/{folder}/{path_index}/{filename:.*}")
@@ -92,6 +95,21 @@ class ModelFileManager:
 
         return output_list
 
+    def get_model_file_info(self, folder_name: str, files: list[dict]) -> list[dict]:
+        # Imported here because loading comfy.sd initializes the torch device
+        import comfy.sd
+        folders = folder_paths.folder_names_and_paths[map_legacy(folder_name)][0]
+        output_list: list[dict] = []
+        for file in files:
+            info = None
+            if file["name"].endswith((".safetensors", ".sft")):
+                try:
+                    info = comfy.sd.describe_model_file(os.path.join(folders[file["pathIndex"]], file["name"]))
+                except Exception as e:
+                    logging.warning(f"Warning: Unable to read model info of {file['name']}: {e}")
+            output_list.append({**file, "info": info})
+        return output_list
+
     def cache_model_file_list_(self, folder: str):
         model_file_list_cache = self.get_cache(folder)
 
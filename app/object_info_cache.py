@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+import threading
+import traceback
+
+import folder_paths
+
+
+def directory_mtimes(directory):
+    """mtimes of directory and of its subdirectories (not recursive), what nodes listing the input directory depend on."""
+    out = {}
+    try:
+        out[directory] = os.path.getmtime(directory)
+        for entry in os.scandir(directory):
+            if entry.is_dir():
+                out[entry.path] = entry.stat().st_mtime
+    except OSError:
+        pass
+    return out
+
+
+class ObjectInfoCache:
+    """
+    The /object_info document (the info of every node) serialized once and reused until something it depends on
+    changes, instead of calling INPUT_TYPES of every node on each request. It is rebuilt when:
+    - one of the model file lists the nodes used is out of date (checked with the mtimes folder_paths keeps for them)
+    - the mtime of the input directory or one of its subdirectories changed
+    - nodes were added or removed
+    Nodes with INPUT_TYPES that depend on anything else are only up to date after one of these or clear(). Enabled with
+    --cache-object-info.
+    """
+    def __init__(self, node_info, node_class_mappings, display_name_mappings):
+        self.node_info = node_info
+        self.node_class_mappings = node_class_mappings
+        self.display_name_mappings = display_name_mappings
+        self.lock = threading.Lock()
+        self.document = None
+        self.filename_lists = {}
+        self.input_mtimes = {}
+        self.nodes = {}
+        self.display_names = {}
+        self.hits = 0
+        self.builds = 0
+
+    def valid(self):
+        if self.document is None:
+            return False
+        if self.nodes != self.node_class_mappings or self.display_names != self.display_name_mappings:
+            return False
+        for folder_name, filename_list in self.filename_lists.items():
+            try:
+                if folder_paths.cached_filename_list_(folder_name) is not filename_list:
+                    return False
+            except OSError:
+                return False
+        return directory_mtimes(folder_paths.get_input_directory()) == self.input_mtimes
+
+    def build(self):
+        nodes = dict(self.node_class_mappings)
+        display_names = dict(self.display_name_mappings)
+        input_mtimes = directory_mtimes(folder_paths.get_input_directory())
+        out = {}
+        with folder_paths.cache_helper:
+            for x in nodes:
+                try:
+                    out[x] = self.node_info(x)
+                except Exception:
+                    logging.error(f"[ERROR] An error occurred while retrieving information for the '{x}' node.")
+                    logging.error(traceback.format_exc())
+        # The file lists the nodes got, folder_paths keeps them until the folders change
+        self.filename_lists = {k: v for k, v in folder_paths.filename_list_cache.items()}
+        self.document = json.dumps(out)
+        self.nodes = nodes
+        self.display_names = display_names
+        self.input_mtimes = input_mtimes
+        self.builds += 1
+
+    def get(self):
+        """Returns the /object_info document as a JSON string."""
+        with self.lock:
+            if self.valid():
+                self.hits += 1
+            else:
+                self.build()
+            return self.document
+
+    def clear(self):
+        with self.lock:
+            self.document = None
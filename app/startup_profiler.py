@@ -0,0 +1,65 @@
+import time
+import logging
+import threading
+
+import psutil
+
+import comfy.lazy_import
+
+# Seconds from the start of the process and RSS in bytes once startup finished, None until then.
+startup_time = None
+startup_rss = None
+
+phases = []  # dicts with the name, seconds and RSS at the end of each phase in the order they ran
+module_import_times = {}  # node module path -> (seconds, success)
+_lock = threading.Lock()
+_phase_start = None
+
+
+def process_start_time():
+    """Wall clock time the process started at, so the time spent before any of our code ran (the interpreter, site packages) counts too."""
+    try:
+        return psutil.Process().create_time()
+    except psutil.Error:
+        return time.time()
+
+
+def end_phase(name):
+    """Ends the startup phase name, which started when the previous one ended (or the process started)."""
+    global _phase_start
+    now = time.time()
+    with _lock:
+        if _phase_start is None:
+            _phase_start = process_start_time()
+        phases.append({"name": name, "seconds": now - _phase_start, "rss": psutil.Process().memory_info().rss})
+        _phase_start = now
+
+
+def record_module_import(module_path, seconds, success):
+    with _lock:
+        module_import_times[module_path] = (seconds, success)
+
+
+def finish_startup():
+    global startup_time, startup_rss
+    end_phase("server_init")
+    startup_time = time.time() - process_start_time()
+    startup_rss = psutil.Process().memory_info().rss
+    logging.info("Startup took {:.1f} seconds, {:.0f} MB RSS".format(startup_time, startup_rss / (1024 * 1024)))
+    for phase in phases:
+        logging.debug("{:6.2f} seconds, {:6.0f} MB RSS: {}".format(phase["seconds"], phase["rss"] / (1024 * 1024), phase["name"]))
+
+
+def get_report():
+    """The startup phases, the import times of the node modules and the modules that were imported on first use."""
+    with _lock:
+        modules = [{"module": k, "seconds": v[0], "success": v[1]} for k, v in module_import_times.items()]
+        modules.sort(key=lambda m: m["seconds"], reverse=True)
+        return {
+            "startup_time": startup_time,
+            "startup_rss": startup_rss,
+            "rss": psutil.Process().memory_info().rss,
+            "phases": list(phases),
+            "node_modules": modules,
+            "lazy_imports": dict(comfy.lazy_import.import_times),
+        }
@@ -0,0 +1,70 @@
+"""
+Times CacheKeySetInputSignature (through HierarchicalCache.set_prompt) on large synthetic graphs.
+
+    python benchmarks/cache_key_benchmark.py --nodes 100 600 2000
+
+For each size three cases are timed: a cold set_prompt, a resubmission of an identical prompt
+and a resubmission where a single widget near the start of the graph changed.
+"""
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True # Cache keys don't depend on the device
+
+import execution
+from comfy_execution.graph import DynamicPrompt
+from comfy_execution.caching import HierarchicalCache, CacheKeySetInputSignature
+
+
+def synthetic_prompt(node_count, seed=0):
+    # A checkpoint loader, a layer of text encodes and a wide DAG of ConditioningCombine nodes
+    # with shared ancestors, which is the worst case for walking the ancestry of every node.
+    rng = random.Random(seed)
+    prompt = {"0": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model.safetensors"}}}
+    encoders = max(2, node_count // 10)
+    for i in range(1, encoders + 1):
+        prompt[str(i)] = {"class_type": "CLIPTextEncode", "inputs": {"text": "prompt {}".format(i), "clip": ["0", 1]}}
+    for i in range(encoders + 1, node_count):
+        a = rng.randrange(1, i)
+        b = rng.randrange(max(1, i - 20), i)
+        prompt[str(i)] = {"class_type": "ConditioningCombine", "inputs": {"conditioning_1": [str(a), 0], "conditioning_2": [str(b), 0]}}
+    return prompt
+
+
+def time_set_prompt(cache, prompt):
+    start = time.perf_counter()
+    dynprompt = DynamicPrompt(prompt)
+    cache.set_prompt(dynprompt, prompt.keys(), execution.IsChangedCache(dynprompt, cache))
+    cache.clean_unused()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 600, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    print("{:>8} {:>12} {:>12} {:>14}".format("nodes", "cold ms", "same ms", "1 change ms"))  # noqa: T201
+    for node_count in options.nodes:
+        prompt = synthetic_prompt(node_count)
+        results = {"cold": [], "same": [], "changed": []}
+        for _ in range(options.repeat):
+            cache = HierarchicalCache(CacheKeySetInputSignature)
+            results["cold"].append(time_set_prompt(cache, copy.deepcopy(prompt)))
+            results["same"].append(time_set_prompt(cache, copy.deepcopy(prompt)))
+            changed = copy.deepcopy(prompt)
+            changed["1"]["inputs"]["text"] = "a different prompt"
+            results["changed"].append(time_set_prompt(cache, changed))
+        print("{:>8} {:>12.2f} {:>12.2f} {:>14.2f}".format(node_count, *[min(results[k]) * 1000 for k in ("cold", "same", "changed")]))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for the per step overhead of comfy.samplers.calc_cond_batch with regional prompts on CPU.
+
+    python benchmarks/cond_batch_benchmark.py --areas 1,4,16 --json cond_batch.json
+
+Runs sampling steps of a positive prompt split into areas (half of them masked) and a negative prompt through a model
+that costs almost nothing, with the cond plan cache (what CFGGuider uses) and without it (what every step did before),
+which leaves the time spent on the areas, masks, conditioning and batch sizes. Reports the milliseconds per step.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True
+
+import torch
+
+import comfy.conds
+import comfy.samplers
+
+
+class Patcher:
+    def prepare_hook_patches_current_keyframe(self, t, hook_group, model_options):
+        pass
+
+    def prepare_state(self, timestep):
+        pass
+
+    def apply_hooks(self, hooks=None):
+        return {}
+
+
+class Model:
+    current_patcher = Patcher()
+
+    def memory_required(self, input_shape, cond_shapes={}):
+        return 1024 * 1024
+
+    def apply_model(self, x, t, c_crossattn=None, transformer_options={}, **kwargs):
+        return x
+
+
+def cond(tokens, **kwargs):
+    out = {"model_conds": {"c_crossattn": comfy.conds.CONDCrossAttn(torch.randn(1, tokens, 768))}, "uuid": uuid.uuid4()}
+    out.update(kwargs)
+    return out
+
+
+def regional_conds(areas, size, tokens):
+    side = max(1, int(areas ** 0.5))
+    tile = size // side
+    positive = [cond(tokens, default=True)]
+    for i in range(areas):
+        y = (i // side) % side * tile
+        x = i % side * tile
+        if i % 2 == 0:
+            positive.append(cond(tokens, area=(tile, tile, y, x), strength=0.8))
+        else:
+            mask = torch.zeros(1, size, size)
+            mask[:, y:y + tile, x:x + tile] = 1.0
+            positive.append(cond(tokens, mask=mask))
+    return positive, [cond(tokens)]
+
+
+def run(conds, x, steps, model_options):
+    model = Model()
+    timestep = torch.ones(x.shape[0])
+    comfy.samplers.calc_cond_batch(model, conds, x, timestep, model_options)  # warm up
+    start = time.perf_counter()
+    for _ in range(steps):
+        comfy.samplers.calc_cond_batch(model, conds, x, timestep, model_options)
+    return (time.perf_counter() - start) / steps * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--areas", type=str, default="1,4,16", help="Comma separated list of the numbers of areas to run.")
+    parser.add_argument("--size", type=int, default=128, help="Width and height of the latents.")
+    parser.add_argument("--batch", type=int, default=1, help="Batch size of the latents.")
+    parser.add_argument("--tokens", type=int, default=77)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this JSON file.")
+    options = parser.parse_args()
+
+    torch.manual_seed(0)
+    x = torch.randn(options.batch, 4, options.size, options.size)
+    output = {"options": vars(options), "torch": torch.__version__, "results": {}}
+    with torch.inference_mode():
+        for areas in map(int, options.areas.split(",")):
+            positive, negative = regional_conds(areas, options.size, options.tokens)
+            conds = [positive, negative]
+            uncached = run(conds, x, options.steps, {})
+            cached = run(conds, x, options.steps, {"cond_plan_cache": comfy.samplers.CondPlanCache()})
+            output["results"][areas] = {"uncached_ms": uncached, "cached_ms": cached}
+            print("{:3} areas  {:8.2f} ms/step uncached  {:8.2f} ms/step cached".format(areas, uncached, cached))  # noqa: T201
+
+    if options.json is not None:
+        with open(options.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
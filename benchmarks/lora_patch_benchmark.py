@@ -0,0 +1,91 @@
+"""
+Benchmark for applying a LoRA to a model with SDXL UNet like attention and feed forward shapes.
+
+    python benchmarks/lora_patch_benchmark.py --keys 300 --rank 32
+
+Times patching every key on its own (patch_weight_to_device) against patching them with batched
+LoRA products (patch_weights_to_device), and checks both give the same weights.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True
+
+import torch
+import comfy.model_patcher
+from comfy.weight_adapter.lora import LoRAAdapter
+
+# (out_features, in_features) of the linear layers in a transformer block at each UNet level
+BLOCK_SHAPES = []
+for dim in (640, 1280):
+    BLOCK_SHAPES += [(dim, dim), (dim, dim), (dim, dim), (dim, dim), (dim, dim), (dim, 2048), (dim, 2048), (dim, dim), (dim * 8, dim), (dim, dim * 4)]
+
+
+class Model(torch.nn.Module):
+    def __init__(self, key_count, dtype):
+        super().__init__()
+        self.layers = torch.nn.ModuleList()
+        for i in range(key_count):
+            out_features, in_features = BLOCK_SHAPES[i % len(BLOCK_SHAPES)]
+            self.layers.append(torch.nn.Linear(in_features, out_features, bias=False, dtype=dtype))
+
+
+def lora_patches(model, rank):
+    patches = {}
+    for i, layer in enumerate(model.layers):
+        out_features, in_features = layer.weight.shape
+        up = torch.randn(out_features, rank, dtype=torch.float16) * 0.01
+        down = torch.randn(rank, in_features, dtype=torch.float16) * 0.01
+        patches["layers.{}.weight".format(i)] = LoRAAdapter(set(), (up, down, float(rank), None, None, None))
+    return patches
+
+
+def patch(model, patches, batched):
+    patcher = comfy.model_patcher.ModelPatcher(model, torch.device("cpu"), torch.device("cpu"))
+    patcher.add_patches(patches, 0.8)
+    keys = ["layers.{}.weight".format(i) for i in range(len(model.layers))]
+    start = time.perf_counter()
+    if batched:
+        patcher.patch_weights_to_device(keys)
+    else:
+        for key in keys:
+            patcher.patch_weight_to_device(key)
+    elapsed = (time.perf_counter() - start) * 1000
+    # Only some of the patched weights are kept for the comparison to limit memory use
+    weights = [layer.weight.detach().clone() for layer in model.layers[::10]]
+    patcher.unpatch_model()
+    return elapsed, weights
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=300)
+    parser.add_argument("--rank", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=3)
+    options = parser.parse_args()
+
+    torch.manual_seed(0)
+    model = Model(options.keys, torch.float16)
+    patches = lora_patches(model, options.rank)
+    print("{} keys, {:.0f} MB of fp16 weights, rank {}".format(options.keys, sum(p.nbytes for p in model.parameters()) / (1024 * 1024), options.rank))  # noqa: T201
+
+    def run(batched):
+        times = []
+        for _ in range(options.runs):
+            elapsed, weights = patch(model, patches, batched)
+            times.append(elapsed)
+        return min(times), weights
+
+    per_key_ms, reference = run(False)
+    print("per key: {:.0f} ms".format(per_key_ms))  # noqa: T201
+    batched_ms, weights = run(True)
+    max_diff = max((a.float() - b.float()).abs().max().item() for a, b in zip(reference, weights))
+    print("batched: {:.0f} ms (max difference {:.2e})".format(batched_ms, max_diff))  # noqa: T201
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Benchmark for the model load path with synthetic checkpoints.
+
+    python benchmarks/model_load_benchmark.py --models sd15,flux --json load.json
+
+Writes safetensors files with the key layout and shapes of real models (built from the comfy model classes on the meta
+device and saved the way save_checkpoint saves them) and times each stage of loading them: load_torch_file, model
+detection, building the models from the state dict, ModelPatcher.load and patching a LoRA. Each stage reports its peak
+RSS, the bytes torch copied and the bytes read from storage (only with --cold, otherwise the files are in the OS file
+cache). The sdxl checkpoint needs about 16GB of RAM, flux is scaled down with --flux-depth.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import functools
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True
+
+import psutil
+import torch
+from torch.utils._python_dispatch import TorchDispatchMode
+
+import comfy.sd
+import comfy.utils
+import comfy.model_detection
+import comfy.model_patcher
+import comfy.supported_models
+from comfy.ldm.models.autoencoder import AutoencoderKL
+from comfy.ldm.flux.model import Flux
+from comfy.weight_adapter.lora import LoRAAdapter
+
+DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16, "fp32": torch.float32}
+SAFETENSORS_NAMES = {v: k for k, v in comfy.utils.SAFETENSORS_DTYPES.items()}
+
+VAE_CONFIG = {'double_z': True, 'z_channels': 4, 'resolution': 256, 'in_channels': 3, 'out_ch': 3, 'ch': 128, 'ch_mult': [1, 2, 4, 4], 'num_res_blocks': 2, 'attn_resolutions': [], 'dropout': 0.0}
+SD15_UNET = {"use_checkpoint": False, "image_size": 32, "out_channels": 4, "use_spatial_transformer": True, "legacy": False, "adm_in_channels": None,
+             "in_channels": 4, "model_channels": 320, "num_res_blocks": [2, 2, 2, 2], "transformer_depth": [1, 1, 1, 1, 1, 1, 0, 0], "channel_mult": [1, 2, 4, 4],
+             "transformer_depth_middle": 1, "use_linear_in_transformer": False, "context_dim": 768, "num_heads": 8,
+             "transformer_depth_output": [1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0], "use_temporal_attention": False, "use_temporal_resblock": False}
+SDXL_UNET = {"use_checkpoint": False, "image_size": 32, "out_channels": 4, "use_spatial_transformer": True, "legacy": False, "num_classes": "sequential",
+             "adm_in_channels": 2816, "in_channels": 4, "model_channels": 320, "num_res_blocks": [2, 2, 2], "transformer_depth": [0, 0, 2, 2, 10, 10],
+             "channel_mult": [1, 2, 4], "transformer_depth_middle": 10, "use_linear_in_transformer": True, "context_dim": 2048, "num_head_channels": 64,
+             "transformer_depth_output": [0, 0, 0, 2, 2, 2, 10, 10, 10], "use_temporal_attention": False, "use_temporal_resblock": False}
+
+
+def checkpoint_state_dict(model_config_class, unet_config, dtype):
+    with torch.device("meta"):
+        model_config = model_config_class(unet_config)
+        model_config.set_inference_dtype(dtype, None)
+        model = model_config.get_model({}, device="meta")
+        clip = model_config.clip_target().clip(device="meta", dtype=dtype)
+        vae = AutoencoderKL(ddconfig=VAE_CONFIG, embed_dim=4)
+    return model.state_dict_for_saving(clip.state_dict(), vae.state_dict())
+
+
+def flux_state_dict(depth, dtype):
+    with torch.device("meta"):
+        model = Flux(in_channels=16, out_channels=16, vec_in_dim=768, context_in_dim=4096, hidden_size=3072, mlp_ratio=4.0, num_heads=24,
+                     depth=depth, depth_single_blocks=depth * 2, axes_dim=[16, 56, 56], theta=10000, patch_size=2, qkv_bias=True,
+                     guidance_embed=True, operations=comfy.ops.disable_weight_init, dtype=dtype)
+    return model.state_dict()
+
+
+def write_safetensors(path, sd, dtype):
+    """Writes the meta state dict sd as a safetensors file filled with small random values, without allocating it."""
+    header = {}
+    offset = 0
+    for k, v in sd.items():
+        v_dtype = dtype if v.is_floating_point() else v.dtype
+        size = v.numel() * v_dtype.itemsize
+        header[k] = {"dtype": SAFETENSORS_NAMES[v_dtype], "shape": list(v.shape), "data_offsets": [offset, offset + size]}
+        offset += size
+    data = json.dumps(header).encode()
+    data += b" " * (-len(data) % 8)
+    block = {}
+    with open(path, "wb") as f:
+        f.write(len(data).to_bytes(8, "little"))
+        f.write(data)
+        for k, v in sd.items():
+            v_dtype = dtype if v.is_floating_point() else v.dtype
+            if v_dtype not in block:
+                block[v_dtype] = (torch.randn(1024 * 1024) * 0.02).to(v_dtype).view(torch.uint8).numpy().tobytes()
+            size = header[k]["data_offsets"][1] - header[k]["data_offsets"][0]
+            b = block[v_dtype]
+            while size > 0:
+                f.write(b[:size])
+                size -= len(b)
+        f.flush()
+        os.fsync(f.fileno())
+    return offset
+
+
+class CopyCounter(TorchDispatchMode):
+    """Counts the bytes written by the torch copy ops that run inside it."""
+    OPS = {torch.ops.aten.copy_.default, torch.ops.aten._to_copy.default, torch.ops.aten.clone.default}
+
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    def __torch_dispatch__(self, func, types, args=(), kwargs=None):
+        out = func(*args, **(kwargs or {}))
+        if func in self.OPS and isinstance(out, torch.Tensor):
+            self.bytes += out.nbytes
+        return out
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return psutil.Process().memory_info().rss
+
+
+def read_bytes():
+    # Counts the pages of memory mapped files read from storage too, but not what was already in the OS file cache
+    try:
+        return psutil.Process().io_counters().read_bytes
+    except (AttributeError, psutil.Error):
+        return 0
+
+
+def timed(results, stage, f):
+    reset_peak_rss()
+    read_start = read_bytes()
+    counter = CopyCounter()
+    start = time.perf_counter()
+    with counter:
+        out = f()
+    elapsed = time.perf_counter() - start
+    results[stage] = {"seconds": elapsed, "peak_rss": peak_rss(), "rss": psutil.Process().memory_info().rss,
+                      "copied_bytes": counter.bytes, "read_bytes": read_bytes() - read_start}
+    print("  {:<16} {:8.3f} s  peak RSS {:7.0f} MB  copied {:7.0f} MB  read {:7.0f} MB".format(  # noqa: T201
+        stage, elapsed, results[stage]["peak_rss"] / (1024 * 1024), counter.bytes / (1024 * 1024), results[stage]["read_bytes"] / (1024 * 1024)))
+    return out
+
+
+def drop_file_cache(path):
+    with open(path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def lora_patches(patcher, rank, max_keys):
+    patches = {}
+    for key, weight in patcher.model.state_dict().items():
+        if len(patches) >= max_keys:
+            break
+        if not key.startswith("diffusion_model.") or weight.ndim != 2 or min(weight.shape) < rank:
+            continue
+        up = torch.randn(weight.shape[0], rank, dtype=torch.float16) * 0.01
+        down = torch.randn(rank, weight.shape[1], dtype=torch.float16) * 0.01
+        patches[key] = LoRAAdapter(set(), (up, down, float(rank), None, None, None))
+    return patches
+
+
+def load(results, path, checkpoint, dtype):
+    sd, metadata = timed(results, "load_torch_file", functools.partial(comfy.utils.load_torch_file, path, return_metadata=True))
+    if checkpoint:
+        timed(results, "detect", functools.partial(comfy.sd.detect_checkpoint, sd, metadata))
+        out = timed(results, "load_state_dict", functools.partial(comfy.sd.load_state_dict_guess_config, sd, output_clipvision=False, model_options={"dtype": dtype}, metadata=metadata))
+        return out[0], out
+    timed(results, "detect", functools.partial(comfy.model_detection.detect_unet_config, sd, ""))
+    patcher = timed(results, "load_state_dict", functools.partial(comfy.sd.load_diffusion_model_state_dict, sd, model_options={"dtype": dtype}))
+    return patcher, (patcher,)
+
+
+def benchmark(name, path, options, dtype):
+    results = {"file_bytes": os.path.getsize(path)}
+    if options.cold:
+        drop_file_cache(path)
+    # The text encoder and VAE of checkpoints stay loaded until the end like they would in a workflow
+    patcher, models = load(results, path, name != "flux", dtype)
+
+    device = torch.device("cpu")
+    timed(results, "patcher_load", functools.partial(patcher.patch_model, device_to=device))
+    patcher.unpatch_model(device_to=device)
+
+    if options.lora_keys > 0:
+        lora = patcher.clone()
+        lora.add_patches(lora_patches(lora, options.lora_rank, options.lora_keys), 1.0)
+        results["lora_keys"] = len(lora.patches)
+        timed(results, "lora_patch", functools.partial(lora.patch_model, device_to=device))
+        timed(results, "lora_unpatch", functools.partial(lora.unpatch_model, device_to=device))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=str, default="sd15,flux", help="Comma separated list of sd15, sdxl and flux.")
+    parser.add_argument("--dtype", type=str, default="fp16", choices=list(DTYPES.keys()), help="Dtype of the checkpoints and of the loaded diffusion models.")
+    parser.add_argument("--flux-depth", type=int, default=1, help="Double blocks of the flux model (19 for the real one), with twice as many single blocks.")
+    parser.add_argument("--lora-keys", type=int, default=200, help="Number of diffusion model weights a LoRA is patched into, 0 to skip.")
+    parser.add_argument("--lora-rank", type=int, default=32)
+    parser.add_argument("--cold", action="store_true", help="Drop the checkpoints from the OS file cache before loading them.")
+    parser.add_argument("--directory", type=str, default=None, help="Where to write the synthetic checkpoints, a temporary directory that is deleted afterwards by default.")
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this JSON file.")
+    options = parser.parse_args()
+
+    dtype = DTYPES[options.dtype]
+    directory = options.directory or tempfile.mkdtemp(prefix="model_load_benchmark")
+    os.makedirs(directory, exist_ok=True)
+    generators = {
+        "sd15": lambda: checkpoint_state_dict(comfy.supported_models.SD15, SD15_UNET, dtype),
+        "sdxl": lambda: checkpoint_state_dict(comfy.supported_models.SDXL, SDXL_UNET, dtype),
+        "flux": lambda: flux_state_dict(options.flux_depth, dtype),
+    }
+    output = {"options": vars(options), "torch": torch.__version__, "results": {}}
+    try:
+        for name in options.models.split(","):
+            path = os.path.join(directory, "{}_{}.safetensors".format(name, options.dtype))
+            if not os.path.exists(path):
+                size = write_safetensors(path, generators[name](), dtype)
+                print("wrote {} ({:.0f} MB)".format(path, size / (1024 * 1024)))  # noqa: T201
+            print(name)  # noqa: T201
+            output["results"][name] = benchmark(name, path, options, dtype)
+    finally:
+        if options.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if options.json is not None:
+        with open(options.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Load benchmark for PromptQueue with a large number of queued prompts.
+
+    python benchmarks/prompt_queue_benchmark.py --items 10000 --nodes 30
+
+Times enqueueing, building the /queue response both for an unchanged queue and for a queue
+that changes between requests, and executing items off the full queue.
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True
+
+import execution
+
+
+class StubServer:
+    def __init__(self):
+        self.queue_updates = 0
+
+    def queue_updated(self):
+        self.queue_updates += 1
+
+    def send_sync(self, event, data, sid=None):
+        pass
+
+
+def synthetic_prompt(node_count, index):
+    prompt = {"0": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model.safetensors"}}}
+    for i in range(1, node_count):
+        prompt[str(i)] = {"class_type": "CLIPTextEncode", "inputs": {"text": "prompt {} of item {}".format(i, index), "clip": ["0", 1]}}
+    return prompt
+
+
+def queue_item(number, node_count):
+    return (number, str(uuid.uuid4()), synthetic_prompt(node_count, number), {"client_id": "benchmark"}, ["1"])
+
+
+def timed(f, count):
+    start = time.perf_counter()
+    for i in range(count):
+        f(i)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--nodes", type=int, default=30, help="Nodes per queued prompt.")
+    parser.add_argument("--requests", type=int, default=20, help="Number of /queue requests to time.")
+    options = parser.parse_args()
+
+    server = StubServer()
+    q = execution.PromptQueue(server)
+    items = [queue_item(i, options.nodes) for i in range(options.items + options.requests)]
+
+    put_ms = timed(lambda i: q.put(items[i]), options.items)
+    print("put {} items: {:.1f} ms ({:.1f} us/item)".format(options.items, put_ms, put_ms * 1000 / options.items))  # noqa: T201
+
+    first_ms = timed(lambda i: q.get_queue_json(), 1)
+    print("/queue first request: {:.1f} ms, {:.1f} MB".format(first_ms, len(q.get_queue_json()) / (1024 * 1024)))  # noqa: T201
+
+    same_ms = timed(lambda i: q.get_queue_json(), options.requests)
+    print("/queue unchanged: {:.3f} ms/request".format(same_ms / options.requests))  # noqa: T201
+
+    def changed(i):
+        q.put(items[options.items + i])
+        q.get_queue_json()
+    changed_ms = timed(changed, options.requests)
+    print("/queue after each put: {:.1f} ms/request".format(changed_ms / options.requests))  # noqa: T201
+
+    def run_item(i):
+        item, item_id = q.get(timeout=0)
+        q.task_done(item_id, {"outputs": {}, "meta": {}}, status=None)
+    run_count = min(1000, options.items)
+    run_ms = timed(run_item, run_count)
+    print("get + task_done: {:.1f} us/item".format(run_ms * 1000 / run_count))  # noqa: T201
+    print("queue status updates requested: {}".format(server.queue_updates))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
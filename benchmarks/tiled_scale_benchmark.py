@@ -0,0 +1,88 @@
+"""
+Benchmark for comfy.utils.tiled_scale_multidim on CPU.
+
+    python benchmarks/tiled_scale_benchmark.py --tile-batch 1,4,16 --json tiles.json
+
+Runs a tiled 8x upscale of random latents through a small convolutional decoder (like the tiled VAE decode) and
+through a nearest neighbour upscale that costs almost nothing, which leaves only the overhead of the tiling itself,
+with each tile batch size. Reports the tiles per second.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import comfy.cli_args
+comfy.cli_args.args.cpu = True
+
+import torch
+
+import comfy.utils
+
+
+class Decoder(torch.nn.Module):
+    def __init__(self, channels=64):
+        super().__init__()
+        layers = [torch.nn.Conv2d(4, channels, 3, padding=1)]
+        for _ in range(3):
+            layers += [torch.nn.SiLU(), torch.nn.Upsample(scale_factor=2), torch.nn.Conv2d(channels, channels, 3, padding=1)]
+        layers += [torch.nn.SiLU(), torch.nn.Conv2d(channels, 3, 3, padding=1)]
+        self.layers = torch.nn.Sequential(*layers)
+
+    def forward(self, x):
+        return self.layers(x)
+
+
+def nearest(x):
+    return torch.nn.functional.interpolate(x[:, :3], scale_factor=8, mode="nearest")
+
+
+def run(function, samples, options, tile_batch):
+    tiles = samples.shape[0] * comfy.utils.get_tiled_scale_steps(samples.shape[3], samples.shape[2], options.tile, options.tile, options.overlap)
+    comfy.utils.tiled_scale(samples, function, options.tile, options.tile, options.overlap, upscale_amount=8)  # warm up
+    start = time.perf_counter()
+    for _ in range(options.repeat):
+        comfy.utils.tiled_scale_multidim(samples, function, (options.tile, options.tile), overlap=options.overlap, upscale_amount=8, tile_batch=tile_batch)
+    elapsed = (time.perf_counter() - start) / options.repeat
+    return {"tiles": tiles, "seconds": elapsed, "tiles_per_second": tiles / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=128, help="Width and height of the latents.")
+    parser.add_argument("--batch", type=int, default=2, help="Batch size of the latents.")
+    parser.add_argument("--tile", type=int, default=32)
+    parser.add_argument("--overlap", type=int, default=8)
+    parser.add_argument("--tile-batch", type=str, default="1,4,16", help="Comma separated list of the tile batch sizes to run.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this JSON file.")
+    options = parser.parse_args()
+
+    if options.threads is not None:
+        torch.set_num_threads(options.threads)
+    torch.manual_seed(0)
+    samples = torch.randn(options.batch, 4, options.size, options.size)
+    decoder = Decoder().eval()
+    functions = {"nearest": nearest, "decoder": decoder}
+
+    output = {"options": vars(options), "torch": torch.__version__, "results": {}}
+    with torch.inference_mode():
+        for name, function in functions.items():
+            print(name)  # noqa: T201
+            output["results"][name] = {}
+            for tile_batch in map(int, options.tile_batch.split(",")):
+                r = run(function, samples, options, tile_batch)
+                output["results"][name][tile_batch] = r
+                print("  tile batch {:<4} {:8.1f} tiles/s  {:8.3f} s".format(tile_batch, r["tiles_per_second"], r["seconds"]))  # noqa: T201
+
+    if options.json is not None:
+        with open(options.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -103,7 +103,24 @@ parser.add_argument("--preview-size", type=int, default=512, help="Sets the maxi
 cache_group = parser.add_mutually_exclusive_group()
 cache_group.add_argument("--cache-classic", action="store_true", help="Use the old style (aggressive) caching.")
 cache_group.add_argument("--cache-lru", type=int, default=0, help="Use LRU caching with a maximum of N node results cached. May use more RAM/VRAM.")
+cache_group.add_argument("--cache-ram", type=float, nargs="?", const=4.0, default=0, metavar="HEADROOM_GB", help="Use memory pressure aware caching: node results are kept until free RAM (or VRAM for results stored there) drops below HEADROOM_GB (default 4.0), then the least recently used ones are evicted.")
 cache_group.add_argument("--cache-none", action="store_true", help="Reduced RAM/VRAM usage at the expense of executing every node for each run.")
+parser.add_argument("--cache-disk", type=float, default=0, metavar="SIZE_GB", help="Keep serializable node outputs (latents, conditioning, images) in an on-disk cache of up to SIZE_GB so they survive restarts. Disabled when 0.")
+parser.add_argument("--cache-patched-weights", type=float, default=0, metavar="SIZE_GB", help="Keep up to SIZE_GB of model weights with LoRAs and other patches applied in RAM, so switching back to a combination of LoRAs that was used before doesn't calculate the patched weights again. Disabled when 0.")
+parser.add_argument("--cache-patched-weights-disk", type=float, default=0, metavar="SIZE_GB", help="Also keep up to SIZE_GB of patched model weights in the cache directory so they survive restarts. Disabled when 0.")
+parser.add_argument("--model-index", action="store_true", help="Keep the detected type, config and parameter count of the loaded and listed model files in model_index.db in the cache directory, so loading a model that was loaded before doesn't scan its state dict keys again.")
+parser.add_argument("--disable-vae-memory-model", action="store_true", help="Size VAE encode and decode batches with the static per architecture estimates only. By default the peak memory each VAE architecture used is measured (on devices with peak memory stats) and kept in vae_memory.json in the cache directory, and the batch and tile sizes are picked from what it predicts instead of retrying with tiling after running out of memory.")
+parser.add_argument("--dedup-weights", action="store_true", help="Make identical weights of the loaded models (the same text encoder or VAE in several checkpoints...) share one copy in RAM and VRAM.")
+parser.add_argument("--eviction-policy", type=str, default="default", choices=["default", "cost"], help="How models are picked for unloading when memory is needed. cost keeps the models that are the slowest to load again and that the running and queued prompts will use the soonest.")
+parser.add_argument("--cache-object-info", action="store_true", help="Reuse the /object_info response until the model folders, the input directory or the nodes change instead of building it on every request. Custom nodes with inputs that depend on anything else are only up to date after one of these or a request to /object_info?refresh=true.")
+parser.add_argument("--cache-directory", type=str, default=None, help="Set the ComfyUI cache directory used by the on-disk caches. Overrides --base-directory.")
+
+parser.add_argument("--prompt-workers", type=int, default=1, metavar="N", help="Number of prompt worker threads pulling from the shared queue. Each worker has its own executor and node cache and runs on its own device (see --prompt-worker-devices).")
+parser.add_argument("--coalesce-prompts", action="store_true", help="Prompts identical to one that is already queued or running are not executed again, they get the results of that prompt. Prompts with nodes that always change (random IS_CHANGED) are never coalesced.")
+parser.add_argument("--history-db", type=str, nargs="?", const="", default=None, metavar="PATH", help="Store the prompt history in an SQLite database instead of memory so it survives restarts. Defaults to history.db in the user directory when PATH isn't given.")
+parser.add_argument("--prefetch-models", action="store_true", help="Read the model files used by the loader nodes of the running and the next queued prompt into the OS file cache on a background thread, so loading them doesn't wait on the disk.")
+parser.add_argument("--parallel-nodes", type=int, default=0, metavar="N", help="Run up to N ready nodes marked THREAD_SAFE (API nodes, image loading, string nodes...) on worker threads while the rest of the workflow executes.")
+parser.add_argument("--prompt-worker-devices", type=str, default=None, metavar="DEVICE", nargs="+", help="Devices to pin the prompt workers to, one per worker (example: cuda:0 cuda:1 cpu). Workers can't share a device, there are never more workers than devices. By default workers are spread over the visible cuda devices.")
 
 attn_group = parser.add_mutually_exclusive_group()
 attn_group.add_argument("--use-split-cross-attention", action="store_true", help="Use the split cross attention optimization. Ignored when xformers is used.")
@@ -130,6 +147,8 @@ vram_group.add_argument("--cpu", action="store_true", help="To use the CPU for e
 parser.add_argument("--reserve-vram", type=float, default=None, help="Set the amount of vram in GB you want to reserve for use by your OS/other software. By default some amount is reserved depending on your OS.")
 
 parser.add_argument("--async-offload", action="store_true", help="Use async weight offloading.")
+parser.add_argument("--prefetch-weights", type=int, default=0, metavar="N", help="When a model is partially loaded (lowvram), copy the weights of the next N offloaded layers to the GPU through reusable pinned memory on a separate stream while the current layer runs. Uses the VRAM of N more layers. Disabled when 0.")
+parser.add_argument("--prefetch-weights-pinned-memory", type=float, default=None, metavar="SIZE_GB", help="Size of the pinned memory --prefetch-weights stages the weights in. Defaults to an eighth of the available RAM, up to 1 GB.")
 
 parser.add_argument("--default-hashing-function", type=str, choices=['md5', 'sha1', 'sha256', 'sha512'], default='sha256', help="Allows you to choose the hash function to use for duplicate filename / contents comparison. Default is sha256.")
 
@@ -144,6 +163,7 @@ class PerformanceFeature(enum.Enum):
 parser.add_argument("--fast", nargs="*", type=PerformanceFeature, help="Enable some untested and potentially quality deteriorating optimizations. --fast with no arguments enables everything. You can pass a list specific optimizations if you only want to enable specific ones. Current valid optimizations: fp16_accumulation fp8_matrix_mult cublas_ops")
 
 parser.add_argument("--mmap-torch-files", action="store_true", help="Use mmap when loading ckpt/pt files.")
+parser.add_argument("--disable-safetensors-mmap", action="store_true", help="Read safetensors files into RAM when loading them instead of memory mapping them.")
 
 parser.add_argument("--dont-print-server", action="store_true", help="Don't print server output.")
 parser.add_argument("--quick-test-for-ci", action="store_true", help="Quick test for CI.")
@@ -236,6 +236,22 @@ class ComfyNodeABC(ABC):
     """Flags a node as deprecated, indicating to users that they should find alternatives to this node."""
     API_NODE: Optional[bool]
     """Flags a node as an API node. See: https://docs.comfy.org/tutorials/api-nodes/overview."""
+    THREAD_SAFE: Optional[bool]
+    """Flags a node as safe to run on a worker thread alongside other nodes, see ``--parallel-nodes``.
+
+    Only set this on nodes that don't use the GPU or mutate shared state (file loading, string and
+    CPU mask operations, remote API calls). API nodes are treated as thread safe unless this is ``False``.
+    """
+    PREFETCH_FILES: Optional[dict[str, str]]
+    """Maps inputs that hold a model file name to the folder the file is in, see ``--prefetch-models``. The outputs
+    downstream of nodes that return models without it aren't kept in ``--cache-disk``.
+
+    Usage::
+
+        PREFETCH_FILES = {"ckpt_name": "checkpoints"}
+    """
+    CACHE_VERSION: Optional[int]
+    """Bump this when the outputs of the node change for the same inputs, so they aren't read from ``--cache-disk`` anymore."""
 
     @classmethod
     @abstractmethod
@@ -312,6 +328,9 @@ class ComfyNodeABC(ABC):
     FUNCTION: str
     """The name of the function to execute as a literal string, e.g. `FUNCTION = "execute"`
 
+    The function may be a coroutine (``async def``). It then runs on a shared event loop, and other
+    ready nodes keep executing while it awaits, which suits nodes that wait on remote jobs.
+
     Comfy Docs: https://docs.comfy.org/custom-nodes/backend/server_overview#function
     """
 
@@ -1,6 +1,5 @@
 import math
 
-from scipy import integrate
 import torch
 from torch import nn
 import torchsde
@@ -10,6 +9,9 @@ from . import utils
 from . import deis
 import comfy.model_patcher
 import comfy.model_sampling
+import comfy.lazy_import
+
+integrate = comfy.lazy_import.lazy_import("scipy.integrate")
 
 def append_zero(x):
     return torch.cat([x, x.new_zeros([1])])
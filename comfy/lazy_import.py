@@ -0,0 +1,53 @@
+import sys
+import time
+import types
+import logging
+import importlib
+
+# Module name -> seconds it took to import, for the modules that were imported through a LazyModule.
+import_times = {}
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module that hasn't been imported yet and imports it the first time one of its attributes is used.
+    Until then it is set as the attribute of its parent package, so code using the full module path doesn't change.
+    """
+    def _load(self):
+        name = self.__name__
+        module = sys.modules.get(name, None)
+        if module is None:
+            # The import system takes care of other threads importing the same module at the same time
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            if name not in import_times:
+                import_times[name] = time.perf_counter() - start
+                logging.debug("Imported {} on first use in {:.2f} seconds".format(name, import_times[name]))
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    Returns the module name if it was already imported, otherwise a LazyModule that imports it on first use. Used for
+    model architectures, text encoders and other modules that are heavy to import and that most setups never use.
+    """
+    module = sys.modules.get(name, None)
+    if module is not None:
+        return module
+    parent, _, child = name.rpartition(".")
+    module = LazyModule(name)
+    if parent != "":
+        parent_module = importlib.import_module(parent)
+        # Not hasattr(), packages like scipy import their submodules in a module __getattr__
+        existing = vars(parent_module).get(child, None)
+        if existing is None:
+            setattr(parent_module, child, module)
+        else:
+            module = existing
+    return module
@@ -16,10 +16,12 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import torchvision
+import comfy.lazy_import
 from torch import nn
 from .common import LayerNorm2d_op
 
+torchvision = comfy.lazy_import.lazy_import("torchvision")
+
 
 class CNetResBlock(nn.Module):
     def __init__(self, c, dtype=None, device=None, operations=None):
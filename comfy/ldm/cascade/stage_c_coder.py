@@ -16,11 +16,12 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import torch
-import torchvision
 from torch import nn
 
 import comfy.ops
+import comfy.lazy_import
 
+torchvision = comfy.lazy_import.lazy_import("torchvision")
 ops = comfy.ops.disable_weight_init
 
 # EfficientNet
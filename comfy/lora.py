@@ -22,6 +22,7 @@ import comfy.model_management
 import comfy.model_base
 import comfy.weight_adapter as weight_adapter
 import logging
+import math
 import torch
 
 LORA_CLIP_MAP = {
@@ -328,6 +329,56 @@ def pad_tensor_to_shape(tensor: torch.Tensor, new_shape: list[int]) -> torch.Ten
 
     return padded_tensor
 
+def lora_patch_signature(patches, weight_shape):
+    """
+    Returns the shapes of patches if they are all plain LoRAs, so keys with the same signature can be
+    patched together with calculate_lora_weights. Returns None for anything else.
+    """
+    signature = [tuple(weight_shape)]
+    for p in patches:
+        v = p[1]
+        if p[2] != 1.0 or p[3] is not None or p[4] is not None or not isinstance(v, weight_adapter.LoRAAdapter):
+            return None
+        up, down, alpha, mid, dora_scale, reshape = v.weights
+        if mid is not None or dora_scale is not None or reshape is not None:
+            return None
+        up_shape = (up.shape[0], math.prod(up.shape[1:]))
+        down_shape = (down.shape[0], math.prod(down.shape[1:]))
+        if up_shape[1] != down_shape[0] or up_shape[0] * down_shape[1] != math.prod(weight_shape):
+            return None
+        signature.append((up_shape, down_shape))
+    return tuple(signature)
+
+def calculate_lora_weights(weights, patches_list, device, intermediate_dtype=torch.float32, out=None):
+    """
+    Batched calculate_weight for keys whose patches all have the same lora_patch_signature: the weights are
+    stacked and every patch index is applied to all of them with one torch.baddbmm. Returns a
+    (len(weights), out_features, in_features) tensor of patched weights in intermediate_dtype, written to
+    out if given so a buffer can be reused between batches.
+    """
+    shape = (len(weights), patches_list[0][0][1].weights[0].shape[0], math.prod(patches_list[0][0][1].weights[1].shape[1:]))
+    if out is None:
+        out = torch.empty(shape, dtype=intermediate_dtype, device=device)
+    else:
+        out = out[:len(weights)]
+    for i, weight in enumerate(weights):
+        out[i].copy_(weight.reshape(shape[1:]))
+
+    for i in range(len(patches_list[0])):
+        ups = []
+        downs = []
+        scales = []
+        for patches in patches_list:
+            strength, v = patches[i][0], patches[i][1]
+            up, down, alpha = v.weights[:3]
+            ups.append(comfy.model_management.cast_to_device(up, device, intermediate_dtype).flatten(start_dim=1))
+            downs.append(comfy.model_management.cast_to_device(down, device, intermediate_dtype).flatten(start_dim=1))
+            scales.append(strength * (alpha / down.shape[0] if alpha is not None else 1.0))
+        # Scaling up is cheaper than scaling its product with down
+        up = torch.stack(ups).mul_(torch.tensor(scales, dtype=intermediate_dtype, device=device).view(-1, 1, 1))
+        out.baddbmm_(up, torch.stack(downs))
+    return out
+
 def calculate_weight(patches, weight, key, intermediate_dtype=torch.float32, original_weights=None):
     for p in patches:
         strength = p[0]
@@ -19,27 +19,29 @@
 import torch
 import logging
 from comfy.ldm.modules.diffusionmodules.openaimodel import UNetModel, Timestep
-from comfy.ldm.cascade.stage_c import StageC
-from comfy.ldm.cascade.stage_b import StageB
 from comfy.ldm.modules.encoders.noise_aug_modules import CLIPEmbeddingNoiseAugmentation
 from comfy.ldm.modules.diffusionmodules.upscaling import ImageConcatWithNoiseAugmentation
 from comfy.ldm.modules.diffusionmodules.mmdit import OpenAISignatureMMDITWrapper
-import comfy.ldm.genmo.joint_model.asymm_models_joint
-import comfy.ldm.aura.mmdit
-import comfy.ldm.pixart.pixartms
-import comfy.ldm.hydit.models
-import comfy.ldm.audio.dit
-import comfy.ldm.audio.embedders
-import comfy.ldm.flux.model
-import comfy.ldm.lightricks.model
-import comfy.ldm.hunyuan_video.model
-import comfy.ldm.cosmos.model
-import comfy.ldm.lumina.model
-import comfy.ldm.wan.model
-import comfy.ldm.hunyuan3d.model
-import comfy.ldm.hidream.model
-import comfy.ldm.chroma.model
-import comfy.ldm.ace.model
+import comfy.lazy_import
+# The other architectures are imported when a model that uses them is loaded
+comfy.lazy_import.lazy_import("comfy.ldm.cascade.stage_c")
+comfy.lazy_import.lazy_import("comfy.ldm.cascade.stage_b")
+comfy.lazy_import.lazy_import("comfy.ldm.genmo.joint_model.asymm_models_joint")
+comfy.lazy_import.lazy_import("comfy.ldm.aura.mmdit")
+comfy.lazy_import.lazy_import("comfy.ldm.pixart.pixartms")
+comfy.lazy_import.lazy_import("comfy.ldm.hydit.models")
+comfy.lazy_import.lazy_import("comfy.ldm.audio.dit")
+comfy.lazy_import.lazy_import("comfy.ldm.audio.embedders")
+comfy.lazy_import.lazy_import("comfy.ldm.flux.model")
+comfy.lazy_import.lazy_import("comfy.ldm.lightricks.model")
+comfy.lazy_import.lazy_import("comfy.ldm.hunyuan_video.model")
+comfy.lazy_import.lazy_import("comfy.ldm.cosmos.model")
+comfy.lazy_import.lazy_import("comfy.ldm.lumina.model")
+comfy.lazy_import.lazy_import("comfy.ldm.wan.model")
+comfy.lazy_import.lazy_import("comfy.ldm.hunyuan3d.model")
+comfy.lazy_import.lazy_import("comfy.ldm.hidream.model")
+comfy.lazy_import.lazy_import("comfy.ldm.chroma.model")
+comfy.lazy_import.lazy_import("comfy.ldm.ace.model")
 
 import comfy.model_management
 import comfy.patcher_extension
@@ -634,7 +636,7 @@ class Lotus(BaseModel):
 
 class StableCascade_C(BaseModel):
     def __init__(self, model_config, model_type=ModelType.STABLE_CASCADE, device=None):
-        super().__init__(model_config, model_type, device=device, unet_model=StageC)
+        super().__init__(model_config, model_type, device=device, unet_model=comfy.ldm.cascade.stage_c.StageC)
         self.diffusion_model.eval().requires_grad_(False)
 
     def extra_conds(self, **kwargs):
@@ -663,7 +665,7 @@ class StableCascade_C(BaseModel):
 
 class StableCascade_B(BaseModel):
     def __init__(self, model_config, model_type=ModelType.STABLE_CASCADE, device=None):
-        super().__init__(model_config, model_type, device=device, unet_model=StageB)
+        super().__init__(model_config, model_type, device=device, unet_model=comfy.ldm.cascade.stage_b.StageB)
         self.diffusion_model.eval().requires_grad_(False)
 
     def extra_conds(self, **kwargs):
@@ -0,0 +1,157 @@
+import os
+import ast
+import json
+import struct
+import hashlib
+import logging
+import sqlite3
+import threading
+
+import torch
+
+import comfy.utils
+
+# Bump this when what is stored in the index changes. Changes to the model detection code are picked up by
+# detection_version() without bumping it.
+MODEL_INDEX_VERSION = 1
+DETECTION_SOURCES = ["model_detection.py", "supported_models.py", "supported_models_base.py"]
+
+
+def detection_version():
+    h = hashlib.sha256(str(MODEL_INDEX_VERSION).encode())
+    directory = os.path.dirname(os.path.realpath(__file__))
+    for name in DETECTION_SOURCES:
+        with open(os.path.join(directory, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def file_id(path):
+    st = os.stat(path)
+    return "{}:{}:{}".format(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def encode_dtype(dtype):
+    return None if dtype is None else str(dtype).replace("torch.", "")
+
+
+def decode_dtype(name):
+    return None if name is None else getattr(torch, name)
+
+
+def is_literal(value):
+    try:
+        return ast.literal_eval(repr(value)) == value
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return False
+
+
+def load_header_state_dict(path):
+    """
+    Returns (sd, metadata) for the safetensors file at path with meta tensors of the right shapes and dtypes,
+    read from the header only. Enough to detect the type of model without reading any weights. None if the
+    file isn't a safetensors file or has dtypes this doesn't handle.
+    """
+    with open(path, "rb") as f:
+        data = f.read(8)
+        if len(data) < 8:
+            return None
+        header_size = struct.unpack("<Q", data)[0]
+        if header_size > 100 * 1024 * 1024:
+            return None
+        try:
+            header = json.loads(f.read(header_size))
+        except ValueError:
+            return None
+    metadata = header.pop("__metadata__", None)
+    sd = {}
+    for k, v in header.items():
+        dtype = comfy.utils.SAFETENSORS_DTYPES.get(v.get("dtype", None), None)
+        if dtype is None:
+            return None
+        sd[k] = torch.empty(v["shape"], dtype=dtype, device="meta")
+    return sd, metadata
+
+
+class ModelIndex:
+    """
+    What the loaders detected about model files (architecture config, parameter count, weight dtype...), stored in an
+    SQLite database keyed by path, so loading or listing a model that was seen before doesn't scan all the keys of its
+    state dict again. Entries are dropped when the size or modification time of the file or the model detection code
+    changes. Values have to be Python literals (dicts, lists, tuples, strings, numbers...).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.version = detection_version()
+        self.mutex = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS models (path TEXT PRIMARY KEY, file_id TEXT NOT NULL, info TEXT NOT NULL)")
+
+    def _file_id(self, path):
+        return "{}:{}".format(self.version, file_id(path))
+
+    def get(self, path):
+        """Returns the info dict of the file at path, an empty dict if it isn't indexed."""
+        path = os.path.abspath(path)
+        current = self._file_id(path)
+        with self.mutex:
+            row = self.connection.execute("SELECT file_id, info FROM models WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != current:
+            return {}
+        try:
+            return ast.literal_eval(row[1])
+        except (ValueError, SyntaxError):
+            return {}
+
+    def update(self, path, info):
+        path = os.path.abspath(path)
+        info = {k: v for k, v in info.items() if is_literal(v)}
+        if self.get(path) == info:
+            return
+        with self.mutex:
+            self.connection.execute("INSERT OR REPLACE INTO models (path, file_id, info) VALUES (?, ?, ?)", (path, self._file_id(path), repr(info)))
+
+    def remove_missing(self):
+        """Removes the entries of files that don't exist anymore."""
+        with self.mutex:
+            paths = [row[0] for row in self.connection.execute("SELECT path FROM models").fetchall()]
+        # Not holding the mutex while checking the files, which can be slow on network drives
+        missing = [(p,) for p in paths if not os.path.exists(p)]
+        with self.mutex:
+            self.connection.executemany("DELETE FROM models WHERE path = ?", missing)
+        return len(missing)
+
+
+# Set up by main.py when enabled with --model-index.
+index = None
+
+
+def get(path):
+    """The info dict of the file at path that the loaders fill in and pass to update(), None when there is no index."""
+    if index is None:
+        return None
+    try:
+        return index.get(path)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning("Could not read the model index entry of {}: {}".format(path, e))
+        return {}
+
+
+def update(path, info):
+    if index is None or info is None:
+        return
+    try:
+        index.update(path, info)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning("Could not update the model index entry of {}: {}".format(path, e))
+
+
+def cached(info, name, f):
+    """Returns info[name], calling f to set it first if it's missing. Just calls f when info is None."""
+    if info is None:
+        return f()
+    if name not in info:
+        info[name] = f()
+    return info[name]
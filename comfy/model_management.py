@@ -18,13 +18,20 @@
 
 import psutil
 import logging
+import contextlib
+import contextvars
+from abc import ABC, abstractmethod
 from enum import Enum
 from comfy.cli_args import args, PerformanceFeature
+import comfy.weight_prefetch
 import torch
 import sys
 import platform
 import weakref
 import gc
+import os
+import time
+import threading
 
 class VRAMState(Enum):
     DISABLED = 0    #No vram present: no need to move models to vram
@@ -151,9 +158,81 @@ def is_mlu():
         return True
     return False
 
+# The prompt worker the calling thread or async task runs nodes for and the device that worker is pinned to. The
+# executor carries them into the node threads and async tasks it starts, see comfy_execution/async_loop.py.
+current_worker = contextvars.ContextVar("current_worker", default=None)
+worker_torch_device = contextvars.ContextVar("worker_torch_device", default=None)
+
+def set_thread_torch_device(device):
+    """Pin the calling thread to a device, used by prompt workers. Passing None removes the pin."""
+    if device is not None:
+        device = torch.device(device)
+        if device.type == "cuda":
+            torch.cuda.set_device(device)
+    worker_torch_device.set(device)
+
+def set_current_worker(worker_id):
+    """Marks the calling thread as the prompt worker with the id worker_id, see interrupt_current_processing."""
+    with interrupt_processing_mutex:
+        interrupt_flags.setdefault(worker_id, False)
+    current_worker.set(worker_id)
+
+# Node work running on each device: [running, started]. Measuring the memory one piece of work uses (see
+# comfy/vae_memory.py) is only valid when no other work ran on the device in the meantime.
+device_work = {}
+device_work_lock = threading.Lock()
+
+def _device_work_key(device):
+    device = torch.device(device)
+    if device.index is None and device.type in ("cuda", "xpu"):
+        return "{}:{}".format(device.type, getattr(torch, device.type).current_device())
+    return str(device)
+
+@contextlib.contextmanager
+def running_on_device(device=None):
+    """Marks work as running on device (the calling worker's device by default) for the duration of the with block."""
+    key = _device_work_key(get_torch_device() if device is None else device)
+    with device_work_lock:
+        work = device_work.setdefault(key, [0, 0])
+        work[0] += 1
+        work[1] += 1
+    try:
+        yield
+    finally:
+        with device_work_lock:
+            work[0] -= 1
+
+def device_work_state(device):
+    """(running, started) counts of the work marked with running_on_device on device."""
+    with device_work_lock:
+        return tuple(device_work.get(_device_work_key(device), (0, 0)))
+
+def prompt_worker_devices(worker_count, devices=None):
+    """
+    The devices to pin worker_count prompt workers to, None for the default device. Workers can't share a device since
+    they would unload and patch the models the other one is running, so this returns at most one worker per device.
+    devices defaults to every visible cuda device when there is more than one worker.
+    """
+    if devices is None:
+        devices = [None]
+        if worker_count > 1 and is_nvidia() and torch.cuda.device_count() > 1:
+            devices = ["cuda:{}".format(i) for i in range(torch.cuda.device_count())]
+    unique = []
+    for device in devices:
+        if device is not None:
+            device = torch.device(device)
+        if device not in unique:
+            unique.append(device)
+    if worker_count > len(unique):
+        logging.warning("Prompt workers can't share a device, starting {} prompt workers instead of {}.".format(len(unique), worker_count))
+    return unique[:worker_count]
+
 def get_torch_device():
     global directml_enabled
     global cpu_state
+    device = worker_torch_device.get()
+    if device is not None:
+        return device
     if directml_enabled:
         global directml_device
         return directml_device
@@ -386,6 +465,100 @@ except:
 
 current_loaded_models = []
 
+class ModelStats:
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0 # load requests for a model that was already loaded
+        self.loads = 0
+        self.reloads = 0 # loads after the model was unloaded before
+        self.unloads = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds = None
+        self.loaded_bytes = 0
+
+model_stats = weakref.WeakKeyDictionary() # torch module of a model patcher -> ModelStats
+
+def get_model_stats(model):
+    stats = model_stats.get(model.model, None)
+    if stats is None:
+        stats = model_stats[model.model] = ModelStats(model.model.__class__.__name__)
+    return stats
+
+def get_all_model_stats():
+    with model_management_lock:
+        loaded = set(id(m.model.model) for m in current_loaded_models if m.model is not None)
+        return [{"name": s.name, "loaded": id(module) in loaded, "hits": s.hits, "loads": s.loads, "reloads": s.reloads, "unloads": s.unloads, "load_seconds": s.load_seconds}
+                for module, s in list(model_stats.items())]
+
+upcoming_files = {} # prompt worker id -> {absolute path -> how many prompts away its next use is, 0 for the running prompt}
+
+def set_upcoming_files(files_per_prompt):
+    """
+    Sets the model files used by the prompt the calling worker runs (files_per_prompt[0]) and the queued ones, in the
+    order they will run.
+    """
+    upcoming = {}
+    for distance, files in enumerate(files_per_prompt):
+        for path in files:
+            upcoming.setdefault(os.path.abspath(path), distance)
+    upcoming_files[current_worker.get()] = upcoming
+
+def get_upcoming_files():
+    """The upcoming files (see set_upcoming_files) of the prompt worker the calling thread runs for."""
+    return upcoming_files.get(current_worker.get(), {})
+
+class EvictionPolicy(ABC):
+    """Decides in which order free_memory unloads models."""
+    @abstractmethod
+    def order(self, candidates):
+        """candidates is a list of (index, LoadedModel) that can be unloaded, returns them in the order to unload them."""
+        pass
+
+class DefaultEvictionPolicy(EvictionPolicy):
+    """Partially loaded models first, then the least referenced and smallest ones."""
+    def order(self, candidates):
+        return [c for _, c in sorted(((-m.model_offloaded_memory(), sys.getrefcount(m.model), m.model_memory(), i), (i, m)) for i, m in candidates)]
+
+class CostEvictionPolicy(EvictionPolicy):
+    """
+    Keeps the models that are the slowest to load again and that will be used the soonest by the running and
+    queued prompts (see set_upcoming_files). Reload cost is the measured load time of the model, or its size over
+    the average measured load bandwidth.
+    """
+    DEFAULT_BANDWIDTH = 1024 * 1024 * 1024
+
+    def reload_seconds(self, loaded_model):
+        stats = get_model_stats(loaded_model.model)
+        if stats.last_load_seconds is not None:
+            return stats.last_load_seconds
+        seconds = sum(s.load_seconds for s in model_stats.values())
+        bandwidth = self.DEFAULT_BANDWIDTH
+        if seconds > 0:
+            bandwidth = sum(s.loaded_bytes for s in model_stats.values()) / seconds
+        return loaded_model.model_memory() / bandwidth
+
+    def next_use(self, loaded_model):
+        paths = getattr(loaded_model.model.model, "weights_paths", ())
+        upcoming = get_upcoming_files()
+        distances = [upcoming[p] for p in paths if p in upcoming]
+        if len(distances) == 0:
+            return None
+        return min(distances)
+
+    def order(self, candidates):
+        def key(candidate):
+            i, m = candidate
+            distance = self.next_use(m)
+            score = 0.0 if distance is None else self.reload_seconds(m) / (distance + 1)
+            return (score, -m.model_offloaded_memory(), sys.getrefcount(m.model), m.model_memory(), i)
+        return sorted(candidates, key=key)
+
+eviction_policy = CostEvictionPolicy() if args.eviction_policy == "cost" else DefaultEvictionPolicy()
+
+def set_eviction_policy(policy):
+    global eviction_policy
+    eviction_policy = policy
+
 def module_size(module):
     module_mem = 0
     sd = module.state_dict()
@@ -464,6 +637,7 @@ class LoadedModel:
                 if freed >= memory_to_free:
                     return False
         self.model.detach(unpatch_weights)
+        clear_weight_prefetchers()
         self.model_finalizer.detach()
         self.model_finalizer = None
         self.real_model = None
@@ -513,7 +687,14 @@ def extra_reserved_memory():
 def minimum_inference_memory():
     return (1024 * 1024 * 1024) * 0.8 + extra_reserved_memory()
 
+# current_loaded_models is shared by every prompt worker thread.
+model_management_lock = threading.RLock()
+
 def free_memory(memory_required, device, keep_loaded=[]):
+    with model_management_lock:
+        return _free_memory(memory_required, device, keep_loaded=keep_loaded)
+
+def _free_memory(memory_required, device, keep_loaded=[]):
     cleanup_models_gc()
     unloaded_model = []
     can_unload = []
@@ -523,11 +704,10 @@ def free_memory(memory_required, device, keep_loaded=[]):
         shift_model = current_loaded_models[i]
         if shift_model.device == device:
             if shift_model not in keep_loaded and not shift_model.is_dead():
-                can_unload.append((-shift_model.model_offloaded_memory(), sys.getrefcount(shift_model.model), shift_model.model_memory(), i))
+                can_unload.append((i, shift_model))
                 shift_model.currently_used = False
 
-    for x in sorted(can_unload):
-        i = x[-1]
+    for i, _ in eviction_policy.order(can_unload):
         memory_to_free = None
         if not DISABLE_SMART_MEMORY:
             free_mem = get_free_memory(device)
@@ -536,6 +716,7 @@ def free_memory(memory_required, device, keep_loaded=[]):
             memory_to_free = memory_required - free_mem
         logging.debug(f"Unloading {current_loaded_models[i].model.model.__class__.__name__}")
         if current_loaded_models[i].model_unload(memory_to_free):
+            get_model_stats(current_loaded_models[i].model).unloads += 1
             unloaded_model.append(i)
 
     for i in sorted(unloaded_model, reverse=True):
@@ -551,6 +732,10 @@ def free_memory(memory_required, device, keep_loaded=[]):
     return unloaded_models
 
 def load_models_gpu(models, memory_required=0, force_patch_weights=False, minimum_memory_required=None, force_full_load=False):
+    with model_management_lock:
+        return _load_models_gpu(models, memory_required=memory_required, force_patch_weights=force_patch_weights, minimum_memory_required=minimum_memory_required, force_full_load=force_full_load)
+
+def _load_models_gpu(models, memory_required=0, force_patch_weights=False, minimum_memory_required=None, force_full_load=False):
     cleanup_models_gc()
     global vram_state
 
@@ -564,6 +749,7 @@ def load_models_gpu(models, memory_required=0, force_patch_weights=False, minimu
     models = set(models)
 
     models_to_load = []
+    models_not_loaded = []
 
     for x in models:
         loaded_model = LoadedModel(x)
@@ -576,10 +762,13 @@ def load_models_gpu(models, memory_required=0, force_patch_weights=False, minimu
             loaded = current_loaded_models[loaded_model_index]
             loaded.currently_used = True
             models_to_load.append(loaded)
+            if hasattr(x, "model"):
+                get_model_stats(x).hits += 1
         else:
             if hasattr(x, "model"):
                 logging.info(f"Requested to load {x.model.__class__.__name__}")
             models_to_load.append(loaded_model)
+            models_not_loaded.append(loaded_model)
 
     for loaded_model in models_to_load:
         to_unload = []
@@ -618,11 +807,24 @@ def load_models_gpu(models, memory_required=0, force_patch_weights=False, minimu
 
             lowvram_model_memory = max(128 * 1024 * 1024, (current_free_mem - minimum_memory_required), min(current_free_mem * MIN_WEIGHT_MEMORY_RATIO, current_free_mem - minimum_inference_memory()))
             lowvram_model_memory = max(0.1, lowvram_model_memory - loaded_memory)
+            if lowvram_model_memory < model.model_size() - loaded_memory:
+                # Partially loaded, leave room for the layers the weight prefetcher copies ahead
+                lowvram_model_memory = max(0.1, lowvram_model_memory - weight_prefetch_memory(model, torch_dev))
 
         if vram_set_state == VRAMState.NO_VRAM:
             lowvram_model_memory = 0.1
 
+        start = time.perf_counter()
+        loaded_memory = loaded_model.model_loaded_memory()
         loaded_model.model_load(lowvram_model_memory, force_patch_weights=force_patch_weights)
+        if hasattr(model, "model") and any(loaded_model is m for m in models_not_loaded):
+            stats = get_model_stats(model)
+            stats.loads += 1
+            if stats.unloads > 0:
+                stats.reloads += 1
+            stats.last_load_seconds = time.perf_counter() - start
+            stats.load_seconds += stats.last_load_seconds
+            stats.loaded_bytes += loaded_model.model_loaded_memory() - loaded_memory
         current_loaded_models.insert(0, loaded_model)
     return
 
@@ -971,6 +1173,38 @@ def get_offload_stream(device):
         return s
     return None
 
+WEIGHT_PREFETCH_PINNED_SIZE = 1024 * 1024 * 1024
+WEIGHT_PREFETCHERS = {}
+def weight_prefetch_pinned_size():
+    """Bytes of pinned memory the weight prefetchers stage weights in, --prefetch-weights-pinned-memory or up to an eighth of the available RAM."""
+    if args.prefetch_weights_pinned_memory is not None:
+        return int(args.prefetch_weights_pinned_memory * 1024 * 1024 * 1024)
+    return int(min(WEIGHT_PREFETCH_PINNED_SIZE, get_free_memory(torch.device("cpu")) / 8))
+
+def weight_prefetch_memory(model, device):
+    """VRAM the weight prefetcher uses for the layers it copies ahead while model is partially loaded on device."""
+    if args.prefetch_weights <= 0 or not is_device_cuda(device):
+        return 0
+    largest = max((module_size(m) for m in model.model.modules() if hasattr(m, "comfy_cast_weights")), default=0)
+    return args.prefetch_weights * largest
+
+def get_weight_prefetcher(device):
+    """The prefetcher that copies the weights of the next lowvram layers to device, None if --prefetch-weights isn't used."""
+    if args.prefetch_weights <= 0 or not is_device_cuda(device):
+        return None
+    prefetcher = WEIGHT_PREFETCHERS.get(device, None)
+    if prefetcher is None:
+        pool = comfy.weight_prefetch.PinnedBufferPool(weight_prefetch_pinned_size(), pin=True)
+        prefetcher = WEIGHT_PREFETCHERS[device] = comfy.weight_prefetch.WeightPrefetcher(device, args.prefetch_weights, pool)
+    return prefetcher
+
+def clear_weight_prefetchers():
+    for prefetcher in WEIGHT_PREFETCHERS.values():
+        prefetcher.clear()
+
+def get_weight_prefetch_stats():
+    return {str(device): prefetcher.get_stats() for device, prefetcher in WEIGHT_PREFETCHERS.items()}
+
 def sync_stream(device, stream):
     if stream is None:
         return
@@ -1299,30 +1533,49 @@ def unload_all_models():
 
 
 #TODO: might be cleaner to put this somewhere else
-import threading
-
 class InterruptProcessingException(Exception):
     pass
 
 interrupt_processing_mutex = threading.RLock()
 
-interrupt_processing = False
-def interrupt_current_processing(value=True):
+interrupt_processing = False # the flag of the code that doesn't run for a prompt worker
+interrupt_flags = {} # prompt worker id -> its interrupt flag
+
+def interrupt_current_processing(value=True, worker=None):
+    """
+    Sets the interrupt flag of the prompt worker with the id worker, by default of the worker the calling thread runs
+    nodes for (see current_worker). Outside of the prompt workers it sets the flag of every worker.
+    """
     global interrupt_processing
     global interrupt_processing_mutex
     with interrupt_processing_mutex:
-        interrupt_processing = value
+        if worker is None:
+            worker = current_worker.get()
+        if worker is None:
+            interrupt_processing = value
+            for w in interrupt_flags:
+                interrupt_flags[w] = value
+        else:
+            interrupt_flags[worker] = value
 
 def processing_interrupted():
     global interrupt_processing
     global interrupt_processing_mutex
     with interrupt_processing_mutex:
-        return interrupt_processing
+        worker = current_worker.get()
+        if worker is None:
+            return interrupt_processing
+        return interrupt_flags.get(worker, False)
 
 def throw_exception_if_processing_interrupted():
     global interrupt_processing
     global interrupt_processing_mutex
     with interrupt_processing_mutex:
-        if interrupt_processing:
-            interrupt_processing = False
+        worker = current_worker.get()
+        if worker is None:
+            if interrupt_processing:
+                interrupt_processing = False
+                raise InterruptProcessingException()
+        elif interrupt_flags.get(worker, False):
+            interrupt_flags[worker] = False
             raise InterruptProcessingException()
@@ -32,9 +32,14 @@ import comfy.model_management
 import comfy.lora
 import comfy.hooks
 import comfy.patcher_extension
+import comfy.patched_weight_cache
+import comfy.weight_dedup
 from comfy.patcher_extension import CallbacksMP, WrappersMP, PatcherInjection
 from comfy.comfy_types import UnetWrapperFunction
 
+# Upper bound for the LoRA products calculated in one batch by ModelPatcher.patch_weights_to_device
+LORA_BATCH_BYTES = 128 * 1024 * 1024
+
 def string_to_seed(data):
     crc = 0xFFFFFFFF
     for byte in data:
@@ -541,7 +546,7 @@ class ModelPatcher:
                         sd.pop(k)
             return sd
 
-    def patch_weight_to_device(self, key, device_to=None, inplace_update=False):
+    def patch_weight_to_device(self, key, device_to=None, inplace_update=False, calculated_weight=None):
         if key not in self.patches:
             return
 
@@ -551,16 +556,35 @@ class ModelPatcher:
         if key not in self.backup:
             self.backup[key] = collections.namedtuple('Dimension', ['weight', 'inplace_update'])(weight.to(device=self.offload_device, copy=inplace_update), inplace_update)
 
-        if device_to is not None:
-            temp_weight = comfy.model_management.cast_to_device(weight, device_to, torch.float32, copy=True)
-        else:
-            temp_weight = weight.to(torch.float32, copy=True)
-        if convert_func is not None:
-            temp_weight = convert_func(temp_weight, inplace=True)
+        out_weight = None
+        cache_key = None
+        cache = comfy.patched_weight_cache.cache if set_func is None else None
+        if cache is not None:
+            cache_key = comfy.patched_weight_cache.patched_weight_key(self.model, key, weight, self.patches[key], convert_func is not None)
+            if cache_key is not None:
+                out_weight = cache.get(cache_key, device_to if device_to is not None else weight.device)
+
+        if out_weight is None:
+            if calculated_weight is not None:
+                out_weight = calculated_weight
+            else:
+                if device_to is not None:
+                    temp_weight = comfy.model_management.cast_to_device(weight, device_to, torch.float32, copy=True)
+                else:
+                    temp_weight = weight.to(torch.float32, copy=True)
+                if convert_func is not None:
+                    temp_weight = convert_func(temp_weight, inplace=True)
+
+                out_weight = comfy.lora.calculate_weight(self.patches[key], temp_weight, key)
+            if set_func is None:
+                out_weight = comfy.float.stochastic_rounding(out_weight, weight.dtype, seed=string_to_seed(key))
+                if out_weight is calculated_weight:
+                    # Part of a buffer patch_weights_to_device reuses
+                    out_weight = out_weight.clone()
+                if cache_key is not None:
+                    cache.put(cache_key, out_weight)
 
-        out_weight = comfy.lora.calculate_weight(self.patches[key], temp_weight, key)
         if set_func is None:
-            out_weight = comfy.float.stochastic_rounding(out_weight, weight.dtype, seed=string_to_seed(key))
             if inplace_update:
                 comfy.utils.copy_to_param(self.model, key, out_weight)
             else:
@@ -568,6 +592,41 @@ class ModelPatcher:
         else:
             set_func(out_weight, inplace_update=inplace_update, seed=string_to_seed(key))
 
+    def patch_weights_to_device(self, keys, device_to=None):
+        """
+        Same as patch_weight_to_device for each key, except that keys with the same weight and LoRA shapes are
+        patched together in batches (see comfy.lora.calculate_lora_weights).
+        """
+        groups = {}
+        cache = comfy.patched_weight_cache.cache
+        for key in keys:
+            if key not in self.patches:
+                continue
+            weight, set_func, convert_func = get_key_weight(self.model, key)
+            signature = None
+            if set_func is None and convert_func is None:
+                signature = comfy.lora.lora_patch_signature(self.patches[key], weight.shape)
+            if signature is not None and cache is not None:
+                cache_key = comfy.patched_weight_cache.patched_weight_key(self.model, key, weight, self.patches[key], False)
+                if cache_key is not None and cache_key in cache:
+                    signature = None
+            if signature is None:
+                self.patch_weight_to_device(key, device_to=device_to)
+            else:
+                groups.setdefault((signature, weight.device), []).append(key)
+
+        for (signature, device), group in groups.items():
+            if device_to is not None:
+                device = device_to
+            batch_size = max(1, min(len(group), LORA_BATCH_BYTES // (math.prod(signature[0]) * 4)))
+            out = None
+            for i in range(0, len(group), batch_size):
+                batch = group[i:i + batch_size]
+                weights = [comfy.utils.get_attr(self.model, k) for k in batch]
+                out = comfy.lora.calculate_lora_weights(weights, [self.patches[k] for k in batch], device, out=out)
+                for j, key in enumerate(batch):
+                    self.patch_weight_to_device(key, device_to=device_to, calculated_weight=out[j].view(signature[0]))
+
     def _load_list(self):
         loading = []
         for n, m in self.model.named_modules():
@@ -652,6 +711,7 @@ class ModelPatcher:
                 mem_counter += move_weight_functions(m, device_to)
 
             load_completely.sort(reverse=True)
+            patch_keys = []
             for x in load_completely:
                 n = x[1]
                 m = x[2]
@@ -660,12 +720,12 @@ class ModelPatcher:
                     if m.comfy_patched_weights == True:
                         continue
 
-                for param in params:
-                    self.patch_weight_to_device("{}.{}".format(n, param), device_to=device_to)
-
+                patch_keys.extend("{}.{}".format(n, param) for param in params)
                 logging.debug("lowvram: loaded module regularly {} {}".format(n, m))
                 m.comfy_patched_weights = True
 
+            self.patch_weights_to_device(patch_keys, device_to=device_to)
+
             for x in load_completely:
                 x[2].to(device_to)
 
@@ -688,6 +748,8 @@ class ModelPatcher:
                 callback(self, device_to, lowvram_model_memory, force_patch_weights, full_load)
 
             self.apply_hooks(self.forced_hooks, force_apply=True)
+            # Moving weights to another device makes new copies of them
+            comfy.weight_dedup.share_weights(self.model)
 
     def patch_model(self, device_to=None, lowvram_model_memory=0, load_weights=True, force_patch_weights=False):
         with self.use_ejected():
@@ -733,6 +795,7 @@ class ModelPatcher:
             if device_to is not None:
                 self.model.to(device_to)
                 self.model.device = device_to
+                comfy.weight_dedup.share_weights(self.model)
             self.model.model_loaded_weight_memory = 0
 
             for m in self.model.modules():
@@ -38,6 +38,16 @@ def cast_bias_weight(s, input=None, dtype=None, device=None, bias_dtype=None):
         if device is None:
             device = input.device
 
+    prefetcher = comfy.model_management.get_weight_prefetcher(device)
+    if prefetcher is not None and s.weight.device != device:
+        weight, bias = prefetcher.get(s, dtype, bias_dtype)
+        if bias is not None:
+            for f in s.bias_function:
+                bias = f(bias)
+        for f in s.weight_function:
+            weight = f(weight)
+        return weight, bias
+
     offload_stream = comfy.model_management.get_offload_stream(device)
     if offload_stream is not None:
         wf_context = offload_stream
@@ -385,7 +395,7 @@ def scaled_fp8_ops(fp8_matrix_mult=False, scale_input=False, override_dtype=None
 
             def set_weight(self, weight, inplace_update=False, seed=None, **kwargs):
                 weight = comfy.float.stochastic_rounding(weight / self.scale_weight.to(device=weight.device, dtype=weight.dtype), self.weight.dtype, seed=seed)
-                if inplace_update:
+                if inplace_update and not getattr(self.weight, "comfy_shared_weight", False):
                     self.weight.data.copy_(weight)
                 else:
                     self.weight = torch.nn.Parameter(weight, requires_grad=False)
@@ -0,0 +1,195 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+import safetensors.torch
+
+import comfy.utils
+import comfy.weight_adapter
+
+# Bump this when the way patched weights are calculated changes.
+PATCHED_WEIGHT_CACHE_VERSION = 1
+EXTENSION = ".safetensors"
+
+
+def set_weights_id(model, paths):
+    """
+    Marks the base weights of model as loaded from the file (or list of files) at paths, so their patched
+    weights can be cached on disk and model management knows which files the model comes from.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    model.weights_paths = [os.path.abspath(p) for p in paths]
+    ids = []
+    for path in model.weights_paths:
+        st = os.stat(path)
+        ids.append("{}:{}:{}".format(path, st.st_size, st.st_mtime_ns))
+    model.weights_id = "file:" + "|".join(ids)
+
+
+def get_weights_id(model):
+    weights_id = getattr(model, "weights_id", None)
+    if weights_id is None:
+        weights_id = model.weights_id = "mem:{}".format(uuid.uuid4().hex)
+    return weights_id
+
+
+def tensor_digest(t):
+    # Patches are loaded once and then shared by every model that uses them, so hash each tensor only once
+    digest = getattr(t, "comfy_digest", None)
+    if digest is None:
+        data = t.detach().to("cpu").contiguous().reshape(-1).view(torch.uint8).numpy()
+        digest = "{}:{}:{}".format(t.dtype, tuple(t.shape), hashlib.sha256(data).hexdigest())
+        t.comfy_digest = digest
+    return digest
+
+
+def _hash_patch(h, v):
+    if v is None or isinstance(v, (bool, int, float, str)):
+        h.update(repr(v).encode())
+    elif isinstance(v, torch.Tensor):
+        h.update(tensor_digest(v).encode())
+    elif isinstance(v, (list, tuple)):
+        h.update("[{}".format(len(v)).encode())
+        return all(_hash_patch(h, x) for x in v)
+    elif isinstance(v, dict):
+        h.update("{{{}".format(len(v)).encode())
+        return all(_hash_patch(h, k) and _hash_patch(h, x) for k, x in sorted(v.items()))
+    elif isinstance(v, comfy.weight_adapter.WeightAdapterBase):
+        h.update(type(v).__name__.encode())
+        return _hash_patch(h, v.weights)
+    else:
+        # Functions and other objects can't be compared between loads
+        return False
+    return True
+
+
+def patched_weight_key(model, key, weight, patches, convert):
+    """
+    Returns (digest, persistent) identifying the weight key of model after patches are applied to it, or None
+    if the patches can't be identified. persistent is False if the base weights weren't loaded from a file.
+    """
+    weights_id = get_weights_id(model)
+    h = hashlib.sha256()
+    h.update(repr((PATCHED_WEIGHT_CACHE_VERSION, weights_id, type(model).__name__, key, tuple(weight.shape), str(weight.dtype), convert)).encode())
+    if not _hash_patch(h, patches):
+        return None
+    return h.hexdigest(), weights_id.startswith("file:")
+
+
+class PatchedWeightCache:
+    """
+    Model weights with their patches (LoRAs, merges...) applied, keyed by the base weights, the patches and their
+    strengths, so loading a model with a combination of patches that was used before copies the weights instead of
+    calculating them again. Kept in RAM up to max_size bytes and optionally in safetensors files on disk up to
+    max_disk_size bytes, least recently used first.
+    """
+    def __init__(self, max_size, directory=None, max_disk_size=0):
+        self.max_size = max_size
+        self.directory = directory
+        self.max_disk_size = max_disk_size
+        self.mutex = threading.RLock()
+        self.entries = OrderedDict()  # digest -> cpu tensor
+        self.size = 0
+        self.disk_entries = OrderedDict()  # digest -> file size
+        self.disk_size = 0
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + EXTENSION)
+
+    def _scan(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(EXTENSION):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-len(EXTENSION)], st.st_size))
+        for _, digest, size in sorted(found):
+            self.disk_entries[digest] = size
+            self.disk_size += size
+        self._evict()
+
+    def _remove_file(self, digest):
+        self.disk_size -= self.disk_entries.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self.size > self.max_size and len(self.entries) > 0:
+            _, weight = self.entries.popitem(last=False)
+            self.size -= weight.nbytes
+        while self.disk_size > self.max_disk_size and len(self.disk_entries) > 0:
+            self._remove_file(next(iter(self.disk_entries)))
+
+    def _add(self, digest, weight):
+        self.entries[digest] = weight
+        self.size += weight.nbytes
+        self._evict()
+
+    def __contains__(self, cache_key):
+        digest, persistent = cache_key
+        with self.mutex:
+            return digest in self.entries or (persistent and digest in self.disk_entries)
+
+    def get(self, cache_key, device):
+        """Returns a copy of the cached weight on device, or None."""
+        digest, persistent = cache_key
+        with self.mutex:
+            weight = self.entries.get(digest, None)
+            if weight is not None:
+                self.entries.move_to_end(digest)
+            elif persistent and digest in self.disk_entries:
+                self.disk_entries.move_to_end(digest)
+                path = self._path(digest)
+                try:
+                    weight = comfy.utils.load_torch_file(path)["weight"]
+                    os.utime(path)
+                except Exception as e:
+                    logging.warning("Could not read patched weight cache entry {}: {}".format(path, e))
+                    self._remove_file(digest)
+                    return None
+                self._add(digest, weight)
+        if weight is None:
+            return None
+        return weight.to(device, copy=True)
+
+    def put(self, cache_key, weight):
+        digest, persistent = cache_key
+        if weight.nbytes > self.max_size and not (persistent and self.directory is not None):
+            return
+        weight = weight.to("cpu", copy=True)
+        with self.mutex:
+            if digest not in self.entries:
+                self._add(digest, weight)
+            if persistent and self.directory is not None and digest not in self.disk_entries:
+                path = self._path(digest)
+                temp_path = path + ".tmp"
+                try:
+                    safetensors.torch.save_file({"weight": weight}, temp_path)
+                    os.replace(temp_path, path)
+                except Exception as e:
+                    logging.warning("Could not write patched weight cache entry {}: {}".format(path, e))
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                    return
+                self.disk_entries[digest] = os.path.getsize(path)
+                self.disk_size += self.disk_entries[digest]
+                self._evict()
+
+
+# Set up by main.py from --cache-patched-weights, None when disabled.
+cache = None
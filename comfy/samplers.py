@@ -16,8 +16,11 @@ import comfy.sampler_helpers
 import comfy.model_patcher
 import comfy.patcher_extension
 import comfy.hooks
-import scipy.stats
+import comfy.lazy_import
 import numpy
+import scipy
+
+comfy.lazy_import.lazy_import("scipy.stats")
 
 
 def add_area_dims(area, num_dims):
@@ -25,19 +28,24 @@ def add_area_dims(area, num_dims):
         area = [2147483648] + area[:len(area) // 2] + [0] + area[len(area) // 2:]
     return area
 
-def get_area_and_mult(conds, x_in, timestep_in):
-    dims = tuple(x_in.shape[2:])
-    area = None
-    strength = 1.0
-
+def timestep_in_range(conds, timestep_in):
     if 'timestep_start' in conds:
         timestep_start = conds['timestep_start']
         if timestep_in[0] > timestep_start:
-            return None
+            return False
     if 'timestep_end' in conds:
         timestep_end = conds['timestep_end']
         if timestep_in[0] < timestep_end:
-            return None
+            return False
+    return True
+
+def get_area_and_mult(conds, x_in, timestep_in):
+    dims = tuple(x_in.shape[2:])
+    area = None
+    strength = 1.0
+
+    if not timestep_in_range(conds, timestep_in):
+        return None
     if 'area' in conds:
         area = list(conds['area'])
         area = add_area_dims(area, len(dims))
@@ -205,18 +213,21 @@ def calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Ten
     )
     return executor.execute(model, conds, x_in, timestep, model_options)
 
-def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Tensor, timestep, model_options):
-    out_conds = []
-    out_counts = []
+cond_batch = collections.namedtuple('cond_batch', ['hooks', 'area', 'mult', 'conditioning', 'cond_or_uncond', 'uuids', 'control', 'patches', 'memory_required'])
+
+def plan_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Tensor, timestep, model_options, free_memory):
+    """
+    Works out how _calc_cond_batch runs conds on x_in: the area and mult of each cond that is active at timestep and which
+    of them are batched together (as many as are estimated to fit in free_memory), with the conditioning of each batch
+    concatenated. Returns a list of cond_batch. Nothing in it depends on the values of x_in or on timestep other than
+    through which conds are active, which is what lets CondPlanCache reuse it for the next steps.
+    """
     # separate conds by matching hooks
     hooked_to_run: dict[comfy.hooks.HookGroup,list[tuple[tuple,int]]] = {}
     default_conds = []
     has_default_conds = False
 
     for i in range(len(conds)):
-        out_conds.append(torch.zeros_like(x_in))
-        out_counts.append(torch.ones_like(x_in) * 1e-37)
-
         cond = conds[i]
         default_c = []
         if cond is not None:
@@ -228,8 +239,6 @@ def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Te
                 p = get_area_and_mult(x, x_in, timestep)
                 if p is None:
                     continue
-                if p.hooks is not None:
-                    model.current_patcher.prepare_hook_patches_current_keyframe(timestep, p.hooks, model_options)
                 hooked_to_run.setdefault(p.hooks, list())
                 hooked_to_run[p.hooks] += [(p, i)]
         default_conds.append(default_c)
@@ -237,9 +246,7 @@ def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Te
     if has_default_conds:
         finalize_default_conds(model, hooked_to_run, default_conds, x_in, timestep, model_options)
 
-    model.current_patcher.prepare_state(timestep)
-
-    # run every hooked_to_run separately
+    batches = []
     for hooks, to_run in hooked_to_run.items():
         while len(to_run) > 0:
             first = to_run[0]
@@ -251,22 +258,22 @@ def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Te
 
             to_batch_temp.reverse()
             to_batch = to_batch_temp[:1]
+            memory_required = 0
 
-            free_memory = model_management.get_free_memory(x_in.device)
             for i in range(1, len(to_batch_temp) + 1):
                 batch_amount = to_batch_temp[:len(to_batch_temp)//i]
                 input_shape = [len(batch_amount) * first_shape[0]] + list(first_shape)[1:]
                 cond_shapes = collections.defaultdict(list)
                 for tt in batch_amount:
-                    cond = {k: v.size() for k, v in to_run[tt][0].conditioning.items()}
                     for k, v in to_run[tt][0].conditioning.items():
                         cond_shapes[k].append(v.size())
 
-                if model.memory_required(input_shape, cond_shapes=cond_shapes) * 1.5 < free_memory:
+                required = model.memory_required(input_shape, cond_shapes=cond_shapes) * 1.5
+                if required < free_memory:
                     to_batch = batch_amount
+                    memory_required = required
                     break
 
-            input_x = []
             mult = []
             c = []
             cond_or_uncond = []
@@ -277,7 +284,6 @@ def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Te
             for x in to_batch:
                 o = to_run.pop(x)
                 p = o[0]
-                input_x.append(p.input_x)
                 mult.append(p.mult)
                 c.append(p.conditioning)
                 area.append(p.area)
@@ -286,59 +292,134 @@ def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Te
                 control = p.control
                 patches = p.patches
 
-            batch_chunks = len(cond_or_uncond)
-            input_x = torch.cat(input_x)
-            c = cond_cat(c)
-            timestep_ = torch.cat([timestep] * batch_chunks)
-
-            transformer_options = model.current_patcher.apply_hooks(hooks=hooks)
-            if 'transformer_options' in model_options:
-                transformer_options = comfy.patcher_extension.merge_nested_dicts(transformer_options,
-                                                                                 model_options['transformer_options'],
-                                                                                 copy_dict1=False)
-
-            if patches is not None:
-                # TODO: replace with merge_nested_dicts function
-                if "patches" in transformer_options:
-                    cur_patches = transformer_options["patches"].copy()
-                    for p in patches:
-                        if p in cur_patches:
-                            cur_patches[p] = cur_patches[p] + patches[p]
-                        else:
-                            cur_patches[p] = patches[p]
-                    transformer_options["patches"] = cur_patches
-                else:
-                    transformer_options["patches"] = patches
+            batches.append(cond_batch(hooks, area, mult, cond_cat(c), cond_or_uncond, uuids, control, patches, memory_required))
+    return batches
+
+class CondPlanCache:
+    """
+    The plans (see plan_cond_batch) _calc_cond_batch made during one sampling run, reused on the following steps as long
+    as the same conds are active, x has the same shape and the memory the batches were sized for is still free, so the
+    masks, areas, concatenated conditioning and batch sizes aren't worked out again on every step. CFGGuider puts one in
+    model_options["cond_plan_cache"] unless model_options["disable_cond_plan_cache"] is set, which is needed by code that
+    changes the conds during sampling.
+    """
+    MAX_PLANS = 16
+
+    def __init__(self):
+        self.plans = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model: 'BaseModel', conds: list[list[dict]], x_in: torch.Tensor, timestep, model_options):
+        free_memory = model_management.get_free_memory(x_in.device)
+        active = tuple(None if c is None else tuple(timestep_in_range(x, timestep) for x in c) for c in conds)
+        key = (tuple(id(c) for c in conds), active, tuple(x_in.shape), x_in.dtype, x_in.device)
+        entry = self.plans.get(key, None)
+        if entry is not None:
+            plan_model, plan_conds, batches = entry
+            # The plan keeps the conds it was made for so their ids can't be reused by other lists
+            if plan_model is model and all(a is b for a, b in zip(plan_conds, conds)) and all(b.memory_required < free_memory for b in batches):
+                self.hits += 1
+                return batches
+
+        self.misses += 1
+        batches = plan_cond_batch(model, conds, x_in, timestep, model_options, free_memory)
+        self.plans.pop(key, None)
+        while len(self.plans) >= self.MAX_PLANS:
+            self.plans.pop(next(iter(self.plans)))
+        self.plans[key] = (model, list(conds), batches)
+        return batches
+
+def _calc_cond_batch(model: 'BaseModel', conds: list[list[dict]], x_in: torch.Tensor, timestep, model_options):
+    out_conds = []
+    out_counts = []
+    for i in range(len(conds)):
+        out_conds.append(torch.zeros_like(x_in))
+        out_counts.append(torch.ones_like(x_in) * 1e-37)
+
+    plan_cache = model_options.get("cond_plan_cache", None)
+    if plan_cache is not None:
+        batches = plan_cache.get(model, conds, x_in, timestep, model_options)
+    else:
+        batches = plan_cond_batch(model, conds, x_in, timestep, model_options, model_management.get_free_memory(x_in.device))
+
+    for hooks in dict.fromkeys(b.hooks for b in batches):
+        if hooks is not None:
+            model.current_patcher.prepare_hook_patches_current_keyframe(timestep, hooks, model_options)
 
-            transformer_options["cond_or_uncond"] = cond_or_uncond[:]
-            transformer_options["uuids"] = uuids[:]
-            transformer_options["sigmas"] = timestep
+    model.current_patcher.prepare_state(timestep)
 
-            c['transformer_options'] = transformer_options
+    # run every batch, the conds of each one have the same hooks
+    for batch in batches:
+        hooks = batch.hooks
+        area = batch.area
+        mult = batch.mult
+        cond_or_uncond = batch.cond_or_uncond
+        control = batch.control
+        patches = batch.patches
+
+        input_x = []
+        for a in area:
+            x = x_in
+            if a is not None:
+                dims = len(a) // 2
+                for i in range(dims):
+                    x = x.narrow(i + 2, a[i + dims], a[i])
+            input_x.append(x)
+
+        batch_chunks = len(cond_or_uncond)
+        input_x = torch.cat(input_x)
+        c = batch.conditioning.copy()
+        timestep_ = torch.cat([timestep] * batch_chunks)
+
+        transformer_options = model.current_patcher.apply_hooks(hooks=hooks)
+        if 'transformer_options' in model_options:
+            transformer_options = comfy.patcher_extension.merge_nested_dicts(transformer_options,
+                                                                             model_options['transformer_options'],
+                                                                             copy_dict1=False)
+
+        if patches is not None:
+            # TODO: replace with merge_nested_dicts function
+            if "patches" in transformer_options:
+                cur_patches = transformer_options["patches"].copy()
+                for p in patches:
+                    if p in cur_patches:
+                        cur_patches[p] = cur_patches[p] + patches[p]
+                    else:
+                        cur_patches[p] = patches[p]
+                transformer_options["patches"] = cur_patches
+            else:
+                transformer_options["patches"] = patches
 
-            if control is not None:
-                c['control'] = control.get_control(input_x, timestep_, c, len(cond_or_uncond), transformer_options)
+        transformer_options["cond_or_uncond"] = cond_or_uncond[:]
+        transformer_options["uuids"] = batch.uuids[:]
+        transformer_options["sigmas"] = timestep
 
-            if 'model_function_wrapper' in model_options:
-                output = model_options['model_function_wrapper'](model.apply_model, {"input": input_x, "timestep": timestep_, "c": c, "cond_or_uncond": cond_or_uncond}).chunk(batch_chunks)
+        c['transformer_options'] = transformer_options
+
+        if control is not None:
+            c['control'] = control.get_control(input_x, timestep_, c, len(cond_or_uncond), transformer_options)
+
+        if 'model_function_wrapper' in model_options:
+            output = model_options['model_function_wrapper'](model.apply_model, {"input": input_x, "timestep": timestep_, "c": c, "cond_or_uncond": cond_or_uncond[:]}).chunk(batch_chunks)
+        else:
+            output = model.apply_model(input_x, timestep_, **c).chunk(batch_chunks)
+
+        for o in range(batch_chunks):
+            cond_index = cond_or_uncond[o]
+            a = area[o]
+            if a is None:
+                out_conds[cond_index] += output[o] * mult[o]
+                out_counts[cond_index] += mult[o]
             else:
-                output = model.apply_model(input_x, timestep_, **c).chunk(batch_chunks)
-
-            for o in range(batch_chunks):
-                cond_index = cond_or_uncond[o]
-                a = area[o]
-                if a is None:
-                    out_conds[cond_index] += output[o] * mult[o]
-                    out_counts[cond_index] += mult[o]
-                else:
-                    out_c = out_conds[cond_index]
-                    out_cts = out_counts[cond_index]
-                    dims = len(a) // 2
-                    for i in range(dims):
-                        out_c = out_c.narrow(i + 2, a[i + dims], a[i])
-                        out_cts = out_cts.narrow(i + 2, a[i + dims], a[i])
-                    out_c += output[o] * mult[o]
-                    out_cts += mult[o]
+                out_c = out_conds[cond_index]
+                out_cts = out_counts[cond_index]
+                dims = len(a) // 2
+                for i in range(dims):
+                    out_c = out_c.narrow(i + 2, a[i + dims], a[i])
+                    out_cts = out_cts.narrow(i + 2, a[i + dims], a[i])
+                out_c += output[o] * mult[o]
+                out_cts += mult[o]
 
     for i in range(len(out_conds)):
         out_conds[i] /= out_counts[i]
@@ -955,6 +1036,8 @@ class CFGGuider:
 
         extra_model_options = comfy.model_patcher.create_model_options_clone(self.model_options)
         extra_model_options.setdefault("transformer_options", {})["sample_sigmas"] = sigmas
+        if not extra_model_options.get("disable_cond_plan_cache", False):
+            extra_model_options["cond_plan_cache"] = CondPlanCache()
         extra_args = {"model_options": extra_model_options, "seed": seed}
 
         executor = comfy.patcher_extension.WrapperExecutor.new_class_executor(
@@ -7,15 +7,17 @@ import logging
 from comfy import model_management
 from comfy.utils import ProgressBar
 from .ldm.models.autoencoder import AutoencoderKL, AutoencodingEngine
-from .ldm.cascade.stage_a import StageA
-from .ldm.cascade.stage_c_coder import StageC_coder
-from .ldm.audio.autoencoder import AudioOobleckVAE
-import comfy.ldm.genmo.vae.model
-import comfy.ldm.lightricks.vae.causal_video_autoencoder
-import comfy.ldm.cosmos.vae
-import comfy.ldm.wan.vae
-import comfy.ldm.hunyuan3d.vae
-import comfy.ldm.ace.vae.music_dcae_pipeline
+import comfy.lazy_import
+# The VAEs and text encoders of the other architectures are imported when a model that uses them is loaded
+comfy.lazy_import.lazy_import("comfy.ldm.cascade.stage_a")
+comfy.lazy_import.lazy_import("comfy.ldm.cascade.stage_c_coder")
+comfy.lazy_import.lazy_import("comfy.ldm.audio.autoencoder")
+comfy.lazy_import.lazy_import("comfy.ldm.genmo.vae.model")
+comfy.lazy_import.lazy_import("comfy.ldm.lightricks.vae.causal_video_autoencoder")
+comfy.lazy_import.lazy_import("comfy.ldm.cosmos.vae")
+comfy.lazy_import.lazy_import("comfy.ldm.wan.vae")
+comfy.lazy_import.lazy_import("comfy.ldm.hunyuan3d.vae")
+comfy.lazy_import.lazy_import("comfy.ldm.ace.vae.music_dcae_pipeline")
 import yaml
 import math
 
@@ -28,22 +30,22 @@ from . import model_detection
 
 from . import sd1_clip
 from . import sdxl_clip
-import comfy.text_encoders.sd2_clip
-import comfy.text_encoders.sd3_clip
-import comfy.text_encoders.sa_t5
-import comfy.text_encoders.aura_t5
-import comfy.text_encoders.pixart_t5
-import comfy.text_encoders.hydit
-import comfy.text_encoders.flux
-import comfy.text_encoders.long_clipl
-import comfy.text_encoders.genmo
-import comfy.text_encoders.lt
-import comfy.text_encoders.hunyuan_video
-import comfy.text_encoders.cosmos
-import comfy.text_encoders.lumina2
-import comfy.text_encoders.wan
-import comfy.text_encoders.hidream
-import comfy.text_encoders.ace
+comfy.lazy_import.lazy_import("comfy.text_encoders.sd2_clip")
+comfy.lazy_import.lazy_import("comfy.text_encoders.sd3_clip")
+comfy.lazy_import.lazy_import("comfy.text_encoders.sa_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.aura_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.pixart_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.hydit")
+comfy.lazy_import.lazy_import("comfy.text_encoders.flux")
+comfy.lazy_import.lazy_import("comfy.text_encoders.long_clipl")
+comfy.lazy_import.lazy_import("comfy.text_encoders.genmo")
+comfy.lazy_import.lazy_import("comfy.text_encoders.lt")
+comfy.lazy_import.lazy_import("comfy.text_encoders.hunyuan_video")
+comfy.lazy_import.lazy_import("comfy.text_encoders.cosmos")
+comfy.lazy_import.lazy_import("comfy.text_encoders.lumina2")
+comfy.lazy_import.lazy_import("comfy.text_encoders.wan")
+comfy.lazy_import.lazy_import("comfy.text_encoders.hidream")
+comfy.lazy_import.lazy_import("comfy.text_encoders.ace")
 
 import comfy.model_patcher
 import comfy.lora
@@ -51,6 +53,10 @@ import comfy.lora_convert
 import comfy.hooks
 import comfy.t2i_adapter.adapter
 import comfy.taesd.taesd
+import comfy.model_index
+import comfy.patched_weight_cache
+import comfy.weight_dedup
+import comfy.vae_memory
 
 import comfy.ldm.flux.redux
 
@@ -297,7 +303,7 @@ class VAE:
                 self.latent_channels = sd["taesd_decoder.1.weight"].shape[1]
                 self.first_stage_model = comfy.taesd.taesd.TAESD(latent_channels=self.latent_channels)
             elif "vquantizer.codebook.weight" in sd: #VQGan: stage a of stable cascade
-                self.first_stage_model = StageA()
+                self.first_stage_model = comfy.ldm.cascade.stage_a.StageA()
                 self.downscale_ratio = 4
                 self.upscale_ratio = 4
                 #TODO
@@ -306,7 +312,7 @@ class VAE:
                 self.process_input = lambda image: image
                 self.process_output = lambda image: image
             elif "backbone.1.0.block.0.1.num_batches_tracked" in sd: #effnet: encoder for stage c latent of stable cascade
-                self.first_stage_model = StageC_coder()
+                self.first_stage_model = comfy.ldm.cascade.stage_c_coder.StageC_coder()
                 self.downscale_ratio = 32
                 self.latent_channels = 16
                 new_sd = {}
@@ -314,14 +320,14 @@ class VAE:
                     new_sd["encoder.{}".format(k)] = sd[k]
                 sd = new_sd
             elif "blocks.11.num_batches_tracked" in sd: #previewer: decoder for stage c latent of stable cascade
-                self.first_stage_model = StageC_coder()
+                self.first_stage_model = comfy.ldm.cascade.stage_c_coder.StageC_coder()
                 self.latent_channels = 16
                 new_sd = {}
                 for k in sd:
                     new_sd["previewer.{}".format(k)] = sd[k]
                 sd = new_sd
             elif "encoder.backbone.1.0.block.0.1.num_batches_tracked" in sd: #combined effnet and previewer for stable cascade
-                self.first_stage_model = StageC_coder()
+                self.first_stage_model = comfy.ldm.cascade.stage_c_coder.StageC_coder()
                 self.downscale_ratio = 32
                 self.latent_channels = 16
             elif "decoder.conv_in.weight" in sd:
@@ -341,7 +347,7 @@ class VAE:
                                                                 encoder_config={'target': "comfy.ldm.modules.diffusionmodules.model.Encoder", 'params': ddconfig},
                                                                 decoder_config={'target': "comfy.ldm.modules.diffusionmodules.model.Decoder", 'params': ddconfig})
             elif "decoder.layers.1.layers.0.beta" in sd:
-                self.first_stage_model = AudioOobleckVAE()
+                self.first_stage_model = comfy.ldm.audio.autoencoder.AudioOobleckVAE()
                 self.memory_used_encode = lambda shape, dtype: (1000 * shape[2]) * model_management.dtype_size(dtype)
                 self.memory_used_decode = lambda shape, dtype: (1000 * shape[2] * 2048) * model_management.dtype_size(dtype)
                 self.latent_channels = 64
@@ -465,6 +471,7 @@ class VAE:
         m, u = self.first_stage_model.load_state_dict(sd, strict=False)
         if len(m) > 0:
             logging.warning("Missing VAE keys {}".format(m))
+        self.memory_architecture = comfy.vae_memory.architecture_key(self.first_stage_model)
 
         if len(u) > 0:
             logging.debug("Leftover VAE keys {}".format(u))
@@ -497,6 +504,47 @@ class VAE:
                 pixels = pixels.narrow(d + 1, x_offset, x)
         return pixels
 
+    def memory_estimate(self, mode, shape):
+        """
+        Memory in bytes encoding or decoding (mode is "encode" or "decode") one item of a batch of shape needs. Predicted
+        from the peaks measured with this VAE architecture when comfy.vae_memory has any, the static estimate otherwise.
+        """
+        shape = (1,) + tuple(shape[1:])
+        if comfy.vae_memory.model is not None:
+            predicted = comfy.vae_memory.model.predict(self.memory_architecture, mode, self.vae_dtype, shape)
+            if predicted is not None:
+                return predicted
+        memory_used = self.memory_used_decode if mode == "decode" else self.memory_used_encode
+        return memory_used(shape, self.vae_dtype)
+
+    def batch_size(self, mode, shape, free_memory):
+        """How many of the items of a batch of shape to encode or decode at once, 0 when not even one is predicted to fit."""
+        if comfy.vae_memory.model is not None:
+            batch_size = comfy.vae_memory.model.batch_size(self.memory_architecture, mode, self.vae_dtype, shape, free_memory)
+            if batch_size is not None:
+                return batch_size
+        return max(1, int(free_memory / max(1, self.memory_estimate(mode, shape))))
+
+    def tile_size(self, mode, shape, tile, minimum):
+        """The biggest tile size up to tile (down to minimum) for the last two dims of shape that is predicted to fit."""
+        if comfy.vae_memory.model is None:
+            return tile
+        free_memory = model_management.get_free_memory(self.device)
+        while tile > minimum:
+            predicted = comfy.vae_memory.model.predict(self.memory_architecture, mode, self.vae_dtype, (1,) + tuple(shape[1:-2]) + (tile, tile))
+            if predicted is None or predicted <= free_memory:
+                break
+            tile = max(minimum, tile * 3 // 4)
+        return tile
+
+    def tile_batch_size(self, memory_used):
+        """How many tiles that each need memory_used to be processed fit in free memory at once."""
+        # On CPU a single tile already uses all the cores, bigger batches are only slower
+        if model_management.is_device_cpu(self.device):
+            return 1
+        free_memory = model_management.get_free_memory(self.device)
+        return max(1, int(free_memory / max(1, memory_used)))
+
     def decode_tiled_(self, samples, tile_x=64, tile_y=64, overlap = 16):
         steps = samples.shape[0] * comfy.utils.get_tiled_scale_steps(samples.shape[3], samples.shape[2], tile_x, tile_y, overlap)
         steps += samples.shape[0] * comfy.utils.get_tiled_scale_steps(samples.shape[3], samples.shape[2], tile_x // 2, tile_y * 2, overlap)
@@ -504,10 +552,11 @@ class VAE:
         pbar = comfy.utils.ProgressBar(steps)
 
         decode_fn = lambda a: self.first_stage_model.decode(a.to(self.vae_dtype).to(self.device)).float()
+        tile_batch = lambda tx, ty: self.tile_batch_size(self.memory_estimate("decode", (1, samples.shape[1], ty, tx)))
         output = self.process_output(
-            (comfy.utils.tiled_scale(samples, decode_fn, tile_x // 2, tile_y * 2, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar) +
-            comfy.utils.tiled_scale(samples, decode_fn, tile_x * 2, tile_y // 2, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar) +
-             comfy.utils.tiled_scale(samples, decode_fn, tile_x, tile_y, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar))
+            (comfy.utils.tiled_scale(samples, decode_fn, tile_x // 2, tile_y * 2, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar, tile_batch=tile_batch(tile_x // 2, tile_y * 2)) +
+            comfy.utils.tiled_scale(samples, decode_fn, tile_x * 2, tile_y // 2, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar, tile_batch=tile_batch(tile_x * 2, tile_y // 2)) +
+             comfy.utils.tiled_scale(samples, decode_fn, tile_x, tile_y, overlap, upscale_amount = self.upscale_ratio, output_device=self.output_device, pbar = pbar, tile_batch=tile_batch(tile_x, tile_y)))
             / 3.0)
         return output
 
@@ -523,7 +572,8 @@ class VAE:
 
     def decode_tiled_3d(self, samples, tile_t=999, tile_x=32, tile_y=32, overlap=(1, 8, 8)):
         decode_fn = lambda a: self.first_stage_model.decode(a.to(self.vae_dtype).to(self.device)).float()
-        return self.process_output(comfy.utils.tiled_scale_multidim(samples, decode_fn, tile=(tile_t, tile_x, tile_y), overlap=overlap, upscale_amount=self.upscale_ratio, out_channels=self.output_channels, index_formulas=self.upscale_index_formula, output_device=self.output_device))
+        tile_batch = self.tile_batch_size(self.memory_estimate("decode", (1, samples.shape[1], min(tile_t, samples.shape[2]), tile_x, tile_y)))
+        return self.process_output(comfy.utils.tiled_scale_multidim(samples, decode_fn, tile=(tile_t, tile_x, tile_y), overlap=overlap, upscale_amount=self.upscale_ratio, out_channels=self.output_channels, index_formulas=self.upscale_index_formula, output_device=self.output_device, tile_batch=tile_batch))
 
     def encode_tiled_(self, pixel_samples, tile_x=512, tile_y=512, overlap = 64):
         steps = pixel_samples.shape[0] * comfy.utils.get_tiled_scale_steps(pixel_samples.shape[3], pixel_samples.shape[2], tile_x, tile_y, overlap)
@@ -532,9 +582,10 @@ class VAE:
         pbar = comfy.utils.ProgressBar(steps)
 
         encode_fn = lambda a: self.first_stage_model.encode((self.process_input(a)).to(self.vae_dtype).to(self.device)).float()
-        samples = comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x, tile_y, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar)
-        samples += comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x * 2, tile_y // 2, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar)
-        samples += comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x // 2, tile_y * 2, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar)
+        tile_batch = lambda tx, ty: self.tile_batch_size(self.memory_estimate("encode", (1, pixel_samples.shape[1], ty, tx)))
+        samples = comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x, tile_y, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar, tile_batch=tile_batch(tile_x, tile_y))
+        samples += comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x * 2, tile_y // 2, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar, tile_batch=tile_batch(tile_x * 2, tile_y // 2))
+        samples += comfy.utils.tiled_scale(pixel_samples, encode_fn, tile_x // 2, tile_y * 2, overlap, upscale_amount = (1/self.downscale_ratio), out_channels=self.latent_channels, output_device=self.output_device, pbar=pbar, tile_batch=tile_batch(tile_x // 2, tile_y * 2))
         samples /= 3.0
         return samples
 
@@ -559,42 +610,77 @@ class VAE:
 
     def encode_tiled_3d(self, samples, tile_t=9999, tile_x=512, tile_y=512, overlap=(1, 64, 64)):
         encode_fn = lambda a: self.first_stage_model.encode((self.process_input(a)).to(self.vae_dtype).to(self.device)).float()
-        return comfy.utils.tiled_scale_multidim(samples, encode_fn, tile=(tile_t, tile_x, tile_y), overlap=overlap, upscale_amount=self.downscale_ratio, out_channels=self.latent_channels, downscale=True, index_formulas=self.downscale_index_formula, output_device=self.output_device)
+        tile_batch = self.tile_batch_size(self.memory_estimate("encode", (1, samples.shape[1], min(tile_t, samples.shape[2]), tile_x, tile_y)))
+        return comfy.utils.tiled_scale_multidim(samples, encode_fn, tile=(tile_t, tile_x, tile_y), overlap=overlap, upscale_amount=self.downscale_ratio, out_channels=self.latent_channels, downscale=True, index_formulas=self.downscale_index_formula, output_device=self.output_device, tile_batch=tile_batch)
 
     def decode(self, samples_in, vae_options={}):
         self.throw_exception_if_invalid()
         pixel_samples = None
+        samples = None
         try:
-            memory_used = self.memory_used_decode(samples_in.shape, self.vae_dtype)
+            memory_used = self.memory_estimate("decode", samples_in.shape)
             model_management.load_models_gpu([self.patcher], memory_required=memory_used, force_full_load=self.disable_offload)
             free_memory = model_management.get_free_memory(self.device)
-            batch_number = int(free_memory / memory_used)
-            batch_number = max(1, batch_number)
-
-            for x in range(0, samples_in.shape[0], batch_number):
-                samples = samples_in[x:x+batch_number].to(self.vae_dtype).to(self.device)
-                out = self.process_output(self.first_stage_model.decode(samples, **vae_options).to(self.output_device).float())
-                if pixel_samples is None:
-                    pixel_samples = torch.empty((samples_in.shape[0],) + tuple(out.shape[1:]), device=self.output_device)
-                pixel_samples[x:x+batch_number] = out
+            batch_number = self.batch_size("decode", samples_in.shape, free_memory)
+            if batch_number == 0:
+                logging.info("Using tiled VAE decoding, regular VAE decoding of {} is predicted to need more memory than is free.".format(list(samples_in.shape[1:])))
+            else:
+                for x in range(0, samples_in.shape[0], batch_number):
+                    samples = samples_in[x:x+batch_number].to(self.vae_dtype).to(self.device)
+                    with comfy.vae_memory.measure(self.memory_architecture, "decode", self.vae_dtype, samples.shape, self.device):
+                        out = self.process_output(self.first_stage_model.decode(samples, **vae_options).to(self.output_device).float())
+                    if pixel_samples is None:
+                        pixel_samples = torch.empty((samples_in.shape[0],) + tuple(out.shape[1:]), device=self.output_device)
+                    pixel_samples[x:x+batch_number] = out
         except model_management.OOM_EXCEPTION:
             logging.warning("Warning: Ran out of memory when regular VAE decoding, retrying with tiled VAE decoding.")
+            if samples is not None:
+                comfy.vae_memory.record_oom(self.memory_architecture, "decode", self.vae_dtype, samples.shape, free_memory)
+            pixel_samples = None
+
+        if pixel_samples is None:
             dims = samples_in.ndim - 2
             if dims == 1 or self.extra_1d_channel is not None:
                 pixel_samples = self.decode_tiled_1d(samples_in)
             elif dims == 2:
-                pixel_samples = self.decode_tiled_(samples_in)
+                tile = self.tile_size("decode", samples_in.shape, 64, 16)
+                pixel_samples = self.decode_tiled_(samples_in, tile_x=tile, tile_y=tile, overlap=tile // 4)
             elif dims == 3:
                 tile = 256 // self.spacial_compression_decode()
+                tile = self.tile_size("decode", samples_in.shape, tile, max(4, tile // 4))
                 overlap = tile // 4
                 pixel_samples = self.decode_tiled_3d(samples_in, tile_x=tile, tile_y=tile, overlap=(1, overlap, overlap))
 
         pixel_samples = pixel_samples.to(self.output_device).movedim(1,-1)
         return pixel_samples
 
+    def decode_iter(self, samples_in, batch_size=None, temporal_size=16, temporal_overlap=2):
+        """
+        Decodes samples_in a part at a time and yields the images of each part like decode() would return them (with the
+        frames of videos combined), so they can be saved as they come without having all of them in memory. Video
+        latents are decoded temporal_size latent frames at a time with temporal_overlap frames blended between the
+        parts, other latents batch_size at a time (as many as fit in memory by default).
+        """
+        self.throw_exception_if_invalid()
+        if samples_in.ndim == 5:
+            output_device = self.output_device
+            for b in range(samples_in.shape[0]):
+                decode_fn = lambda a: self.decode(a).movedim(-1, 1)
+                for frames in comfy.utils.tiled_scale_stream(samples_in[b:b+1], decode_fn, tile=temporal_size, overlap=temporal_overlap, upscale_amount=self.upscale_ratio[0], index_formula=self.upscale_index_formula[0], output_device=output_device):
+                    frames = frames.movedim(1, -1)
+                    yield frames.reshape(-1, frames.shape[-3], frames.shape[-2], frames.shape[-1])
+            return
+
+        if batch_size is None:
+            memory_used = self.memory_estimate("decode", samples_in.shape)
+            model_management.load_models_gpu([self.patcher], memory_required=memory_used, force_full_load=self.disable_offload)
+            batch_size = max(1, self.batch_size("decode", samples_in.shape, model_management.get_free_memory(self.device)))
+        for x in range(0, samples_in.shape[0], batch_size):
+            yield self.decode(samples_in[x:x+batch_size])
+
     def decode_tiled(self, samples, tile_x=None, tile_y=None, overlap=None, tile_t=None, overlap_t=None):
         self.throw_exception_if_invalid()
-        memory_used = self.memory_used_decode(samples.shape, self.vae_dtype) #TODO: calculate mem required for tile
+        memory_used = self.memory_estimate("decode", samples.shape) #TODO: calculate mem required for tile
         model_management.load_models_gpu([self.patcher], memory_required=memory_used, force_full_load=self.disable_offload)
         dims = samples.ndim - 2
         args = {}
@@ -627,30 +713,40 @@ class VAE:
         pixel_samples = pixel_samples.movedim(-1, 1)
         if self.latent_dim == 3 and pixel_samples.ndim < 5:
             pixel_samples = pixel_samples.movedim(1, 0).unsqueeze(0)
+        samples = None
+        pixels_in = None
         try:
-            memory_used = self.memory_used_encode(pixel_samples.shape, self.vae_dtype)
+            memory_used = self.memory_estimate("encode", pixel_samples.shape)
             model_management.load_models_gpu([self.patcher], memory_required=memory_used, force_full_load=self.disable_offload)
             free_memory = model_management.get_free_memory(self.device)
-            batch_number = int(free_memory / max(1, memory_used))
-            batch_number = max(1, batch_number)
-            samples = None
-            for x in range(0, pixel_samples.shape[0], batch_number):
-                pixels_in = self.process_input(pixel_samples[x:x + batch_number]).to(self.vae_dtype).to(self.device)
-                out = self.first_stage_model.encode(pixels_in).to(self.output_device).float()
-                if samples is None:
-                    samples = torch.empty((pixel_samples.shape[0],) + tuple(out.shape[1:]), device=self.output_device)
-                samples[x:x + batch_number] = out
+            batch_number = self.batch_size("encode", pixel_samples.shape, free_memory)
+            if batch_number == 0:
+                logging.info("Using tiled VAE encoding, regular VAE encoding of {} is predicted to need more memory than is free.".format(list(pixel_samples.shape[1:])))
+            else:
+                for x in range(0, pixel_samples.shape[0], batch_number):
+                    pixels_in = self.process_input(pixel_samples[x:x + batch_number]).to(self.vae_dtype).to(self.device)
+                    with comfy.vae_memory.measure(self.memory_architecture, "encode", self.vae_dtype, pixels_in.shape, self.device):
+                        out = self.first_stage_model.encode(pixels_in).to(self.output_device).float()
+                    if samples is None:
+                        samples = torch.empty((pixel_samples.shape[0],) + tuple(out.shape[1:]), device=self.output_device)
+                    samples[x:x + batch_number] = out
 
         except model_management.OOM_EXCEPTION:
             logging.warning("Warning: Ran out of memory when regular VAE encoding, retrying with tiled VAE encoding.")
+            if pixels_in is not None:
+                comfy.vae_memory.record_oom(self.memory_architecture, "encode", self.vae_dtype, pixels_in.shape, free_memory)
+            samples = None
+
+        if samples is None:
             if self.latent_dim == 3:
-                tile = 256
+                tile = self.tile_size("encode", pixel_samples.shape, 256, 64)
                 overlap = tile // 4
                 samples = self.encode_tiled_3d(pixel_samples, tile_x=tile, tile_y=tile, overlap=(1, overlap, overlap))
             elif self.latent_dim == 1 or self.extra_1d_channel is not None:
                 samples = self.encode_tiled_1d(pixel_samples)
             else:
-                samples = self.encode_tiled_(pixel_samples)
+                tile = self.tile_size("encode", pixel_samples.shape, 512, 128)
+                samples = self.encode_tiled_(pixel_samples, tile_x=tile, tile_y=tile, overlap=tile // 8)
 
         return samples
 
@@ -662,7 +758,7 @@ class VAE:
         if dims == 3:
             pixel_samples = pixel_samples.movedim(1, 0).unsqueeze(0)
 
-        memory_used = self.memory_used_encode(pixel_samples.shape, self.vae_dtype)  # TODO: calculate mem required for tile
+        memory_used = self.memory_estimate("encode", pixel_samples.shape)  # TODO: calculate mem required for tile
         model_management.load_models_gpu([self.patcher], memory_required=memory_used, force_full_load=self.disable_offload)
 
         args = {}
@@ -760,7 +856,10 @@ def load_clip(ckpt_paths, embedding_directory=None, clip_type=CLIPType.STABLE_DI
     clip_data = []
     for p in ckpt_paths:
         clip_data.append(comfy.utils.load_torch_file(p, safe_load=True))
-    return load_text_encoder_state_dicts(clip_data, embedding_directory=embedding_directory, clip_type=clip_type, model_options=model_options)
+    clip = load_text_encoder_state_dicts(clip_data, embedding_directory=embedding_directory, clip_type=clip_type, model_options=model_options)
+    comfy.patched_weight_cache.set_weights_id(clip.patcher.model, ckpt_paths)
+    comfy.weight_dedup.share_weights(clip.patcher.model)
+    return clip
 
 
 class TEModel(Enum):
@@ -995,27 +1094,80 @@ def load_checkpoint(config_path=None, ckpt_path=None, output_vae=True, output_cl
 
 def load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True, output_clipvision=False, embedding_directory=None, output_model=True, model_options={}, te_model_options={}):
     sd, metadata = comfy.utils.load_torch_file(ckpt_path, return_metadata=True)
-    out = load_state_dict_guess_config(sd, output_vae, output_clip, output_clipvision, embedding_directory, output_model, model_options, te_model_options=te_model_options, metadata=metadata)
+    model_info = comfy.model_index.get(ckpt_path)
+    out = load_state_dict_guess_config(sd, output_vae, output_clip, output_clipvision, embedding_directory, output_model, model_options, te_model_options=te_model_options, metadata=metadata, model_info=model_info)
     if out is None:
         raise RuntimeError("ERROR: Could not detect model type of: {}".format(ckpt_path))
+    comfy.model_index.update(ckpt_path, model_info)
+    if out[0] is not None:
+        comfy.patched_weight_cache.set_weights_id(out[0].model, ckpt_path)
+        comfy.weight_dedup.share_weights(out[0].model)
+    if out[1] is not None:
+        comfy.patched_weight_cache.set_weights_id(out[1].patcher.model, ckpt_path)
+        comfy.weight_dedup.share_weights(out[1].patcher.model)
+    if out[2] is not None and out[2].first_stage_model is not None:
+        comfy.patched_weight_cache.set_weights_id(out[2].patcher.model, ckpt_path)
+        comfy.weight_dedup.share_weights(out[2].patcher.model)
     return out
 
-def load_state_dict_guess_config(sd, output_vae=True, output_clip=True, output_clipvision=False, embedding_directory=None, output_model=True, model_options={}, te_model_options={}, metadata=None):
+def detect_checkpoint(sd, metadata=None, model_info=None):
+    """
+    Returns the diffusion model prefix, parameter count, weight dtype and unet config of checkpoint state dict sd.
+    model_info is an info dict from comfy.model_index that these are taken from when known and added to otherwise.
+    """
+    diffusion_model_prefix = comfy.model_index.cached(model_info, "unet_prefix", lambda: model_detection.unet_prefix_from_state_dict(sd))
+    parameters = comfy.model_index.cached(model_info, "parameters", lambda: comfy.utils.calculate_parameters(sd, diffusion_model_prefix))
+    weight_dtype = comfy.model_index.cached(model_info, "weight_dtype", lambda: comfy.model_index.encode_dtype(comfy.utils.weight_dtype(sd, diffusion_model_prefix)))
+    unet_config = comfy.model_index.cached(model_info, "unet_config", lambda: model_detection.detect_unet_config(sd, diffusion_model_prefix, metadata=metadata))
+    return diffusion_model_prefix, parameters, comfy.model_index.decode_dtype(weight_dtype), unet_config
+
+def describe_model_file(path):
+    """
+    Returns a dict with the model type, parameter count and weight dtype of the safetensors model file at path,
+    detected from its header or taken from the model index. None if the file can't be read that way.
+    """
+    model_info = comfy.model_index.get(path)
+    if model_info is None:
+        model_info = {}
+    if "model_type" not in model_info:
+        out = comfy.model_index.load_header_state_dict(path)
+        if out is None:
+            return None
+        sd, metadata = out
+        prefix, _, _, unet_config = detect_checkpoint(sd, metadata, model_info)
+        if not any(k.startswith(prefix) for k in sd):
+            # Not a checkpoint, detect it the same way load_diffusion_model_state_dict does
+            comfy.model_index.cached(model_info, "diffusion_model_parameters", lambda: comfy.utils.calculate_parameters(sd))
+            comfy.model_index.cached(model_info, "diffusion_model_weight_dtype", lambda: comfy.model_index.encode_dtype(comfy.utils.weight_dtype(sd)))
+            unet_config = comfy.model_index.cached(model_info, "diffusion_model_unet_config", lambda: model_detection.detect_unet_config(sd, ""))
+        model_config = None
+        if unet_config is not None:
+            model_config = model_detection.model_config_from_unet_config(unet_config, sd)
+        model_info["model_type"] = None if model_config is None else model_config.__class__.__name__
+        te_model = detect_te_model(sd)
+        model_info["te_model"] = None if te_model is None else te_model.name
+        comfy.model_index.update(path, model_info)
+    return {
+        "model_type": model_info["model_type"],
+        "te_model": model_info["te_model"],
+        "parameters": model_info.get("diffusion_model_parameters", model_info["parameters"]),
+        "weight_dtype": model_info.get("diffusion_model_weight_dtype", model_info["weight_dtype"]),
+    }
+
+def load_state_dict_guess_config(sd, output_vae=True, output_clip=True, output_clipvision=False, embedding_directory=None, output_model=True, model_options={}, te_model_options={}, metadata=None, model_info=None):
     clip = None
     clipvision = None
     vae = None
     model = None
     model_patcher = None
 
-    diffusion_model_prefix = model_detection.unet_prefix_from_state_dict(sd)
-    parameters = comfy.utils.calculate_parameters(sd, diffusion_model_prefix)
-    weight_dtype = comfy.utils.weight_dtype(sd, diffusion_model_prefix)
+    diffusion_model_prefix, parameters, weight_dtype, unet_config = detect_checkpoint(sd, metadata, model_info)
     load_device = model_management.get_torch_device()
 
-    model_config = model_detection.model_config_from_unet(sd, diffusion_model_prefix, metadata=metadata)
+    model_config = model_detection.model_config_from_unet(sd, diffusion_model_prefix, metadata=metadata, unet_config=unet_config)
     if model_config is None:
         logging.warning("Warning, This is not a checkpoint file, trying to load it as a diffusion model only.")
-        diffusion_model = load_diffusion_model_state_dict(sd, model_options={})
+        diffusion_model = load_diffusion_model_state_dict(sd, model_options={}, model_info=model_info)
         if diffusion_model is None:
             return None
         return (diffusion_model, None, VAE(sd={}), None)  # The VAE object is there to throw an exception if it's actually used'
@@ -1081,20 +1233,21 @@ def load_state_dict_guess_config(sd, output_vae=True, output_clip=True, output_c
     return (model_patcher, clip, vae, clipvision)
 
 
-def load_diffusion_model_state_dict(sd, model_options={}): #load unet in diffusers or regular format
+def load_diffusion_model_state_dict(sd, model_options={}, model_info=None): #load unet in diffusers or regular format
     dtype = model_options.get("dtype", None)
 
     #Allow loading unets from checkpoint files
-    diffusion_model_prefix = model_detection.unet_prefix_from_state_dict(sd)
+    diffusion_model_prefix = comfy.model_index.cached(model_info, "unet_prefix", lambda: model_detection.unet_prefix_from_state_dict(sd))
     temp_sd = comfy.utils.state_dict_prefix_replace(sd, {diffusion_model_prefix: ""}, filter_keys=True)
     if len(temp_sd) > 0:
         sd = temp_sd
 
-    parameters = comfy.utils.calculate_parameters(sd)
-    weight_dtype = comfy.utils.weight_dtype(sd)
+    parameters = comfy.model_index.cached(model_info, "diffusion_model_parameters", lambda: comfy.utils.calculate_parameters(sd))
+    weight_dtype = comfy.model_index.decode_dtype(comfy.model_index.cached(model_info, "diffusion_model_weight_dtype", lambda: comfy.model_index.encode_dtype(comfy.utils.weight_dtype(sd))))
 
     load_device = model_management.get_torch_device()
-    model_config = model_detection.model_config_from_unet(sd, "")
+    unet_config = comfy.model_index.cached(model_info, "diffusion_model_unet_config", lambda: model_detection.detect_unet_config(sd, ""))
+    model_config = model_detection.model_config_from_unet(sd, "", unet_config=unet_config)
 
     if model_config is not None:
         new_sd = sd
@@ -1145,10 +1298,14 @@ def load_diffusion_model_state_dict(sd, model_options={}): #load unet in diffuse
 
 def load_diffusion_model(unet_path, model_options={}):
     sd = comfy.utils.load_torch_file(unet_path)
-    model = load_diffusion_model_state_dict(sd, model_options=model_options)
+    model_info = comfy.model_index.get(unet_path)
+    model = load_diffusion_model_state_dict(sd, model_options=model_options, model_info=model_info)
     if model is None:
         logging.error("ERROR UNSUPPORTED UNET {}".format(unet_path))
         raise RuntimeError("ERROR: Could not detect model type of: {}".format(unet_path))
+    comfy.model_index.update(unet_path, model_info)
+    comfy.patched_weight_cache.set_weights_id(model.model, unet_path)
+    comfy.weight_dedup.share_weights(model.model)
     return model
 
 def load_unet(unet_path, dtype=None):
@@ -4,20 +4,22 @@ from . import utils
 
 from . import sd1_clip
 from . import sdxl_clip
-import comfy.text_encoders.sd2_clip
-import comfy.text_encoders.sd3_clip
-import comfy.text_encoders.sa_t5
-import comfy.text_encoders.aura_t5
-import comfy.text_encoders.pixart_t5
-import comfy.text_encoders.hydit
-import comfy.text_encoders.flux
-import comfy.text_encoders.genmo
-import comfy.text_encoders.lt
-import comfy.text_encoders.hunyuan_video
-import comfy.text_encoders.cosmos
-import comfy.text_encoders.lumina2
-import comfy.text_encoders.wan
-import comfy.text_encoders.ace
+import comfy.lazy_import
+# The text encoders of the other architectures are imported when a model that uses them is loaded
+comfy.lazy_import.lazy_import("comfy.text_encoders.sd2_clip")
+comfy.lazy_import.lazy_import("comfy.text_encoders.sd3_clip")
+comfy.lazy_import.lazy_import("comfy.text_encoders.sa_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.aura_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.pixart_t5")
+comfy.lazy_import.lazy_import("comfy.text_encoders.hydit")
+comfy.lazy_import.lazy_import("comfy.text_encoders.flux")
+comfy.lazy_import.lazy_import("comfy.text_encoders.genmo")
+comfy.lazy_import.lazy_import("comfy.text_encoders.lt")
+comfy.lazy_import.lazy_import("comfy.text_encoders.hunyuan_video")
+comfy.lazy_import.lazy_import("comfy.text_encoders.cosmos")
+comfy.lazy_import.lazy_import("comfy.text_encoders.lumina2")
+comfy.lazy_import.lazy_import("comfy.text_encoders.wan")
+comfy.lazy_import.lazy_import("comfy.text_encoders.ace")
 
 from . import supported_models_base
 from . import latent_formats
@@ -20,17 +20,23 @@
 import torch
 import math
 import struct
+import json
+import mmap
+import os
 import comfy.checkpoint_pickle
+import comfy.weight_dedup
 import safetensors.torch
 import numpy as np
 from PIL import Image
 import logging
 import itertools
+import functools
 from torch.nn.functional import interpolate
 from einops import rearrange
 from comfy.cli_args import args
 
 MMAP_TORCH_FILES = args.mmap_torch_files
+MMAP_SAFETENSORS = not args.disable_safetensors_mmap
 
 ALWAYS_SAFE_LOAD = False
 if hasattr(torch.serialization, "add_safe_globals"):  # TODO: this was added in pytorch 2.4, the unsafe path should be removed once earlier versions are deprecated
@@ -49,18 +55,74 @@ if hasattr(torch.serialization, "add_safe_globals"):  # TODO: this was added in
 else:
     logging.info("Warning, you are using an old pytorch version and some ckpt/pt files might be loaded unsafely. Upgrading to 2.4 or above is recommended.")
 
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+if hasattr(torch, "float8_e4m3fn"):
+    SAFETENSORS_DTYPES["F8_E4M3"] = torch.float8_e4m3fn
+    SAFETENSORS_DTYPES["F8_E5M2"] = torch.float8_e5m2
+
+def load_safetensors_mmap(ckpt):
+    """
+    Loads a safetensors file as a dict of tensors that are views into a private (copy on write) memory
+    map of the file. Nothing is read until a tensor is used and weights that are never used don't take
+    up any RAM. Returns None if the file has dtypes this doesn't handle.
+    """
+    with open(ckpt, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        header_size = struct.unpack("<Q", f.read(8))[0] if file_size >= 8 else 0
+        if header_size == 0 or header_size + 8 > file_size:
+            raise ValueError("HeaderTooLarge")
+        header = json.loads(f.read(header_size))
+        metadata = header.pop("__metadata__", None)
+        if any(v["dtype"] not in SAFETENSORS_DTYPES for v in header.values()):
+            return None
+        data_start = 8 + header_size
+        if max((v["data_offsets"][1] for v in header.values()), default=0) + data_start > file_size:
+            raise ValueError("MetadataIncompleteBuffer")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) if len(header) > 0 else None
+
+    sd = {}
+    for k in sorted(header.keys()):
+        v = header[k]
+        dtype = SAFETENSORS_DTYPES[v["dtype"]]
+        start, end = v["data_offsets"]
+        count = math.prod(v["shape"])
+        if end - start != count * dtype.itemsize:
+            raise ValueError("MetadataIncompleteBuffer")
+        if count == 0:
+            sd[k] = torch.empty(v["shape"], dtype=dtype)
+        else:
+            sd[k] = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + start).view(v["shape"])
+    return sd, metadata
+
 def load_torch_file(ckpt, safe_load=False, device=None, return_metadata=False):
     if device is None:
         device = torch.device("cpu")
     metadata = None
     if ckpt.lower().endswith(".safetensors") or ckpt.lower().endswith(".sft"):
         try:
-            with safetensors.safe_open(ckpt, framework="pt", device=device.type) as f:
-                sd = {}
-                for k in f.keys():
-                    sd[k] = f.get_tensor(k)
-                if return_metadata:
-                    metadata = f.metadata()
+            loaded = None
+            if MMAP_SAFETENSORS and device.type == "cpu":
+                loaded = load_safetensors_mmap(ckpt)
+            if loaded is not None:
+                sd, metadata = loaded
+            else:
+                with safetensors.safe_open(ckpt, framework="pt", device=device.type) as f:
+                    sd = {}
+                    for k in f.keys():
+                        sd[k] = f.get_tensor(k)
+                    if return_metadata:
+                        metadata = f.metadata()
         except Exception as e:
             if len(e.args) > 0:
                 message = e.args[0]
@@ -724,6 +786,10 @@ def copy_to_param(obj, attr, value):
     for name in attrs[:-1]:
         obj = getattr(obj, name)
     prev = getattr(obj, attrs[-1])
+    if comfy.weight_dedup.is_shared(prev):
+        # Shared with other models, give it its own storage first
+        prev.data = torch.empty_like(prev.data)
+        prev.comfy_shared_weight = False
     prev.data.copy_(value)
 
 def get_attr(obj, attr: str):
@@ -872,8 +938,27 @@ def get_tiled_scale_steps(width, height, tile_x, tile_y, overlap):
     cols = 1 if width <= tile_x else math.ceil((width - overlap) / (tile_x - overlap))
     return rows * cols
 
+@functools.lru_cache(maxsize=64)
+def tile_blend_ramp(size, feather):
+    """Weights along one dimension of size of a tile in the blend, ramping up over feather values at both ends. Kept on the CPU."""
+    v = torch.ones(size)
+    ramp = torch.arange(1, feather + 1, dtype=torch.float32) / feather
+    v[:feather] *= ramp
+    v[size - feather:] *= ramp.flip(0)
+    return v
+
+def tile_blend_mask(shape, feather, device):
+    """Weights of a tile of spatial shape in the blend, ramping up over feather[d] values at both ends of dimension d."""
+    mask = torch.ones([1, 1] + list(shape), device=device)
+    for d, (size, f) in enumerate(zip(shape, feather)):
+        if f <= 0 or f >= size:
+            continue
+        mask = mask * tile_blend_ramp(size, f).to(device).view([size] + [1] * (len(shape) - d - 1))
+    return mask
+
 @torch.inference_mode()
-def tiled_scale_multidim(samples, function, tile=(64, 64), overlap=8, upscale_amount=4, out_channels=3, output_device="cpu", downscale=False, index_formulas=None, pbar=None):
+def tiled_scale_multidim(samples, function, tile=(64, 64), overlap=8, upscale_amount=4, out_channels=3, output_device="cpu", downscale=False, index_formulas=None, pbar=None, tile_batch=1):
+    import comfy.model_management  # not at the top, importing it sets up the devices
     dims = len(tile)
 
     if not (isinstance(upscale_amount, (tuple, list))):
@@ -929,62 +1014,125 @@ def tiled_scale_multidim(samples, function, tile=(64, 64), overlap=8, upscale_am
             out.append(round(get_scale(i, a[i])))
         return out
 
-    output = torch.empty([samples.shape[0], out_channels] + mult_list_upscale(samples.shape[2:]), device=output_device)
-
-    for b in range(samples.shape[0]):
-        s = samples[b:b+1]
-
-        # handle entire input fitting in a single tile
-        if all(s.shape[d+2] <= tile[d] for d in range(dims)):
-            output[b:b+1] = function(s).to(output_device)
-            if pbar is not None:
-                pbar.update(1)
-            continue
-
-        out = torch.zeros([s.shape[0], out_channels] + mult_list_upscale(s.shape[2:]), device=output_device)
-        out_div = torch.zeros([s.shape[0], out_channels] + mult_list_upscale(s.shape[2:]), device=output_device)
+    output = torch.zeros([samples.shape[0], out_channels] + mult_list_upscale(samples.shape[2:]), device=output_device)
 
-        positions = [range(0, s.shape[d+2] - overlap[d], tile[d] - overlap[d]) if s.shape[d+2] > tile[d] else [0] for d in range(dims)]
+    feather = tuple(round(get_scale(d, overlap[d])) for d in range(dims))
 
+    # handle entire input fitting in a single tile
+    if all(samples.shape[d+2] <= tile[d] for d in range(dims)):
+        tiles = [(b, (0,) * dims, tuple(samples.shape[2:])) for b in range(samples.shape[0])]
+        feather = (0,) * dims
+    else:
+        positions = [range(0, samples.shape[d+2] - overlap[d], tile[d] - overlap[d]) if samples.shape[d+2] > tile[d] else [0] for d in range(dims)]
+        tiles = []
         for it in itertools.product(*positions):
-            s_in = s
-            upscaled = []
-
+            pos = tuple(max(0, min(samples.shape[d + 2] - overlap[d], it[d])) for d in range(dims))
+            size = tuple(min(tile[d], samples.shape[d + 2] - pos[d]) for d in range(dims))
+            for b in range(samples.shape[0]):
+                tiles.append((b, pos, size))
+
+    # Tiles of the same size are run through function in batches of up to tile_batch
+    groups = {}
+    for t in tiles:
+        groups.setdefault(t[2], []).append(t)
+    tiles = [t for group in groups.values() for t in group]
+
+    out_div = torch.zeros([1, 1] + list(output.shape[2:]), device=output_device)
+    i = 0
+    while i < len(tiles):
+        batch = [t for t in tiles[i:i + tile_batch] if t[2] == tiles[i][2]]
+        s_in = []
+        for b, pos, size in batch:
+            s = samples[b:b+1]
             for d in range(dims):
-                pos = max(0, min(s.shape[d + 2] - overlap[d], it[d]))
-                l = min(tile[d], s.shape[d + 2] - pos)
-                s_in = s_in.narrow(d + 2, pos, l)
-                upscaled.append(round(get_pos(d, pos)))
+                s = s.narrow(d + 2, pos[d], size[d])
+            s_in.append(s)
+        s_in = s_in[0] if len(s_in) == 1 else torch.cat(s_in)
 
+        try:
             ps = function(s_in).to(output_device)
-            mask = torch.ones_like(ps)
-
-            for d in range(2, dims + 2):
-                feather = round(get_scale(d - 2, overlap[d - 2]))
-                if feather >= mask.shape[d]:
-                    continue
-                for t in range(feather):
-                    a = (t + 1) / feather
-                    mask.narrow(d, t, 1).mul_(a)
-                    mask.narrow(d, mask.shape[d] - 1 - t, 1).mul_(a)
-
-            o = out
-            o_d = out_div
-            for d in range(dims):
-                o = o.narrow(d + 2, upscaled[d], mask.shape[d + 2])
-                o_d = o_d.narrow(d + 2, upscaled[d], mask.shape[d + 2])
-
-            o.add_(ps * mask)
-            o_d.add_(mask)
-
-            if pbar is not None:
-                pbar.update(1)
+        except comfy.model_management.OOM_EXCEPTION:
+            if tile_batch <= 1:
+                raise
+            tile_batch = max(1, len(batch) // 2)
+            logging.warning("Ran out of memory when processing a batch of {} tiles, retrying with batches of {}.".format(len(batch), tile_batch))
+            continue
 
-        output[b:b+1] = out/out_div
+        mask = tile_blend_mask(tuple(ps.shape[2:]), feather, ps.device)
+        ps = ps * mask
+        for (b, pos, size), p in zip(batch, ps):
+            upscaled = [round(get_pos(d, pos[d])) for d in range(dims)]
+            o = output[b]
+            o_d = out_div[0]
+            for d in range(dims):
+                o = o.narrow(d + 1, upscaled[d], mask.shape[d + 2])
+                o_d = o_d.narrow(d + 1, upscaled[d], mask.shape[d + 2])
+            o.add_(p)
+            # The weights are the same for every sample of the batch
+            if b == 0:
+                o_d.add_(mask[0])
+
+        if pbar is not None:
+            pbar.update(len(batch))
+        i += len(batch)
+
+    output /= out_div
     return output
 
-def tiled_scale(samples, function, tile_x=64, tile_y=64, overlap = 8, upscale_amount = 4, out_channels = 3, output_device="cpu", pbar = None):
-    return tiled_scale_multidim(samples, function, (tile_y, tile_x), overlap=overlap, upscale_amount=upscale_amount, out_channels=out_channels, output_device=output_device, pbar=pbar)
+def tiled_scale_stream(samples, function, tile=16, overlap=4, upscale_amount=4, index_formula=None, output_device="cpu"):
+    """
+    Like tiled_scale_multidim with tiles along the first dimension after the channels only (the frames of a video), but
+    yields each part of the output once no later tile overlaps it instead of returning all of it at the end, so the
+    memory used doesn't grow with the length of samples. The concatenation of the yielded tensors is the output.
+    """
+    if index_formula is None:
+        index_formula = upscale_amount
+
+    def get_scale(val):
+        return upscale_amount(val) if callable(upscale_amount) else upscale_amount * val
+
+    def get_pos(val):
+        return index_formula(val) if callable(index_formula) else index_formula * val
+
+    length = samples.shape[2]
+    if length <= tile:
+        yield function(samples).to(output_device)
+        return
+
+    positions = [max(0, min(length - overlap, p)) for p in range(0, length - overlap, tile - overlap)]
+    feather = round(get_scale(overlap))
+    out = None
+    out_div = None
+    start = 0  # Position in the output of out[:, :, 0]
+    for i, pos in enumerate(positions):
+        ps = function(samples.narrow(2, pos, min(tile, length - pos))).to(output_device)
+        mask = tile_blend_mask((ps.shape[2],), (feather,), ps.device).view([1, 1, ps.shape[2]] + [1] * (ps.ndim - 3))
+        if out is None:
+            out = torch.zeros(list(ps.shape[:2]) + [0] + list(ps.shape[3:]), device=ps.device)
+            out_div = torch.zeros([1, 1, 0] + [1] * (ps.ndim - 3), device=ps.device)
+
+        o_start = round(get_pos(pos)) - start
+        o_end = o_start + ps.shape[2]
+        if o_end > out.shape[2]:
+            extra = o_end - out.shape[2]
+            out = torch.cat((out, out.new_zeros(list(out.shape[:2]) + [extra] + list(out.shape[3:]))), dim=2)
+            out_div = torch.cat((out_div, out_div.new_zeros([1, 1, extra] + list(out_div.shape[3:]))), dim=2)
+        out[:, :, o_start:o_end] += ps * mask
+        out_div[:, :, o_start:o_end] += mask
+
+        # What is before the start of the next tile won't change anymore
+        if i + 1 < len(positions):
+            done = round(get_pos(positions[i + 1])) - start
+        else:
+            done = out.shape[2]
+        if done > 0:
+            yield out[:, :, :done] / out_div[:, :, :done]
+            out = out[:, :, done:].clone()
+            out_div = out_div[:, :, done:].clone()
+            start += done
+
+def tiled_scale(samples, function, tile_x=64, tile_y=64, overlap = 8, upscale_amount = 4, out_channels = 3, output_device="cpu", pbar = None, tile_batch=1):
+    return tiled_scale_multidim(samples, function, (tile_y, tile_x), overlap=overlap, upscale_amount=upscale_amount, out_channels=out_channels, output_device=output_device, pbar=pbar, tile_batch=tile_batch)
 
 PROGRESS_BAR_ENABLED = True
 def set_progress_bar_enabled(enabled):
@@ -997,11 +1145,13 @@ def set_progress_bar_global_hook(function):
     PROGRESS_BAR_HOOK = function
 
 class ProgressBar:
-    def __init__(self, total):
+    # node_id is the node the progress is shown on, the hook falls back to the one it thinks is running
+    def __init__(self, total, node_id=None):
         global PROGRESS_BAR_HOOK
         self.total = total
         self.current = 0
         self.hook = PROGRESS_BAR_HOOK
+        self.node_id = node_id
 
     def update_absolute(self, value, total=None, preview=None):
         if total is not None:
@@ -1010,7 +1160,7 @@ class ProgressBar:
             value = self.total
         self.current = value
         if self.hook is not None:
-            self.hook(self.current, self.total, preview)
+            self.hook(self.current, self.total, preview, node_id=self.node_id)
 
     def update(self, value):
         self.update_absolute(self.current + value)
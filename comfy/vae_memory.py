@@ -0,0 +1,224 @@
+import os
+import json
+import math
+import logging
+import threading
+import contextlib
+
+import torch
+
+import comfy.model_management
+
+VAE_MEMORY_VERSION = 2
+MAX_SAMPLES = 16  # per architecture, mode and dtype, the most recently measured sizes are kept
+SAFETY_MARGIN = 1.1
+
+
+def architecture_key(model):
+    """Identifies the architecture of a VAE model: its class and parameter count."""
+    return "{}:{}".format(type(model).__name__, sum(p.numel() for p in model.parameters()))
+
+
+def elements(shape):
+    """What the memory use is modeled as linear in: the batch size times the size of the spatial and temporal dims."""
+    return shape[0] * math.prod(shape[2:])
+
+
+def fit(samples):
+    """
+    Least squares fit of peak = a * elements + b to the (elements, peak) samples with a and b >= 0, and the factor
+    the fit has to be multiplied by to not be below any of the samples.
+    """
+    n = len(samples)
+    xs = [s[0] for s in samples]
+    ys = [s[1] for s in samples]
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    a = b = None
+    if var_x > 0:
+        a = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+        b = mean_y - a * mean_x
+    if a is None or a <= 0 or b < 0:
+        # Proportional fit through the origin
+        a = sum(x * y for x, y in zip(xs, ys)) / max(1, sum(x * x for x in xs))
+        b = 0.0
+    if a <= 0:
+        return None
+    under = max(y / (a * x + b) for x, y in zip(xs, ys))
+    return {"a": a, "b": b, "margin": max(1.0, under) * SAFETY_MARGIN}
+
+
+class VAEMemoryModel:
+    """
+    Peak memory each VAE architecture used to encode and decode in each dtype, measured the first time each size is
+    run on a device that keeps peak memory stats (CUDA, ROCm, XPU), with a linear fit in the number of latent or pixel
+    elements that predicts how much memory a batch or tile will need. The VAE picks its batch size and whether (and
+    with which tile size) it has to use tiled encoding or decoding from the predictions instead of finding out by
+    running out of memory. Running out of memory anyway records what was free at the time, so the next prediction is
+    at least that. Kept in a JSON file at path when it isn't None, written by save().
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.dirty = False
+        self.entries = {}  # "architecture|mode|dtype" -> {"samples": [[elements, peak bytes], ...], "fit": fit()}
+        if path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning("Could not read the VAE memory model {}: {}".format(self.path, e))
+            return
+        if data.get("version") != VAE_MEMORY_VERSION:
+            return
+        self.entries = data.get("entries", {})
+
+    def save(self):
+        """Writes the model to path if anything was recorded since it was last written."""
+        if self.path is None:
+            return
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                data = json.dumps({"version": VAE_MEMORY_VERSION, "entries": self.entries})
+                self.dirty = False
+            temp_path = "{}.{}.tmp".format(self.path, os.getpid())
+            try:
+                with open(temp_path, "w") as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logging.warning("Could not write the VAE memory model {}: {}".format(self.path, e))
+                with self.lock:
+                    self.dirty = True
+
+    def key(self, architecture, mode, dtype):
+        return "{}|{}|{}".format(architecture, mode, str(dtype).replace("torch.", ""))
+
+    def measured(self, architecture, mode, dtype, shape):
+        with self.lock:
+            entry = self.entries.get(self.key(architecture, mode, dtype))
+            return entry is not None and any(s[0] == elements(shape) for s in entry["samples"])
+
+    def record(self, architecture, mode, dtype, shape, peak, lower_bound=False):
+        """
+        Adds the peak memory in bytes encoding or decoding a batch of shape used. With lower_bound the peak is only
+        known to be at least that much (what was free when it ran out of memory) and only raises the prediction.
+        """
+        x = elements(shape)
+        key = self.key(architecture, mode, dtype)
+        with self.lock:
+            entry = self.entries.setdefault(key, {"samples": [], "fit": None})
+            samples = [s for s in entry["samples"] if s[0] != x]
+            if lower_bound:
+                peak = max([peak] + [s[1] for s in entry["samples"] if s[0] == x])
+            samples.append([x, int(peak)])
+            entry["samples"] = samples[-MAX_SAMPLES:]
+            entry["fit"] = fit(entry["samples"])
+            self.dirty = True
+
+    def _predict(self, entry, x):
+        f = entry["fit"]
+        if f is None:
+            return None
+        return (f["a"] * x + f["b"]) * f["margin"]
+
+    def predict(self, architecture, mode, dtype, shape):
+        """Predicted peak memory in bytes of encoding or decoding a batch of shape, None before anything was measured."""
+        with self.lock:
+            entry = self.entries.get(self.key(architecture, mode, dtype))
+            if entry is None:
+                return None
+            return self._predict(entry, elements(shape))
+
+    def batch_size(self, architecture, mode, dtype, shape, free_memory):
+        """
+        The biggest number of the shape[0] batch items that are predicted to fit in free_memory at once, 0 when not even
+        one does, None before anything was measured.
+        """
+        with self.lock:
+            entry = self.entries.get(self.key(architecture, mode, dtype))
+            if entry is None or entry["fit"] is None:
+                return None
+            f = entry["fit"]
+        per_item = f["a"] * elements((1,) + tuple(shape[1:]))
+        available = free_memory / f["margin"] - f["b"]
+        if available < per_item:
+            return 0
+        return min(shape[0], int(available / per_item))
+
+    def report(self):
+        with self.lock:
+            out = {}
+            for key, entry in self.entries.items():
+                architecture, mode, dtype = key.split("|")
+                f = entry["fit"]
+                out[key] = {
+                    "architecture": architecture,
+                    "mode": mode,
+                    "dtype": dtype,
+                    "samples": [{"elements": x, "peak": peak, "predicted": self._predict(entry, x)} for x, peak in entry["samples"]],
+                    "fit": f,
+                    "bytes_per_megaelement": None if f is None else self._predict(entry, 1024 * 1024),
+                }
+            return out
+
+
+# Set up by main.py, None when disabled with --disable-vae-memory-model (the VAEs then use their static estimates).
+model = None
+
+
+def peak_memory_stats(device):
+    """The torch module with peak memory stats for device (torch.cuda, torch.xpu), None if it has none."""
+    module = getattr(torch, getattr(device, "type", ""), None)
+    if module is None or not hasattr(module, "memory_allocated") or not hasattr(module, "max_memory_allocated"):
+        return None
+    return module
+
+
+@contextlib.contextmanager
+def measure(architecture, mode, dtype, shape, device):
+    """
+    Records the peak memory the code in the with block uses on device, if this size wasn't measured before. The peak
+    memory stats are global, so they aren't reset: the block is only measured when it raised the peak of the device,
+    and nothing is recorded when other work (see comfy.model_management.running_on_device) ran on the device at the
+    same time, since its memory would be counted too.
+    """
+    stats = peak_memory_stats(device)
+    if model is None or stats is None or model.measured(architecture, mode, dtype, shape):
+        yield
+        return
+    work = comfy.model_management.device_work_state(device)
+    before = stats.memory_allocated(device)
+    peak_before = stats.max_memory_allocated(device)
+    yield
+    peak_after = stats.max_memory_allocated(device)
+    if work[0] > 1 or comfy.model_management.device_work_state(device) != work or peak_after <= peak_before:
+        return
+    peak = peak_after - before
+    model.record(architecture, mode, dtype, shape, peak)
+    logging.debug("VAE {} of {} {} used {:.0f} MB at peak".format(mode, list(shape), dtype, peak / (1024 * 1024)))
+
+
+def record_oom(architecture, mode, dtype, shape, free_memory):
+    if model is not None:
+        model.record(architecture, mode, dtype, shape, free_memory, lower_bound=True)
+
+
+def save():
+    if model is not None:
+        model.save()
+
+
+def get_report():
+    if model is None:
+        return {}
+    return model.report()
@@ -0,0 +1,97 @@
+import weakref
+import logging
+import itertools
+import threading
+
+import torch
+
+# Tensors smaller than this (in elements) aren't worth comparing.
+MIN_NUMEL = 4096
+SAMPLE_COUNT = 64
+
+
+def is_shared(t):
+    """True if the storage of parameter or buffer t may be shared with another model, so it must not be written in place."""
+    return getattr(t, "comfy_shared_weight", False)
+
+
+def _sample_keys(tensors):
+    """Sample keys of tensors, with one copy to the CPU for each device instead of one for each tensor."""
+    keys = [None] * len(tensors)
+    by_device = {}
+    for i, t in enumerate(tensors):
+        by_device.setdefault(t.device, []).append(i)
+    for device, indexes in by_device.items():
+        samples = []
+        for i in indexes:
+            flat = tensors[i].reshape(-1)
+            index = torch.linspace(0, flat.numel() - 1, SAMPLE_COUNT, device=device).long()
+            samples.append(flat[index].view(torch.uint8))
+        sizes = [s.numel() for s in samples]
+        for i, sample in zip(indexes, torch.cat(samples).to("cpu").split(sizes)):
+            t = tensors[i]
+            keys[i] = (t.device, t.dtype, tuple(t.shape), sample.numpy().tobytes())
+    return keys
+
+
+class WeightStore:
+    """
+    Makes identical weights of different models (the same text encoder or VAE in several checkpoints, a model loaded
+    by two nodes...) share one tensor storage. Weights are grouped by device, dtype, shape and a sample of their values
+    and only compared in full with the weights in the same group, so weights that differ are almost never read in full.
+    The store only keeps weak references, a storage is freed once no model uses it.
+    """
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.groups = {}  # sample key -> list of weak references to parameters and buffers
+        self.shared_bytes = 0
+
+    def _find(self, key, t):
+        group = self.groups.setdefault(key, [])
+        found = None
+        alive = []
+        for ref in group:
+            other = ref()
+            # Parameters moved to another device by module.to() keep the same object
+            if other is None or other.device != t.device:
+                continue
+            alive.append(ref)
+            if found is None and other is not t and (other.data_ptr() == t.data_ptr() or torch.equal(other.data, t)):
+                found = other
+        group[:] = alive
+        return found, group
+
+    def share(self, module):
+        """
+        Replaces the storage of the parameters and buffers of module that are identical to ones of modules
+        shared before with theirs. Returns the number of bytes freed.
+        """
+        freed = 0
+        tensors = [t for t in itertools.chain(module.parameters(), module.buffers()) if t.numel() >= MIN_NUMEL and t.is_contiguous() and not t.is_meta]
+        keys = _sample_keys([t.data for t in tensors])
+        with self.mutex:
+            for t, key in zip(tensors, keys):
+                found, group = self._find(key, t)
+                if found is None:
+                    group.append(weakref.ref(t))
+                    continue
+                # Weights restored from a backup can already use the storage without being marked
+                t.comfy_shared_weight = True
+                found.comfy_shared_weight = True
+                if found.data_ptr() != t.data_ptr():
+                    t.data = found.data
+                    freed += t.nbytes
+            self.shared_bytes += freed
+        if freed > 0:
+            logging.debug("Shared {:.1f} MB of identical weights of {}".format(freed / (1024 * 1024), module.__class__.__name__))
+        return freed
+
+
+# Set up by main.py from --dedup-weights, None when disabled.
+store = None
+
+
+def share_weights(module):
+    if store is None or module is None:
+        return 0
+    return store.share(module)
@@ -0,0 +1,216 @@
+import weakref
+import threading
+
+import torch
+
+MB = 1024 * 1024
+# Smaller tensors (biases, norms) are copied directly, staging them isn't worth a pool buffer.
+STAGE_MIN_BYTES = 256 * 1024
+
+
+class PinnedBufferPool:
+    """
+    Reusable page-locked (pinned) host buffers to stage weights in before copying them to the GPU, since copies from
+    pageable memory can't run asynchronously. Buffers are handed back with the event of the copy that reads them and
+    only reused once it completed. With pin=False (CPU) the buffers are ordinary memory, so the pool works the same.
+    """
+    def __init__(self, max_size, pin=True):
+        self.max_size = max_size
+        self.pin = pin
+        self.free = {}  # buffer size -> list of buffers
+        self.busy = []  # (buffer, event) of copies that may still be reading the buffer
+        self.size = 0
+        self.allocations = 0
+        self.reuses = 0
+
+    def _collect(self):
+        busy = []
+        for buffer, event in self.busy:
+            if event is None or event.query():
+                self.free.setdefault(buffer.numel(), []).append(buffer)
+            else:
+                busy.append((buffer, event))
+        self.busy = busy
+
+    def _evict(self, needed):
+        for size in sorted(self.free, reverse=True):
+            buffers = self.free[size]
+            while len(buffers) > 0 and self.size + needed > self.max_size:
+                buffers.pop()
+                self.size -= size
+        self.free = {k: v for k, v in self.free.items() if len(v) > 0}
+
+    def get(self, nbytes):
+        """Returns a uint8 buffer of at least nbytes, or None if the pool is full."""
+        self._collect()
+        size = max(1, (nbytes + MB - 1) // MB) * MB
+        buffers = self.free.get(size, None)
+        if buffers:
+            self.reuses += 1
+            return buffers.pop()
+        if self.size + size > self.max_size:
+            self._evict(size)
+            if self.size + size > self.max_size:
+                return None
+        self.size += size
+        self.allocations += 1
+        return torch.empty(size, dtype=torch.uint8, pin_memory=self.pin)
+
+    def release(self, buffer, event=None):
+        self.busy.append((buffer, event))
+
+    def clear(self):
+        self._collect()
+        self.size -= sum(size * len(buffers) for size, buffers in self.free.items())
+        self.free = {}
+
+
+class Transfer:
+    def __init__(self, weight, bias, sources, event):
+        self.weight = weight
+        self.bias = bias
+        self.sources = sources  # (tensor, version) of the weight and bias the copies were made from
+        self.event = event
+
+    def valid(self, module, dtype, bias_dtype):
+        if self.weight.dtype != dtype or (self.bias is not None and self.bias.dtype != bias_dtype):
+            return False
+        for (t, version), current in zip(self.sources, (module.weight, module.bias)):
+            if t is not current or (t is not None and t._version != version):
+                return False
+        return True
+
+
+class WeightPrefetcher:
+    """
+    Copies the weights of the layers that run with comfy_cast_weights (lowvram mode) to device ahead of time.
+    The order the layers cast their weights in is recorded, and when a layer asks for its weights, the next depth
+    layers in that order start copying through the pinned buffer pool on a separate stream, so the copies overlap
+    with the computation of the current layer. On CPU there is no stream and copies happen right away, which keeps the
+    scheduling the same.
+    """
+    def __init__(self, device, depth, pool):
+        self.device = device
+        self.depth = depth
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.stream = torch.cuda.Stream(device=device) if device.type == "cuda" else None
+        self.order = []  # weak references to the layers in the order they asked for their weights
+        self.position = weakref.WeakKeyDictionary()  # layer -> index in order
+        self.dtypes = weakref.WeakKeyDictionary()  # layer -> (dtype, bias_dtype) it asked for last
+        self.pending = {}  # index in order -> Transfer
+        self.stats = {"layers": 0, "transfers": 0, "bytes": 0, "ready": 0, "in_flight": 0, "misses": 0}
+
+    def _copy(self, t, dtype):
+        staged = None
+        buffer = None
+        if self.pool is not None and t.nbytes >= STAGE_MIN_BYTES and not t.is_pinned():
+            buffer = self.pool.get(t.nbytes)
+            if buffer is not None:
+                staged = buffer[:t.nbytes].view(t.dtype).view(t.shape)
+                staged.copy_(t)
+        source = t if staged is None else staged
+        out = torch.empty(t.shape, dtype=t.dtype, device=self.device)
+        out.copy_(source, non_blocking=self.stream is not None)
+        self.stats["bytes"] += t.nbytes
+        return out.to(dtype=dtype), buffer
+
+    def _transfer(self, module, dtype, bias_dtype):
+        buffers = []
+        sources = []
+        out = []
+        for t, d in ((module.weight, dtype), (module.bias, bias_dtype)):
+            sources.append((t, None if t is None else t._version))
+            if t is None:
+                out.append(None)
+                continue
+            r, buffer = self._copy(t, d)
+            out.append(r)
+            if buffer is not None:
+                buffers.append(buffer)
+        event = None
+        if self.stream is not None:
+            event = torch.cuda.Event()
+            event.record(self.stream)
+        for buffer in buffers:
+            self.pool.release(buffer, event)
+        self.stats["transfers"] += 1
+        return Transfer(out[0], out[1], sources, event)
+
+    def _start(self, module, dtype, bias_dtype):
+        if self.stream is None:
+            return self._transfer(module, dtype, bias_dtype)
+        self.stream.wait_stream(torch.cuda.current_stream(self.device))
+        with torch.cuda.stream(self.stream):
+            return self._transfer(module, dtype, bias_dtype)
+
+    def _schedule(self, index):
+        for i in range(1, self.depth + 1):
+            n = (index + i) % len(self.order)
+            if n == index:
+                break
+            if n in self.pending:
+                continue
+            module = self.order[n]()
+            # Layers that got fully loaded since don't cast their weights anymore
+            if module is None or not getattr(module, "comfy_cast_weights", False):
+                continue
+            dtypes = self.dtypes.get(module, None)
+            if dtypes is None:
+                continue
+            self.pending[n] = self._start(module, *dtypes)
+
+    def _wait(self, transfer, prefetched):
+        if not prefetched:
+            self.stats["misses"] += 1
+        elif transfer.event is None or transfer.event.query():
+            # Completed before it was needed, so the copy fully overlapped with the computation of earlier layers
+            self.stats["ready"] += 1
+        else:
+            self.stats["in_flight"] += 1
+        if transfer.event is None:
+            return
+        stream = torch.cuda.current_stream(self.device)
+        stream.wait_event(transfer.event)
+        for t in (transfer.weight, transfer.bias):
+            if t is not None:
+                t.record_stream(stream)
+
+    def get(self, module, dtype, bias_dtype):
+        """Returns (weight, bias) of module on device with the dtypes, copied ahead of time when possible."""
+        if dtype is None:
+            dtype = module.weight.dtype
+        if bias_dtype is None and module.bias is not None:
+            bias_dtype = module.bias.dtype
+        with self.lock:
+            index = self.position.get(module, None)
+            if index is None:
+                index = len(self.order)
+                self.order.append(weakref.ref(module))
+                self.position[module] = index
+                self.stats["layers"] = len(self.order)
+            self.dtypes[module] = (dtype, bias_dtype)
+            transfer = self.pending.pop(index, None)
+            prefetched = transfer is not None and transfer.valid(module, dtype, bias_dtype)
+            if not prefetched:
+                transfer = self._start(module, dtype, bias_dtype)
+            self._schedule(index)
+        self._wait(transfer, prefetched)
+        return transfer.weight, transfer.bias
+
+    def clear(self):
+        """Drops the copies that weren't used yet and the recorded layer order."""
+        with self.lock:
+            self.pending = {}
+            self.order = []
+            self.position = weakref.WeakKeyDictionary()
+            self.dtypes = weakref.WeakKeyDictionary()
+            if self.pool is not None:
+                self.pool.clear()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            if self.pool is not None:
+                stats["pinned_bytes"] = self.pool.size
+        return stats
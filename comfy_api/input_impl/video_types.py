@@ -2,12 +2,17 @@ from __future__ import annotations
 from av.container import InputContainer
 from av.subtitles.stream import SubtitleStream
 from fractions import Fraction
-from typing import Optional
+from typing import Iterable, Optional
 from comfy_api.input import AudioInput
 import av
 import io
+import itertools
 import json
 import numpy as np
+import os
+import shutil
+import tempfile
+import weakref
 import torch
 from comfy_api.input import VideoInput
 from comfy_api.util import VideoContainer, VideoCodec, VideoComponents
@@ -239,65 +244,149 @@ class VideoFromComponents(VideoInput):
         codec: VideoCodec = VideoCodec.AUTO,
         metadata: Optional[dict] = None
     ):
-        if format != VideoContainer.AUTO and format != VideoContainer.MP4:
-            raise ValueError("Only MP4 format is supported for now")
-        if codec != VideoCodec.AUTO and codec != VideoCodec.H264:
-            raise ValueError("Only H264 codec is supported for now")
-        with av.open(path, mode='w', options={'movflags': 'use_metadata_tags'}) as output:
-            # Add metadata before writing any streams
-            if metadata is not None:
-                for key, value in metadata.items():
-                    output.metadata[key] = json.dumps(value)
-
-            frame_rate = Fraction(round(self.__components.frame_rate * 1000), 1000)
-            # Create a video stream
-            video_stream = output.add_stream('h264', rate=frame_rate)
-            video_stream.width = self.__components.images.shape[2]
-            video_stream.height = self.__components.images.shape[1]
-            video_stream.pix_fmt = 'yuv420p'
-
-            # Create an audio stream
-            audio_sample_rate = 1
-            audio_stream: Optional[av.AudioStream] = None
-            if self.__components.audio:
-                audio_sample_rate = int(self.__components.audio['sample_rate'])
-                audio_stream = output.add_stream('aac', rate=audio_sample_rate)
-                audio_stream.sample_rate = audio_sample_rate
-                audio_stream.format = 'fltp'
-
-            # Encode video
-            for i, frame in enumerate(self.__components.images):
+        save_frames_to(
+            path,
+            [self.__components.images],
+            self.__components.frame_rate,
+            self.__components.audio,
+            format=format,
+            codec=codec,
+            metadata=metadata
+        )
+
+
+class VideoFromFrameChunks(VideoInput):
+    """
+    Class representing video input from frames produced a chunk at a time, like a VAE decoding the video in parts.
+    The chunks are consumed once when the video is created and spilled to a temporary directory, so the whole video
+    never has to be in memory as a tensor and using the video any number of times does not produce the frames again.
+    Saving encodes the spilled chunks one at a time; get_components loads all of them and combines them.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[torch.Tensor],
+        frame_rate: Fraction,
+        audio: Optional[AudioInput] = None
+    ):
+        """chunks yields [frames, height, width, channels] tensors."""
+        self.__frame_rate = frame_rate
+        self.__audio = audio
+        self.__dir = tempfile.mkdtemp(prefix="comfy_video_")
+        weakref.finalize(self, shutil.rmtree, self.__dir, True)
+        self.__files = []
+        self.__frame_count = 0
+        self.__dimensions = None
+        for chunk in chunks:
+            path = os.path.join(self.__dir, "{:05}.pt".format(len(self.__files)))
+            torch.save(chunk.cpu(), path)
+            self.__files.append(path)
+            self.__frame_count += chunk.shape[0]
+            self.__dimensions = (chunk.shape[2], chunk.shape[1])
+
+    def __chunks(self):
+        for path in self.__files:
+            yield torch.load(path, weights_only=True)
+
+    def get_dimensions(self) -> tuple[int, int]:
+        if self.__dimensions is None:
+            raise ValueError("Video has no frames")
+        return self.__dimensions
+
+    def get_duration(self) -> float:
+        return float(self.__frame_count / self.__frame_rate)
+
+    def get_components(self) -> VideoComponents:
+        return VideoComponents(
+            images=torch.cat(list(self.__chunks()), dim=0),
+            audio=self.__audio,
+            frame_rate=self.__frame_rate
+        )
+
+    def save_to(
+        self,
+        path: str,
+        format: VideoContainer = VideoContainer.AUTO,
+        codec: VideoCodec = VideoCodec.AUTO,
+        metadata: Optional[dict] = None
+    ):
+        save_frames_to(path, self.__chunks(), self.__frame_rate, self.__audio, format=format, codec=codec, metadata=metadata)
+
+
+def save_frames_to(
+    path: str,
+    chunks: Iterable[torch.Tensor],
+    frame_rate: Fraction,
+    audio: Optional[AudioInput],
+    format: VideoContainer = VideoContainer.AUTO,
+    codec: VideoCodec = VideoCodec.AUTO,
+    metadata: Optional[dict] = None
+):
+    """Encodes the frames in chunks ([frames, height, width, channels] tensors) to an MP4 file as they come."""
+    if format != VideoContainer.AUTO and format != VideoContainer.MP4:
+        raise ValueError("Only MP4 format is supported for now")
+    if codec != VideoCodec.AUTO and codec != VideoCodec.H264:
+        raise ValueError("Only H264 codec is supported for now")
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError("Video has no frames")
+    with av.open(path, mode='w', options={'movflags': 'use_metadata_tags'}) as output:
+        # Add metadata before writing any streams
+        if metadata is not None:
+            for key, value in metadata.items():
+                output.metadata[key] = json.dumps(value)
+
+        frame_rate = Fraction(round(frame_rate * 1000), 1000)
+        # Create a video stream
+        video_stream = output.add_stream('h264', rate=frame_rate)
+        video_stream.width = first.shape[2]
+        video_stream.height = first.shape[1]
+        video_stream.pix_fmt = 'yuv420p'
+
+        # Create an audio stream
+        audio_sample_rate = 1
+        audio_stream: Optional[av.AudioStream] = None
+        if audio:
+            audio_sample_rate = int(audio['sample_rate'])
+            audio_stream = output.add_stream('aac', rate=audio_sample_rate)
+            audio_stream.sample_rate = audio_sample_rate
+            audio_stream.format = 'fltp'
+
+        # Encode video
+        for images in itertools.chain([first], chunks):
+            for frame in images:
                 img = (frame * 255).clamp(0, 255).byte().cpu().numpy() # shape: (H, W, 3)
                 frame = av.VideoFrame.from_ndarray(img, format='rgb24')
                 frame = frame.reformat(format='yuv420p')  # Convert to YUV420P as required by h264
                 packet = video_stream.encode(frame)
                 output.mux(packet)
 
-            # Flush video
-            packet = video_stream.encode(None)
-            output.mux(packet)
-
-            if audio_stream and self.__components.audio:
-                # Encode audio
-                samples_per_frame = int(audio_sample_rate / frame_rate)
-                num_frames = self.__components.audio['waveform'].shape[2] // samples_per_frame
-                for i in range(num_frames):
-                    start = i * samples_per_frame
-                    end = start + samples_per_frame
-                    # TODO(Feature) - Add support for stereo audio
-                    chunk = (
-                        self.__components.audio["waveform"][0, 0, start:end]
-                        .unsqueeze(0)
-                        .contiguous()
-                        .numpy()
-                    )
-                    audio_frame = av.AudioFrame.from_ndarray(chunk, format='fltp', layout='mono')
-                    audio_frame.sample_rate = audio_sample_rate
-                    audio_frame.pts = i * samples_per_frame
-                    for packet in audio_stream.encode(audio_frame):
-                        output.mux(packet)
-
-                # Flush audio
-                for packet in audio_stream.encode(None):
+        # Flush video
+        packet = video_stream.encode(None)
+        output.mux(packet)
+
+        if audio_stream and audio:
+            # Encode audio
+            samples_per_frame = int(audio_sample_rate / frame_rate)
+            num_frames = audio['waveform'].shape[2] // samples_per_frame
+            for i in range(num_frames):
+                start = i * samples_per_frame
+                end = start + samples_per_frame
+                # TODO(Feature) - Add support for stereo audio
+                chunk = (
+                    audio["waveform"][0, 0, start:end]
+                    .unsqueeze(0)
+                    .contiguous()
+                    .numpy()
+                )
+                audio_frame = av.AudioFrame.from_ndarray(chunk, format='fltp', layout='mono')
+                audio_frame.sample_rate = audio_sample_rate
+                audio_frame.pts = i * samples_per_frame
+                for packet in audio_stream.encode(audio_frame):
                     output.mux(packet)
 
+            # Flush audio
+            for packet in audio_stream.encode(None):
+                output.mux(packet)
+
@@ -15,10 +15,12 @@ from comfy_api_nodes.apis.client import (
     SynchronousOperation,
     UploadRequest,
     UploadResponse,
+    get_async_session,
 )
 from server import PromptServer
 
 
+import aiohttp
 import numpy as np
 from PIL import Image
 import requests
@@ -47,6 +49,11 @@ def download_url_to_video_output(video_url: str, timeout: int = None) -> VideoFr
     return VideoFromFile(video_io)
 
 
+async def download_url_to_video_output_async(video_url: str, timeout: int = None) -> VideoFromFile:
+    """Async version of `download_url_to_video_output`."""
+    return VideoFromFile(await download_url_to_bytesio_async(video_url, timeout))
+
+
 def downscale_image_tensor(image, total_pixels=1536 * 1024) -> torch.Tensor:
     """Downscale input image tensor to roughly the specified total pixels."""
     samples = image.movedim(-1, 1)
@@ -190,6 +197,21 @@ def download_url_to_bytesio(url: str, timeout: int = None) -> BytesIO:
     return BytesIO(response.content)
 
 
+async def download_url_to_bytesio_async(url: str, timeout: int = None) -> BytesIO:
+    """Downloads content from a URL using the pooled aiohttp session and returns it as BytesIO.
+
+    Args:
+        url: The URL to download.
+        timeout: Request timeout in seconds. Defaults to None (no timeout).
+
+    Returns:
+        BytesIO object containing the downloaded content.
+    """
+    async with get_async_session().get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        response.raise_for_status()  # Raises ClientResponseError for bad responses (4XX or 5XX)
+        return BytesIO(await response.read())
+
+
 def bytesio_to_image_tensor(image_bytesio: BytesIO, mode: str = "RGBA") -> torch.Tensor:
     """Converts image data from BytesIO to a torch.Tensor.
 
@@ -216,6 +238,11 @@ def download_url_to_image_tensor(url: str, timeout: int = None) -> torch.Tensor:
     return bytesio_to_image_tensor(image_bytesio)
 
 
+async def download_url_to_image_tensor_async(url: str, timeout: int = None) -> torch.Tensor:
+    """Async version of `download_url_to_image_tensor`."""
+    return bytesio_to_image_tensor(await download_url_to_bytesio_async(url, timeout))
+
+
 def process_image_response(response: requests.Response) -> torch.Tensor:
     """Uses content from a Response object and converts it to a torch.Tensor"""
     return bytesio_to_image_tensor(BytesIO(response.content))
@@ -91,6 +91,7 @@ result = operation.execute(client=api_client)  # Returns the final ImageGenerati
 """
 
 from __future__ import annotations
+import asyncio
 import logging
 import time
 import io
@@ -98,6 +99,7 @@ import socket
 from typing import Dict, Type, Optional, Any, TypeVar, Generic, Callable, Tuple
 from enum import Enum
 import json
+import aiohttp
 import requests
 from urllib.parse import urljoin, urlparse
 from pydantic import BaseModel, Field
@@ -106,6 +108,8 @@ import uuid # For generating unique operation IDs
 from server import PromptServer
 from comfy.cli_args import args
 from comfy import utils
+import comfy.model_management
+import comfy_execution.async_loop
 from . import request_logger
 
 T = TypeVar("T", bound=BaseModel)
@@ -158,6 +162,18 @@ class HttpMethod(str, Enum):
     PATCH = "PATCH"
 
 
+STATUS_CODE_MESSAGES = {
+    401: "Unauthorized: Please login first to use this node.",
+    402: "Payment Required: Please add credits to your account to use this node.",
+    409: "There is a problem with your account. Please contact support@comfy.org.",
+    429: "Rate Limit Exceeded: Please try again later.",
+}
+
+def get_async_session() -> aiohttp.ClientSession:
+    """Returns the aiohttp session of the async node loop, so async API calls share one connection pool."""
+    return comfy_execution.async_loop.get_session()
+
+
 class ApiClient:
     """
     Client for making HTTP requests to an API with authentication, error handling, and retry logic.
@@ -583,15 +599,8 @@ class ApiClient:
                 )
 
             # Specific error messages for common status codes for user display
-            if status_code == 401:
-                user_display_error_message = "Unauthorized: Please login first to use this node."
-            elif status_code == 402:
-                user_display_error_message = "Payment Required: Please add credits to your account to use this node."
-            elif status_code == 409:
-                user_display_error_message = "There is a problem with your account. Please contact support@comfy.org."
-            elif status_code == 429:
-                user_display_error_message = "Rate Limit Exceeded: Please try again later."
             # else, user_display_error_message remains as parsed from response or original HTTPError string
+            user_display_error_message = STATUS_CODE_MESSAGES.get(status_code, user_display_error_message)
 
             raise Exception(user_display_error_message) # Raise with the user-friendly message
 
@@ -600,6 +609,166 @@ class ApiClient:
             return response.json()
         return {}
 
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content_type: str = "application/json",
+        multipart_parser: Callable = None,
+    ) -> Dict[str, Any]:
+        """
+        Async version of `request`, using the pooled aiohttp session of the running event loop.
+
+        Retries and raised errors are the same as for `request`.
+        """
+        url = urljoin(self.base_url, path)
+        self.check_auth(self.auth_token, self.comfy_api_key)
+        request_headers = self.get_headers()
+        if headers:
+            request_headers.update(headers)
+
+        if content_type == "application/x-www-form-urlencoded":
+            request_headers["Content-Type"] = content_type
+            payload_args = {"data": data}
+        elif content_type == "multipart/form-data" or files:
+            # aiohttp sets the multipart boundary in the content type itself
+            del request_headers["Content-Type"]
+            if multipart_parser:
+                data = multipart_parser(data)
+            payload_args = {"data": self._create_aiohttp_form_data(data, files)}
+        else:
+            payload_args = {"json": data}
+
+        operation_id = self._generate_operation_id(path)
+        request_logger.log_request_response(
+            operation_id=operation_id,
+            request_method=method,
+            request_url=url,
+            request_headers=request_headers,
+            request_params=params,
+            request_data=data if content_type == "application/json" else "[form-data or other]"
+        )
+
+        session = get_async_session()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        retry_count = 0
+        while True:
+            delay = self.retry_delay * (self.retry_backoff_factor ** retry_count)
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=request_headers,
+                    timeout=timeout,
+                    ssl=None if self.verify_ssl else False,
+                    **payload_args,
+                ) as response:
+                    status_code = response.status
+                    response_headers = dict(response.headers)
+                    content = await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                is_timeout = isinstance(e, asyncio.TimeoutError)
+                request_logger.log_request_response(
+                    operation_id=operation_id,
+                    request_method=method, request_url=url,
+                    error_message=f"{'Timeout' if is_timeout else 'ConnectionError'}: {str(e)}"
+                )
+                if retry_count < self.max_retries:
+                    logging.warning(
+                        f"{'Request timed out' if is_timeout else f'Connection error: {str(e)}'}. "
+                        f"Retrying in {delay:.2f}s ({retry_count + 1}/{self.max_retries})"
+                    )
+                    await asyncio.sleep(delay)
+                    retry_count += 1
+                    continue
+                if is_timeout:
+                    raise Exception(
+                        f"Request timed out after {self.timeout} seconds and {self.max_retries} retry attempts. "
+                        f"The server might be experiencing high load or the operation is taking longer than expected."
+                    ) from e
+                connectivity = await asyncio.to_thread(self._check_connectivity, self.base_url)
+                if connectivity["is_local_issue"]:
+                    raise LocalNetworkError(
+                        "Unable to connect to the API server due to local network issues. "
+                        "Please check your internet connection and try again."
+                    ) from e
+                elif connectivity["is_api_issue"]:
+                    raise ApiServerError(
+                        f"The API server at {self.base_url} is currently unreachable. "
+                        f"The service may be experiencing issues. Please try again later."
+                    ) from e
+                raise Exception(
+                    f"Unable to connect to the API server after {self.max_retries} attempts. "
+                    f"Please check your internet connection or try again later."
+                ) from e
+
+            try:
+                response_json = json.loads(content) if content else {}
+            except json.JSONDecodeError:
+                response_json = None
+            request_logger.log_request_response(
+                operation_id=operation_id,
+                request_method=method,
+                request_url=url,
+                response_status_code=status_code,
+                response_headers=response_headers,
+                response_content=response_json if response_json is not None else content,
+                error_message=f"HTTP Error: {status_code}" if status_code >= 400 else None
+            )
+
+            if status_code in self.retry_status_codes and retry_count < self.max_retries:
+                logging.warning(
+                    f"Request failed with status {status_code}. "
+                    f"Retrying in {delay:.2f}s ({retry_count + 1}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+                retry_count += 1
+                continue
+
+            if status_code >= 400:
+                raise Exception(self._get_error_display_message(status_code, content, response_json))
+            if response_json is None:
+                raise Exception(f"API Error: invalid JSON response (status {status_code})")
+            return response_json
+
+    @staticmethod
+    def _create_aiohttp_form_data(data, files) -> aiohttp.FormData:
+        """Builds a multipart body from requests style data and files arguments."""
+        form = aiohttp.FormData()
+        for key, value in (data or {}).items():
+            if value is not None:
+                form.add_field(key, value if isinstance(value, (str, bytes)) else str(value))
+        items = files.items() if isinstance(files, dict) else (files or [])
+        for key, value in items:
+            if isinstance(value, tuple):
+                filename, fileobj = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+                form.add_field(key, fileobj, filename=filename, content_type=content_type)
+            else:
+                form.add_field(key, value)
+        return form
+
+    @staticmethod
+    def _get_error_display_message(status_code: int, content: bytes, error_json) -> str:
+        if status_code in STATUS_CODE_MESSAGES:
+            return STATUS_CODE_MESSAGES[status_code]
+        if isinstance(error_json, dict) and isinstance(error_json.get("error"), dict) and "message" in error_json["error"]:
+            message = f"API Error: {error_json['error']['message']}"
+            if "type" in error_json["error"]:
+                message += f" (Type: {error_json['error']['type']})"
+            return message
+        if error_json is not None and content:
+            return f"API Error: {json.dumps(error_json)}"
+        raw_content = content.decode(errors="ignore")
+        if 0 < len(raw_content) < 200:
+            return f"API Error (raw): {raw_content}"
+        return f"API Error (raw, status {status_code})"
+
     def check_auth(self, auth_token, comfy_api_key):
         """Verify that an auth token is present or comfy_api_key is present"""
         if auth_token is None and comfy_api_key is None:
@@ -801,60 +970,89 @@ class SynchronousOperation(Generic[T, R]):
         self.retry_delay = retry_delay
         self.retry_backoff_factor = retry_backoff_factor
 
+    def _get_client(self, client: Optional[ApiClient]) -> ApiClient:
+        # Create client if not provided
+        if client is None:
+            client = ApiClient(
+                base_url=self.api_base,
+                auth_token=self.auth_token,
+                comfy_api_key=self.comfy_api_key,
+                timeout=self.timeout,
+                verify_ssl=self.verify_ssl,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay,
+                retry_backoff_factor=self.retry_backoff_factor,
+            )
+        return client
+
+    def _get_request_args(self) -> Dict[str, Any]:
+        # Convert request model to dict, but use None for EmptyRequest
+        request_dict = (
+            None
+            if isinstance(self.request, EmptyRequest)
+            else self.request.model_dump(exclude_none=True)
+        )
+        if request_dict:
+            for key, value in request_dict.items():
+                if isinstance(value, Enum):
+                    request_dict[key] = value.value
+
+        # Debug log for request
+        logging.debug(
+            f"[DEBUG] API Request: {self.endpoint.method.value} {self.endpoint.path}"
+        )
+        logging.debug(f"[DEBUG] Request Data: {json.dumps(request_dict, indent=2)}")
+        logging.debug(f"[DEBUG] Query Params: {self.endpoint.query_params}")
+
+        return dict(
+            method=self.endpoint.method.value,
+            path=self.endpoint.path,
+            data=request_dict,
+            params=self.endpoint.query_params,
+            files=self.files,
+            content_type=self.content_type,
+            multipart_parser=self.multipart_parser
+        )
+
+    def _handle_response(self, resp) -> R:
+        # Debug log for response
+        logging.debug("=" * 50)
+        logging.debug("[DEBUG] RESPONSE DETAILS:")
+        logging.debug("[DEBUG] Status Code: 200 (Success)")
+        logging.debug(f"[DEBUG] Response Body: {json.dumps(resp, indent=2)}")
+        logging.debug("=" * 50)
+
+        # Parse and return the response
+        return self._parse_response(resp)
+
     def execute(self, client: Optional[ApiClient] = None) -> R:
         """Execute the API operation using the provided client or create one with retry support"""
         try:
-            # Create client if not provided
-            if client is None:
-                client = ApiClient(
-                    base_url=self.api_base,
-                    auth_token=self.auth_token,
-                    comfy_api_key=self.comfy_api_key,
-                    timeout=self.timeout,
-                    verify_ssl=self.verify_ssl,
-                    max_retries=self.max_retries,
-                    retry_delay=self.retry_delay,
-                    retry_backoff_factor=self.retry_backoff_factor,
-                )
-
-            # Convert request model to dict, but use None for EmptyRequest
-            request_dict = (
-                None
-                if isinstance(self.request, EmptyRequest)
-                else self.request.model_dump(exclude_none=True)
-            )
-            if request_dict:
-                for key, value in request_dict.items():
-                    if isinstance(value, Enum):
-                        request_dict[key] = value.value
+            client = self._get_client(client)
+            # Make the request with built-in retry
+            resp = client.request(**self._get_request_args())
+            return self._handle_response(resp)
 
-            # Debug log for request
-            logging.debug(
-                f"[DEBUG] API Request: {self.endpoint.method.value} {self.endpoint.path}"
-            )
-            logging.debug(f"[DEBUG] Request Data: {json.dumps(request_dict, indent=2)}")
-            logging.debug(f"[DEBUG] Query Params: {self.endpoint.query_params}")
+        except LocalNetworkError as e:
+            # Propagate specific network error types
+            logging.error(f"[ERROR] Local network error: {str(e)}")
+            raise
 
-            # Make the request with built-in retry
-            resp = client.request(
-                method=self.endpoint.method.value,
-                path=self.endpoint.path,
-                data=request_dict,
-                params=self.endpoint.query_params,
-                files=self.files,
-                content_type=self.content_type,
-                multipart_parser=self.multipart_parser
-            )
+        except ApiServerError as e:
+            # Propagate API server errors
+            logging.error(f"[ERROR] API server error: {str(e)}")
+            raise
 
-            # Debug log for response
-            logging.debug("=" * 50)
-            logging.debug("[DEBUG] RESPONSE DETAILS:")
-            logging.debug("[DEBUG] Status Code: 200 (Success)")
-            logging.debug(f"[DEBUG] Response Body: {json.dumps(resp, indent=2)}")
-            logging.debug("=" * 50)
+        except Exception as e:
+            logging.error(f"[ERROR] API Exception: {str(e)}")
+            raise Exception(str(e))
 
-            # Parse and return the response
-            return self._parse_response(resp)
+    async def execute_async(self, client: Optional[ApiClient] = None) -> R:
+        """Async version of `execute`, lets other nodes run while waiting on the API"""
+        try:
+            client = self._get_client(client)
+            resp = await client.async_request(**self._get_request_args())
+            return self._handle_response(resp)
 
         except LocalNetworkError as e:
             # Propagate specific network error types
@@ -944,33 +1142,52 @@ class PollingOperation(Generic[T, R]):
         self.final_response = None
         self.error = None
 
-    def execute(self, client: Optional[ApiClient] = None) -> R:
-        """Execute the polling operation using the provided client. If failed, raise an exception."""
-        try:
-            if client is None:
-                client = ApiClient(
-                    base_url=self.api_base,
-                    auth_token=self.auth_token,
-                    comfy_api_key=self.comfy_api_key,
-                    max_retries=self.max_retries,
-                    retry_delay=self.retry_delay,
-                    retry_backoff_factor=self.retry_backoff_factor,
-                )
-            return self._poll_until_complete(client)
-        except LocalNetworkError as e:
+    def _get_client(self, client: Optional[ApiClient]) -> ApiClient:
+        if client is None:
+            client = ApiClient(
+                base_url=self.api_base,
+                auth_token=self.auth_token,
+                comfy_api_key=self.comfy_api_key,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay,
+                retry_backoff_factor=self.retry_backoff_factor,
+            )
+        return client
+
+    def _wrap_error(self, e: Exception) -> Exception:
+        if isinstance(e, LocalNetworkError):
             # Provide clear message for local network issues
-            raise Exception(
+            return Exception(
                 f"Polling failed due to local network issues. Please check your internet connection. "
                 f"Details: {str(e)}"
-            ) from e
-        except ApiServerError as e:
+            )
+        if isinstance(e, ApiServerError):
             # Provide clear message for API server issues
-            raise Exception(
+            return Exception(
                 f"Polling failed due to API server issues. The service may be experiencing problems. "
                 f"Please try again later. Details: {str(e)}"
-            ) from e
+            )
+        return Exception(f"Error during polling: {str(e)}")
+
+    def execute(self, client: Optional[ApiClient] = None) -> R:
+        """Execute the polling operation using the provided client. If failed, raise an exception."""
+        try:
+            return self._poll_until_complete(self._get_client(client))
+        except (LocalNetworkError, ApiServerError) as e:
+            raise self._wrap_error(e) from e
         except Exception as e:
-            raise Exception(f"Error during polling: {str(e)}")
+            raise self._wrap_error(e)
+
+    async def execute_async(self, client: Optional[ApiClient] = None) -> R:
+        """Async version of `execute`, polls without blocking so other nodes can run in the meantime."""
+        try:
+            return await self._poll_until_complete_async(self._get_client(client))
+        except comfy.model_management.InterruptProcessingException:
+            raise
+        except (LocalNetworkError, ApiServerError) as e:
+            raise self._wrap_error(e) from e
+        except Exception as e:
+            raise self._wrap_error(e)
 
     def _display_text_on_node(self, text: str):
         """Sends text to the client which will be displayed on the node in the UI"""
@@ -1005,120 +1222,174 @@ class PollingOperation(Generic[T, R]):
             logging.error(f"Error extracting status: {e}")
             return TaskStatus.PENDING
 
+    def _get_poll_request_args(self, poll_count: int) -> Dict[str, Any]:
+        logging.debug(f"[DEBUG] Polling attempt #{poll_count}")
+
+        request_dict = (
+            self.request.model_dump(exclude_none=True)
+            if self.request is not None
+            else None
+        )
+
+        if poll_count == 1:
+            logging.debug(
+                f"[DEBUG] Poll Request: {self.poll_endpoint.method.value} {self.poll_endpoint.path}"
+            )
+            logging.debug(
+                f"[DEBUG] Poll Request Data: {json.dumps(request_dict, indent=2) if request_dict else 'None'}"
+            )
+
+        return dict(
+            method=self.poll_endpoint.method.value,
+            path=self.poll_endpoint.path,
+            params=self.poll_endpoint.query_params,
+            data=request_dict,
+        )
+
+    def _handle_poll_response(self, resp, progress) -> Tuple[TaskStatus, Optional[R]]:
+        """Checks a poll response, returning its status and the parsed response"""
+        # Parse response
+        response_obj = self.poll_endpoint.response_model.model_validate(resp)
+
+        # Check if task is complete
+        status = self._check_task_status(response_obj)
+        logging.debug(f"[DEBUG] Task Status: {status}")
+
+        # If progress extractor is provided, extract progress
+        if self.progress_extractor:
+            new_progress = self.progress_extractor(response_obj)
+            if new_progress is not None:
+                progress.update_absolute(new_progress, total=PROGRESS_BAR_MAX)
+
+        if status == TaskStatus.COMPLETED:
+            message = "Task completed successfully"
+            if self.result_url_extractor:
+                result_url = self.result_url_extractor(response_obj)
+                if result_url:
+                    message = f"Result URL: {result_url}"
+            else:
+                message = "Task completed successfully!"
+            logging.debug(f"[DEBUG] {message}")
+            self._display_text_on_node(message)
+            self.final_response = response_obj
+            if self.progress_extractor:
+                progress.update(100)
+        elif status == TaskStatus.FAILED:
+            logging.error(f"[DEBUG] Task failed: {json.dumps(resp)}")
+        else:
+            logging.debug("[DEBUG] Task still pending, continuing to poll...")
+            # Wait before polling again
+            logging.debug(
+                f"[DEBUG] Waiting {self.poll_interval} seconds before next poll"
+            )
+        return status, response_obj
+
+    def _check_poll_error(self, e: Exception, status, poll_count: int, consecutive_errors: int, max_consecutive_errors: int):
+        """Raises if polling should be aborted after this error, otherwise logs it"""
+        if isinstance(e, (LocalNetworkError, ApiServerError)):
+            # For network-related errors, increment error count and potentially abort
+            if consecutive_errors >= max_consecutive_errors:
+                raise Exception(
+                    f"Polling aborted after {consecutive_errors} consecutive network errors: {str(e)}"
+                ) from e
+
+            # Log the error but continue polling
+            logging.warning(
+                f"Network error during polling (attempt {poll_count}/{self.max_poll_attempts}): {str(e)}. "
+                f"Will retry in {self.poll_interval} seconds."
+            )
+        else:
+            # For other errors, increment count and potentially abort
+            if consecutive_errors >= max_consecutive_errors or status == TaskStatus.FAILED:
+                raise Exception(
+                    f"Polling aborted after {consecutive_errors} consecutive errors: {str(e)}"
+                ) from e
+
+            logging.error(f"[DEBUG] Polling error: {str(e)}")
+            logging.warning(
+                f"Error during polling (attempt {poll_count}/{self.max_poll_attempts}): {str(e)}. "
+                f"Will retry in {self.poll_interval} seconds."
+            )
+
+    def _timeout_error(self, poll_count: int) -> Exception:
+        # If we've exhausted all polling attempts
+        return Exception(
+            f"Polling timed out after {poll_count} attempts ({poll_count * self.poll_interval} seconds). "
+            f"The operation may still be running on the server but is taking longer than expected."
+        )
+
     def _poll_until_complete(self, client: ApiClient) -> R:
         """Poll until the task is complete"""
         poll_count = 0
         consecutive_errors = 0
         max_consecutive_errors = min(5, self.max_retries * 2)  # Limit consecutive errors
+        status = None
 
+        progress = None
         if self.progress_extractor:
-            progress = utils.ProgressBar(PROGRESS_BAR_MAX)
+            progress = utils.ProgressBar(PROGRESS_BAR_MAX, node_id=self.node_id)
 
         while poll_count < self.max_poll_attempts:
             try:
                 poll_count += 1
-                logging.debug(f"[DEBUG] Polling attempt #{poll_count}")
-
-                request_dict = (
-                    self.request.model_dump(exclude_none=True)
-                    if self.request is not None
-                    else None
-                )
-
-                if poll_count == 1:
-                    logging.debug(
-                        f"[DEBUG] Poll Request: {self.poll_endpoint.method.value} {self.poll_endpoint.path}"
-                    )
-                    logging.debug(
-                        f"[DEBUG] Poll Request Data: {json.dumps(request_dict, indent=2) if request_dict else 'None'}"
-                    )
-
                 # Query task status
-                resp = client.request(
-                    method=self.poll_endpoint.method.value,
-                    path=self.poll_endpoint.path,
-                    params=self.poll_endpoint.query_params,
-                    data=request_dict,
-                )
+                resp = client.request(**self._get_poll_request_args(poll_count))
 
                 # Successfully got a response, reset consecutive error count
                 consecutive_errors = 0
 
-                # Parse response
-                response_obj = self.poll_endpoint.response_model.model_validate(resp)
-
-                # Check if task is complete
-                status = self._check_task_status(response_obj)
-                logging.debug(f"[DEBUG] Task Status: {status}")
-
-                # If progress extractor is provided, extract progress
-                if self.progress_extractor:
-                    new_progress = self.progress_extractor(response_obj)
-                    if new_progress is not None:
-                        progress.update_absolute(new_progress, total=PROGRESS_BAR_MAX)
-
+                status, response_obj = self._handle_poll_response(resp, progress)
                 if status == TaskStatus.COMPLETED:
-                    message = "Task completed successfully"
-                    if self.result_url_extractor:
-                        result_url = self.result_url_extractor(response_obj)
-                        if result_url:
-                            message = f"Result URL: {result_url}"
-                    else:
-                        message = "Task completed successfully!"
-                    logging.debug(f"[DEBUG] {message}")
-                    self._display_text_on_node(message)
-                    self.final_response = response_obj
-                    if self.progress_extractor:
-                        progress.update(100)
-                    return self.final_response
+                    return response_obj
                 elif status == TaskStatus.FAILED:
-                    message = f"Task failed: {json.dumps(resp)}"
-                    logging.error(f"[DEBUG] {message}")
-                    raise Exception(message)
-                else:
-                    logging.debug("[DEBUG] Task still pending, continuing to poll...")
+                    raise Exception(f"Task failed: {json.dumps(resp)}")
 
-                # Wait before polling again
-                logging.debug(
-                    f"[DEBUG] Waiting {self.poll_interval} seconds before next poll"
-                )
                 for i in range(int(self.poll_interval)):
                     time_completed = (poll_count * self.poll_interval) + i
                     self._display_time_progress_on_node(time_completed)
                     time.sleep(1)
 
-            except (LocalNetworkError, ApiServerError) as e:
-                # For network-related errors, increment error count and potentially abort
+            except Exception as e:
                 consecutive_errors += 1
-                if consecutive_errors >= max_consecutive_errors:
-                    raise Exception(
-                        f"Polling aborted after {consecutive_errors} consecutive network errors: {str(e)}"
-                    ) from e
-
-                # Log the error but continue polling
-                logging.warning(
-                    f"Network error during polling (attempt {poll_count}/{self.max_poll_attempts}): {str(e)}. "
-                    f"Will retry in {self.poll_interval} seconds."
-                )
+                self._check_poll_error(e, status, poll_count, consecutive_errors, max_consecutive_errors)
                 time.sleep(self.poll_interval)
 
+        raise self._timeout_error(poll_count)
+
+    async def _poll_until_complete_async(self, client: ApiClient) -> R:
+        """Poll until the task is complete, sleeping on the event loop between polls"""
+        poll_count = 0
+        consecutive_errors = 0
+        max_consecutive_errors = min(5, self.max_retries * 2)  # Limit consecutive errors
+        status = None
+
+        progress = None
+        if self.progress_extractor:
+            progress = utils.ProgressBar(PROGRESS_BAR_MAX, node_id=self.node_id)
+
+        while poll_count < self.max_poll_attempts:
+            try:
+                poll_count += 1
+                resp = await client.async_request(**self._get_poll_request_args(poll_count))
+                consecutive_errors = 0
+
+                status, response_obj = self._handle_poll_response(resp, progress)
+                if status == TaskStatus.COMPLETED:
+                    return response_obj
+                elif status == TaskStatus.FAILED:
+                    raise Exception(f"Task failed: {json.dumps(resp)}")
+
+                for i in range(int(self.poll_interval)):
+                    time_completed = (poll_count * self.poll_interval) + i
+                    self._display_time_progress_on_node(time_completed)
+                    comfy.model_management.throw_exception_if_processing_interrupted()
+                    await asyncio.sleep(1)
+
+            except comfy.model_management.InterruptProcessingException:
+                raise
             except Exception as e:
-                # For other errors, increment count and potentially abort
                 consecutive_errors += 1
-                if consecutive_errors >= max_consecutive_errors or status == TaskStatus.FAILED:
-                    raise Exception(
-                        f"Polling aborted after {consecutive_errors} consecutive errors: {str(e)}"
-                    ) from e
-
-                logging.error(f"[DEBUG] Polling error: {str(e)}")
-                logging.warning(
-                    f"Error during polling (attempt {poll_count}/{self.max_poll_attempts}): {str(e)}. "
-                    f"Will retry in {self.poll_interval} seconds."
-                )
-                time.sleep(self.poll_interval)
+                self._check_poll_error(e, status, poll_count, consecutive_errors, max_consecutive_errors)
+                await asyncio.sleep(self.poll_interval)
 
-        # If we've exhausted all polling attempts
-        raise Exception(
-            f"Polling timed out after {poll_count} attempts ({poll_count * self.poll_interval} seconds). "
-            f"The operation may still be running on the server but is taking longer than expected."
-        )
+        raise self._timeout_error(poll_count)
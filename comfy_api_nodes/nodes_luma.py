@@ -1,8 +1,8 @@
 from __future__ import annotations
+import asyncio
 from inspect import cleandoc
 from typing import Optional
 from comfy.comfy_types.node_typing import IO, ComfyNodeABC
-from comfy_api.input_impl.video_types import VideoFromFile
 from comfy_api_nodes.apis.luma_api import (
     LumaImageModel,
     LumaVideoModel,
@@ -32,15 +32,14 @@ from comfy_api_nodes.apis.client import (
     EmptyRequest,
 )
 from comfy_api_nodes.apinode_utils import (
+    download_url_to_image_tensor_async,
+    download_url_to_video_output_async,
     upload_images_to_comfyapi,
-    process_image_response,
     validate_string,
 )
 from server import PromptServer
 
-import requests
 import torch
-from io import BytesIO
 
 LUMA_T2V_AVERAGE_DURATION = 105
 LUMA_I2V_AVERAGE_DURATION = 100
@@ -217,7 +216,7 @@ class LumaImageGenerationNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         model: str,
@@ -234,20 +233,20 @@ class LumaImageGenerationNode(ComfyNodeABC):
         # handle image_luma_ref
         api_image_ref = None
         if image_luma_ref is not None:
-            api_image_ref = self._convert_luma_refs(
-                image_luma_ref, max_refs=4, auth_kwargs=kwargs,
+            api_image_ref = await asyncio.to_thread(
+                self._convert_luma_refs, image_luma_ref, max_refs=4, auth_kwargs=kwargs,
             )
         # handle style_luma_ref
         api_style_ref = None
         if style_image is not None:
-            api_style_ref = self._convert_style_image(
-                style_image, weight=style_image_weight, auth_kwargs=kwargs,
+            api_style_ref = await asyncio.to_thread(
+                self._convert_style_image, style_image, weight=style_image_weight, auth_kwargs=kwargs,
             )
         # handle character_ref images
         character_ref = None
         if character_image is not None:
-            download_urls = upload_images_to_comfyapi(
-                character_image, max_images=4, auth_kwargs=kwargs,
+            download_urls = await asyncio.to_thread(
+                upload_images_to_comfyapi, character_image, max_images=4, auth_kwargs=kwargs,
             )
             character_ref = LumaCharacterRef(
                 identity0=LumaImageIdentity(images=download_urls)
@@ -270,7 +269,7 @@ class LumaImageGenerationNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api: LumaGeneration = operation.execute()
+        response_api: LumaGeneration = await operation.execute_async()
 
         operation = PollingOperation(
             poll_endpoint=ApiEndpoint(
@@ -286,11 +285,9 @@ class LumaImageGenerationNode(ComfyNodeABC):
             node_id=unique_id,
             auth_kwargs=kwargs,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        img_response = requests.get(response_poll.assets.image)
-        img = process_image_response(img_response)
-        return (img,)
+        return (await download_url_to_image_tensor_async(response_poll.assets.image),)
 
     def _convert_luma_refs(
         self, luma_ref: LumaReferenceChain, max_refs: int, auth_kwargs: Optional[dict[str,str]] = None
@@ -370,7 +367,7 @@ class LumaImageModifyNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         model: str,
@@ -381,8 +378,8 @@ class LumaImageModifyNode(ComfyNodeABC):
         **kwargs,
     ):
         # first, upload image
-        download_urls = upload_images_to_comfyapi(
-            image, max_images=1, auth_kwargs=kwargs,
+        download_urls = await asyncio.to_thread(
+            upload_images_to_comfyapi, image, max_images=1, auth_kwargs=kwargs,
         )
         image_url = download_urls[0]
         # next, make Luma call with download url provided
@@ -402,7 +399,7 @@ class LumaImageModifyNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api: LumaGeneration = operation.execute()
+        response_api: LumaGeneration = await operation.execute_async()
 
         operation = PollingOperation(
             poll_endpoint=ApiEndpoint(
@@ -418,11 +415,9 @@ class LumaImageModifyNode(ComfyNodeABC):
             node_id=unique_id,
             auth_kwargs=kwargs,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        img_response = requests.get(response_poll.assets.image)
-        img = process_image_response(img_response)
-        return (img,)
+        return (await download_url_to_image_tensor_async(response_poll.assets.image),)
 
 
 class LumaTextToVideoGenerationNode(ComfyNodeABC):
@@ -494,7 +489,7 @@ class LumaTextToVideoGenerationNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         model: str,
@@ -529,7 +524,7 @@ class LumaTextToVideoGenerationNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api: LumaGeneration = operation.execute()
+        response_api: LumaGeneration = await operation.execute_async()
 
         if unique_id:
             PromptServer.instance.send_progress_text(f"Luma video generation started: {response_api.id}", unique_id)
@@ -549,10 +544,9 @@ class LumaTextToVideoGenerationNode(ComfyNodeABC):
             estimated_duration=LUMA_T2V_AVERAGE_DURATION,
             auth_kwargs=kwargs,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        vid_response = requests.get(response_poll.assets.video)
-        return (VideoFromFile(BytesIO(vid_response.content)),)
+        return (await download_url_to_video_output_async(response_poll.assets.video),)
 
 
 class LumaImageToVideoGenerationNode(ComfyNodeABC):
@@ -626,7 +620,7 @@ class LumaImageToVideoGenerationNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         model: str,
@@ -644,7 +638,7 @@ class LumaImageToVideoGenerationNode(ComfyNodeABC):
             raise Exception(
                 "At least one of first_image and last_image requires an input."
             )
-        keyframes = self._convert_to_keyframes(first_image, last_image, auth_kwargs=kwargs)
+        keyframes = await asyncio.to_thread(self._convert_to_keyframes, first_image, last_image, auth_kwargs=kwargs)
         duration = duration if model != LumaVideoModel.ray_1_6 else None
         resolution = resolution if model != LumaVideoModel.ray_1_6 else None
 
@@ -667,7 +661,7 @@ class LumaImageToVideoGenerationNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api: LumaGeneration = operation.execute()
+        response_api: LumaGeneration = await operation.execute_async()
 
         if unique_id:
             PromptServer.instance.send_progress_text(f"Luma video generation started: {response_api.id}", unique_id)
@@ -687,10 +681,9 @@ class LumaImageToVideoGenerationNode(ComfyNodeABC):
             estimated_duration=LUMA_I2V_AVERAGE_DURATION,
             auth_kwargs=kwargs,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        vid_response = requests.get(response_poll.assets.video)
-        return (VideoFromFile(BytesIO(vid_response.content)),)
+        return (await download_url_to_video_output_async(response_poll.assets.video),)
 
     def _convert_to_keyframes(
         self,
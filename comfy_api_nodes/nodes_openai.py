@@ -623,11 +623,12 @@ class OpenAIChatNode(OpenAITextNode):
 
     DESCRIPTION = "Generate text responses from an OpenAI model."
 
-    def get_result_response(
+    async def get_result_response(
         self,
         response_id: str,
         include: Optional[list[Includable]] = None,
         auth_kwargs: Optional[dict[str, str]] = None,
+        node_id: Optional[str] = None,
     ) -> OpenAIResponse:
         """
         Retrieve a model response with the given ID from the OpenAI API.
@@ -639,7 +640,7 @@ class OpenAIChatNode(OpenAITextNode):
                 creation above for more information.
 
         """
-        return PollingOperation(
+        return await PollingOperation(
             poll_endpoint=ApiEndpoint(
                 path=f"{RESPONSES_ENDPOINT}/{response_id}",
                 method=HttpMethod.GET,
@@ -651,7 +652,8 @@ class OpenAIChatNode(OpenAITextNode):
             failed_statuses=["failed"],
             status_extractor=lambda response: response.status,
             auth_kwargs=auth_kwargs,
-        ).execute()
+            node_id=node_id,
+        ).execute_async()
 
     def get_message_content_from_response(
         self, response: OpenAIResponse
@@ -784,7 +786,7 @@ class OpenAIChatNode(OpenAITextNode):
 
         self.history[session_id] = new_history
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         persist_context: bool,
@@ -815,7 +817,7 @@ class OpenAIChatNode(OpenAITextNode):
             previous_response_id = None
 
         # Create response
-        create_response = SynchronousOperation(
+        create_response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path=RESPONSES_ENDPOINT,
                 method=HttpMethod.POST,
@@ -844,11 +846,11 @@ class OpenAIChatNode(OpenAITextNode):
                 ),
             ),
             auth_kwargs=kwargs,
-        ).execute()
+        ).execute_async()
         response_id = create_response.id
 
         # Get result output
-        result_response = self.get_result_response(response_id, auth_kwargs=kwargs)
+        result_response = await self.get_result_response(response_id, auth_kwargs=kwargs, node_id=unique_id)
         output_text = self.parse_output_text_from_response(result_response)
 
         # Update history
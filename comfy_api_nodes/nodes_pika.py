@@ -34,7 +34,7 @@ from comfy_api_nodes.apis.client import (
 )
 from comfy_api_nodes.apinode_utils import (
     tensor_to_bytesio,
-    download_url_to_video_output,
+    download_url_to_video_output_async,
 )
 from comfy_api_nodes.mapper_utils import model_field_to_node_input
 from comfy_api.input_impl.video_types import VideoInput, VideoContainer, VideoCodec
@@ -120,7 +120,7 @@ class PikaNodeBase(ComfyNodeABC):
     FUNCTION = "api_call"
     RETURN_TYPES = ("VIDEO",)
 
-    def poll_for_task_status(
+    async def poll_for_task_status(
         self,
         task_id: str,
         auth_kwargs: Optional[dict[str, str]] = None,
@@ -150,9 +150,9 @@ class PikaNodeBase(ComfyNodeABC):
             node_id=node_id,
             estimated_duration=60
         )
-        return polling_operation.execute()
+        return await polling_operation.execute_async()
 
-    def execute_task(
+    async def execute_task(
         self,
         initial_operation: SynchronousOperation[R, PikaGenerateResponse],
         auth_kwargs: Optional[dict[str, str]] = None,
@@ -167,14 +167,14 @@ class PikaNodeBase(ComfyNodeABC):
         Returns:
             A tuple containing the video file as a VIDEO output.
         """
-        initial_response = initial_operation.execute()
+        initial_response = await initial_operation.execute_async()
         if not is_valid_initial_response(initial_response):
             error_msg = f"Pika initial request failed. Code: {initial_response.code}, Message: {initial_response.message}, Data: {initial_response.data}"
             logging.error(error_msg)
             raise PikaApiError(error_msg)
 
         task_id = initial_response.video_id
-        final_response = self.poll_for_task_status(task_id, auth_kwargs)
+        final_response = await self.poll_for_task_status(task_id, auth_kwargs, node_id=node_id)
         if not is_valid_video_response(final_response):
             error_msg = (
                 f"Pika task {task_id} succeeded but no video data found in response."
@@ -185,7 +185,7 @@ class PikaNodeBase(ComfyNodeABC):
         video_url = str(final_response.url)
         logging.info("Pika task %s succeeded. Video URL: %s", task_id, video_url)
 
-        return (download_url_to_video_output(video_url),)
+        return (await download_url_to_video_output_async(video_url),)
 
 
 class PikaImageToVideoV2_2(PikaNodeBase):
@@ -209,7 +209,7 @@ class PikaImageToVideoV2_2(PikaNodeBase):
 
     DESCRIPTION = "Sends an image and prompt to the Pika API v2.2 to generate a video."
 
-    def api_call(
+    async def api_call(
         self,
         image: torch.Tensor,
         prompt_text: str,
@@ -248,7 +248,7 @@ class PikaImageToVideoV2_2(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikaTextToVideoNodeV2_2(PikaNodeBase):
@@ -278,7 +278,7 @@ class PikaTextToVideoNodeV2_2(PikaNodeBase):
 
     DESCRIPTION = "Sends a text prompt to the Pika API v2.2 to generate a video."
 
-    def api_call(
+    async def api_call(
         self,
         prompt_text: str,
         negative_prompt: str,
@@ -308,7 +308,7 @@ class PikaTextToVideoNodeV2_2(PikaNodeBase):
             content_type="application/x-www-form-urlencoded",
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikaScenesV2_2(PikaNodeBase):
@@ -358,7 +358,7 @@ class PikaScenesV2_2(PikaNodeBase):
 
     DESCRIPTION = "Combine your images to create a video with the objects in them. Upload multiple images as ingredients and generate a high-quality video that incorporates all of them."
 
-    def api_call(
+    async def api_call(
         self,
         prompt_text: str,
         negative_prompt: str,
@@ -417,7 +417,7 @@ class PikaScenesV2_2(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikAdditionsNode(PikaNodeBase):
@@ -459,7 +459,7 @@ class PikAdditionsNode(PikaNodeBase):
 
     DESCRIPTION = "Add any object or image into your video. Upload a video and specify what you’d like to add to create a seamlessly integrated result."
 
-    def api_call(
+    async def api_call(
         self,
         video: VideoInput,
         image: torch.Tensor,
@@ -503,7 +503,7 @@ class PikAdditionsNode(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikaSwapsNode(PikaNodeBase):
@@ -555,7 +555,7 @@ class PikaSwapsNode(PikaNodeBase):
     DESCRIPTION = "Swap out any object or region of your video with a new image or object. Define areas to replace either with a mask or coordinates."
     RETURN_TYPES = ("VIDEO",)
 
-    def api_call(
+    async def api_call(
         self,
         video: VideoInput,
         image: torch.Tensor,
@@ -610,7 +610,7 @@ class PikaSwapsNode(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikaffectsNode(PikaNodeBase):
@@ -661,7 +661,7 @@ class PikaffectsNode(PikaNodeBase):
 
     DESCRIPTION = "Generate a video with a specific Pikaffect. Supported Pikaffects: Cake-ify, Crumble, Crush, Decapitate, Deflate, Dissolve, Explode, Eye-pop, Inflate, Levitate, Melt, Peel, Poke, Squish, Ta-da, Tear"
 
-    def api_call(
+    async def api_call(
         self,
         image: torch.Tensor,
         pikaffect: str,
@@ -690,7 +690,7 @@ class PikaffectsNode(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 class PikaStartEndFrameNode2_2(PikaNodeBase):
@@ -715,7 +715,7 @@ class PikaStartEndFrameNode2_2(PikaNodeBase):
 
     DESCRIPTION = "Generate a video by combining your first and last frame. Upload two images to define the start and end points, and let the AI create a smooth transition between them."
 
-    def api_call(
+    async def api_call(
         self,
         image_start: torch.Tensor,
         image_end: torch.Tensor,
@@ -755,7 +755,7 @@ class PikaStartEndFrameNode2_2(PikaNodeBase):
             auth_kwargs=kwargs,
         )
 
-        return self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
+        return await self.execute_task(initial_operation, auth_kwargs=kwargs, node_id=unique_id)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -1,3 +1,4 @@
+import asyncio
 from inspect import cleandoc
 from typing import Optional
 from comfy_api_nodes.apis.pixverse_api import (
@@ -23,15 +24,13 @@ from comfy_api_nodes.apis.client import (
     EmptyRequest,
 )
 from comfy_api_nodes.apinode_utils import (
+    download_url_to_video_output_async,
     tensor_to_bytesio,
     validate_string,
 )
 from comfy.comfy_types.node_typing import IO, ComfyNodeABC
-from comfy_api.input_impl import VideoFromFile
 
 import torch
-import requests
-from io import BytesIO
 
 
 AVERAGE_DURATION_T2V = 32
@@ -164,7 +163,7 @@ class PixverseTextToVideoNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         aspect_ratio: str,
@@ -205,7 +204,7 @@ class PixverseTextToVideoNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api = operation.execute()
+        response_api = await operation.execute_async()
 
         if response_api.Resp is None:
             raise Exception(f"PixVerse request failed: '{response_api.ErrMsg}'")
@@ -229,11 +228,9 @@ class PixverseTextToVideoNode(ComfyNodeABC):
             result_url_extractor=get_video_url_from_response,
             estimated_duration=AVERAGE_DURATION_T2V,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        vid_response = requests.get(response_poll.Resp.url)
-
-        return (VideoFromFile(BytesIO(vid_response.content)),)
+        return (await download_url_to_video_output_async(response_poll.Resp.url),)
 
 
 class PixverseImageToVideoNode(ComfyNodeABC):
@@ -302,7 +299,7 @@ class PixverseImageToVideoNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         image: torch.Tensor,
         prompt: str,
@@ -316,7 +313,7 @@ class PixverseImageToVideoNode(ComfyNodeABC):
         **kwargs,
     ):
         validate_string(prompt, strip_whitespace=False)
-        img_id = upload_image_to_pixverse(image, auth_kwargs=kwargs)
+        img_id = await asyncio.to_thread(upload_image_to_pixverse, image, auth_kwargs=kwargs)
 
         # 1080p is limited to 5 seconds duration
         # only normal motion_mode supported for 1080p or for non-5 second duration
@@ -345,7 +342,7 @@ class PixverseImageToVideoNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api = operation.execute()
+        response_api = await operation.execute_async()
 
         if response_api.Resp is None:
             raise Exception(f"PixVerse request failed: '{response_api.ErrMsg}'")
@@ -369,10 +366,9 @@ class PixverseImageToVideoNode(ComfyNodeABC):
             result_url_extractor=get_video_url_from_response,
             estimated_duration=AVERAGE_DURATION_I2V,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        vid_response = requests.get(response_poll.Resp.url)
-        return (VideoFromFile(BytesIO(vid_response.content)),)
+        return (await download_url_to_video_output_async(response_poll.Resp.url),)
 
 
 class PixverseTransitionVideoNode(ComfyNodeABC):
@@ -436,7 +432,7 @@ class PixverseTransitionVideoNode(ComfyNodeABC):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         first_frame: torch.Tensor,
         last_frame: torch.Tensor,
@@ -450,8 +446,8 @@ class PixverseTransitionVideoNode(ComfyNodeABC):
         **kwargs,
     ):
         validate_string(prompt, strip_whitespace=False)
-        first_frame_id = upload_image_to_pixverse(first_frame, auth_kwargs=kwargs)
-        last_frame_id = upload_image_to_pixverse(last_frame, auth_kwargs=kwargs)
+        first_frame_id = await asyncio.to_thread(upload_image_to_pixverse, first_frame, auth_kwargs=kwargs)
+        last_frame_id = await asyncio.to_thread(upload_image_to_pixverse, last_frame, auth_kwargs=kwargs)
 
         # 1080p is limited to 5 seconds duration
         # only normal motion_mode supported for 1080p or for non-5 second duration
@@ -480,7 +476,7 @@ class PixverseTransitionVideoNode(ComfyNodeABC):
             ),
             auth_kwargs=kwargs,
         )
-        response_api = operation.execute()
+        response_api = await operation.execute_async()
 
         if response_api.Resp is None:
             raise Exception(f"PixVerse request failed: '{response_api.ErrMsg}'")
@@ -504,10 +500,9 @@ class PixverseTransitionVideoNode(ComfyNodeABC):
             result_url_extractor=get_video_url_from_response,
             estimated_duration=AVERAGE_DURATION_T2V,
         )
-        response_poll = operation.execute()
+        response_poll = await operation.execute_async()
 
-        vid_response = requests.get(response_poll.Resp.url)
-        return (VideoFromFile(BytesIO(vid_response.content)),)
+        return (await download_url_to_video_output_async(response_poll.Resp.url),)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -6,6 +6,7 @@ Rodin API docs: https://developer.hyper3d.ai/
 """
 
 from __future__ import annotations
+import asyncio
 from inspect import cleandoc
 from comfy.comfy_types.node_typing import IO
 import folder_paths as comfy_paths
@@ -123,7 +124,7 @@ class Rodin3DAPI:
         else:
             return "Generating"
 
-    def CreateGenerateTask(self, images=None, seed=1, material="PBR", quality="medium", tier="Regular", mesh_mode="Quad", **kwargs):
+    async def CreateGenerateTask(self, images=None, seed=1, material="PBR", quality="medium", tier="Regular", mesh_mode="Quad", **kwargs):
         if images == None:
             raise Exception("Rodin 3D generate requires at least 1 image.")
         if len(images) >= 5:
@@ -155,7 +156,7 @@ class Rodin3DAPI:
             auth_kwargs=kwargs,
         )
 
-        response = operation.execute()
+        response = await operation.execute_async()
 
         if create_task_error(response):
             error_message = f"Rodin3D Create 3D generate Task Failed. Message: {response.message}, error: {response.error}"
@@ -168,7 +169,7 @@ class Rodin3DAPI:
         logging.info(f"[ Rodin3D API - Submit Jobs ] UUID: {task_uuid}")
         return task_uuid, subscription_key
 
-    def poll_for_task_status(self, subscription_key, **kwargs) -> Rodin3DCheckStatusResponse:
+    async def poll_for_task_status(self, subscription_key, **kwargs) -> Rodin3DCheckStatusResponse:
 
         path = "/proxy/rodin/api/v2/status"
 
@@ -191,11 +192,11 @@ class Rodin3DAPI:
 
         logging.info("[ Rodin3D API - CheckStatus ] Generate Start!")
 
-        return poll_operation.execute()
+        return await poll_operation.execute_async()
 
 
 
-    def GetRodinDownloadList(self, uuid, **kwargs) -> Rodin3DDownloadResponse:
+    async def GetRodinDownloadList(self, uuid, **kwargs) -> Rodin3DDownloadResponse:
         logging.info("[ Rodin3D API - Downloading ] Generate Successfully!")
 
         path = "/proxy/rodin/api/v2/download"
@@ -212,7 +213,7 @@ class Rodin3DAPI:
             auth_kwargs=kwargs
         )
 
-        return operation.execute()
+        return await operation.execute_async()
 
     def GetQualityAndMode(self, PolyCount):
         if PolyCount == "200K-Triangle":
@@ -285,7 +286,7 @@ class Rodin3D_Regular(Rodin3DAPI):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         Images,
         Seed,
@@ -299,10 +300,10 @@ class Rodin3D_Regular(Rodin3DAPI):
         for i in range(num_images):
             m_images.append(Images[i])
         mesh_mode, quality = self.GetQualityAndMode(Polygon_count)
-        task_uuid, subscription_key = self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
-        self.poll_for_task_status(subscription_key, **kwargs)
-        Download_List = self.GetRodinDownloadList(task_uuid, **kwargs)
-        model = self.DownLoadFiles(Download_List)
+        task_uuid, subscription_key = await self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
+        await self.poll_for_task_status(subscription_key, **kwargs)
+        Download_List = await self.GetRodinDownloadList(task_uuid, **kwargs)
+        model = await asyncio.to_thread(self.DownLoadFiles, Download_List)
 
         return (model,)
 
@@ -328,7 +329,7 @@ class Rodin3D_Detail(Rodin3DAPI):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         Images,
         Seed,
@@ -342,10 +343,10 @@ class Rodin3D_Detail(Rodin3DAPI):
         for i in range(num_images):
             m_images.append(Images[i])
         mesh_mode, quality = self.GetQualityAndMode(Polygon_count)
-        task_uuid, subscription_key = self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
-        self.poll_for_task_status(subscription_key, **kwargs)
-        Download_List = self.GetRodinDownloadList(task_uuid, **kwargs)
-        model = self.DownLoadFiles(Download_List)
+        task_uuid, subscription_key = await self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
+        await self.poll_for_task_status(subscription_key, **kwargs)
+        Download_List = await self.GetRodinDownloadList(task_uuid, **kwargs)
+        model = await asyncio.to_thread(self.DownLoadFiles, Download_List)
 
         return (model,)
 
@@ -371,7 +372,7 @@ class Rodin3D_Smooth(Rodin3DAPI):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         Images,
         Seed,
@@ -385,10 +386,10 @@ class Rodin3D_Smooth(Rodin3DAPI):
         for i in range(num_images):
             m_images.append(Images[i])
         mesh_mode, quality = self.GetQualityAndMode(Polygon_count)
-        task_uuid, subscription_key = self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
-        self.poll_for_task_status(subscription_key, **kwargs)
-        Download_List = self.GetRodinDownloadList(task_uuid, **kwargs)
-        model = self.DownLoadFiles(Download_List)
+        task_uuid, subscription_key = await self.CreateGenerateTask(images=m_images, seed=Seed, material=Material_Type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
+        await self.poll_for_task_status(subscription_key, **kwargs)
+        Download_List = await self.GetRodinDownloadList(task_uuid, **kwargs)
+        model = await asyncio.to_thread(self.DownLoadFiles, Download_List)
 
         return (model,)
 
@@ -423,7 +424,7 @@ class Rodin3D_Sketch(Rodin3DAPI):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         Images,
         Seed,
@@ -437,10 +438,10 @@ class Rodin3D_Sketch(Rodin3DAPI):
         material_type = "PBR"
         quality = "medium"
         mesh_mode = "Quad"
-        task_uuid, subscription_key = self.CreateGenerateTask(images=m_images, seed=Seed, material=material_type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
-        self.poll_for_task_status(subscription_key, **kwargs)
-        Download_List = self.GetRodinDownloadList(task_uuid, **kwargs)
-        model = self.DownLoadFiles(Download_List)
+        task_uuid, subscription_key = await self.CreateGenerateTask(images=m_images, seed=Seed, material=material_type, quality=quality, tier=tier, mesh_mode=mesh_mode, **kwargs)
+        await self.poll_for_task_status(subscription_key, **kwargs)
+        Download_List = await self.GetRodinDownloadList(task_uuid, **kwargs)
+        model = await asyncio.to_thread(self.DownLoadFiles, Download_List)
 
         return (model,)
 
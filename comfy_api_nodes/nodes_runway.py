@@ -11,6 +11,7 @@ User Guides:
 
 """
 
+import asyncio
 from typing import Union, Optional, Any
 from enum import Enum
 
@@ -41,10 +42,10 @@ from comfy_api_nodes.apis.client import (
 )
 from comfy_api_nodes.apinode_utils import (
     upload_images_to_comfyapi,
-    download_url_to_video_output,
+    download_url_to_video_output_async,
     image_tensor_pair_to_batch,
     validate_string,
-    download_url_to_image_tensor,
+    download_url_to_image_tensor_async,
 )
 from comfy_api_nodes.mapper_utils import model_field_to_node_input
 from comfy_api.input_impl import VideoFromFile
@@ -99,14 +100,14 @@ def validate_input_image(image: torch.Tensor) -> bool:
     return image.shape[2] < 8000 and image.shape[1] < 8000
 
 
-def poll_until_finished(
+async def poll_until_finished(
     auth_kwargs: dict[str, str],
     api_endpoint: ApiEndpoint[Any, TaskStatusResponse],
     estimated_duration: Optional[int] = None,
     node_id: Optional[str] = None,
 ) -> TaskStatusResponse:
     """Polls the Runway API endpoint until the task reaches a terminal state, then returns the response."""
-    return PollingOperation(
+    return await PollingOperation(
         poll_endpoint=api_endpoint,
         completed_statuses=[
             TaskStatus.SUCCEEDED.value,
@@ -121,7 +122,7 @@ def poll_until_finished(
         estimated_duration=estimated_duration,
         node_id=node_id,
         progress_extractor=extract_progress_from_task_status,
-    ).execute()
+    ).execute_async()
 
 
 def extract_progress_from_task_status(
@@ -167,11 +168,11 @@ class RunwayVideoGenNode(ComfyNodeABC):
             )
         return True
 
-    def get_response(
+    async def get_response(
         self, task_id: str, auth_kwargs: dict[str, str], node_id: Optional[str] = None
     ) -> RunwayImageToVideoResponse:
         """Poll the task status until it is finished then get the response."""
-        return poll_until_finished(
+        return await poll_until_finished(
             auth_kwargs,
             ApiEndpoint(
                 path=f"{PATH_GET_TASK_STATUS}/{task_id}",
@@ -183,7 +184,7 @@ class RunwayVideoGenNode(ComfyNodeABC):
             node_id=node_id,
         )
 
-    def generate_video(
+    async def generate_video(
         self,
         request: RunwayImageToVideoRequest,
         auth_kwargs: dict[str, str],
@@ -200,15 +201,15 @@ class RunwayVideoGenNode(ComfyNodeABC):
             auth_kwargs=auth_kwargs,
         )
 
-        initial_response = initial_operation.execute()
+        initial_response = await initial_operation.execute_async()
         self.validate_task_created(initial_response)
         task_id = initial_response.id
 
-        final_response = self.get_response(task_id, auth_kwargs, node_id)
+        final_response = await self.get_response(task_id, auth_kwargs, node_id)
         self.validate_response(final_response)
 
         video_url = get_video_url_from_task_status(final_response)
-        return (download_url_to_video_output(video_url),)
+        return (await download_url_to_video_output_async(video_url),)
 
 
 class RunwayImageToVideoNodeGen3a(RunwayVideoGenNode):
@@ -250,7 +251,7 @@ class RunwayImageToVideoNodeGen3a(RunwayVideoGenNode):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         start_frame: torch.Tensor,
@@ -265,7 +266,8 @@ class RunwayImageToVideoNodeGen3a(RunwayVideoGenNode):
         validate_input_image(start_frame)
 
         # Upload image
-        download_urls = upload_images_to_comfyapi(
+        download_urls = await asyncio.to_thread(
+            upload_images_to_comfyapi,
             start_frame,
             max_images=1,
             mime_type="image/png",
@@ -274,7 +276,7 @@ class RunwayImageToVideoNodeGen3a(RunwayVideoGenNode):
         if len(download_urls) != 1:
             raise RunwayApiError("Failed to upload one or more images to comfy api.")
 
-        return self.generate_video(
+        return await self.generate_video(
             RunwayImageToVideoRequest(
                 promptText=prompt,
                 seed=seed,
@@ -333,7 +335,7 @@ class RunwayImageToVideoNodeGen4(RunwayVideoGenNode):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         start_frame: torch.Tensor,
@@ -348,7 +350,8 @@ class RunwayImageToVideoNodeGen4(RunwayVideoGenNode):
         validate_input_image(start_frame)
 
         # Upload image
-        download_urls = upload_images_to_comfyapi(
+        download_urls = await asyncio.to_thread(
+            upload_images_to_comfyapi,
             start_frame,
             max_images=1,
             mime_type="image/png",
@@ -357,7 +360,7 @@ class RunwayImageToVideoNodeGen4(RunwayVideoGenNode):
         if len(download_urls) != 1:
             raise RunwayApiError("Failed to upload one or more images to comfy api.")
 
-        return self.generate_video(
+        return await self.generate_video(
             RunwayImageToVideoRequest(
                 promptText=prompt,
                 seed=seed,
@@ -382,10 +385,10 @@ class RunwayFirstLastFrameNode(RunwayVideoGenNode):
 
     DESCRIPTION = "Upload first and last keyframes, draft a prompt, and generate a video. More complex transitions, such as cases where the Last frame is completely different from the First frame, may benefit from the longer 10s duration. This would give the generation more time to smoothly transition between the two inputs. Before diving in, review these best practices to ensure that your input selections will set your generation up for success: https://help.runwayml.com/hc/en-us/articles/34170748696595-Creating-with-Keyframes-on-Gen-3."
 
-    def get_response(
+    async def get_response(
         self, task_id: str, auth_kwargs: dict[str, str], node_id: Optional[str] = None
     ) -> RunwayImageToVideoResponse:
-        return poll_until_finished(
+        return await poll_until_finished(
             auth_kwargs,
             ApiEndpoint(
                 path=f"{PATH_GET_TASK_STATUS}/{task_id}",
@@ -437,7 +440,7 @@ class RunwayFirstLastFrameNode(RunwayVideoGenNode):
             },
         }
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         start_frame: torch.Tensor,
@@ -455,7 +458,8 @@ class RunwayFirstLastFrameNode(RunwayVideoGenNode):
 
         # Upload images
         stacked_input_images = image_tensor_pair_to_batch(start_frame, end_frame)
-        download_urls = upload_images_to_comfyapi(
+        download_urls = await asyncio.to_thread(
+            upload_images_to_comfyapi,
             stacked_input_images,
             max_images=2,
             mime_type="image/png",
@@ -464,7 +468,7 @@ class RunwayFirstLastFrameNode(RunwayVideoGenNode):
         if len(download_urls) != 2:
             raise RunwayApiError("Failed to upload one or more images to comfy api.")
 
-        return self.generate_video(
+        return await self.generate_video(
             RunwayImageToVideoRequest(
                 promptText=prompt,
                 seed=seed,
@@ -543,11 +547,11 @@ class RunwayTextToImageNode(ComfyNodeABC):
             )
         return True
 
-    def get_response(
+    async def get_response(
         self, task_id: str, auth_kwargs: dict[str, str], node_id: Optional[str] = None
     ) -> TaskStatusResponse:
         """Poll the task status until it is finished then get the response."""
-        return poll_until_finished(
+        return await poll_until_finished(
             auth_kwargs,
             ApiEndpoint(
                 path=f"{PATH_GET_TASK_STATUS}/{task_id}",
@@ -559,7 +563,7 @@ class RunwayTextToImageNode(ComfyNodeABC):
             node_id=node_id,
         )
 
-    def api_call(
+    async def api_call(
         self,
         prompt: str,
         ratio: str,
@@ -574,7 +578,8 @@ class RunwayTextToImageNode(ComfyNodeABC):
         reference_images = None
         if reference_image is not None:
             validate_input_image(reference_image)
-            download_urls = upload_images_to_comfyapi(
+            download_urls = await asyncio.to_thread(
+            upload_images_to_comfyapi,
                 reference_image,
                 max_images=1,
                 mime_type="image/png",
@@ -605,19 +610,19 @@ class RunwayTextToImageNode(ComfyNodeABC):
             auth_kwargs=kwargs,
         )
 
-        initial_response = initial_operation.execute()
+        initial_response = await initial_operation.execute_async()
         self.validate_task_created(initial_response)
         task_id = initial_response.id
 
         # Poll for completion
-        final_response = self.get_response(
+        final_response = await self.get_response(
             task_id, auth_kwargs=kwargs, node_id=unique_id
         )
         self.validate_response(final_response)
 
         # Download and return image
         image_url = get_image_url_from_task_status(final_response)
-        return (download_url_to_image_tensor(image_url),)
+        return (await download_url_to_image_tensor_async(image_url),)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from folder_paths import get_output_directory
 from comfy_api_nodes.mapper_utils import model_field_to_node_input
 from comfy.comfy_types.node_typing import IO
@@ -33,7 +34,7 @@ from comfy_api_nodes.apis.client import (
 )
 from comfy_api_nodes.apinode_utils import (
     upload_images_to_comfyapi,
-    download_url_to_bytesio,
+    download_url_to_bytesio_async,
 )
 
 
@@ -49,7 +50,7 @@ def get_model_url_from_response(response: TripoTaskResponse) -> str:
     raise RuntimeError(f"Failed to get model url from response: {response}")
 
 
-def poll_until_finished(
+async def poll_until_finished(
     kwargs: dict[str, str],
     response: TripoTaskResponse,
 ) -> tuple[str, str]:
@@ -57,7 +58,7 @@ def poll_until_finished(
     if response.code != 0:
         raise RuntimeError(f"Failed to generate mesh: {response.error}")
     task_id = response.data.task_id
-    response_poll = PollingOperation(
+    response_poll = await PollingOperation(
         poll_endpoint=ApiEndpoint(
             path=f"/proxy/tripo/v2/openapi/task/{task_id}",
             method=HttpMethod.GET,
@@ -77,10 +78,10 @@ def poll_until_finished(
         node_id=kwargs["unique_id"],
         result_url_extractor=get_model_url_from_response,
         progress_extractor=lambda x: x.data.progress,
-    ).execute()
+    ).execute_async()
     if response_poll.data.status == TripoTaskStatus.SUCCESS:
         url = get_model_url_from_response(response_poll)
-        bytesio = download_url_to_bytesio(url)
+        bytesio = await download_url_to_bytesio_async(url)
         # Save the downloaded model file
         model_file = f"tripo_model_{task_id}.glb"
         with open(os.path.join(get_output_directory(), model_file), "wb") as f:
@@ -126,11 +127,11 @@ class TripoTextToModelNode:
     API_NODE = True
     OUTPUT_NODE = True
 
-    def generate_mesh(self, prompt, negative_prompt=None, model_version=None, style=None, texture=None, pbr=None, image_seed=None, model_seed=None, texture_seed=None, texture_quality=None, face_limit=None, quad=None, **kwargs):
+    async def generate_mesh(self, prompt, negative_prompt=None, model_version=None, style=None, texture=None, pbr=None, image_seed=None, model_seed=None, texture_seed=None, texture_quality=None, face_limit=None, quad=None, **kwargs):
         style_enum = None if style == "None" else style
         if not prompt:
             raise RuntimeError("Prompt is required")
-        response = SynchronousOperation(
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -154,8 +155,8 @@ class TripoTextToModelNode:
                 quad=quad
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 class TripoImageToModelNode:
     """
@@ -195,12 +196,12 @@ class TripoImageToModelNode:
     API_NODE = True
     OUTPUT_NODE = True
 
-    def generate_mesh(self, image, model_version=None, style=None, texture=None, pbr=None, model_seed=None, orientation=None, texture_alignment=None, texture_seed=None, texture_quality=None, face_limit=None, quad=None, **kwargs):
+    async def generate_mesh(self, image, model_version=None, style=None, texture=None, pbr=None, model_seed=None, orientation=None, texture_alignment=None, texture_seed=None, texture_quality=None, face_limit=None, quad=None, **kwargs):
         style_enum = None if style == "None" else style
         if image is None:
             raise RuntimeError("Image is required")
-        tripo_file = upload_image_to_tripo(image, **kwargs)
-        response = SynchronousOperation(
+        tripo_file = await asyncio.to_thread(upload_image_to_tripo, image, **kwargs)
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -224,8 +225,8 @@ class TripoImageToModelNode:
                 quad=quad
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 class TripoMultiviewToModelNode:
     """
@@ -267,7 +268,7 @@ class TripoMultiviewToModelNode:
     API_NODE = True
     OUTPUT_NODE = True
 
-    def generate_mesh(self, image, image_left=None, image_back=None, image_right=None, model_version=None, orientation=None, texture=None, pbr=None, model_seed=None, texture_seed=None, texture_quality=None, texture_alignment=None, face_limit=None, quad=None, **kwargs):
+    async def generate_mesh(self, image, image_left=None, image_back=None, image_right=None, model_version=None, orientation=None, texture=None, pbr=None, model_seed=None, texture_seed=None, texture_quality=None, texture_alignment=None, face_limit=None, quad=None, **kwargs):
         if image is None:
             raise RuntimeError("front image for multiview is required")
         images = []
@@ -282,11 +283,11 @@ class TripoMultiviewToModelNode:
         for image_name in ["image", "image_left", "image_back", "image_right"]:
             image_ = image_dict[image_name]
             if image_ is not None:
-                tripo_file = upload_image_to_tripo(image_, **kwargs)
+                tripo_file = await asyncio.to_thread(upload_image_to_tripo, image_, **kwargs)
                 images.append(tripo_file)
             else:
                 images.append(TripoFileEmptyReference())
-        response = SynchronousOperation(
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -308,8 +309,8 @@ class TripoMultiviewToModelNode:
                 quad=quad,
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 class TripoTextureNode:
     @classmethod
@@ -340,8 +341,8 @@ class TripoTextureNode:
     OUTPUT_NODE = True
     AVERAGE_DURATION = 80
 
-    def generate_mesh(self, model_task_id, texture=None, pbr=None, texture_seed=None, texture_quality=None, texture_alignment=None, **kwargs):
-        response = SynchronousOperation(
+    async def generate_mesh(self, model_task_id, texture=None, pbr=None, texture_seed=None, texture_quality=None, texture_alignment=None, **kwargs):
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -357,8 +358,8 @@ class TripoTextureNode:
                 texture_alignment=texture_alignment
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 
 class TripoRefineNode:
@@ -387,8 +388,8 @@ class TripoRefineNode:
     OUTPUT_NODE = True
     AVERAGE_DURATION = 240
 
-    def generate_mesh(self, model_task_id, **kwargs):
-        response = SynchronousOperation(
+    async def generate_mesh(self, model_task_id, **kwargs):
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -399,8 +400,8 @@ class TripoRefineNode:
                 draft_model_task_id=model_task_id
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 
 class TripoRigNode:
@@ -425,8 +426,8 @@ class TripoRigNode:
     OUTPUT_NODE = True
     AVERAGE_DURATION = 180
 
-    def generate_mesh(self, original_model_task_id, **kwargs):
-        response = SynchronousOperation(
+    async def generate_mesh(self, original_model_task_id, **kwargs):
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -439,8 +440,8 @@ class TripoRigNode:
                 spec="tripo"
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 class TripoRetargetNode:
     @classmethod
@@ -475,8 +476,8 @@ class TripoRetargetNode:
     OUTPUT_NODE = True
     AVERAGE_DURATION = 30
 
-    def generate_mesh(self, animation, original_model_task_id, **kwargs):
-        response = SynchronousOperation(
+    async def generate_mesh(self, animation, original_model_task_id, **kwargs):
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -490,8 +491,8 @@ class TripoRetargetNode:
                 bake_animation=True
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 class TripoConversionNode:
     @classmethod
@@ -529,10 +530,10 @@ class TripoConversionNode:
     OUTPUT_NODE = True
     AVERAGE_DURATION = 30
 
-    def generate_mesh(self, original_model_task_id, format, quad, face_limit, texture_size, texture_format, **kwargs):
+    async def generate_mesh(self, original_model_task_id, format, quad, face_limit, texture_size, texture_format, **kwargs):
         if not original_model_task_id:
             raise RuntimeError("original_model_task_id is required")
-        response = SynchronousOperation(
+        response = await SynchronousOperation(
             endpoint=ApiEndpoint(
                 path="/proxy/tripo/v2/openapi/task",
                 method=HttpMethod.POST,
@@ -548,8 +549,8 @@ class TripoConversionNode:
                 texture_format=texture_format if texture_format != "JPEG" else None
             ),
             auth_kwargs=kwargs,
-        ).execute()
-        return poll_until_finished(kwargs, response)
+        ).execute_async()
+        return await poll_until_finished(kwargs, response)
 
 NODE_CLASS_MAPPINGS = {
     "TripoTextToModelNode": TripoTextToModelNode,
@@ -1,7 +1,6 @@
 import io
 import logging
 import base64
-import requests
 import torch
 from typing import Optional
 
@@ -21,6 +20,7 @@ from comfy_api_nodes.apis.client import (
 )
 
 from comfy_api_nodes.apinode_utils import (
+    download_url_to_bytesio_async,
     downscale_image_tensor,
     tensor_to_base64_string
 )
@@ -144,7 +144,7 @@ class VeoVideoGenerationNode(ComfyNodeABC):
     DESCRIPTION = "Generates videos from text prompts using Google's Veo API"
     API_NODE = True
 
-    def generate_video(
+    async def generate_video(
         self,
         prompt,
         aspect_ratio="16:9",
@@ -204,7 +204,7 @@ class VeoVideoGenerationNode(ComfyNodeABC):
             auth_kwargs=kwargs,
         )
 
-        initial_response = initial_operation.execute()
+        initial_response = await initial_operation.execute_async()
         operation_name = initial_response.name
 
         logging.info(f"Veo generation started with operation name: {operation_name}")
@@ -243,7 +243,7 @@ class VeoVideoGenerationNode(ComfyNodeABC):
         )
 
         # Execute the polling operation
-        poll_response = poll_operation.execute()
+        poll_response = await poll_operation.execute_async()
 
         # Now check for errors in the final response
         # Check for error in poll response
@@ -279,8 +279,7 @@ class VeoVideoGenerationNode(ComfyNodeABC):
             elif hasattr(video, 'gcsUri') and video.gcsUri:
                 # Download from URL
                 video_url = video.gcsUri
-                video_response = requests.get(video_url)
-                video_data = video_response.content
+                video_data = (await download_url_to_bytesio_async(video_url)).getvalue()
             else:
                 raise Exception("Video returned but no data or URL was provided")
         else:
@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+import contextvars
+import threading
+
+import aiohttp
+import torch
+
+# Coroutine node functions all run on one event loop in a background thread, so a node that is
+# waiting on the network doesn't hold up the executor thread or the other async nodes.
+_loop = None
+_loop_lock = threading.Lock()
+_session = None
+
+
+def _run_loop(loop, started):
+    asyncio.set_event_loop(loop)
+    # Same as the inference_mode the executor wraps sync nodes in, but for every task on this thread
+    torch.set_grad_enabled(False)
+    started.set()
+    loop.run_forever()
+
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            threading.Thread(target=_run_loop, args=(loop, started), daemon=True, name="comfy_async").start()
+            started.wait()
+            _loop = loop
+        return _loop
+
+
+async def _run_in_context(coro, context):
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def get_session():
+    """
+    The aiohttp session of the async node loop, so the nodes share one connection pool. Only usable by coroutines
+    running on that loop, it is closed by shutdown().
+    """
+    global _session
+    if asyncio.get_running_loop() is not _loop:
+        raise RuntimeError("The shared aiohttp session can only be used on the async node loop.")
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+
+async def _close_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def shutdown():
+    """Closes the shared aiohttp session and stops the async node loop, if it was started."""
+    global _loop
+    with _loop_lock:
+        loop = _loop
+        _loop = None
+    if loop is None:
+        return
+    asyncio.run_coroutine_threadsafe(_close_session(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def submit(coro):
+    """
+    Schedules coro on the async node loop and returns a concurrent.futures.Future for its result. coro sees the context
+    variables of the calling thread (like the prompt worker it runs for, see comfy.model_management.current_worker).
+    """
+    return asyncio.run_coroutine_threadsafe(_run_in_context(coro, contextvars.copy_context()), get_loop())
+
+
+def run(coro):
+    """Runs coro on the async node loop and blocks the calling thread until it is done."""
+    return submit(coro).result()
+
+
+async def resolve_results(results):
+    """Awaits the awaitable items of results concurrently, returning a list with their values in place."""
+    pending = [r for r in results if inspect.isawaitable(r)]
+    if len(pending) == 0:
+        return results
+    values = iter(await asyncio.gather(*pending))
+    return [next(values) if inspect.isawaitable(r) else r for r in results]
@@ -1,12 +1,25 @@
+import os
+import inspect
 import itertools
+import hashlib
+import math
+import sys
+import time
 from typing import Sequence, Mapping, Dict
 from comfy_execution.graph import DynamicPrompt
 
+import torch
 import nodes
+import folder_paths
+import comfy.model_management
+import comfyui_version
 
 from comfy_execution.graph_utils import is_link
 
 NODE_CLASS_CONTAINS_UNIQUE_ID: Dict[str, bool] = {}
+NODE_CLASS_IDENTITY: Dict[str, object] = {}
+# Nodes that return these without taking any of them as input load models from files
+MODEL_TYPES = {"MODEL", "CLIP", "VAE", "CONTROL_NET", "CLIP_VISION", "STYLE_MODEL", "GLIGEN", "UPSCALE_MODEL", "LORA_MODEL", "PHOTOMAKER", "AUDIO_ENCODER", "MODEL_PATCH"}
 
 
 def include_unique_id_in_input(class_type: str) -> bool:
@@ -16,8 +29,39 @@ def include_unique_id_in_input(class_type: str) -> bool:
     NODE_CLASS_CONTAINS_UNIQUE_ID[class_type] = "UNIQUE_ID" in class_def.INPUT_TYPES().get("hidden", {}).values()
     return NODE_CLASS_CONTAINS_UNIQUE_ID[class_type]
 
+def file_identity(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+def _input_types(class_def):
+    input_types = class_def.INPUT_TYPES()
+    for section in ("required", "optional"):
+        for spec in input_types.get(section, {}).values():
+            if isinstance(spec, (list, tuple)) and len(spec) > 0 and isinstance(spec[0], str):
+                yield spec[0]
+
+def node_class_identity(class_type):
+    """
+    What the outputs of class_type persisted on disk depend on besides the inputs of the node: the ComfyUI version, the
+    CACHE_VERSION of the class if it has one and the file it is defined in, so updating ComfyUI or a custom node makes
+    new digests. None for classes that load models from files that PREFETCH_FILES doesn't identify.
+    """
+    if class_type in NODE_CLASS_IDENTITY:
+        return NODE_CLASS_IDENTITY[class_type]
+    class_def = nodes.NODE_CLASS_MAPPINGS[class_type]
+    identity = None
+    try:
+        loads_unknown_files = not getattr(class_def, "PREFETCH_FILES", None) and MODEL_TYPES.intersection(getattr(class_def, "RETURN_TYPES", ())) \
+            and MODEL_TYPES.isdisjoint(_input_types(class_def))
+        if not loads_unknown_files:
+            identity = (comfyui_version.__version__, to_hashable(getattr(class_def, "CACHE_VERSION", None)), file_identity(inspect.getfile(class_def)))
+    except Exception:
+        pass
+    NODE_CLASS_IDENTITY[class_type] = identity
+    return identity
+
 class CacheKeySet:
-    def __init__(self, dynprompt, node_ids, is_changed_cache):
+    def __init__(self, dynprompt, node_ids, is_changed_cache, previous=None):
         self.keys = {}
         self.subcache_keys = {}
 
@@ -39,6 +83,11 @@ class CacheKeySet:
     def get_subcache_key(self, node_id):
         return self.subcache_keys.get(node_id, None)
 
+    # A digest of the data key that is stable across processes, or None if the
+    # output of this node shouldn't be persisted.
+    def get_data_digest(self, node_id):
+        return None
+
 class Unhashable:
     def __init__(self):
         self.value = float("NaN")
@@ -56,8 +105,35 @@ def to_hashable(obj):
         # TODO - Support other objects like tensors?
         return Unhashable()
 
+def to_stable_repr(hashable):
+    # Python's hash() is salted per process, so build a canonical string out of the
+    # to_hashable() structure instead. Returns None for values that can't be persisted.
+    if isinstance(hashable, Unhashable):
+        return None
+    if isinstance(hashable, float) and math.isnan(hashable):
+        return None
+    if isinstance(hashable, (int, float, str, bool, type(None))):
+        return repr((type(hashable).__name__, hashable))
+    if isinstance(hashable, (frozenset, tuple)):
+        items = []
+        for x in hashable:
+            r = to_stable_repr(x)
+            if r is None:
+                return None
+            items.append(r)
+        if isinstance(hashable, frozenset):
+            return "{" + ",".join(sorted(items)) + "}"
+        return "(" + ",".join(items) + ")"
+    return None
+
+def to_stable_digest(hashable):
+    r = to_stable_repr(hashable)
+    if r is None:
+        return None
+    return hashlib.sha256(r.encode("utf-8")).hexdigest()
+
 class CacheKeySetID(CacheKeySet):
-    def __init__(self, dynprompt, node_ids, is_changed_cache):
+    def __init__(self, dynprompt, node_ids, is_changed_cache, previous=None):
         super().__init__(dynprompt, node_ids, is_changed_cache)
         self.dynprompt = dynprompt
         self.add_keys(node_ids)
@@ -73,15 +149,41 @@ class CacheKeySetID(CacheKeySet):
             self.subcache_keys[node_id] = (node_id, node["class_type"])
 
 class CacheKeySetInputSignature(CacheKeySet):
-    def __init__(self, dynprompt, node_ids, is_changed_cache):
+    """
+    Keys every node by its input signature. Signatures are built Merkle style: a node's
+    signature contains the signatures of the nodes it links to, so each node is only
+    signed once per prompt, in topological order. Nodes whose class, IS_CHANGED result,
+    inputs and parent signatures are the same as in the previous prompt reuse the previous
+    signature object without rehashing their inputs.
+    """
+    def __init__(self, dynprompt, node_ids, is_changed_cache, previous=None):
         super().__init__(dynprompt, node_ids, is_changed_cache)
         self.dynprompt = dynprompt
         self.is_changed_cache = is_changed_cache
+        self.signatures = {} # Signatures of every node visited, including ancestors
+        self.immediate = {} # node_id -> signature items, links refer to ancestor node ids
+        self.memo = {} # node_id -> (inputs, class_type, is_changed, ancestor signatures, signature, immediate items)
+        self.digests = {}
+        self.node_digests = {}
+        self.previous_memo = previous.memo if isinstance(previous, CacheKeySetInputSignature) else {}
         self.add_keys(node_ids)
+        self.previous_memo = {}
 
     def include_node_id_in_input(self) -> bool:
         return False
 
+    def get_data_digest(self, node_id):
+        if node_id in self.digests:
+            return self.digests[node_id]
+        digest = None
+        if node_id in self.keys:
+            class_def = nodes.NODE_CLASS_MAPPINGS[self.dynprompt.get_node(node_id)["class_type"]]
+            # Output nodes have side effects and non idempotent nodes must run every time.
+            if not getattr(class_def, "OUTPUT_NODE", False) and not getattr(class_def, "NOT_IDEMPOTENT", False):
+                digest = self.get_node_digest(node_id)
+        self.digests[node_id] = digest
+        return digest
+
     def add_keys(self, node_ids):
         for node_id in node_ids:
             if node_id in self.keys:
@@ -93,53 +195,132 @@ class CacheKeySetInputSignature(CacheKeySet):
             self.subcache_keys[node_id] = (node_id, node["class_type"])
 
     def get_node_signature(self, dynprompt, node_id):
-        signature = []
-        ancestors, order_mapping = self.get_ordered_ancestry(dynprompt, node_id)
-        signature.append(self.get_immediate_node_signature(dynprompt, node_id, order_mapping))
-        for ancestor_id in ancestors:
-            signature.append(self.get_immediate_node_signature(dynprompt, ancestor_id, order_mapping))
-        return to_hashable(signature)
-
-    def get_immediate_node_signature(self, dynprompt, node_id, ancestor_order_mapping):
+        for current_id in self.get_unsigned_ancestry(dynprompt, node_id):
+            self.signatures[current_id] = self.sign_node(dynprompt, current_id)
+        return self.signatures[node_id]
+
+    def sign_node(self, dynprompt, node_id):
         if not dynprompt.has_node(node_id):
             # This node doesn't exist -- we can't cache it.
-            return [float("NaN")]
+            return to_hashable([float("NaN")])
+        node = dynprompt.get_node(node_id)
+        inputs = node["inputs"]
+        class_type = node["class_type"]
+        is_changed = self.is_changed_cache.get(node_id)
+        ancestor_signatures = tuple(self.signatures.get(inputs[key][0]) for key in inputs if is_link(inputs[key]))
+
+        previous = self.previous_memo.get(node_id, None)
+        if previous is not None and previous[1] == class_type and previous[2] == is_changed and previous[0] == inputs \
+                and len(previous[3]) == len(ancestor_signatures) and all(a is b for a, b in zip(previous[3], ancestor_signatures)):
+            signature = previous[4]
+            self.immediate[node_id] = self.previous_memo[node_id][5]
+        else:
+            items = self.get_immediate_node_signature(dynprompt, node_id, is_changed)
+            self.immediate[node_id] = items
+            signature = frozenset(enumerate(self.resolve_links(items, self.signatures)))
+        self.memo[node_id] = (inputs, class_type, is_changed, ancestor_signatures, signature, self.immediate[node_id])
+        return signature
+
+    def get_immediate_node_signature(self, dynprompt, node_id, is_changed):
         node = dynprompt.get_node(node_id)
         class_type = node["class_type"]
         class_def = nodes.NODE_CLASS_MAPPINGS[class_type]
-        signature = [class_type, self.is_changed_cache.get(node_id)]
+        signature = [class_type, to_hashable(is_changed)]
         if self.include_node_id_in_input() or (hasattr(class_def, "NOT_IDEMPOTENT") and class_def.NOT_IDEMPOTENT) or include_unique_id_in_input(class_type):
             signature.append(node_id)
         inputs = node["inputs"]
         for key in sorted(inputs.keys()):
             if is_link(inputs[key]):
                 (ancestor_id, ancestor_socket) = inputs[key]
-                ancestor_index = ancestor_order_mapping[ancestor_id]
-                signature.append((key,("ANCESTOR", ancestor_index, ancestor_socket)))
+                signature.append((key, ("ANCESTOR", ancestor_id, ancestor_socket)))
             else:
-                signature.append((key, inputs[key]))
+                signature.append((key, to_hashable(inputs[key])))
         return signature
 
-    # This function returns a list of all ancestors of the given node. The order of the list is
-    # deterministic based on which specific inputs the ancestor is connected by.
-    def get_ordered_ancestry(self, dynprompt, node_id):
-        ancestors = []
-        order_mapping = {}
-        self.get_ordered_ancestry_internal(dynprompt, node_id, ancestors, order_mapping)
-        return ancestors, order_mapping
-
-    def get_ordered_ancestry_internal(self, dynprompt, node_id, ancestors, order_mapping):
-        if not dynprompt.has_node(node_id):
-            return
-        inputs = dynprompt.get_node(node_id)["inputs"]
-        input_keys = sorted(inputs.keys())
-        for key in input_keys:
-            if is_link(inputs[key]):
-                ancestor_id = inputs[key][0]
-                if ancestor_id not in order_mapping:
-                    ancestors.append(ancestor_id)
-                    order_mapping[ancestor_id] = len(ancestors) - 1
-                    self.get_ordered_ancestry_internal(dynprompt, ancestor_id, ancestors, order_mapping)
+    @staticmethod
+    def get_link_ancestor(item):
+        # Links are the only tuples in immediate signatures, to_hashable never produces them.
+        if isinstance(item, tuple) and isinstance(item[1], tuple) and len(item[1]) == 3 and item[1][0] == "ANCESTOR":
+            return item[1][1]
+        return None
+
+    def resolve_links(self, items, ancestor_values):
+        # Replaces the ancestor node ids in immediate signature items with their signature or digest.
+        resolved = []
+        for item in items:
+            ancestor_id = self.get_link_ancestor(item)
+            if ancestor_id is not None:
+                item = (item[0], ("ANCESTOR", ancestor_values.get(ancestor_id), item[1][2]))
+            resolved.append(item)
+        return resolved
+
+    # Returns node_id and any of its ancestors that have not been signed yet, ancestors first.
+    def get_unsigned_ancestry(self, dynprompt, node_id):
+        order = []
+        seen = set()
+        stack = [(node_id, False)]
+        while len(stack) > 0:
+            current_id, expanded = stack.pop()
+            if expanded:
+                order.append(current_id)
+                continue
+            if current_id in self.signatures or current_id in seen:
+                continue
+            seen.add(current_id)
+            stack.append((current_id, True))
+            if dynprompt.has_node(current_id):
+                inputs = dynprompt.get_node(current_id)["inputs"]
+                for key in sorted(inputs.keys(), reverse=True):
+                    if is_link(inputs[key]):
+                        stack.append((inputs[key][0], False))
+        return order
+
+    def get_node_digest(self, node_id):
+        # Digests are chained the same way as signatures, so the ancestry isn't serialized again for every node.
+        pending = [node_id]
+        while len(pending) > 0:
+            current_id = pending[-1]
+            if current_id in self.node_digests:
+                pending.pop()
+                continue
+            items = self.immediate.get(current_id, None)
+            if items is None:
+                self.node_digests[current_id] = None
+                continue
+            ancestors = [a for a in map(self.get_link_ancestor, items) if a is not None]
+            missing = [a for a in ancestors if a not in self.node_digests and a not in pending]
+            if len(missing) > 0:
+                pending.extend(missing)
+                continue
+            identity = self.get_node_identity(current_id)
+            if identity is None or any(self.node_digests.get(a, None) is None for a in ancestors):
+                self.node_digests[current_id] = None
+            else:
+                self.node_digests[current_id] = to_stable_digest((tuple(self.resolve_links(items, self.node_digests)), identity))
+        return self.node_digests[node_id]
+
+    def get_node_identity(self, node_id):
+        # The class identity and the size and mtime of the model files the node loads, None if they can't be identified.
+        node = self.dynprompt.get_node(node_id)
+        class_identity = node_class_identity(node["class_type"])
+        if class_identity is None:
+            return None
+        files = []
+        prefetch_files = getattr(nodes.NODE_CLASS_MAPPINGS[node["class_type"]], "PREFETCH_FILES", None) or {}
+        for input_name, folder_name in sorted(prefetch_files.items()):
+            value = node["inputs"].get(input_name, None)
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                return None
+            path = folder_paths.get_full_path(folder_name, value)
+            if path is None:
+                return None
+            try:
+                files.append(file_identity(path))
+            except OSError:
+                return None
+        return (class_identity, tuple(files))
 
 class BasicCache:
     def __init__(self, key_class):
@@ -149,10 +330,16 @@ class BasicCache:
         self.cache_key_set: CacheKeySet
         self.cache = {}
         self.subcaches = {}
+        self.disk_cache = None
+
+    # Adds a persistent tier behind this cache, see comfy_execution.disk_cache.DiskCache
+    def set_disk_cache(self, disk_cache):
+        self.disk_cache = disk_cache
 
     def set_prompt(self, dynprompt, node_ids, is_changed_cache):
         self.dynprompt = dynprompt
-        self.cache_key_set = self.key_class(dynprompt, node_ids, is_changed_cache)
+        previous = self.cache_key_set if self.initialized else None
+        self.cache_key_set = self.key_class(dynprompt, node_ids, is_changed_cache, previous=previous)
         self.is_changed_cache = is_changed_cache
         self.initialized = True
 
@@ -191,6 +378,10 @@ class BasicCache:
         assert self.initialized
         cache_key = self.cache_key_set.get_data_key(node_id)
         self.cache[cache_key] = value
+        if self.disk_cache is not None:
+            digest = self.cache_key_set.get_data_digest(node_id)
+            if digest is not None:
+                self.disk_cache.set(digest, value)
 
     def _get_immediate(self, node_id):
         if not self.initialized:
@@ -198,9 +389,20 @@ class BasicCache:
         cache_key = self.cache_key_set.get_data_key(node_id)
         if cache_key in self.cache:
             return self.cache[cache_key]
+        elif self.disk_cache is not None:
+            return self._get_from_disk(node_id, cache_key)
         else:
             return None
 
+    def _get_from_disk(self, node_id, cache_key):
+        digest = self.cache_key_set.get_data_digest(node_id)
+        if digest is None or digest not in self.disk_cache:
+            return None
+        value = self.disk_cache.get(digest)
+        if value is not None:
+            self.cache[cache_key] = value
+        return value
+
     def _ensure_subcache(self, node_id, children_ids):
         subcache_key = self.cache_key_set.get_subcache_key(node_id)
         subcache = self.subcaches.get(subcache_key, None)
@@ -317,6 +519,123 @@ class LRUCache(BasicCache):
         return self
 
 
+def estimate_size(obj, seen=None):
+    """
+    Returns the approximate (ram_bytes, vram_bytes) held by a cached value. Tensor storages
+    shared inside the value are only counted once. Models only count the weights that
+    currently live in RAM, the ones on the GPU are managed by model_management.
+    """
+    if seen is None:
+        seen = set()
+    if isinstance(obj, torch.Tensor):
+        storage = obj.untyped_storage()
+        key = (storage.data_ptr(), obj.device)
+        if key in seen:
+            return 0, 0
+        seen.add(key)
+        if obj.device.type == "cpu":
+            return storage.nbytes(), 0
+        return 0, storage.nbytes()
+    if isinstance(obj, (str, bytes)):
+        return sys.getsizeof(obj), 0
+    if isinstance(obj, (list, tuple)):
+        items = obj
+    elif isinstance(obj, Mapping):
+        items = obj.values()
+    elif hasattr(obj, "model_size") and hasattr(obj, "loaded_size"):
+        if id(obj.model) in seen:
+            return 0, 0
+        seen.add(id(obj.model))
+        return max(obj.model_size() - obj.loaded_size(), 0), 0
+    elif hasattr(obj, "patcher"):
+        items = [obj.patcher]
+    else:
+        return 0, 0
+    ram, vram = 0, 0
+    for item in items:
+        r, v = estimate_size(item, seen)
+        ram += r
+        vram += v
+    return ram, vram
+
+class RAMPressureCache(LRUCache):
+    """
+    An LRU cache that evicts by memory pressure instead of by entry count. The approximate
+    size of every cached value is tracked, and whenever free RAM (or VRAM, if cached values
+    live there) drops below the configured headroom the least recently used entries are
+    dropped until enough bytes have been released. Entries used by the current prompt are
+    never evicted. Setting entries only checks the free memory every POLL_INTERVAL seconds,
+    or sooner once half of the headroom was added to the cache since the last check.
+    """
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, key_class, min_free_ram, min_free_vram=None):
+        super().__init__(key_class, max_size=0)
+        self.min_free_ram = min_free_ram
+        self.min_free_vram = min_free_vram
+        self.sizes = {}
+        self.last_poll = 0.0
+        self.added_since_poll = 0
+
+    def clean_unused(self):
+        self.poll()
+        self._clean_subcaches()
+
+    def set(self, node_id, value):
+        super().set(node_id, value)
+        cache_key = self.cache_key_set.get_data_key(node_id)
+        self.sizes[cache_key] = estimate_size(value)
+        self.added_since_poll += sum(self.sizes[cache_key])
+        if time.monotonic() - self.last_poll >= self.POLL_INTERVAL or self.added_since_poll * 2 >= self.min_free_ram:
+            self.poll()
+
+    def _get_size(self, cache_key):
+        if cache_key not in self.sizes:
+            self.sizes[cache_key] = estimate_size(self.cache[cache_key])
+        return self.sizes[cache_key]
+
+    def cached_size(self):
+        ram, vram = 0, 0
+        for cache_key in self.cache:
+            r, v = self._get_size(cache_key)
+            ram += r
+            vram += v
+        return ram, vram
+
+    def poll(self):
+        self.last_poll = time.monotonic()
+        self.added_since_poll = 0
+        ram_size, vram_size = self.cached_size()
+        ram_needed = 0
+        if ram_size > 0:
+            ram_needed = self.min_free_ram - comfy.model_management.get_free_memory(torch.device("cpu"))
+        vram_needed = 0
+        if vram_size > 0:
+            min_free_vram = self.min_free_vram
+            if min_free_vram is None:
+                min_free_vram = comfy.model_management.minimum_inference_memory()
+            vram_needed = min_free_vram - comfy.model_management.get_free_memory(comfy.model_management.get_torch_device())
+        if ram_needed <= 0 and vram_needed <= 0:
+            return
+
+        candidates = [key for key in self.cache if self.used_generation.get(key, 0) < self.generation]
+        # Oldest first, and the biggest entries first within a generation so fewer results need recomputing
+        candidates.sort(key=lambda key: (self.used_generation.get(key, 0), -sum(self._get_size(key))))
+        for key in candidates:
+            if ram_needed <= 0 and vram_needed <= 0:
+                break
+            ram, vram = self._get_size(key)
+            if (ram_needed > 0 and ram > 0) or (vram_needed > 0 and vram > 0):
+                ram_needed -= ram
+                vram_needed -= vram
+                self._remove_key(key)
+
+    def _remove_key(self, cache_key):
+        del self.cache[cache_key]
+        self.sizes.pop(cache_key, None)
+        self.used_generation.pop(cache_key, None)
+        self.children.pop(cache_key, None)
+
 class DependencyAwareCache(BasicCache):
     """
     A cache implementation that tracks dependencies between nodes and manages
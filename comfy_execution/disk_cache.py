@@ -0,0 +1,220 @@
+import os
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+
+# Bump this when the on-disk format or the signature digest changes, the entries of other versions are deleted.
+DISK_CACHE_VERSION = 2
+DISK_CACHE_EXTENSION = ".pt"
+# Outputs aren't queued for writing while the ones waiting for the writer thread add up to more than this
+MAX_PENDING_BYTES = 4 * 1024 * 1024 * 1024
+
+
+def is_serializable(obj):
+    """Returns True if obj only contains tensors, primitives and lists/tuples/dicts of those."""
+    if obj is None or isinstance(obj, (int, float, str, bool)):
+        return True
+    if isinstance(obj, torch.Tensor):
+        return True
+    if isinstance(obj, (list, tuple)):
+        return all(is_serializable(x) for x in obj)
+    if isinstance(obj, dict):
+        return all(isinstance(k, str) and is_serializable(v) for k, v in obj.items())
+    return False
+
+
+def storable_size(obj):
+    if isinstance(obj, torch.Tensor):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sum(storable_size(x) for x in obj)
+    if isinstance(obj, dict):
+        return sum(storable_size(x) for x in obj.values())
+    return 0
+
+
+def to_storable(obj):
+    if isinstance(obj, torch.Tensor):
+        obj = obj.detach().to("cpu")
+        # Views would otherwise save the whole storage they point into.
+        if obj.untyped_storage().nbytes() > obj.nbytes or not obj.is_contiguous():
+            obj = obj.clone(memory_format=torch.contiguous_format)
+        return obj
+    if isinstance(obj, list):
+        return [to_storable(x) for x in obj]
+    if isinstance(obj, tuple):
+        return tuple(to_storable(x) for x in obj)
+    if isinstance(obj, dict):
+        return {k: to_storable(v) for k, v in obj.items()}
+    return obj
+
+
+class DiskCache:
+    """
+    A size bounded store of node outputs on disk, used as a second tier behind the in-memory
+    output caches. Entries are keyed by a stable digest of the node input signature and are
+    evicted least recently used first. Reads are memory-mapped so a hit doesn't copy the
+    tensors into RAM until they are actually used. Writes happen on a background thread, the
+    outputs waiting for it are served from memory. The entries are kept in a subdirectory for
+    DISK_CACHE_VERSION.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = os.path.join(directory, "v{}".format(DISK_CACHE_VERSION))
+        self.max_size = max_size
+        self.mutex = threading.RLock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.entries = OrderedDict()  # digest -> file size, least recently used first
+        self.total_size = 0
+        self.pending = OrderedDict()  # digest -> (storable value, size) waiting for the writer thread
+        self.pending_size = 0
+        # digest -> file size of evicted entries whose file couldn't be removed yet (still memory-mapped on Windows),
+        # counted in total_size until it is
+        self.removing = {}
+        self.writer = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_old_versions(directory)
+        self._scan()
+
+    def _remove_old_versions(self, directory):
+        for entry in os.scandir(directory):
+            if entry.path == self.directory:
+                continue
+            if entry.is_dir() and entry.name.startswith("v"):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.is_file() and entry.name.endswith(DISK_CACHE_EXTENSION):
+                # Version 1 kept the entries in directory itself
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + DISK_CACHE_EXTENSION)
+
+    def _scan(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(DISK_CACHE_EXTENSION):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-len(DISK_CACHE_EXTENSION)], st.st_size))
+        for _, digest, size in sorted(found):
+            self.entries[digest] = size
+            self.total_size += size
+        self._evict()
+        logging.info("Disk node cache: {} entries, {:.1f} MB in {}".format(len(self.entries), self.total_size / (1024 * 1024), self.directory))
+
+    def _remove(self, digest):
+        size = self.entries.pop(digest, None)
+        if size is None:
+            size = self.removing.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.removing[digest] = size
+            return
+        self.total_size -= size
+
+    def _evict(self):
+        for digest in list(self.removing):
+            self._remove(digest)
+        while self.total_size > self.max_size and len(self.entries) > 0:
+            self._remove(next(iter(self.entries)))
+
+    def __contains__(self, digest):
+        with self.mutex:
+            return digest in self.entries or digest in self.pending
+
+    def get(self, digest):
+        with self.mutex:
+            if digest in self.pending:
+                return self.pending[digest][0]
+            if digest not in self.entries:
+                return None
+            self.entries.move_to_end(digest)
+            path = self._path(digest)
+            try:
+                value = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+                os.utime(path)
+            except Exception as e:
+                logging.warning("Could not read disk cache entry {}: {}".format(path, e))
+                self._remove(digest)
+                return None
+            return value
+
+    def set(self, digest, value):
+        """Queues value to be written, returns False if it won't be."""
+        if not is_serializable(value):
+            return False
+        with self.mutex:
+            if digest in self.entries or digest in self.pending:
+                if digest in self.entries:
+                    self.entries.move_to_end(digest)
+                return True
+            if digest in self.removing:
+                return False
+        value = to_storable(value)
+        size = storable_size(value)
+        with self.mutex:
+            if size > self.max_size or self.pending_size + size > MAX_PENDING_BYTES:
+                logging.debug("Not writing disk cache entry {}, {:.1f} MB are waiting to be written".format(digest, self.pending_size / (1024 * 1024)))
+                return False
+            self.pending[digest] = (value, size)
+            self.pending_size += size
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._run, daemon=True, name="comfy_disk_cache")
+                self.writer.start()
+            self.not_empty.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.not_empty:
+                while len(self.pending) == 0:
+                    self.not_empty.notify_all()
+                    self.not_empty.wait()
+                digest = next(iter(self.pending))
+                value, size = self.pending[digest]
+            file_size = self._write(digest, value)
+            with self.mutex:
+                del self.pending[digest]
+                self.pending_size -= size
+                if file_size is not None:
+                    self.entries[digest] = file_size
+                    self.total_size += file_size
+                    self._evict()
+
+    def _write(self, digest, value):
+        path = self._path(digest)
+        temp_path = path + ".tmp"
+        try:
+            torch.save(value, temp_path)
+            os.replace(temp_path, path)
+            return os.path.getsize(path)
+        except Exception as e:
+            logging.warning("Could not write disk cache entry {}: {}".format(path, e))
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+
+    def flush(self):
+        """Waits until the queued outputs were written."""
+        with self.not_empty:
+            while len(self.pending) > 0:
+                self.not_empty.wait()
+
+    def clear(self):
+        self.flush()
+        with self.mutex:
+            for digest in list(self.entries) + list(self.removing):
+                self._remove(digest)
@@ -177,6 +177,8 @@ class ExecutionList(TopologicalSort):
         super().__init__(dynprompt)
         self.output_cache = output_cache
         self.staged_node_id = None
+        # node_id -> future of nodes already running on the parallel node pool
+        self.running_nodes = {}
 
     def is_cached(self, node_id):
         return self.output_cache.get(node_id) is not None
@@ -206,6 +208,10 @@ class ExecutionList(TopologicalSort):
             }
             return None, error_details, ex
 
+        # Keep the executor thread busy with nodes that aren't already running in parallel
+        not_running = [node_id for node_id in available if node_id not in self.running_nodes or self.running_nodes[node_id].done()]
+        if len(not_running) > 0:
+            available = not_running
         self.staged_node_id = self.ux_friendly_pick_node(available)
         return self.staged_node_id, None, None
 
@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+from itertools import islice
+
+
+class MemoryHistory:
+    """
+    Prompt history kept in memory, oldest entry first. Entries aren't modified once added so they are
+    returned without copying. This is the default store and doesn't survive restarts.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, prompt_id, entry):
+        self.entries.pop(prompt_id, None)
+        self.entries[prompt_id] = entry
+        while len(self.entries) > self.max_size:
+            self.entries.pop(next(iter(self.entries)))
+
+    def get(self, prompt_id):
+        return self.entries.get(prompt_id, None)
+
+    def get_range(self, max_items=None, offset=-1, before=None):
+        """
+        Returns a dict of entries, oldest first. With before (a prompt_id) these are the max_items entries
+        added just before it, otherwise max_items entries starting at offset, or the newest ones if offset < 0.
+        """
+        if before is not None:
+            if before not in self.entries:
+                return {}
+            keys = iter(reversed(self.entries))
+            for k in keys:
+                if k == before:
+                    break
+            keys = list(islice(keys, max_items))
+            keys.reverse()
+        elif offset < 0:
+            if max_items is None:
+                return dict(self.entries)
+            keys = list(islice(reversed(self.entries), max_items))
+            keys.reverse()
+        else:
+            keys = islice(self.entries, offset, None if max_items is None else offset + max_items)
+        return {k: self.entries[k] for k in keys}
+
+    def delete(self, prompt_id):
+        self.entries.pop(prompt_id, None)
+
+    def clear(self):
+        self.entries = {}
+
+
+class SqliteHistory:
+    """
+    Prompt history stored as JSON in an SQLite database, so it survives restarts and only the entries
+    that are requested get loaded into memory. Entries are ordered by the sequence they were added in
+    and looked up through the prompt_id index, which is also what /history uses as a pagination cursor.
+    """
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        self.mutex = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS history (seq INTEGER PRIMARY KEY AUTOINCREMENT, prompt_id TEXT NOT NULL UNIQUE, entry TEXT NOT NULL)")
+
+    def __len__(self):
+        with self.mutex:
+            return self.connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def add(self, prompt_id, entry):
+        data = json.dumps(entry)
+        with self.mutex:
+            cursor = self.connection.execute("INSERT OR REPLACE INTO history (prompt_id, entry) VALUES (?, ?)", (prompt_id, data))
+            # Sequence numbers only grow, so this keeps at most max_size entries without counting them
+            self.connection.execute("DELETE FROM history WHERE seq <= ?", (cursor.lastrowid - self.max_size,))
+
+    def get(self, prompt_id):
+        with self.mutex:
+            row = self.connection.execute("SELECT entry FROM history WHERE prompt_id = ?", (prompt_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def get_range(self, max_items=None, offset=-1, before=None):
+        """Same as MemoryHistory.get_range."""
+        limit = -1 if max_items is None else max_items
+        with self.mutex:
+            if before is not None:
+                rows = self.connection.execute("SELECT prompt_id, entry FROM history WHERE seq < (SELECT seq FROM history WHERE prompt_id = ?) ORDER BY seq DESC LIMIT ?", (before, limit)).fetchall()
+                rows.reverse()
+            elif offset < 0:
+                rows = self.connection.execute("SELECT prompt_id, entry FROM history ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+                rows.reverse()
+            else:
+                rows = self.connection.execute("SELECT prompt_id, entry FROM history ORDER BY seq LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return {prompt_id: json.loads(entry) for prompt_id, entry in rows}
+
+    def delete(self, prompt_id):
+        with self.mutex:
+            self.connection.execute("DELETE FROM history WHERE prompt_id = ?", (prompt_id,))
+
+    def clear(self):
+        with self.mutex:
+            self.connection.execute("DELETE FROM history")
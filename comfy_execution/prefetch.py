@@ -0,0 +1,70 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+import psutil
+
+PREFETCH_CHUNK_SIZE = 64 * 1024 * 1024
+# Files aren't read ahead if that would leave less than this much RAM available
+PREFETCH_RAM_HEADROOM = 2 * 1024 * 1024 * 1024
+
+
+class ModelPrefetcher:
+    """
+    Reads the model files that upcoming loader nodes will load into the OS file cache on a background
+    thread, so loading them while the previous nodes or prompt run doesn't have to wait on the disk.
+    Files are read in the order they are requested and files that were read recently are skipped.
+    """
+    def __init__(self, history_size=16):
+        self.history_size = history_size
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.pending = deque()
+        self.recent = OrderedDict()  # path -> None, files that were read or are being read
+        self.thread = None
+
+    def prefetch(self, paths, first=False):
+        """Adds paths to the files to read. With first they are read before the ones that were already pending."""
+        with self.mutex:
+            paths = [p for p in paths if p not in self.recent]
+            for path in paths:
+                if path in self.pending:
+                    self.pending.remove(path)
+            if first:
+                self.pending.extendleft(reversed(paths))
+            else:
+                self.pending.extend(paths)
+            if len(self.pending) == 0:
+                return
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="comfy_prefetch")
+                self.thread.start()
+            self.not_empty.notify()
+
+    def _run(self):
+        buffer = bytearray(PREFETCH_CHUNK_SIZE)
+        while True:
+            with self.not_empty:
+                while len(self.pending) == 0:
+                    self.not_empty.wait()
+                path = self.pending.popleft()
+                self.recent[path] = None
+                while len(self.recent) > self.history_size:
+                    self.recent.popitem(last=False)
+            self._read(path, buffer)
+
+    def _read(self, path, buffer):
+        try:
+            size = os.path.getsize(path)
+            if size > psutil.virtual_memory().available - PREFETCH_RAM_HEADROOM:
+                logging.debug("Not prefetching {}, not enough free RAM".format(path))
+                return
+            start = time.perf_counter()
+            with open(path, "rb", buffering=0) as f:
+                while f.readinto(buffer) > 0:
+                    pass
+            logging.debug("Prefetched {} ({:.1f} MB) in {:.2f} seconds".format(path, size / (1024 * 1024), time.perf_counter() - start))
+        except OSError as e:
+            logging.warning("Could not prefetch {}: {}".format(path, e))
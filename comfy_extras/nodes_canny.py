@@ -1,5 +1,7 @@
-from kornia.filters import canny
 import comfy.model_management
+import comfy.lazy_import
+
+kornia = comfy.lazy_import.lazy_import("kornia")
 
 
 class Canny:
@@ -16,7 +18,7 @@ class Canny:
     CATEGORY = "image/preprocessors"
 
     def detect_edge(self, image, low_threshold, high_threshold):
-        output = canny(image.to(comfy.model_management.get_torch_device()).movedim(-1, 1), low_threshold, high_threshold)
+        output = kornia.filters.canny(image.to(comfy.model_management.get_torch_device()).movedim(-1, 1), low_threshold, high_threshold)
         img_out = output[1].to(comfy.model_management.intermediate_device()).repeat(1, 3, 1, 1).movedim(1, -1)
         return (img_out,)
 
@@ -0,0 +1,102 @@
+import inspect
+import logging
+
+import comfy.patcher_extension
+
+
+class FeatureCacheState:
+    def __init__(self, x, residual):
+        self.x = x
+        self.residual = residual
+        self.change = 0.0
+        self.skipped = 0
+
+
+class DiffusionFeatureCache:
+    """
+    Skips the diffusion model (UNet, Flux, Wan...) on the steps where its input barely changed since the step it last
+    ran on, and adds the difference between the output and the input of that step to the new input instead, like
+    TeaCache and EasyCache do with the features of the blocks. The relative L1 change of the input is added up over the
+    skipped steps and the model runs again once it reaches threshold or after max_skipped_steps skipped steps. The cond
+    and uncond batches are tracked separately. Only steps with a sigma between start_sigma and end_sigma are skipped.
+    """
+    def __init__(self, threshold, start_sigma, end_sigma, max_skipped_steps):
+        self.threshold = threshold
+        self.start_sigma = start_sigma
+        self.end_sigma = end_sigma
+        self.max_skipped_steps = max_skipped_steps
+        self.reset()
+
+    def reset(self):
+        self.states = {}
+        self.calls = 0
+        self.hits = 0
+
+    def hit_rate(self):
+        return self.hits / max(1, self.calls)
+
+    def outer_sample_wrapper(self, executor, *args, **kwargs):
+        self.reset()
+        try:
+            return executor(*args, **kwargs)
+        finally:
+            if self.calls > 0:
+                logging.info("Feature cache: reused the model output on {} of {} model calls ({:.0%}).".format(self.hits, self.calls, self.hit_rate()))
+            self.states = {}
+
+    def diffusion_model_wrapper(self, executor, *args, **kwargs):
+        transformer_options = inspect.signature(executor.original).bind(*args, **kwargs).arguments.get("transformer_options", {})
+        x = args[0]
+        self.calls += 1
+        key = (tuple(transformer_options.get("uuids", [])), tuple(x.shape))
+        state = self.states.get(key, None)
+        sigmas = transformer_options.get("sigmas", None)
+        if state is not None and sigmas is not None and self.end_sigma <= float(sigmas.max()) <= self.start_sigma:
+            x_out = x[:, :state.residual.shape[1]]
+            state.change += ((x_out - state.x).abs().mean() / state.x.abs().mean().clamp(min=1e-6)).item()
+            state.x = x_out
+            if state.change < self.threshold and state.skipped < self.max_skipped_steps:
+                state.skipped += 1
+                self.hits += 1
+                return x_out + state.residual
+
+        out = executor(*args, **kwargs)
+        # Models that also take concatenated channels (inpainting) output the first channels of their input
+        if out.shape[0] == x.shape[0] and out.shape[2:] == x.shape[2:] and out.shape[1] <= x.shape[1]:
+            x_out = x[:, :out.shape[1]]
+            self.states[key] = FeatureCacheState(x_out, out - x_out)
+        return out
+
+
+class FeatureCache:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"model": ("MODEL",),
+                             "threshold": ("FLOAT", {"default": 0.1, "min": 0.0, "max": 3.0, "step": 0.001, "tooltip": "How much the input of the model can change (relative L1, added up over the skipped steps) before it is run again. Higher is faster at a lower quality, 0 disables it."}),
+                             "start_percent": ("FLOAT", {"default": 0.15, "min": 0.0, "max": 1.0, "step": 0.001, "tooltip": "The first steps set the composition and always run the model."}),
+                             "end_percent": ("FLOAT", {"default": 0.95, "min": 0.0, "max": 1.0, "step": 0.001}),
+                             "max_skipped_steps": ("INT", {"default": 3, "min": 1, "max": 100, "tooltip": "The most steps in a row the model can be skipped on."}),
+                             }}
+    RETURN_TYPES = ("MODEL",)
+    FUNCTION = "patch"
+
+    CATEGORY = "model_patches"
+    DESCRIPTION = "Reuses the output of the diffusion model from the previous step on steps where its input barely changed. Works with UNet models and DiT models like Flux and Wan, the ratio of reused steps is logged after sampling."
+    EXPERIMENTAL = True
+
+    def patch(self, model, threshold, start_percent, end_percent, max_skipped_steps):
+        model_sampling = model.get_model_object("model_sampling")
+        cache = DiffusionFeatureCache(threshold, model_sampling.percent_to_sigma(start_percent), model_sampling.percent_to_sigma(end_percent), max_skipped_steps)
+        m = model.clone()
+        m.add_wrapper_with_key(comfy.patcher_extension.WrappersMP.OUTER_SAMPLE, "feature_cache", cache.outer_sample_wrapper)
+        m.add_wrapper_with_key(comfy.patcher_extension.WrappersMP.DIFFUSION_MODEL, "feature_cache", cache.diffusion_model_wrapper)
+        return (m,)
+
+
+NODE_CLASS_MAPPINGS = {
+    "FeatureCache": FeatureCache,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "FeatureCache": "Feature Cache",
+}
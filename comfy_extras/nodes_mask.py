@@ -1,7 +1,8 @@
 import numpy as np
-import scipy.ndimage
+import scipy
 import torch
 import comfy.utils
+import comfy.lazy_import
 import node_helpers
 import folder_paths
 import random
@@ -9,6 +10,8 @@ import random
 import nodes
 from nodes import MAX_RESOLUTION
 
+comfy.lazy_import.lazy_import("scipy.ndimage")
+
 def composite(destination, source, x, y, mask = None, multiplier = 8, resize_source = False):
     source = source.to(destination.device)
     if resize_source:
@@ -1,8 +1,8 @@
 import torch
 import comfy.model_management
+import comfy.lazy_import
 
-from kornia.morphology import dilation, erosion, opening, closing, gradient, top_hat, bottom_hat
-import kornia.color
+kornia = comfy.lazy_import.lazy_import("kornia")
 
 
 class Morphology:
@@ -23,19 +23,19 @@ class Morphology:
         kernel = torch.ones(kernel_size, kernel_size, device=device)
         image_k = image.to(device).movedim(-1, 1)
         if operation == "erode":
-            output = erosion(image_k, kernel)
+            output = kornia.morphology.erosion(image_k, kernel)
         elif operation == "dilate":
-            output = dilation(image_k, kernel)
+            output = kornia.morphology.dilation(image_k, kernel)
         elif operation == "open":
-            output = opening(image_k, kernel)
+            output = kornia.morphology.opening(image_k, kernel)
         elif operation == "close":
-            output = closing(image_k, kernel)
+            output = kornia.morphology.closing(image_k, kernel)
         elif operation == "gradient":
-            output = gradient(image_k, kernel)
+            output = kornia.morphology.gradient(image_k, kernel)
         elif operation == "top_hat":
-            output = top_hat(image_k, kernel)
+            output = kornia.morphology.top_hat(image_k, kernel)
         elif operation == "bottom_hat":
-            output = bottom_hat(image_k, kernel)
+            output = kornia.morphology.bottom_hat(image_k, kernel)
         else:
             raise ValueError(f"Invalid operation {operation} for morphology. Must be one of 'erode', 'dilate', 'open', 'close', 'gradient', 'tophat', 'bottomhat'")
         img_out = output.to(comfy.model_management.intermediate_device()).movedim(1, -1)
@@ -16,6 +16,7 @@ class StringConcatenate():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string_a, string_b, delimiter, **kwargs):
         return delimiter.join((string_a, string_b)),
@@ -34,6 +35,7 @@ class StringSubstring():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, start, end, **kwargs):
         return string[start:end],
@@ -51,6 +53,7 @@ class StringLength():
     RETURN_NAMES = ("length",)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, **kwargs):
         length = len(string)
@@ -70,6 +73,7 @@ class CaseConverter():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, mode, **kwargs):
         if mode == "UPPERCASE":
@@ -99,6 +103,7 @@ class StringTrim():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, mode, **kwargs):
         if mode == "Both":
@@ -126,6 +131,7 @@ class StringReplace():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, find, replace, **kwargs):
         result = string.replace(find, replace)
@@ -147,6 +153,7 @@ class StringContains():
     RETURN_NAMES = ("contains",)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, substring, case_sensitive, **kwargs):
         if case_sensitive:
@@ -172,6 +179,7 @@ class StringCompare():
     RETURN_TYPES = (IO.BOOLEAN,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string_a, string_b, mode, case_sensitive, **kwargs):
         if case_sensitive:
@@ -205,6 +213,7 @@ class RegexMatch():
     RETURN_NAMES = ("matches",)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, regex_pattern, case_insensitive, multiline, dotall, **kwargs):
         flags = 0
@@ -244,6 +253,7 @@ class RegexExtract():
     RETURN_TYPES = (IO.STRING,)
     FUNCTION = "execute"
     CATEGORY = "utils/string"
+    THREAD_SAFE = True
 
     def execute(self, string, regex_pattern, mode, case_insensitive, multiline, dotall, group_index, **kwargs):
         join_delimiter = "\n"
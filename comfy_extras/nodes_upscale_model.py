@@ -1,17 +1,22 @@
 import logging
-from spandrel import ModelLoader, ImageModelDescriptor
+import functools
 from comfy import model_management
 import torch
 import comfy.utils
+import comfy.lazy_import
 import folder_paths
 
-try:
-    from spandrel_extra_arches import EXTRA_REGISTRY
-    from spandrel import MAIN_REGISTRY
-    MAIN_REGISTRY.add(*EXTRA_REGISTRY)
-    logging.info("Successfully imported spandrel_extra_arches: support for non commercial upscale models.")
-except:
-    pass
+spandrel = comfy.lazy_import.lazy_import("spandrel")
+
+@functools.cache
+def load_extra_arches():
+    # Done when the first upscale model is loaded instead of at startup since spandrel is slow to import
+    try:
+        from spandrel_extra_arches import EXTRA_REGISTRY
+        spandrel.MAIN_REGISTRY.add(*EXTRA_REGISTRY)
+        logging.info("Successfully imported spandrel_extra_arches: support for non commercial upscale models.")
+    except:
+        pass
 
 class UpscaleModelLoader:
     @classmethod
@@ -28,9 +33,10 @@ class UpscaleModelLoader:
         sd = comfy.utils.load_torch_file(model_path, safe_load=True)
         if "module.layers.0.residual_group.blocks.0.norm1.weight" in sd:
             sd = comfy.utils.state_dict_prefix_replace(sd, {"module.":""})
-        out = ModelLoader().load_from_state_dict(sd).eval()
+        load_extra_arches()
+        out = spandrel.ModelLoader().load_from_state_dict(sd).eval()
 
-        if not isinstance(out, ImageModelDescriptor):
+        if not isinstance(out, spandrel.ImageModelDescriptor):
             raise Exception("Upscale model must be a single-image model.")
 
         return (out, )
@@ -66,7 +72,11 @@ class ImageUpscaleWithModel:
             try:
                 steps = in_img.shape[0] * comfy.utils.get_tiled_scale_steps(in_img.shape[3], in_img.shape[2], tile_x=tile, tile_y=tile, overlap=overlap)
                 pbar = comfy.utils.ProgressBar(steps)
-                s = comfy.utils.tiled_scale(in_img, lambda a: upscale_model(a), tile_x=tile, tile_y=tile, overlap=overlap, upscale_amount=upscale_model.scale, pbar=pbar)
+                tile_batch = 1
+                if not model_management.is_device_cpu(device):
+                    tile_memory = (tile * tile * 3) * image.element_size() * max(upscale_model.scale, 1.0) * 384.0
+                    tile_batch = max(1, int(model_management.get_free_memory(device) / tile_memory))
+                s = comfy.utils.tiled_scale(in_img, lambda a: upscale_model(a), tile_x=tile, tile_y=tile, overlap=overlap, upscale_amount=upscale_model.scale, pbar=pbar, tile_batch=tile_batch)
                 oom = False
             except model_management.OOM_EXCEPTION as e:
                 tile //= 2
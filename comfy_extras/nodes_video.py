@@ -10,7 +10,7 @@ from fractions import Fraction
 from comfy.comfy_types import IO, FileLocator, ComfyNodeABC
 from comfy_api.input import ImageInput, AudioInput, VideoInput
 from comfy_api.util import VideoContainer, VideoCodec, VideoComponents
-from comfy_api.input_impl import VideoFromFile, VideoFromComponents
+from comfy_api.input_impl import VideoFromFile, VideoFromComponents, VideoFromFrameChunks
 from comfy.cli_args import args
 
 class SaveWEBM:
@@ -172,6 +172,41 @@ class CreateVideo(ComfyNodeABC):
             )
         ),)
 
+class VAEDecodeVideo(ComfyNodeABC):
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "samples": (IO.LATENT, {"tooltip": "The latent to be decoded."}),
+                "vae": (IO.VAE, {"tooltip": "The VAE model used for decoding the latent."}),
+                "fps": ("FLOAT", {"default": 24.0, "min": 1.0, "max": 120.0, "step": 1.0}),
+                "temporal_size": ("INT", {"default": 64, "min": 8, "max": 4096, "step": 4, "tooltip": "Only used for video VAEs: Amount of frames to decode at a time."}),
+                "temporal_overlap": ("INT", {"default": 8, "min": 4, "max": 4096, "step": 4, "tooltip": "Only used for video VAEs: Amount of frames to overlap."}),
+            },
+            "optional": {
+                "audio": (IO.AUDIO, {"tooltip": "The audio to add to the video."}),
+            }
+        }
+
+    RETURN_TYPES = (IO.VIDEO,)
+    FUNCTION = "decode"
+
+    CATEGORY = "image/video"
+    DESCRIPTION = "Decodes a latent into a video a part at a time, keeping the decoded parts on disk so saving the video never needs all the frames in memory at once."
+
+    def decode(self, samples, vae, fps: float, temporal_size: int, temporal_overlap: int, audio: Optional[AudioInput] = None):
+        if temporal_size < temporal_overlap * 2:
+            temporal_overlap = temporal_overlap // 2
+        temporal_compression = vae.temporal_compression_decode()
+        if temporal_compression is not None:
+            temporal_size = max(2, temporal_size // temporal_compression)
+            temporal_overlap = max(1, min(temporal_size // 2, temporal_overlap // temporal_compression))
+        return (VideoFromFrameChunks(
+            vae.decode_iter(samples["samples"], temporal_size=temporal_size, temporal_overlap=temporal_overlap),
+            frame_rate=Fraction(fps),
+            audio=audio,
+        ),)
+
 class GetVideoComponents(ComfyNodeABC):
     @classmethod
     def INPUT_TYPES(cls):
@@ -229,6 +264,7 @@ NODE_CLASS_MAPPINGS = {
     "SaveWEBM": SaveWEBM,
     "SaveVideo": SaveVideo,
     "CreateVideo": CreateVideo,
+    "VAEDecodeVideo": VAEDecodeVideo,
     "GetVideoComponents": GetVideoComponents,
     "LoadVideo": LoadVideo,
 }
@@ -236,6 +272,7 @@ NODE_CLASS_MAPPINGS = {
 NODE_DISPLAY_NAME_MAPPINGS = {
     "SaveVideo": "Save Video",
     "CreateVideo": "Create Video",
+    "VAEDecodeVideo": "VAE Decode (Video)",
     "GetVideoComponents": "Get Video Components",
     "LoadVideo": "Load Video",
 }
@@ -1,9 +1,12 @@
 import sys
 import copy
+import json
 import logging
 import threading
 import heapq
 import time
+import concurrent.futures
+import contextvars
 import traceback
 from enum import Enum
 import inspect
@@ -11,12 +14,15 @@ from typing import List, Literal, NamedTuple, Optional
 
 import torch
 import nodes
+import folder_paths
 
 import comfy.model_management
 from comfy_execution.graph import get_input_info, ExecutionList, DynamicPrompt, ExecutionBlocker
 from comfy_execution.graph_utils import is_link, GraphBuilder
-from comfy_execution.caching import HierarchicalCache, LRUCache, DependencyAwareCache, CacheKeySetInputSignature, CacheKeySetID
+from comfy_execution.caching import HierarchicalCache, LRUCache, RAMPressureCache, DependencyAwareCache, CacheKeySetInputSignature, CacheKeySetID, to_hashable, to_stable_digest
 from comfy_execution.validation import validate_node_input
+import comfy_execution.async_loop
+import comfy_execution.history
 
 class ExecutionResult(Enum):
     SUCCESS = 0
@@ -27,10 +33,11 @@ class DuplicateNodeError(Exception):
     pass
 
 class IsChangedCache:
-    def __init__(self, dynprompt, outputs_cache):
+    # is_changed can hold IS_CHANGED results that were already computed for this prompt (see get_prompt_signature)
+    def __init__(self, dynprompt, outputs_cache, is_changed=None):
         self.dynprompt = dynprompt
         self.outputs_cache = outputs_cache
-        self.is_changed = {}
+        self.is_changed = is_changed if is_changed is not None else {}
 
     def get(self, node_id):
         if node_id in self.is_changed:
@@ -48,26 +55,27 @@ class IsChangedCache:
             return self.is_changed[node_id]
 
         # Intentionally do not use cached outputs here. We only want constants in IS_CHANGED
+        # The result is not stored on the node: queued prompts are shared with the queue and history.
         input_data_all, _ = get_input_data(node["inputs"], class_def, node_id, None)
         try:
-            is_changed = _map_node_over_list(class_def, input_data_all, "IS_CHANGED")
-            node["is_changed"] = [None if isinstance(x, ExecutionBlocker) else x for x in is_changed]
+            is_changed = resolve_awaitables(_map_node_over_list(class_def, input_data_all, "IS_CHANGED"))
+            is_changed = [None if isinstance(x, ExecutionBlocker) else x for x in is_changed]
         except Exception as e:
             logging.warning("WARNING: {}".format(e))
-            node["is_changed"] = float("NaN")
-        finally:
-            self.is_changed[node_id] = node["is_changed"]
-        return self.is_changed[node_id]
+            is_changed = float("NaN")
+        self.is_changed[node_id] = is_changed
+        return is_changed
 
 
 class CacheType(Enum):
     CLASSIC = 0
     LRU = 1
     DEPENDENCY_AWARE = 2
+    RAM_PRESSURE = 3
 
 
 class CacheSet:
-    def __init__(self, cache_type=None, cache_size=None):
+    def __init__(self, cache_type=None, cache_size=None, disk_cache=None):
         if cache_type == CacheType.DEPENDENCY_AWARE:
             self.init_dependency_aware_cache()
             logging.info("Disabling intermediate node cache.")
@@ -76,9 +84,15 @@ class CacheSet:
                 cache_size = 0
             self.init_lru_cache(cache_size)
             logging.info("Using LRU cache")
+        elif cache_type == CacheType.RAM_PRESSURE:
+            self.init_ram_cache(cache_size)
+            logging.info("Using memory pressure aware cache")
         else:
             self.init_classic_cache()
 
+        if disk_cache is not None:
+            self.outputs.set_disk_cache(disk_cache)
+
         self.all = [self.outputs, self.ui, self.objects]
 
     # Performs like the old cache -- dump data ASAP
@@ -92,6 +106,12 @@ class CacheSet:
         self.ui = LRUCache(CacheKeySetInputSignature, max_size=cache_size)
         self.objects = HierarchicalCache(CacheKeySetID)
 
+    # cache_size is the RAM headroom in bytes, entries are evicted once free memory drops below it
+    def init_ram_cache(self, min_headroom):
+        self.outputs = RAMPressureCache(CacheKeySetInputSignature, min_free_ram=min_headroom)
+        self.ui = RAMPressureCache(CacheKeySetInputSignature, min_free_ram=min_headroom)
+        self.objects = HierarchicalCache(CacheKeySetID)
+
     # only hold cached items while the decendents have not executed
     def init_dependency_aware_cache(self):
         self.outputs = DependencyAwareCache(CacheKeySetInputSignature)
@@ -180,9 +200,13 @@ def _map_node_over_list(obj, input_data_all, func, allow_interrupt=False, execut
                 execution_block = execution_block_cb(v) if execution_block_cb else v
                 break
         if execution_block is None:
-            if pre_execute_cb is not None and index is not None:
-                pre_execute_cb(index)
-            results.append(getattr(obj, func)(**inputs))
+            f = getattr(obj, func)
+            if inspect.iscoroutinefunction(f):
+                results.append(_call_async(f, inputs, pre_execute_cb, index))
+            else:
+                if pre_execute_cb is not None and index is not None:
+                    pre_execute_cb(index)
+                results.append(f(**inputs))
         else:
             results.append(execution_block)
 
@@ -196,6 +220,12 @@ def _map_node_over_list(obj, input_data_all, func, allow_interrupt=False, execut
             process_inputs(input_dict, i)
     return results
 
+async def _call_async(f, inputs, pre_execute_cb, index):
+    # Runs as its own task, so the GraphBuilder prefix set here only applies to this call
+    if pre_execute_cb is not None and index is not None:
+        pre_execute_cb(index)
+    return await f(**inputs)
+
 def merge_result_data(results, obj):
     # check which outputs need concatenating
     output = []
@@ -217,11 +247,22 @@ def merge_result_data(results, obj):
             output.append([o[i] for o in results])
     return output
 
+def resolve_awaitables(results):
+    # Coroutine node methods (FUNCTION, IS_CHANGED, check_lazy_status, VALIDATE_INPUTS) called from a thread that
+    # has to have their values run on the async node loop.
+    if any(inspect.isawaitable(r) for r in results):
+        return comfy_execution.async_loop.run(comfy_execution.async_loop.resolve_results(results))
+    return results
+
 def get_output_data(obj, input_data_all, execution_block_cb=None, pre_execute_cb=None):
+    with comfy.model_management.running_on_device():
+        return_values = _map_node_over_list(obj, input_data_all, obj.FUNCTION, allow_interrupt=True, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb)
+        return get_output_from_returns(resolve_awaitables(return_values), obj)
+
+def get_output_from_returns(return_values, obj):
     results = []
     uis = []
     subgraph_results = []
-    return_values = _map_node_over_list(obj, input_data_all, obj.FUNCTION, allow_interrupt=True, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb)
     has_subgraph = False
     for i in range(len(return_values)):
         r = return_values[i]
@@ -259,6 +300,87 @@ def get_output_data(obj, input_data_all, execution_block_cb=None, pre_execute_cb
         ui = {k: [y for x in uis for y in x[k]] for k in uis[0].keys()}
     return output, ui, has_subgraph
 
+def is_thread_safe(class_def):
+    thread_safe = getattr(class_def, "THREAD_SAFE", None)
+    if thread_safe is None:
+        return getattr(class_def, "API_NODE", False)
+    return thread_safe
+
+def is_async(class_def):
+    return inspect.iscoroutinefunction(getattr(class_def, class_def.FUNCTION, None))
+
+def get_node_object(caches, unique_id, class_def):
+    obj = caches.objects.get(unique_id)
+    if obj is None:
+        obj = class_def()
+        caches.objects.set(unique_id, obj)
+    return obj
+
+def _deferred_block_callbacks(unique_id):
+    # Blocks with a message are handed back to the executor thread, which reports them when it
+    # consumes the result.
+    blocks = []
+    def execution_block_cb(block):
+        if block.message is not None:
+            blocks.append(block)
+            return ExecutionBlocker(None)
+        return block
+    def pre_execute_cb(call_index):
+        GraphBuilder.set_default_prefix(unique_id, call_index, 0)
+    return blocks, execution_block_cb, pre_execute_cb
+
+# The display node id of the node that runs on the calling node thread or async task (see submit_ready_nodes), the
+# progress it reports is shown on that node instead of the one the executor thread is on (server.last_node_id).
+executing_node = contextvars.ContextVar("executing_node", default=None)
+
+def get_output_data_threaded(obj, input_data_all, unique_id, display_node_id):
+    # Runs a node on a parallel node thread.
+    executing_node.set(display_node_id)
+    blocks, execution_block_cb, pre_execute_cb = _deferred_block_callbacks(unique_id)
+    try:
+        with torch.inference_mode():
+            return get_output_data(obj, input_data_all, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb), blocks
+    except comfy.model_management.InterruptProcessingException:
+        # Checking consumed the interrupt, the executor thread needs to see it too
+        nodes.interrupt_processing(True)
+        raise
+
+async def get_output_data_async(obj, input_data_all, unique_id, display_node_id):
+    # Runs a node with a coroutine FUNCTION on the async node loop.
+    executing_node.set(display_node_id)
+    blocks, execution_block_cb, pre_execute_cb = _deferred_block_callbacks(unique_id)
+    try:
+        with comfy.model_management.running_on_device():
+            return_values = _map_node_over_list(obj, input_data_all, obj.FUNCTION, allow_interrupt=True, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb)
+            return_values = await comfy_execution.async_loop.resolve_results(return_values)
+            return get_output_from_returns(return_values, obj), blocks
+    except comfy.model_management.InterruptProcessingException:
+        nodes.interrupt_processing(True)
+        raise
+
+def submit_ready_nodes(node_pool, dynprompt, caches, extra_data, execution_list, pending_subgraph_results, prefetched):
+    # Starts the async nodes that are ready to run on the async node loop, and the thread safe ones on the
+    # node pool (if any), so they can run while the executor thread works on other nodes. All cache and
+    # graph bookkeeping stays on the executor thread, execute() picks the results up when the node gets staged.
+    for unique_id in execution_list.get_ready_nodes():
+        if unique_id in prefetched or unique_id == execution_list.staged_node_id or unique_id in pending_subgraph_results:
+            continue
+        class_def = nodes.NODE_CLASS_MAPPINGS[dynprompt.get_node(unique_id)['class_type']]
+        if hasattr(class_def, "check_lazy_status"):
+            continue
+        node_is_async = is_async(class_def)
+        if not node_is_async and (node_pool is None or not is_thread_safe(class_def)):
+            continue
+        if caches.outputs.get(unique_id) is not None:
+            continue
+        input_data_all, _ = get_input_data(dynprompt.get_node(unique_id)['inputs'], class_def, unique_id, caches.outputs, dynprompt, extra_data)
+        obj = get_node_object(caches, unique_id, class_def)
+        display_node_id = dynprompt.get_display_node_id(unique_id)
+        if node_is_async:
+            prefetched[unique_id] = comfy_execution.async_loop.submit(get_output_data_async(obj, input_data_all, unique_id, display_node_id))
+        else:
+            prefetched[unique_id] = node_pool.submit(contextvars.copy_context().run, get_output_data_threaded, obj, input_data_all, unique_id, display_node_id)
+
 def format_value(x):
     if x is None:
         return None
@@ -267,7 +389,9 @@ def format_value(x):
     else:
         return str(x)
 
-def execute(server, dynprompt, caches, current_item, extra_data, executed, prompt_id, execution_list, pending_subgraph_results):
+def execute(server, dynprompt, caches, current_item, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, prefetched=None):
+    if prefetched is None:
+        prefetched = {}
     unique_id = current_item
     real_node_id = dynprompt.get_real_node_id(unique_id)
     display_node_id = dynprompt.get_display_node_id(unique_id)
@@ -310,13 +434,10 @@ def execute(server, dynprompt, caches, current_item, extra_data, executed, promp
                 server.last_node_id = display_node_id
                 server.send_sync("executing", { "node": unique_id, "display_node": display_node_id, "prompt_id": prompt_id }, server.client_id)
 
-            obj = caches.objects.get(unique_id)
-            if obj is None:
-                obj = class_def()
-                caches.objects.set(unique_id, obj)
+            obj = get_node_object(caches, unique_id, class_def)
 
             if hasattr(obj, "check_lazy_status"):
-                required_inputs = _map_node_over_list(obj, input_data_all, "check_lazy_status", allow_interrupt=True)
+                required_inputs = resolve_awaitables(_map_node_over_list(obj, input_data_all, "check_lazy_status", allow_interrupt=True))
                 required_inputs = set(sum([r for r in required_inputs if isinstance(r,list)], []))
                 required_inputs = [x for x in required_inputs if isinstance(x,str) and (
                     x not in input_data_all or x in missing_keys
@@ -346,7 +467,12 @@ def execute(server, dynprompt, caches, current_item, extra_data, executed, promp
                     return block
             def pre_execute_cb(call_index):
                 GraphBuilder.set_default_prefix(unique_id, call_index, 0)
-            output_data, output_ui, has_subgraph = get_output_data(obj, input_data_all, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb)
+            if unique_id in prefetched:
+                (output_data, output_ui, has_subgraph), blocks = prefetched.pop(unique_id).result()
+                for block in blocks:
+                    execution_block_cb(block)
+            else:
+                output_data, output_ui, has_subgraph = get_output_data(obj, input_data_all, execution_block_cb=execution_block_cb, pre_execute_cb=pre_execute_cb)
         if len(output_ui) > 0:
             caches.ui.set(unique_id, {
                 "meta": {
@@ -436,14 +562,19 @@ def execute(server, dynprompt, caches, current_item, extra_data, executed, promp
     return (ExecutionResult.SUCCESS, None, None)
 
 class PromptExecutor:
-    def __init__(self, server, cache_type=False, cache_size=None):
+    def __init__(self, server, cache_type=False, cache_size=None, disk_cache=None, parallel_nodes=0, prefetcher=None):
         self.cache_size = cache_size
         self.cache_type = cache_type
+        self.disk_cache = disk_cache
+        self.prefetcher = prefetcher
         self.server = server
+        self.node_pool = None
+        if parallel_nodes > 0:
+            self.node_pool = concurrent.futures.ThreadPoolExecutor(max_workers=parallel_nodes, thread_name_prefix="comfy_node")
         self.reset()
 
     def reset(self):
-        self.caches = CacheSet(cache_type=self.cache_type, cache_size=self.cache_size)
+        self.caches = CacheSet(cache_type=self.cache_type, cache_size=self.cache_size, disk_cache=self.disk_cache)
         self.status_messages = []
         self.success = True
 
@@ -484,7 +615,7 @@ class PromptExecutor:
             }
             self.add_message("execution_error", mes, broadcast=False)
 
-    def execute(self, prompt, prompt_id, extra_data={}, execute_outputs=[]):
+    def execute(self, prompt, prompt_id, extra_data={}, execute_outputs=[], is_changed=None):
         nodes.interrupt_processing(False)
 
         if "client_id" in extra_data:
@@ -497,7 +628,7 @@ class PromptExecutor:
 
         with torch.inference_mode():
             dynamic_prompt = DynamicPrompt(prompt)
-            is_changed_cache = IsChangedCache(dynamic_prompt, self.caches.outputs)
+            is_changed_cache = IsChangedCache(dynamic_prompt, self.caches.outputs, is_changed)
             for cache in self.caches.all:
                 cache.set_prompt(dynamic_prompt, prompt.keys(), is_changed_cache)
                 cache.clean_unused()
@@ -507,13 +638,19 @@ class PromptExecutor:
                 if self.caches.outputs.get(node_id) is not None:
                     cached_nodes.append(node_id)
 
+            if self.prefetcher is not None:
+                # Cached loaders won't load their files again
+                self.prefetcher.prefetch(get_prefetch_files(prompt, cached_nodes), first=True)
+
             comfy.model_management.cleanup_models_gc()
             self.add_message("execution_cached",
                           { "nodes": cached_nodes, "prompt_id": prompt_id},
                           broadcast=False)
             pending_subgraph_results = {}
+            prefetched = {}
             executed = set()
             execution_list = ExecutionList(dynamic_prompt, self.caches.outputs)
+            execution_list.running_nodes = prefetched
             current_outputs = self.caches.outputs.all_node_ids()
             for node_id in list(execute_outputs):
                 execution_list.add_node(node_id)
@@ -524,7 +661,8 @@ class PromptExecutor:
                     self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
                     break
 
-                result, error, ex = execute(self.server, dynamic_prompt, self.caches, node_id, extra_data, executed, prompt_id, execution_list, pending_subgraph_results)
+                submit_ready_nodes(self.node_pool, dynamic_prompt, self.caches, extra_data, execution_list, pending_subgraph_results, prefetched)
+                result, error, ex = execute(self.server, dynamic_prompt, self.caches, node_id, extra_data, executed, prompt_id, execution_list, pending_subgraph_results, prefetched)
                 self.success = result != ExecutionResult.FAILURE
                 if result == ExecutionResult.FAILURE:
                     self.handle_execution_error(prompt_id, dynamic_prompt.original_prompt, current_outputs, executed, error, ex)
@@ -537,6 +675,11 @@ class PromptExecutor:
                 # Only execute when the while-loop ends without break
                 self.add_message("execution_success", { "prompt_id": prompt_id }, broadcast=False)
 
+            # Results of nodes started in parallel or asynchronously are dropped if the prompt failed before using them.
+            for future in prefetched.values():
+                future.cancel()
+            concurrent.futures.wait(list(prefetched.values()))
+
             ui_outputs = {}
             meta_outputs = {}
             all_node_ids = self.caches.ui.all_node_ids()
@@ -756,7 +899,7 @@ def validate_inputs(prompt, item, validated):
             input_filtered['input_types'] = [received_types]
 
         #ret = obj_class.VALIDATE_INPUTS(**input_filtered)
-        ret = _map_node_over_list(obj_class, input_filtered, "VALIDATE_INPUTS")
+        ret = resolve_awaitables(_map_node_over_list(obj_class, input_filtered, "VALIDATE_INPUTS"))
         for x in input_filtered:
             for i, r in enumerate(ret):
                 if r is not True and not isinstance(r, ExecutionBlocker):
@@ -897,26 +1040,119 @@ def validate_prompt(prompt):
 
     return (True, None, list(good_outputs), node_errors)
 
+# The hidden inputs that get their values from the extra_data of the prompt, and the extra_data key they come from
+EXTRA_DATA_HIDDEN_INPUTS = {"EXTRA_PNGINFO": "extra_pnginfo", "AUTH_TOKEN_COMFY_ORG": "auth_token_comfy_org", "API_KEY_COMFY_ORG": "api_key_comfy_org"}
+
+def get_prompt_signature(prompt, outputs_to_execute, is_changed=None, extra_data=None):
+    """
+    Returns a digest of everything the outputs of a prompt depend on, the same for any two prompts
+    that would produce the same results. None if the prompt has to run on its own, because IS_CHANGED
+    says a node always changes or a node is NOT_IDEMPOTENT. The extra_data values the nodes get as
+    hidden inputs (the workflow to embed, the credentials) are part of it. The IS_CHANGED results are
+    added to the is_changed dict if one is passed, so executing the prompt doesn't have to call
+    IS_CHANGED again. Calls IS_CHANGED, which can be slow (hashing files), so it shouldn't run on the event loop.
+    """
+    if extra_data is None:
+        extra_data = {}
+    dynprompt = DynamicPrompt(prompt)
+    key_set = CacheKeySetInputSignature(dynprompt, outputs_to_execute, IsChangedCache(dynprompt, None, is_changed))
+    extra_keys = set()
+    for node_id in key_set.signatures:
+        class_def = nodes.NODE_CLASS_MAPPINGS[dynprompt.get_node(node_id)["class_type"]]
+        if getattr(class_def, "NOT_IDEMPOTENT", False):
+            return None
+        for hidden in class_def.INPUT_TYPES().get("hidden", {}).values():
+            if hidden in EXTRA_DATA_HIDDEN_INPUTS:
+                extra_keys.add(EXTRA_DATA_HIDDEN_INPUTS[hidden])
+    digests = []
+    for node_id in sorted(outputs_to_execute):
+        digest = key_set.get_node_digest(node_id)
+        if digest is None:
+            return None
+        # Results are reported per node id, so those need to match too
+        digests.append((node_id, digest))
+    extra = tuple((key, to_hashable(extra_data.get(key, None))) for key in sorted(extra_keys))
+    return to_stable_digest((tuple(digests), extra))
+
+def get_prefetch_files(prompt, skip=()):
+    """Returns the paths of the model files the loader nodes of prompt (see PREFETCH_FILES) load, except for the node ids in skip."""
+    paths = []
+    for node_id, node in prompt.items():
+        if node_id in skip:
+            continue
+        class_def = nodes.NODE_CLASS_MAPPINGS.get(node.get("class_type"), None)
+        prefetch_files = getattr(class_def, "PREFETCH_FILES", None)
+        if not prefetch_files:
+            continue
+        for input_name, folder_name in prefetch_files.items():
+            value = node.get("inputs", {}).get(input_name, None)
+            if not isinstance(value, str):
+                continue
+            path = folder_paths.get_full_path(folder_name, value)
+            if path is not None and path not in paths:
+                paths.append(path)
+    return paths
+
 MAXIMUM_HISTORY_SIZE = 10000
 
 class PromptQueue:
-    def __init__(self, server):
+    # Queue items are treated as immutable once queued: running items, snapshots and history
+    # entries all share them instead of copying.
+    def __init__(self, server, history=None):
         self.server = server
         self.mutex = threading.RLock()
         self.not_empty = threading.Condition(self.mutex)
         self.task_counter = 0
         self.queue = []
         self.currently_running = {}
-        self.history = {}
+        self.running_workers = {}
+        self.history = history if history is not None else comfy_execution.history.MemoryHistory(MAXIMUM_HISTORY_SIZE)
         self.flags = {}
-
-    def put(self, item):
+        self.coalesced = {} # prompt_id of a queued or running prompt -> identical prompts waiting on its results
+        self.signatures = {} # prompt signature -> prompt_id of the queued or running prompt with it
+        self.prompt_signatures = {} # prompt_id -> prompt signature
+        self.is_changed = {} # prompt_id -> IS_CHANGED results computed with its signature, see take_is_changed
+        self.version = 0 # bumped on every change to the queued or running items
+        self.snapshot = None # (version, running, queued)
+        self.json_lock = threading.Lock()
+        self.queue_json = None # (version, serialized /queue response)
+        self.item_json = {} # prompt_id -> serialized queue item
+
+    def _queue_changed(self):
+        self.version += 1
+        self.server.queue_updated()
+
+    def put(self, item, signature=None, is_changed=None):
+        # Prompts with the same signature as a queued or running one (see get_prompt_signature) don't get
+        # queued themselves, they get the results of that prompt when it is done.
         with self.mutex:
-            heapq.heappush(self.queue, item)
-            self.server.queue_updated()
-            self.not_empty.notify()
-
-    def get(self, timeout=None):
+            if is_changed is not None:
+                self.is_changed[item[1]] = is_changed
+            primary_id = self.signatures.get(signature) if signature is not None else None
+            if primary_id is not None:
+                self.coalesced[primary_id].append(item)
+            else:
+                if signature is not None:
+                    self.signatures[signature] = item[1]
+                    self.prompt_signatures[item[1]] = signature
+                    self.coalesced[item[1]] = []
+                heapq.heappush(self.queue, item)
+                self.not_empty.notify()
+            self._queue_changed()
+
+    def _pop_coalesced(self, prompt_id):
+        signature = self.prompt_signatures.pop(prompt_id, None)
+        if signature is not None:
+            self.signatures.pop(signature, None)
+        return self.coalesced.pop(prompt_id, []), signature
+
+    def _all_coalesced(self):
+        return [x for items in self.coalesced.values() for x in items]
+
+    def _count_coalesced(self):
+        return sum(len(items) for items in self.coalesced.values())
+
+    def get(self, timeout=None, worker=None):
         with self.not_empty:
             while len(self.queue) == 0:
                 self.not_empty.wait(timeout=timeout)
@@ -924,11 +1160,23 @@ class PromptQueue:
                     return None
             item = heapq.heappop(self.queue)
             i = self.task_counter
-            self.currently_running[i] = copy.deepcopy(item)
+            self.currently_running[i] = item
+            if worker is not None:
+                self.running_workers[i] = worker
             self.task_counter += 1
-            self.server.queue_updated()
+            self._queue_changed()
             return (item, i)
 
+    def take_is_changed(self, prompt_id):
+        """Returns the IS_CHANGED results that were passed to put with the prompt, None if there weren't any."""
+        with self.mutex:
+            return self.is_changed.pop(prompt_id, None)
+
+    def peek(self, count=1):
+        """Returns the next count items get() will return, without removing them."""
+        with self.mutex:
+            return heapq.nsmallest(count, self.queue)
+
     class ExecutionStatus(NamedTuple):
         status_str: Literal['success', 'error']
         completed: bool
@@ -938,84 +1186,159 @@ class PromptQueue:
                   status: Optional['PromptQueue.ExecutionStatus']):
         with self.mutex:
             prompt = self.currently_running.pop(item_id)
-            if len(self.history) > MAXIMUM_HISTORY_SIZE:
-                self.history.pop(next(iter(self.history)))
+            worker = self.running_workers.pop(item_id, None)
 
             status_dict: Optional[dict] = None
             if status is not None:
                 status_dict = copy.deepcopy(status._asdict())
 
-            self.history[prompt[1]] = {
+            entry = {
                 "prompt": prompt,
                 "outputs": {},
                 'status': status_dict,
             }
-            self.history[prompt[1]].update(history_result)
-            self.server.queue_updated()
+            if worker is not None:
+                entry["worker"] = worker
+            entry.update(history_result)
+            self.history.add(prompt[1], entry)
+
+            coalesced, signature = self._pop_coalesced(prompt[1])
+            if status_dict is not None and status_dict["status_str"] == "success":
+                for item in coalesced:
+                    self.is_changed.pop(item[1], None)
+                    entry = {
+                        "prompt": item,
+                        "outputs": {},
+                        'status': status_dict,
+                        "coalesced_with": prompt[1],
+                    }
+                    entry.update(history_result)
+                    self.history.add(item[1], entry)
+                    self._send_coalesced_result(item, history_result)
+            else:
+                # Failed or interrupted, the identical prompts still get to run
+                for item in coalesced:
+                    self.put(item, signature)
+            self._queue_changed()
+
+    def _send_coalesced_result(self, item, history_result):
+        client_id = item[3].get("client_id")
+        if client_id is None:
+            return
+        prompt_id = item[1]
+        self.server.send_sync("execution_start", { "prompt_id": prompt_id, "timestamp": int(time.time() * 1000) }, client_id)
+        for node_id, output in history_result.get("outputs", {}).items():
+            display_node = history_result.get("meta", {}).get(node_id, {}).get("display_node", node_id)
+            self.server.send_sync("executed", { "node": node_id, "display_node": display_node, "output": output, "prompt_id": prompt_id }, client_id)
+        self.server.send_sync("execution_success", { "prompt_id": prompt_id, "timestamp": int(time.time() * 1000) }, client_id)
+        self.server.send_sync("executing", { "node": None, "prompt_id": prompt_id }, client_id)
 
-    # Note: slow
     def get_current_queue(self):
         with self.mutex:
-            out = []
-            for x in self.currently_running.values():
-                out += [x]
-            return (out, copy.deepcopy(self.queue))
+            running, queued = self.get_current_queue_volatile()
+            return (list(running), list(queued))
 
     # read-safe as long as queue items are immutable
     def get_current_queue_volatile(self):
+        return self.get_queue_snapshot()[1:]
+
+    def get_queue_snapshot(self):
+        """Returns (version, running, queued). Snapshots are reused until the queue changes."""
+        with self.mutex:
+            if self.snapshot is None or self.snapshot[0] != self.version:
+                running = tuple(self.currently_running.values())
+                queued = tuple(self.queue) + tuple(self._all_coalesced())
+                self.snapshot = (self.version, running, queued)
+            return self.snapshot
+
+    def get_queue_json(self):
+        """
+        Returns the /queue response as a JSON string. It is only built again when the queue changed, and
+        then only the items that weren't in the previous response get serialized.
+        """
         with self.mutex:
-            running = [x for x in self.currently_running.values()]
-            queued = copy.copy(self.queue)
-            return (running, queued)
+            version, running, queued = self.get_queue_snapshot()
+            running_workers = self.get_running_workers()
+        with self.json_lock:
+            if self.queue_json is None or self.queue_json[0] != version:
+                item_json = {}
+                def serialize(items):
+                    out = []
+                    for item in items:
+                        s = self.item_json.get(item[1])
+                        if s is None:
+                            s = json.dumps(item)
+                        item_json[item[1]] = s
+                        out.append(s)
+                    return "[" + ",".join(out) + "]"
+                response = '{{"queue_running": {}, "queue_pending": {}, "queue_running_workers": {}}}'.format(
+                    serialize(running), serialize(queued), json.dumps(running_workers))
+                self.item_json = item_json
+                self.queue_json = (version, response)
+            return self.queue_json[1]
+
+    def get_running_workers(self):
+        with self.mutex:
+            return {self.currently_running[i][1]: w for i, w in self.running_workers.items()}
 
     def get_tasks_remaining(self):
         with self.mutex:
-            return len(self.queue) + len(self.currently_running)
+            return len(self.queue) + len(self.currently_running) + self._count_coalesced()
 
     def wipe_queue(self):
         with self.mutex:
+            for item in self.queue:
+                coalesced, _ = self._pop_coalesced(item[1])
+                for x in [item] + coalesced:
+                    self.is_changed.pop(x[1], None)
+            for items in self.coalesced.values():
+                for item in items:
+                    self.is_changed.pop(item[1], None)
+                items.clear()
             self.queue = []
-            self.server.queue_updated()
+            self._queue_changed()
 
     def delete_queue_item(self, function):
         with self.mutex:
             for x in range(len(self.queue)):
                 if function(self.queue[x]):
-                    if len(self.queue) == 1:
-                        self.wipe_queue()
-                    else:
-                        self.queue.pop(x)
-                        heapq.heapify(self.queue)
-                    self.server.queue_updated()
+                    self.is_changed.pop(self.queue[x][1], None)
+                    coalesced, signature = self._pop_coalesced(self.queue[x][1])
+                    self.queue.pop(x)
+                    heapq.heapify(self.queue)
+                    # The first identical prompt takes the place of the deleted one
+                    for item in coalesced:
+                        self.put(item, signature)
+                    self._queue_changed()
                     return True
+            for items in self.coalesced.values():
+                for x in range(len(items)):
+                    if function(items[x]):
+                        self.is_changed.pop(items.pop(x)[1], None)
+                        self._queue_changed()
+                        return True
         return False
 
-    def get_history(self, prompt_id=None, max_items=None, offset=-1):
+    def get_history(self, prompt_id=None, max_items=None, offset=-1, before=None):
+        """
+        Returns a dict of history entries, oldest first. before is a prompt_id to page backwards from:
+        the max_items entries that finished before it are returned.
+        """
         with self.mutex:
             if prompt_id is None:
-                out = {}
-                i = 0
-                if offset < 0 and max_items is not None:
-                    offset = len(self.history) - max_items
-                for k in self.history:
-                    if i >= offset:
-                        out[k] = self.history[k]
-                        if max_items is not None and len(out) >= max_items:
-                            break
-                    i += 1
-                return out
-            elif prompt_id in self.history:
-                return {prompt_id: copy.deepcopy(self.history[prompt_id])}
-            else:
+                return self.history.get_range(max_items=max_items, offset=offset, before=before)
+            entry = self.history.get(prompt_id)
+            if entry is None:
                 return {}
+            return {prompt_id: entry}
 
     def wipe_history(self):
         with self.mutex:
-            self.history = {}
+            self.history.clear()
 
     def delete_history_item(self, id_to_delete):
         with self.mutex:
-            self.history.pop(id_to_delete, None)
+            self.history.delete(id_to_delete)
 
     def set_flag(self, name, data):
         with self.mutex:
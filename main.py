@@ -1,5 +1,7 @@
 import comfy.options
 comfy.options.enable_args_parsing()
+import app.startup_profiler
+app.startup_profiler.end_phase("interpreter")
 
 import os
 import importlib.util
@@ -19,6 +21,7 @@ if __name__ == "__main__":
 
 
 setup_logger(log_level=args.verbose, use_stdout=args.log_stdout)
+app.startup_profiler.end_phase("arg_parsing")
 
 def apply_custom_paths():
     # extra model paths
@@ -54,6 +57,11 @@ def apply_custom_paths():
         logging.info(f"Setting user directory to: {user_dir}")
         folder_paths.set_user_directory(user_dir)
 
+    if args.cache_directory:
+        cache_dir = os.path.abspath(args.cache_directory)
+        logging.info(f"Setting cache directory to: {cache_dir}")
+        folder_paths.set_cache_directory(cache_dir)
+
 
 def execute_prestartup_script():
     def execute_script(script_path):
@@ -97,6 +105,7 @@ def execute_prestartup_script():
 
 apply_custom_paths()
 execute_prestartup_script()
+app.startup_profiler.end_phase("prestartup_scripts")
 
 
 # Main code
@@ -126,15 +135,25 @@ if __name__ == "__main__":
     import cuda_malloc
 
 import comfy.utils
+app.startup_profiler.end_phase("torch_import")
+import comfy.model_management
+app.startup_profiler.end_phase("device_probe")
 
 import execution
+import comfy_execution.async_loop
+import comfy_execution.disk_cache
+import comfy_execution.prefetch
 import server
 from server import BinaryEventTypes
 import nodes
-import comfy.model_management
+import comfy.model_index
+import comfy.patched_weight_cache
+import comfy.weight_dedup
+import comfy.vae_memory
 import comfyui_version
 import app.logger
 import hook_breaker_ac10a0
+app.startup_profiler.end_phase("core_import")
 
 def cuda_malloc_warning():
     device = comfy.model_management.get_torch_device()
@@ -148,15 +167,28 @@ def cuda_malloc_warning():
             logging.warning("\nWARNING: this card most likely does not support cuda-malloc, if you get \"CUDA error\" please run ComfyUI with: --disable-cuda-malloc\n")
 
 
-def prompt_worker(q, server_instance):
+# Number of queued prompts the eviction policy looks at
+EVICTION_LOOKAHEAD = 8
+
+def prompt_worker(q, server_instance, worker_id=0, device=None, disk_cache=None, prefetcher=None):
+    comfy.model_management.set_current_worker(worker_id)
+    if device is not None:
+        comfy.model_management.set_thread_torch_device(device)
+        logging.info("Prompt worker {} using device: {}".format(worker_id, comfy.model_management.get_torch_device()))
+    worker = {"id": worker_id, "device": str(comfy.model_management.get_torch_device())}
+
     current_time: float = 0.0
     cache_type = execution.CacheType.CLASSIC
+    cache_size = args.cache_lru
     if args.cache_lru > 0:
         cache_type = execution.CacheType.LRU
+    elif args.cache_ram > 0:
+        cache_type = execution.CacheType.RAM_PRESSURE
+        cache_size = int(args.cache_ram * 1024 * 1024 * 1024)
     elif args.cache_none:
         cache_type = execution.CacheType.DEPENDENCY_AWARE
 
-    e = execution.PromptExecutor(server_instance, cache_type=cache_type, cache_size=args.cache_lru)
+    e = execution.PromptExecutor(server_instance, cache_type=cache_type, cache_size=cache_size, disk_cache=disk_cache, parallel_nodes=args.parallel_nodes, prefetcher=prefetcher)
     last_gc_collect = 0
     need_gc = False
     gc_collect_interval = 10.0
@@ -166,14 +198,22 @@ def prompt_worker(q, server_instance):
         if need_gc:
             timeout = max(gc_collect_interval - (current_time - last_gc_collect), 0.0)
 
-        queue_item = q.get(timeout=timeout)
+        queue_item = q.get(timeout=timeout, worker=worker)
         if queue_item is not None:
             item, item_id = queue_item
             execution_start_time = time.perf_counter()
             prompt_id = item[1]
             server_instance.last_prompt_id = prompt_id
 
-            e.execute(item[2], prompt_id, item[3], item[4])
+            if prefetcher is not None:
+                # Read the models of the next prompt while this one runs
+                for next_item in q.peek(1):
+                    prefetcher.prefetch(execution.get_prefetch_files(next_item[2]))
+            upcoming = [item] + q.peek(EVICTION_LOOKAHEAD)
+            comfy.model_management.set_upcoming_files([execution.get_prefetch_files(x[2]) for x in upcoming])
+
+            e.execute(item[2], prompt_id, item[3], item[4], is_changed=q.take_is_changed(prompt_id))
+            comfy.vae_memory.save()
             need_gc = True
             q.task_done(item_id,
                         e.history_result,
@@ -186,7 +226,10 @@ def prompt_worker(q, server_instance):
 
             current_time = time.perf_counter()
             execution_time = current_time - execution_start_time
-            logging.info("Prompt executed in {:.2f} seconds".format(execution_time))
+            if args.prompt_workers > 1:
+                logging.info("Prompt executed in {:.2f} seconds by worker {}".format(execution_time, worker_id))
+            else:
+                logging.info("Prompt executed in {:.2f} seconds".format(execution_time))
 
         flags = q.get_flags()
         free_memory = flags.get("free_memory", False)
@@ -221,9 +264,13 @@ async def run(server_instance, address='', port=8188, verbose=True, call_on_star
 
 
 def hijack_progress(server_instance):
-    def hook(value, total, preview_image):
+    def hook(value, total, preview_image, node_id=None):
         comfy.model_management.throw_exception_if_processing_interrupted()
-        progress = {"value": value, "max": total, "prompt_id": server_instance.last_prompt_id, "node": server_instance.last_node_id}
+        if node_id is None:
+            node_id = execution.executing_node.get()
+        if node_id is None:
+            node_id = server_instance.last_node_id
+        progress = {"value": value, "max": total, "prompt_id": server_instance.last_prompt_id, "node": node_id}
 
         server_instance.send_sync("progress", progress, server_instance.client_id)
         if preview_image is not None:
@@ -260,17 +307,49 @@ def start_comfyui(asyncio_loop=None):
         asyncio_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(asyncio_loop)
     prompt_server = server.PromptServer(asyncio_loop)
+    app.startup_profiler.end_phase("frontend_init")
 
     hook_breaker_ac10a0.save_functions()
     nodes.init_extra_nodes(init_custom_nodes=not args.disable_all_custom_nodes, init_api_nodes=not args.disable_api_nodes)
     hook_breaker_ac10a0.restore_functions()
+    app.startup_profiler.end_phase("node_import")
 
     cuda_malloc_warning()
 
     prompt_server.add_routes()
     hijack_progress(prompt_server)
 
-    threading.Thread(target=prompt_worker, daemon=True, args=(prompt_server.prompt_queue, prompt_server,)).start()
+    disk_cache = None
+    if args.cache_disk > 0:
+        disk_cache = comfy_execution.disk_cache.DiskCache(os.path.join(folder_paths.get_cache_directory(), "node_outputs"), int(args.cache_disk * 1024 * 1024 * 1024))
+
+    if args.cache_patched_weights > 0 or args.cache_patched_weights_disk > 0:
+        directory = None
+        if args.cache_patched_weights_disk > 0:
+            directory = os.path.join(folder_paths.get_cache_directory(), "patched_weights")
+        comfy.patched_weight_cache.cache = comfy.patched_weight_cache.PatchedWeightCache(int(args.cache_patched_weights * 1024 * 1024 * 1024), directory, int(args.cache_patched_weights_disk * 1024 * 1024 * 1024))
+
+    if args.model_index:
+        os.makedirs(folder_paths.get_cache_directory(), exist_ok=True)
+        comfy.model_index.index = comfy.model_index.ModelIndex(os.path.join(folder_paths.get_cache_directory(), "model_index.db"))
+        threading.Thread(target=comfy.model_index.index.remove_missing, daemon=True).start()
+
+    if not args.disable_vae_memory_model:
+        os.makedirs(folder_paths.get_cache_directory(), exist_ok=True)
+        comfy.vae_memory.model = comfy.vae_memory.VAEMemoryModel(os.path.join(folder_paths.get_cache_directory(), "vae_memory.json"))
+
+    if args.dedup_weights:
+        comfy.weight_dedup.store = comfy.weight_dedup.WeightStore()
+
+    prefetcher = None
+    if args.prefetch_models:
+        prefetcher = comfy_execution.prefetch.ModelPrefetcher()
+
+    worker_count = max(1, args.prompt_workers)
+    for worker_id, device in enumerate(comfy.model_management.prompt_worker_devices(worker_count, args.prompt_worker_devices)):
+        threading.Thread(target=prompt_worker, daemon=True, args=(prompt_server.prompt_queue, prompt_server, worker_id, device, disk_cache, prefetcher)).start()
+
+    app.startup_profiler.finish_startup()
 
     if args.quick_test_for_ci:
         exit(0)
@@ -308,4 +387,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logging.info("\nStopped server")
 
+    comfy_execution.async_loop.shutdown()
     cleanup_temp()
@@ -30,19 +30,22 @@ from comfy.comfy_types import IO, ComfyNodeABC, InputTypeDict, FileLocator
 import comfy.clip_vision
 
 import comfy.model_management
+import comfy.patched_weight_cache
+import comfy.weight_dedup
 from comfy.cli_args import args
 
 import importlib
 
 import folder_paths
 import latent_preview
+import app.startup_profiler
 import node_helpers
 
 def before_node_execution():
     comfy.model_management.throw_exception_if_processing_interrupted()
 
-def interrupt_processing(value=True):
-    comfy.model_management.interrupt_current_processing(value)
+def interrupt_processing(value=True, worker=None):
+    comfy.model_management.interrupt_current_processing(value, worker=worker)
 
 MAX_RESOLUTION=16384
 
@@ -542,6 +545,7 @@ class CheckpointLoader:
                               "ckpt_name": (folder_paths.get_filename_list("checkpoints"), )}}
     RETURN_TYPES = ("MODEL", "CLIP", "VAE")
     FUNCTION = "load_checkpoint"
+    PREFETCH_FILES = {"ckpt_name": "checkpoints"}
 
     CATEGORY = "advanced/loaders"
     DEPRECATED = True
@@ -564,6 +568,7 @@ class CheckpointLoaderSimple:
                        "The CLIP model used for encoding text prompts.",
                        "The VAE model used for encoding and decoding images to and from latent space.")
     FUNCTION = "load_checkpoint"
+    PREFETCH_FILES = {"ckpt_name": "checkpoints"}
 
     CATEGORY = "loaders"
     DESCRIPTION = "Loads a diffusion model checkpoint, diffusion models are used to denoise latents."
@@ -607,6 +612,7 @@ class unCLIPCheckpointLoader:
                              }}
     RETURN_TYPES = ("MODEL", "CLIP", "VAE", "CLIP_VISION")
     FUNCTION = "load_checkpoint"
+    PREFETCH_FILES = {"ckpt_name": "checkpoints"}
 
     CATEGORY = "loaders"
 
@@ -650,6 +656,7 @@ class LoraLoader:
     RETURN_TYPES = ("MODEL", "CLIP")
     OUTPUT_TOOLTIPS = ("The modified diffusion model.", "The modified CLIP model.")
     FUNCTION = "load_lora"
+    PREFETCH_FILES = {"lora_name": "loras"}
 
     CATEGORY = "loaders"
     DESCRIPTION = "LoRAs are used to modify diffusion and CLIP models, altering the way in which latents are denoised such as applying styles. Multiple LoRA nodes can be linked together."
@@ -762,6 +769,7 @@ class VAELoader:
         return {"required": { "vae_name": (s.vae_list(), )}}
     RETURN_TYPES = ("VAE",)
     FUNCTION = "load_vae"
+    PREFETCH_FILES = {"vae_name": "vae"}
 
     CATEGORY = "loaders"
 
@@ -774,6 +782,9 @@ class VAELoader:
             sd = comfy.utils.load_torch_file(vae_path)
         vae = comfy.sd.VAE(sd=sd)
         vae.throw_exception_if_invalid()
+        if vae_name not in ["taesd", "taesdxl", "taesd3", "taef1"]:
+            comfy.patched_weight_cache.set_weights_id(vae.patcher.model, vae_path)
+            comfy.weight_dedup.share_weights(vae.patcher.model)
         return (vae,)
 
 class ControlNetLoader:
@@ -783,6 +794,7 @@ class ControlNetLoader:
 
     RETURN_TYPES = ("CONTROL_NET",)
     FUNCTION = "load_controlnet"
+    PREFETCH_FILES = {"control_net_name": "controlnet"}
 
     CATEGORY = "loaders"
 
@@ -801,6 +813,7 @@ class DiffControlNetLoader:
 
     RETURN_TYPES = ("CONTROL_NET",)
     FUNCTION = "load_controlnet"
+    PREFETCH_FILES = {"control_net_name": "controlnet"}
 
     CATEGORY = "loaders"
 
@@ -899,6 +912,7 @@ class UNETLoader:
                              }}
     RETURN_TYPES = ("MODEL",)
     FUNCTION = "load_unet"
+    PREFETCH_FILES = {"unet_name": "diffusion_models"}
 
     CATEGORY = "advanced/loaders"
 
@@ -927,6 +941,7 @@ class CLIPLoader:
                              }}
     RETURN_TYPES = ("CLIP",)
     FUNCTION = "load_clip"
+    PREFETCH_FILES = {"clip_name": "text_encoders"}
 
     CATEGORY = "advanced/loaders"
 
@@ -955,6 +970,7 @@ class DualCLIPLoader:
                              }}
     RETURN_TYPES = ("CLIP",)
     FUNCTION = "load_clip"
+    PREFETCH_FILES = {"clip_name1": "text_encoders", "clip_name2": "text_encoders"}
 
     CATEGORY = "advanced/loaders"
 
@@ -980,6 +996,7 @@ class CLIPVisionLoader:
                              }}
     RETURN_TYPES = ("CLIP_VISION",)
     FUNCTION = "load_clip"
+    PREFETCH_FILES = {"clip_name": "clip_vision"}
 
     CATEGORY = "loaders"
 
@@ -1016,6 +1033,7 @@ class StyleModelLoader:
 
     RETURN_TYPES = ("STYLE_MODEL",)
     FUNCTION = "load_style_model"
+    PREFETCH_FILES = {"style_model_name": "style_models"}
 
     CATEGORY = "loaders"
 
@@ -1113,6 +1131,7 @@ class GLIGENLoader:
 
     RETURN_TYPES = ("GLIGEN",)
     FUNCTION = "load_gligen"
+    PREFETCH_FILES = {"gligen_name": "gligen"}
 
     CATEGORY = "loaders"
 
@@ -1629,6 +1648,7 @@ class LoadImage:
                 }
 
     CATEGORY = "image"
+    THREAD_SAFE = True
 
     RETURN_TYPES = ("IMAGE", "MASK")
     FUNCTION = "load_image"
@@ -1706,6 +1726,7 @@ class LoadImageMask:
                 }
 
     CATEGORY = "mask"
+    THREAD_SAFE = True
 
     RETURN_TYPES = ("MASK",)
     FUNCTION = "load_image"
@@ -2100,6 +2121,12 @@ def get_module_name(module_path: str) -> str:
 
 
 def load_custom_node(module_path: str, ignore=set(), module_parent="custom_nodes") -> bool:
+    time_before = time.perf_counter()
+    success = _load_custom_node(module_path, ignore, module_parent)
+    app.startup_profiler.record_module_import(module_path, time.perf_counter() - time_before, success)
+    return success
+
+def _load_custom_node(module_path: str, ignore=set(), module_parent="custom_nodes") -> bool:
     module_name = get_module_name(module_path)
     if os.path.isfile(module_path):
         sp = os.path.splitext(module_path)
@@ -2257,6 +2284,7 @@ def init_builtin_extra_nodes():
         "nodes_ace.py",
         "nodes_string.py",
         "nodes_camera_trajectory.py",
+        "nodes_feature_cache.py",
     ]
 
     import_failed = []
@@ -1,6 +1,7 @@
 import os
 import sys
 import asyncio
+import contextvars
 import traceback
 
 import nodes
@@ -14,6 +15,8 @@ import struct
 import ssl
 import socket
 import ipaddress
+import threading
+import time
 from PIL import Image, ImageOps
 from PIL.PngImagePlugin import PngInfo
 from io import BytesIO
@@ -26,16 +29,23 @@ import mimetypes
 from comfy.cli_args import args
 import comfy.utils
 import comfy.model_management
+import comfy.vae_memory
 import node_helpers
+import comfy_execution.history
 from comfyui_version import __version__
 from app.frontend_management import FrontendManager
 
 from app.user_manager import UserManager
 from app.model_manager import ModelFileManager
 from app.custom_node_manager import CustomNodeManager
+from app.object_info_cache import ObjectInfoCache
+import app.startup_profiler
 from typing import Optional, Union
 from api_server.routes.internal.internal_routes import InternalRoutes
 
+# Minimum time between two queue status broadcasts
+QUEUE_STATUS_INTERVAL = 0.1
+
 class BinaryEventTypes:
     PREVIEW_IMAGE = 1
     UNENCODED_PREVIEW_IMAGE = 2
@@ -151,6 +161,10 @@ class PromptServer():
     def __init__(self, loop):
         PromptServer.instance = self
 
+        # Per prompt worker execution state, see client_id/last_node_id/last_prompt_id
+        self.worker_state = contextvars.ContextVar("prompt_server_worker_state", default=None)
+        self.shared_worker_state = {}
+
         mimetypes.init()
         mimetypes.add_type('application/javascript; charset=utf-8', '.js')
         mimetypes.add_type('image/webp', '.webp')
@@ -160,9 +174,15 @@ class PromptServer():
         self.custom_node_manager = CustomNodeManager()
         self.internal_routes = InternalRoutes(self)
         self.supports = ["custom_nodes_from_web"]
-        self.prompt_queue = execution.PromptQueue(self)
+        history = None
+        if args.history_db is not None:
+            history = comfy_execution.history.SqliteHistory(args.history_db or os.path.join(folder_paths.get_user_directory(), "history.db"), execution.MAXIMUM_HISTORY_SIZE)
+        self.prompt_queue = execution.PromptQueue(self, history)
         self.loop = loop
         self.messages = asyncio.Queue()
+        self.status_lock = threading.Lock()
+        self.status_pending = False
+        self.last_status_time = 0.0
         self.client_session:Optional[aiohttp.ClientSession] = None
         self.number = 0
 
@@ -186,8 +206,6 @@ class PromptServer():
         logging.info(f"[Prompt Server] web root: {self.web_root}")
         routes = web.RouteTableDef()
         self.routes = routes
-        self.last_node_id = None
-        self.client_id = None
 
         self.on_prompt_handlers = []
 
@@ -545,10 +563,20 @@ class PromptServer():
                         "torch_vram_total": torch_vram_total,
                         "torch_vram_free": torch_vram_free,
                     }
-                ]
+                ],
+                "models": comfy.model_management.get_all_model_stats(),
+                "weight_prefetch": comfy.model_management.get_weight_prefetch_stats(),
             }
             return web.json_response(system_stats)
 
+        @routes.get("/startup_stats")
+        async def startup_stats(request):
+            return web.json_response(app.startup_profiler.get_report())
+
+        @routes.get("/vae_memory")
+        async def get_vae_memory(request):
+            return web.json_response(comfy.vae_memory.get_report())
+
         @routes.get("/prompt")
         async def get_prompt(request):
             return web.json_response(self.get_queue_info())
@@ -586,17 +614,13 @@ class PromptServer():
                 info['api_node'] = obj_class.API_NODE
             return info
 
+        self.object_info_cache = ObjectInfoCache(node_info, nodes.NODE_CLASS_MAPPINGS, nodes.NODE_DISPLAY_NAME_MAPPINGS)
+
         @routes.get("/object_info")
         async def get_object_info(request):
-            with folder_paths.cache_helper:
-                out = {}
-                for x in nodes.NODE_CLASS_MAPPINGS:
-                    try:
-                        out[x] = node_info(x)
-                    except Exception:
-                        logging.error(f"[ERROR] An error occurred while retrieving information for the '{x}' node.")
-                        logging.error(traceback.format_exc())
-                return web.json_response(out)
+            if not args.cache_object_info or request.rel_url.query.get("refresh", "false") == "true":
+                self.object_info_cache.clear()
+            return web.Response(text=self.object_info_cache.get(), content_type="application/json")
 
         @routes.get("/object_info/{node_class}")
         async def get_object_info_node(request):
@@ -611,7 +635,8 @@ class PromptServer():
             max_items = request.rel_url.query.get("max_items", None)
             if max_items is not None:
                 max_items = int(max_items)
-            return web.json_response(self.prompt_queue.get_history(max_items=max_items))
+            before = request.rel_url.query.get("before", None)
+            return web.json_response(self.prompt_queue.get_history(max_items=max_items, before=before))
 
         @routes.get("/history/{prompt_id}")
         async def get_history_prompt_id(request):
@@ -620,11 +645,7 @@ class PromptServer():
 
         @routes.get("/queue")
         async def get_queue(request):
-            queue_info = {}
-            current_queue = self.prompt_queue.get_current_queue_volatile()
-            queue_info['queue_running'] = current_queue[0]
-            queue_info['queue_pending'] = current_queue[1]
-            return web.json_response(queue_info)
+            return web.Response(text=self.prompt_queue.get_queue_json(), content_type='application/json')
 
         @routes.post("/prompt")
         async def post_prompt(request):
@@ -654,7 +675,13 @@ class PromptServer():
                 if valid[0]:
                     prompt_id = str(uuid.uuid4())
                     outputs_to_execute = valid[2]
-                    self.prompt_queue.put((number, prompt_id, prompt, extra_data, outputs_to_execute))
+                    signature = None
+                    is_changed = None
+                    if args.coalesce_prompts:
+                        # IS_CHANGED can take a while (hashing files), the worker reuses the results
+                        is_changed = {}
+                        signature = await self.loop.run_in_executor(None, execution.get_prompt_signature, prompt, outputs_to_execute, is_changed, extra_data)
+                    self.prompt_queue.put((number, prompt_id, prompt, extra_data, outputs_to_execute), signature=signature, is_changed=is_changed)
                     response = {"prompt_id": prompt_id, "number": number, "node_errors": valid[3]}
                     return web.json_response(response)
                 else:
@@ -685,7 +712,22 @@ class PromptServer():
 
         @routes.post("/interrupt")
         async def post_interrupt(request):
-            nodes.interrupt_processing()
+            prompt_id = None
+            if request.can_read_body:
+                try:
+                    json_data = await request.json()
+                except ValueError:
+                    # Not JSON, interrupt everything like a request without a body does
+                    json_data = None
+                if isinstance(json_data, dict):
+                    prompt_id = json_data.get("prompt_id", None)
+            if prompt_id is None:
+                nodes.interrupt_processing()
+            else:
+                # Only the worker running that prompt, if it is still running
+                worker = self.prompt_queue.get_running_workers().get(prompt_id, None)
+                if worker is not None:
+                    nodes.interrupt_processing(worker=worker["id"])
             return web.Response(status=200)
 
         @routes.post("/free")
@@ -712,6 +754,46 @@ class PromptServer():
 
             return web.Response(status=200)
 
+    # Each prompt worker sees its own client_id, last_node_id and last_prompt_id, and so do the node threads and async
+    # tasks it starts. Code that never set them (like the event loop) sees the most recent values set by any worker.
+    def _get_worker_state(self, name):
+        state = self.worker_state.get()
+        if state is None or name not in state:
+            return self.shared_worker_state.get(name, None)
+        return state[name]
+
+    def _set_worker_state(self, name, value):
+        state = self.worker_state.get()
+        if state is None:
+            state = {}
+            self.worker_state.set(state)
+        state[name] = value
+        self.shared_worker_state[name] = value
+
+    @property
+    def client_id(self):
+        return self._get_worker_state("client_id")
+
+    @client_id.setter
+    def client_id(self, value):
+        self._set_worker_state("client_id", value)
+
+    @property
+    def last_node_id(self):
+        return self._get_worker_state("last_node_id")
+
+    @last_node_id.setter
+    def last_node_id(self, value):
+        self._set_worker_state("last_node_id", value)
+
+    @property
+    def last_prompt_id(self):
+        return self._get_worker_state("last_prompt_id")
+
+    @last_prompt_id.setter
+    def last_prompt_id(self, value):
+        self._set_worker_state("last_prompt_id", value)
+
     async def setup(self):
         timeout = aiohttp.ClientTimeout(total=None) # no timeout
         self.client_session = aiohttp.ClientSession(timeout=timeout)
@@ -823,6 +905,21 @@ class PromptServer():
             self.messages.put_nowait, (event, data, sid))
 
     def queue_updated(self):
+        # Bursts of queue changes are sent as one status message, at most one every QUEUE_STATUS_INTERVAL seconds.
+        with self.status_lock:
+            if self.status_pending:
+                return
+            self.status_pending = True
+        self.loop.call_soon_threadsafe(self.schedule_queue_status)
+
+    def schedule_queue_status(self):
+        delay = self.last_status_time + QUEUE_STATUS_INTERVAL - time.monotonic()
+        self.loop.call_later(max(delay, 0.0), self.send_queue_status)
+
+    def send_queue_status(self):
+        with self.status_lock:
+            self.status_pending = False
+            self.last_status_time = time.monotonic()
         self.send_sync("status", { "status": self.get_queue_info() })
 
     async def publish_loop(self):
@@ -0,0 +1,99 @@
+import os
+import json
+import pytest
+from importlib import reload
+
+import folder_paths
+from app.object_info_cache import ObjectInfoCache
+
+
+@pytest.fixture
+def folders(tmp_path):
+    models = tmp_path / "models"
+    models.mkdir()
+    (models / "a.safetensors").write_bytes(b"")
+    inputs = tmp_path / "input"
+    inputs.mkdir()
+    folder_paths.folder_names_and_paths["test_models"] = ([str(models)], {".safetensors"})
+    folder_paths.set_input_directory(str(inputs))
+    yield models, inputs
+    reload(folder_paths)
+
+
+def touch(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def make_cache():
+    calls = []
+
+    class Loader:
+        @classmethod
+        def INPUT_TYPES(s):
+            return {"required": {"name": (folder_paths.get_filename_list("test_models"),)}}
+
+    def node_info(node_class):
+        calls.append(node_class)
+        return {"name": node_class, "input": mappings[node_class].INPUT_TYPES()}
+
+    mappings = {"Loader": Loader}
+    return ObjectInfoCache(node_info, mappings, {}), mappings, calls
+
+
+def test_reused_until_model_folder_changes(folders):
+    models, inputs = folders
+    cache, mappings, calls = make_cache()
+    assert json.loads(cache.get())["Loader"]["input"]["required"]["name"] == [["a.safetensors"]]
+    assert json.loads(cache.get())["Loader"]["input"]["required"]["name"] == [["a.safetensors"]]
+    assert len(calls) == 1
+    assert cache.hits == 1
+
+    (models / "b.safetensors").write_bytes(b"")
+    touch(models, os.path.getmtime(models) + 10)
+    assert json.loads(cache.get())["Loader"]["input"]["required"]["name"] == [["a.safetensors", "b.safetensors"]]
+    assert len(calls) == 2
+
+
+def test_input_directory_changes(folders):
+    models, inputs = folders
+    cache, mappings, calls = make_cache()
+    cache.get()
+    cache.get()
+    assert len(calls) == 1
+
+    (inputs / "3d").mkdir()
+    touch(inputs, os.path.getmtime(inputs) + 10)
+    cache.get()
+    assert len(calls) == 2
+
+    touch(inputs / "3d", os.path.getmtime(inputs / "3d") + 10)
+    cache.get()
+    assert len(calls) == 3
+
+
+def test_nodes_change(folders):
+    cache, mappings, calls = make_cache()
+    cache.get()
+    mappings["Loader2"] = mappings["Loader"]
+    assert set(json.loads(cache.get()).keys()) == {"Loader", "Loader2"}
+    cache.get()
+    assert cache.builds == 2
+
+
+def test_node_error_is_skipped(folders):
+    cache, mappings, calls = make_cache()
+
+    class Broken:
+        @classmethod
+        def INPUT_TYPES(s):
+            raise ValueError("broken")
+    mappings["Broken"] = Broken
+    assert list(json.loads(cache.get()).keys()) == ["Loader"]
+
+
+def test_clear_rebuilds(folders):
+    cache, mappings, calls = make_cache()
+    cache.get()
+    cache.clear()
+    cache.get()
+    assert len(calls) == 2
@@ -0,0 +1,100 @@
+import torch
+
+import comfy.patcher_extension
+from comfy_extras.nodes_feature_cache import DiffusionFeatureCache
+
+
+class StubModel:
+    def __init__(self):
+        self.calls = 0
+
+    def forward(self, x, timesteps, context=None, transformer_options={}, **kwargs):
+        self.calls += 1
+        return x * 2 + 1
+
+
+def make(threshold=0.1, start_sigma=10.0, end_sigma=1.0, max_skipped_steps=10):
+    cache = DiffusionFeatureCache(threshold, start_sigma, end_sigma, max_skipped_steps)
+    model = StubModel()
+
+    def run(value, sigma=5.0, uuids=("cond",)):
+        x = torch.full((1, 4, 8, 8), float(value))
+        executor = comfy.patcher_extension.WrapperExecutor.new_executor(model.forward, [cache.diffusion_model_wrapper])
+        return executor.execute(x, torch.tensor([sigma]), None, transformer_options={"uuids": list(uuids), "sigmas": torch.tensor([sigma])})
+    return cache, model, run
+
+
+def test_skips_below_threshold():
+    cache, model, run = make()
+    assert torch.equal(run(1.0), torch.full((1, 4, 8, 8), 3.0))
+    # The difference between the output and the input of the last step that ran is added to the new input
+    assert torch.allclose(run(1.05), torch.full((1, 4, 8, 8), 3.05))
+    assert model.calls == 1
+    assert (cache.calls, cache.hits) == (2, 1)
+    run(1.5)
+    assert model.calls == 2
+
+
+def test_change_adds_up_over_skipped_steps():
+    cache, model, run = make(threshold=0.1)
+    run(1.0)
+    run(1.04)
+    run(1.08)
+    assert model.calls == 1
+    # 0.04 + 0.038 + 0.037 is over the threshold
+    run(1.12)
+    assert model.calls == 2
+    run(1.16)
+    assert model.calls == 2
+
+
+def test_max_skipped_steps():
+    cache, model, run = make(threshold=100.0, max_skipped_steps=2)
+    for i in range(7):
+        run(1.0 + i * 0.01)
+    # Runs, skips twice, runs...
+    assert model.calls == 3
+    assert cache.hits == 4
+
+
+def test_only_skips_in_sigma_window():
+    cache, model, run = make(start_sigma=10.0, end_sigma=1.0)
+    run(1.0, sigma=20.0)
+    run(1.0, sigma=15.0)
+    assert model.calls == 2
+    run(1.0, sigma=10.0)
+    assert model.calls == 2
+    run(1.0, sigma=0.5)
+    run(1.0, sigma=0.1)
+    assert model.calls == 4
+
+
+def test_cond_and_uncond_are_separate():
+    cache, model, run = make()
+    run(1.0, uuids=("cond",))
+    run(-3.0, uuids=("uncond",))
+    assert model.calls == 2
+    assert torch.allclose(run(1.01, uuids=("cond",)), torch.full((1, 4, 8, 8), 3.01))
+    assert torch.allclose(run(-3.01, uuids=("uncond",)), torch.full((1, 4, 8, 8), -5.01))
+    assert model.calls == 2
+    # Batched cond and uncond are another batch
+    run(1.0, uuids=("cond", "uncond"))
+    assert model.calls == 3
+
+
+def test_outer_sample_wrapper_resets():
+    cache, model, run = make()
+
+    def sample():
+        for i in range(4):
+            run(1.0 + i * 0.01)
+        return cache.hits
+
+    executor = comfy.patcher_extension.WrapperExecutor.new_executor(sample, [cache.outer_sample_wrapper])
+    assert executor.execute() == 3
+    assert model.calls == 1
+    assert cache.states == {}
+    # The next sampling run doesn't reuse the outputs of the last one
+    executor = comfy.patcher_extension.WrapperExecutor.new_executor(sample, [cache.outer_sample_wrapper])
+    assert executor.execute() == 3
+    assert model.calls == 2
@@ -0,0 +1,55 @@
+import os
+import av
+import torch
+
+from comfy_extras.nodes_video import GetVideoComponents, SaveVideo, VAEDecodeVideo
+
+
+class FakeVAE:
+    """Decodes like the Wan 2.1 VAE (4x temporal, 8x spacial) into flat frames and counts the decoded chunks."""
+    upscale_ratio = (lambda a: max(0, a * 4 - 3), 8, 8)
+
+    def __init__(self):
+        self.decoded = 0
+
+    def temporal_compression_decode(self):
+        return 4
+
+    def decode_iter(self, samples, temporal_size=16, temporal_overlap=2):
+        frames = self.upscale_ratio[0](samples.shape[2])
+        height, width = samples.shape[-2] * 8, samples.shape[-1] * 8
+        for start in range(0, frames, 8):
+            self.decoded += 1
+            yield torch.full((min(8, frames - start), height, width, 3), 0.5)
+
+
+def test_video_decodes_each_chunk_once(tmp_path):
+    vae = FakeVAE()
+    latent = torch.zeros(1, 16, 6, 4, 6)
+    (video,) = VAEDecodeVideo().decode({"samples": latent}, vae, 24.0, 64, 8)
+    assert vae.decoded == 3
+    assert video.get_dimensions() == (48, 32)
+    assert video.get_duration() == 21 / 24
+
+    node = SaveVideo()
+    node.output_dir = str(tmp_path)
+    for _ in range(2):
+        result = node.save_video(video, "video/test", "auto", "auto")
+    images, _, fps = GetVideoComponents().get_components(video)
+    assert vae.decoded == 3
+    assert images.shape == (21, 32, 48, 3)
+    assert fps == 24.0
+
+    saved = result["ui"]["images"][0]
+    with av.open(os.path.join(str(tmp_path), saved["subfolder"], saved["filename"])) as container:
+        stream = container.streams.video[0]
+        assert (stream.width, stream.height) == (48, 32)
+        assert sum(1 for _ in container.decode(stream)) == 21
+
+
+def test_spilled_chunks_removed():
+    (video,) = VAEDecodeVideo().decode({"samples": torch.zeros(1, 16, 3, 2, 2)}, FakeVAE(), 24.0, 64, 8)
+    directory = video._VideoFromFrameChunks__dir
+    assert len(os.listdir(directory)) == 2
+    del video
+    assert not os.path.exists(directory)
@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+import torch
+
+import comfy.conds
+import comfy.samplers
+
+
+class Patcher:
+    def prepare_hook_patches_current_keyframe(self, t, hook_group, model_options):
+        pass
+
+    def prepare_state(self, timestep):
+        pass
+
+    def apply_hooks(self, hooks=None):
+        return {}
+
+
+class Model:
+    """Output depends on the input, the timestep and the conditioning, so wrong plans change the result."""
+    current_patcher = Patcher()
+
+    def __init__(self, memory_required=1024):
+        self.required = memory_required
+        self.calls = []
+
+    def memory_required(self, input_shape, cond_shapes={}):
+        return self.required * input_shape[0]
+
+    def apply_model(self, x, t, c_crossattn=None, transformer_options={}, **kwargs):
+        self.calls.append(x.shape[0])
+        return x * t.view(-1, 1, 1, 1) + c_crossattn.mean(dim=(1, 2)).view(-1, 1, 1, 1)
+
+
+def cond(value, **kwargs):
+    out = {"model_conds": {"c_crossattn": comfy.conds.CONDCrossAttn(torch.full((1, 7, 16), float(value)))}, "uuid": uuid.uuid4()}
+    out.update(kwargs)
+    return out
+
+
+def make_conds():
+    mask = torch.zeros(1, 16, 16)
+    mask[:, 4:12, 2:10] = 0.75
+    positive = [
+        cond(1.0, default=True),
+        cond(2.0, area=(8, 8, 0, 0), strength=0.8),
+        cond(3.0, area=(8, 16, 8, 0), timestep_start=0.7),
+        cond(4.0, mask=mask, timestep_end=0.4),
+        cond(5.0, timestep_start=0.5, timestep_end=0.2),
+    ]
+    negative = [cond(-1.0), cond(-2.0, area=(4, 4, 12, 12), timestep_start=0.6)]
+    return [positive, negative]
+
+
+def sample(model_options, steps, memory_required=1024):
+    torch.manual_seed(0)
+    conds = make_conds()
+    model = Model(memory_required)
+    out = []
+    for t in torch.linspace(1.0, 0.0, steps):
+        x = torch.randn(2, 4, 16, 16)
+        out.append(comfy.samplers.calc_cond_batch(model, conds, x, torch.full((2,), float(t)), model_options))
+    return out, model
+
+
+@pytest.mark.parametrize("memory_required", [1024, 1024 * 1024 * 1024 * 1024])
+def test_cached_plans_give_the_same_results(memory_required):
+    steps = 12
+    cache = comfy.samplers.CondPlanCache()
+    cached, cached_model = sample({"cond_plan_cache": cache}, steps, memory_required)
+    uncached, uncached_model = sample({}, steps, memory_required)
+    for a, b in zip(cached, uncached):
+        for x, y in zip(a, b):
+            assert torch.equal(x, y)
+    assert cached_model.calls == uncached_model.calls
+    # One plan for every set of active conds (timestep_start/end), reused on the other steps
+    active = {tuple(comfy.samplers.timestep_in_range(c, torch.tensor([float(t)])) for c in make_conds()[0] + make_conds()[1]) for t in torch.linspace(1.0, 0.0, steps)}
+    assert cache.misses == len(active)
+    assert cache.hits == steps - len(active)
+
+
+def test_conds_replaced_during_sampling():
+    cache = comfy.samplers.CondPlanCache()
+    model = Model()
+    x = torch.randn(1, 4, 16, 16)
+    t = torch.full((1,), 0.5)
+    conds = make_conds()
+    first = comfy.samplers.calc_cond_batch(model, conds, x, t, {"cond_plan_cache": cache})
+    other = [[cond(9.0)], conds[1]]
+    changed = comfy.samplers.calc_cond_batch(model, other, x, t, {"cond_plan_cache": cache})
+    assert torch.equal(changed[0], comfy.samplers.calc_cond_batch(model, other, x, t, {})[0])
+    assert not torch.equal(changed[0], first[0])
+    assert cache.misses == 2
+    # A batch of another shape gets its own plan
+    comfy.samplers.calc_cond_batch(model, conds, torch.randn(2, 4, 16, 16), torch.full((2,), 0.5), {"cond_plan_cache": cache})
+    assert cache.misses == 3
@@ -0,0 +1,119 @@
+import os
+import threading
+import weakref
+
+import pytest
+import torch
+
+import comfy.model_management as mm
+import comfy.model_patcher
+
+MB = 1024 * 1024
+
+
+class Module(torch.nn.Module):
+    def __init__(self, paths=()):
+        super().__init__()
+        self.weights_paths = [os.path.abspath(p) for p in paths]
+
+
+class Patcher:
+    def __init__(self, paths=()):
+        self.model = Module(paths)
+
+
+class Loaded:
+    """Stands in for a LoadedModel."""
+    def __init__(self, memory, offloaded=0, paths=()):
+        self.model = Patcher(paths)
+        self.memory = memory
+        self.offloaded = offloaded
+
+    def model_memory(self):
+        return self.memory
+
+    def model_offloaded_memory(self):
+        return self.offloaded
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(mm, "model_stats", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(mm, "upcoming_files", {})
+
+
+def order(policy, models):
+    return [i for i, _ in policy.order(list(enumerate(models)))]
+
+
+def test_policy_is_abstract():
+    with pytest.raises(TypeError):
+        mm.EvictionPolicy()
+
+
+def test_default_order():
+    models = [Loaded(300 * MB), Loaded(100 * MB), Loaded(200 * MB, offloaded=50 * MB), Loaded(200 * MB)]
+    # Partially loaded models first, then the smallest
+    assert order(mm.DefaultEvictionPolicy(), models) == [2, 1, 3, 0]
+
+
+def test_cost_order():
+    models = [
+        Loaded(100 * MB, paths=["running.safetensors"]),
+        Loaded(100 * MB, paths=["unused.safetensors"]),
+        Loaded(100 * MB, paths=["next_slow.safetensors"]),
+        Loaded(100 * MB, paths=["next_fast.safetensors"]),
+        Loaded(100 * MB, paths=["later_slow.safetensors"]),
+    ]
+    for m, seconds in zip(models, [1.0, 10.0, 8.0, 1.0, 8.0]):
+        mm.get_model_stats(m.model).last_load_seconds = seconds
+    mm.set_upcoming_files([["running.safetensors"], ["next_slow.safetensors", "next_fast.safetensors"], [], ["later_slow.safetensors"]])
+    # Scores (reload seconds / (distance + 1)): unused 0, next_fast 0.5, running 1, later_slow 2, next_slow 4
+    assert order(mm.CostEvictionPolicy(), models) == [1, 3, 0, 4, 2]
+
+
+def test_cost_reload_estimate():
+    policy = mm.CostEvictionPolicy()
+    measured = Loaded(100 * MB)
+    stats = mm.get_model_stats(measured.model)
+    assert policy.reload_seconds(Loaded(1024 * MB)) == 1.0  # DEFAULT_BANDWIDTH, nothing measured yet
+    stats.last_load_seconds = stats.load_seconds = 2.0
+    stats.loaded_bytes = 100 * MB
+    assert policy.reload_seconds(measured) == 2.0
+    # Models that were never loaded are estimated from the measured bandwidth
+    assert policy.reload_seconds(Loaded(200 * MB)) == pytest.approx(4.0)
+
+
+def test_upcoming_files_per_worker():
+    seen = {}
+    def worker(worker_id, path):
+        mm.current_worker.set(worker_id)
+        mm.set_upcoming_files([[path]])
+        barrier.wait()
+        seen[worker_id] = mm.get_upcoming_files()
+    barrier = threading.Barrier(2)
+    threads = [threading.Thread(target=worker, args=(w, "{}.safetensors".format(w))) for w in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen["a"] == {os.path.abspath("a.safetensors"): 0}
+    assert seen["b"] == {os.path.abspath("b.safetensors"): 0}
+    assert mm.get_upcoming_files() == {}
+
+
+def test_model_stats():
+    patcher = comfy.model_patcher.ModelPatcher(torch.nn.Linear(4, 4), load_device=torch.device("cpu"), offload_device=torch.device("cpu"))
+    mm.load_models_gpu([patcher])
+    mm.load_models_gpu([patcher])
+    stats = mm.get_model_stats(patcher)
+    assert (stats.name, stats.loads, stats.hits, stats.unloads, stats.reloads) == ("Linear", 1, 1, 0, 0)
+    assert stats.loaded_bytes == 4 * 4 * 4 + 4 * 4
+    mm.free_memory(1e30, torch.device("cpu"))
+    assert stats.unloads == 1
+    # Clones share the stats of their model
+    clone = patcher.clone()
+    mm.load_models_gpu([clone])
+    assert mm.get_model_stats(clone) is stats
+    assert (stats.loads, stats.reloads) == (2, 1)
+    mm.free_memory(1e30, torch.device("cpu"))
@@ -0,0 +1,41 @@
+import sys
+import pytest
+import comfy.lazy_import
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    directory = tmp_path / "lazy_test_package"
+    directory.mkdir()
+    (directory / "__init__.py").write_text("")
+    (directory / "heavy.py").write_text("VALUE = 5\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_test_package"
+    for name in ["lazy_test_package", "lazy_test_package.heavy"]:
+        sys.modules.pop(name, None)
+
+
+def test_imported_on_first_use(package):
+    module = comfy.lazy_import.lazy_import(package + ".heavy")
+    assert package + ".heavy" not in sys.modules
+    assert isinstance(module, comfy.lazy_import.LazyModule)
+
+    # Code using the full module path goes through the parent package
+    parent = sys.modules[package]
+    assert parent.heavy is module
+    assert parent.heavy.VALUE == 5
+    assert package + ".heavy" in sys.modules
+    assert package + ".heavy" in comfy.lazy_import.import_times
+    assert parent.heavy is sys.modules[package + ".heavy"]
+
+
+def test_already_imported(package):
+    __import__(package + ".heavy")
+    module = comfy.lazy_import.lazy_import(package + ".heavy")
+    assert module is sys.modules[package + ".heavy"]
+
+
+def test_missing_module(package):
+    module = comfy.lazy_import.lazy_import(package + ".missing")
+    with pytest.raises(ImportError):
+        module.VALUE
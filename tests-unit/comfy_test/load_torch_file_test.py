@@ -0,0 +1,51 @@
+import os
+import pytest
+import torch
+import safetensors.torch
+import comfy.utils
+
+
+def save(tmp_path, sd, metadata=None):
+    path = os.path.join(str(tmp_path), "model.safetensors")
+    safetensors.torch.save_file(sd, path, metadata=metadata)
+    return path
+
+
+def test_mmap_matches_safetensors(tmp_path):
+    sd = {
+        "a.weight": torch.randn(4, 3),
+        "b.weight": torch.randn(5).to(torch.bfloat16),
+        "c.weight": torch.randn(7).to(torch.float16),
+        "d.bias": torch.arange(3, dtype=torch.int64),
+        "e.mask": torch.tensor([True, False, True]),
+        "f.empty": torch.zeros(0, 4),
+    }
+    path = save(tmp_path, sd, metadata={"format": "pt"})
+    loaded, metadata = comfy.utils.load_safetensors_mmap(path)
+    assert list(loaded.keys()) == sorted(sd.keys())
+    assert metadata == {"format": "pt"}
+    for k, v in sd.items():
+        assert loaded[k].dtype == v.dtype
+        assert torch.equal(loaded[k], v)
+
+    assert torch.equal(comfy.utils.load_torch_file(path)["a.weight"], sd["a.weight"])
+
+
+def test_mmap_is_copy_on_write(tmp_path):
+    path = save(tmp_path, {"a": torch.zeros(16)})
+    loaded, _ = comfy.utils.load_safetensors_mmap(path)
+    loaded["a"] += 1
+    assert torch.equal(comfy.utils.load_safetensors_mmap(path)[0]["a"], torch.zeros(16))
+
+
+def test_corrupt_file(tmp_path):
+    path = save(tmp_path, {"a": torch.zeros(1024)})
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 16)
+    with pytest.raises(ValueError, match="incomplete"):
+        comfy.utils.load_torch_file(path)
+
+    with open(path, "wb") as f:
+        f.write(b"not a safetensors file")
+    with pytest.raises(ValueError, match="corrupt or invalid"):
+        comfy.utils.load_torch_file(path)
@@ -0,0 +1,100 @@
+import pytest
+import torch
+
+import comfy.lora
+import comfy.model_patcher
+import comfy.weight_adapter
+
+
+def adapter(up, down, alpha=None):
+    return comfy.weight_adapter.LoRAAdapter(set(), (up, down, alpha, None, None, None))
+
+
+def lora_patches(out_features, in_shape, ranks, dtype, alphas):
+    in_features = 1
+    for s in in_shape:
+        in_features *= s
+    patches = []
+    for i, (rank, alpha) in enumerate(zip(ranks, alphas)):
+        up = torch.randn(out_features, rank, dtype=dtype)
+        down = torch.randn(rank, *in_shape, dtype=dtype)
+        patches.append((0.5 + i * 0.25, adapter(up, down, alpha), 1.0, None, None))
+    return patches
+
+
+@pytest.mark.parametrize("weight_shape,dtype", [
+    ((64, 32), torch.float32),
+    ((64, 32), torch.float16),
+    ((48, 16), torch.bfloat16),
+    ((32, 8, 3, 3), torch.float32),
+])
+def test_batched_equals_per_key(weight_shape, dtype):
+    torch.manual_seed(0)
+    weights = [torch.randn(weight_shape, dtype=dtype) for _ in range(5)]
+    patches_list = [lora_patches(weight_shape[0], weight_shape[1:], [4, 8], dtype, [None, 2.0]) for _ in weights]
+    signatures = {comfy.lora.lora_patch_signature(p, weight_shape) for p in patches_list}
+    assert len(signatures) == 1 and None not in signatures
+
+    out = comfy.lora.calculate_lora_weights(weights, patches_list, torch.device("cpu"))
+    assert out.shape == (len(weights), weight_shape[0], out[0].numel() // weight_shape[0])
+    for i, (weight, patches) in enumerate(zip(weights, patches_list)):
+        expected = comfy.lora.calculate_weight(patches, weight.to(torch.float32, copy=True), "k{}".format(i))
+        torch.testing.assert_close(out[i].view(weight_shape), expected, rtol=1e-4, atol=1e-4)
+
+    # A reused buffer gives the same result for a smaller batch
+    again = comfy.lora.calculate_lora_weights(weights[:2], patches_list[:2], torch.device("cpu"), out=torch.zeros_like(out))
+    torch.testing.assert_close(again, out[:2])
+
+
+def test_signature_only_for_plain_loras():
+    up, down = torch.randn(64, 4), torch.randn(4, 32)
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 1.0, None, None)], (64, 32)) == ((64, 32), ((64, 4), (4, 32)))
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 0.5, None, None)], (64, 32)) is None
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 1.0, (0, 0, 32), None)], (64, 32)) is None
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 1.0, None, lambda w: w)], (64, 32)) is None
+    assert comfy.lora.lora_patch_signature([(1.0, (torch.randn(64, 32),), 1.0, None, None)], (64, 32)) is None
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 1.0, None, None)], (64, 16)) is None
+    loha = comfy.weight_adapter.LoHaAdapter(set(), (up, down, None, up, down, None, None, None))
+    assert comfy.lora.lora_patch_signature([(1.0, adapter(up, down), 1.0, None, None), (1.0, loha, 1.0, None, None)], (64, 32)) is None
+
+
+class Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.a = torch.nn.Linear(32, 64)
+        self.b = torch.nn.Linear(32, 64)
+        self.c = torch.nn.Linear(32, 64).to(torch.float16)
+        self.d = torch.nn.Linear(64, 16)
+        self.e = torch.nn.Conv2d(8, 32, 3)
+        self.f = torch.nn.Linear(32, 64)
+
+
+def patched_state_dict(batched, monkeypatch):
+    torch.manual_seed(0)
+    model = Model()
+    patcher = comfy.model_patcher.ModelPatcher(model, load_device=torch.device("cpu"), offload_device=torch.device("cpu"))
+    loha = comfy.weight_adapter.LoHaAdapter(set(), (torch.randn(64, 2), torch.randn(2, 32), None, torch.randn(64, 2), torch.randn(2, 32), None, None, None))
+    patcher.add_patches({
+        "a.weight": adapter(torch.randn(64, 4), torch.randn(4, 32), 2.0),
+        "b.weight": adapter(torch.randn(64, 4), torch.randn(4, 32)),
+        "c.weight": adapter(torch.randn(64, 4), torch.randn(4, 32)),
+        "d.weight": adapter(torch.randn(16, 4), torch.randn(4, 64)),
+        "e.weight": adapter(torch.randn(32, 4, 1, 1), torch.randn(4, 8, 3, 3)),
+        "f.weight": loha,
+        "a.bias": (torch.randn(64),),
+    }, 0.8)
+    patcher.add_patches({"b.weight": adapter(torch.randn(64, 8), torch.randn(8, 32))}, 0.3)
+    if not batched:
+        monkeypatch.setattr(comfy.lora, "lora_patch_signature", lambda patches, weight_shape: None)
+    patcher.patch_model()
+    out = {k: v.detach().clone() for k, v in model.state_dict().items()}
+    monkeypatch.undo()
+    return out
+
+
+def test_patch_model_batched_equals_per_key(monkeypatch):
+    batched = patched_state_dict(True, monkeypatch)
+    per_key = patched_state_dict(False, monkeypatch)
+    for k in per_key:
+        assert batched[k].dtype == per_key[k].dtype
+        torch.testing.assert_close(batched[k], per_key[k], rtol=1e-3, atol=1e-3)
@@ -0,0 +1,68 @@
+import os
+import torch
+import safetensors.torch
+import comfy.model_index
+
+
+def save(tmp_path, name, sd):
+    path = os.path.join(str(tmp_path), name)
+    safetensors.torch.save_file(sd, path, metadata={"format": "pt"})
+    return path
+
+
+def test_get_and_update(tmp_path):
+    path = save(tmp_path, "model.safetensors", {"a": torch.zeros(4)})
+    index = comfy.model_index.ModelIndex(os.path.join(str(tmp_path), "index.db"))
+    assert index.get(path) == {}
+    info = {"unet_prefix": "model.diffusion_model.", "parameters": 4, "unet_config": {"context_dim": 768, "channel_mult": (1, 2, 4), "num_res_blocks": [2, 2, 2]}, "weight_dtype": None}
+    index.update(path, info)
+    assert index.get(path) == info
+    assert isinstance(index.get(path)["unet_config"]["channel_mult"], tuple)
+
+    # Entries survive reopening the database
+    index = comfy.model_index.ModelIndex(os.path.join(str(tmp_path), "index.db"))
+    assert index.get(path) == info
+
+
+def test_values_that_arent_literals_are_dropped(tmp_path):
+    path = save(tmp_path, "model.safetensors", {"a": torch.zeros(4)})
+    index = comfy.model_index.ModelIndex(os.path.join(str(tmp_path), "index.db"))
+    index.update(path, {"parameters": 4, "dtype": torch.float16})
+    assert index.get(path) == {"parameters": 4}
+
+
+def test_changed_file_is_not_indexed(tmp_path):
+    path = save(tmp_path, "model.safetensors", {"a": torch.zeros(4)})
+    index = comfy.model_index.ModelIndex(os.path.join(str(tmp_path), "index.db"))
+    index.update(path, {"parameters": 4})
+    save(tmp_path, "model.safetensors", {"a": torch.zeros(8)})
+    assert index.get(path) == {}
+
+    index.update(path, {"parameters": 8})
+    os.remove(path)
+    assert index.remove_missing() == 1
+
+
+def test_header_state_dict(tmp_path):
+    sd = {"a.weight": torch.zeros(4, 3, dtype=torch.float16), "b.bias": torch.zeros(5, dtype=torch.bfloat16)}
+    path = save(tmp_path, "model.safetensors", sd)
+    header_sd, metadata = comfy.model_index.load_header_state_dict(path)
+    assert metadata == {"format": "pt"}
+    for k, v in sd.items():
+        assert header_sd[k].shape == v.shape
+        assert header_sd[k].dtype == v.dtype
+        assert header_sd[k].is_meta
+
+
+def test_cached():
+    calls = []
+
+    def f():
+        calls.append(1)
+        return 5
+    info = {}
+    assert comfy.model_index.cached(info, "x", f) == 5
+    assert comfy.model_index.cached(info, "x", f) == 5
+    assert len(calls) == 1
+    assert comfy.model_index.cached(None, "x", f) == 5
+    assert len(calls) == 2
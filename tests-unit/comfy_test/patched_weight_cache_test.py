@@ -0,0 +1,103 @@
+import os
+import torch
+
+import comfy.lora
+import comfy.model_patcher
+import comfy.patched_weight_cache
+import comfy.weight_adapter
+from comfy.patched_weight_cache import PatchedWeightCache, patched_weight_key
+
+
+def lora(up, down, strength=1.0, alpha=None):
+    return [(strength, comfy.weight_adapter.LoRAAdapter(set(), (up, down, alpha, None, None, None)), 1.0, None, None)]
+
+
+def make_lora(rank=4, features=32):
+    return torch.randn(features, rank), torch.randn(rank, features)
+
+
+def test_key_changes_with_patches():
+    model = torch.nn.Linear(32, 32)
+    weight = model.weight
+    up, down = make_lora()
+    key = patched_weight_key(model, "weight", weight, lora(up, down), False)
+    assert key == patched_weight_key(model, "weight", weight, lora(up.clone(), down.clone()), False)
+    assert key[1] is False  # Not loaded from a file
+    assert key != patched_weight_key(model, "weight", weight, lora(up, down, strength=0.5), False)
+    assert key != patched_weight_key(model, "weight", weight, lora(up, down, alpha=2.0), False)
+    changed = up.clone()
+    changed[0, 0] += 1.0
+    assert key != patched_weight_key(model, "weight", weight, lora(changed, down), False)
+    assert key != patched_weight_key(model, "weight", weight, lora(up, down) + lora(up, down), False)
+    assert key != patched_weight_key(model, "bias", weight, lora(up, down), False)
+    assert key != patched_weight_key(model, "weight", weight, lora(up, down), True)
+    assert key != patched_weight_key(torch.nn.Linear(32, 32), "weight", weight, lora(up, down), False)
+    # Patches with functions can't be identified
+    assert patched_weight_key(model, "weight", weight, [(1.0, up, 1.0, None, lambda w: w)], False) is None
+
+
+def test_stale_version_is_rejected(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), "model.safetensors")
+    open(path, "wb").close()
+    model = torch.nn.Linear(32, 32)
+    comfy.patched_weight_cache.set_weights_id(model, path)
+    patches = lora(*make_lora())
+    key = patched_weight_key(model, "weight", model.weight, patches, False)
+    assert key[1] is True
+    cache = PatchedWeightCache(1024 * 1024, str(tmp_path / "cache"), 1024 * 1024)
+    cache.put(key, torch.ones(32, 32))
+    monkeypatch.setattr(comfy.patched_weight_cache, "PATCHED_WEIGHT_CACHE_VERSION", comfy.patched_weight_cache.PATCHED_WEIGHT_CACHE_VERSION + 1)
+    stale = PatchedWeightCache(1024 * 1024, str(tmp_path / "cache"), 1024 * 1024)
+    assert key in stale
+    new_key = patched_weight_key(model, "weight", model.weight, patches, False)
+    assert new_key != key
+    assert new_key not in stale
+    assert stale.get(new_key, torch.device("cpu")) is None
+
+
+def test_hits_and_eviction(tmp_path):
+    size = 32 * 32 * 4
+    cache = PatchedWeightCache(int(size * 2.5), str(tmp_path), int(size * 1.5))
+    for i, persistent in enumerate([True, False, False]):
+        cache.put(("{}".format(i), persistent), torch.full((32, 32), float(i)))
+    # Least recently used first, in RAM and on disk
+    assert ("0", True) not in cache.entries
+    assert ("1", False) in cache and ("2", False) in cache
+    assert ("0", True) in cache  # Still on disk
+    weight = cache.get(("0", True), torch.device("cpu"))
+    assert torch.equal(weight, torch.zeros(32, 32))
+    # Reading it from disk put it back in RAM and evicted "1"
+    assert ("1", False) not in cache
+    assert cache.size <= cache.max_size
+    # Copies are returned
+    weight += 1
+    assert torch.equal(cache.get(("0", True), torch.device("cpu")), torch.zeros(32, 32))
+    cache.put(("3", True), torch.ones(32, 32))
+    assert cache.disk_size <= cache.max_disk_size
+    assert ("0", True) not in cache.disk_entries
+
+    reopened = PatchedWeightCache(int(size * 2.5), str(tmp_path), int(size * 1.5))
+    assert torch.equal(reopened.get(("3", True), torch.device("cpu")), torch.ones(32, 32))
+
+
+def test_patching_reuses_cached_weights(monkeypatch):
+    monkeypatch.setattr(comfy.patched_weight_cache, "cache", PatchedWeightCache(1024 * 1024))
+    model = torch.nn.Sequential(torch.nn.Linear(32, 32))
+    original = model[0].weight.detach().clone()
+    patcher = comfy.model_patcher.ModelPatcher(model, load_device=torch.device("cpu"), offload_device=torch.device("cpu"))
+    up, down = make_lora()
+    patcher.add_patches({"0.weight": comfy.weight_adapter.LoRAAdapter(set(), (up, down, None, None, None, None))}, 0.5)
+    patcher.patch_model()
+    patched = model[0].weight.detach().clone()
+    assert not torch.equal(patched, original)
+    patcher.unpatch_model()
+    assert len(comfy.patched_weight_cache.cache.entries) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("patched weight was calculated again")
+    monkeypatch.setattr(comfy.lora, "calculate_weight", fail)
+    monkeypatch.setattr(comfy.lora, "calculate_lora_weights", fail)
+    patcher.patch_model()
+    assert torch.equal(model[0].weight, patched)
+    patcher.unpatch_model()
+    assert torch.equal(model[0].weight, original)
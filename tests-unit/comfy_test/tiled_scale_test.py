@@ -0,0 +1,110 @@
+import pytest
+import torch
+import comfy.model_management
+import comfy.utils
+
+
+def upscale(x):
+    return torch.nn.functional.interpolate(x[:, :3], scale_factor=4, mode="bilinear") * 2
+
+
+def tiled_reference(samples, function, tile, overlap, upscale_amount, out_channels):
+    """One tile at a time with the blend done the way tiled_scale_multidim used to do it."""
+    output = []
+    for b in range(samples.shape[0]):
+        s = samples[b:b+1]
+        out = torch.zeros([1, out_channels] + [x * upscale_amount for x in s.shape[2:]])
+        out_div = torch.zeros_like(out)
+        positions = [range(0, s.shape[d + 2] - overlap, tile[d] - overlap) if s.shape[d + 2] > tile[d] else [0] for d in range(len(tile))]
+        for y in positions[0]:
+            for x in positions[1]:
+                y = max(0, min(s.shape[2] - overlap, y))
+                x = max(0, min(s.shape[3] - overlap, x))
+                ps = function(s[:, :, y:y + tile[0], x:x + tile[1]])
+                mask = torch.ones_like(ps)
+                feather = overlap * upscale_amount
+                for d in range(2, 4):
+                    if feather >= mask.shape[d]:
+                        continue
+                    for t in range(feather):
+                        a = (t + 1) / feather
+                        mask.narrow(d, t, 1).mul_(a)
+                        mask.narrow(d, mask.shape[d] - 1 - t, 1).mul_(a)
+                o = out[:, :, y * upscale_amount:y * upscale_amount + ps.shape[2], x * upscale_amount:x * upscale_amount + ps.shape[3]]
+                o_d = out_div[:, :, y * upscale_amount:y * upscale_amount + ps.shape[2], x * upscale_amount:x * upscale_amount + ps.shape[3]]
+                o += ps * mask
+                o_d += mask
+        output.append(out / out_div)
+    return torch.cat(output)
+
+
+@pytest.mark.parametrize("shape", [(2, 4, 50, 37), (3, 4, 32, 64)])
+@pytest.mark.parametrize("tile_batch", [1, 3, 64])
+def test_matches_reference(shape, tile_batch):
+    torch.manual_seed(0)
+    samples = torch.randn(shape)
+    expected = tiled_reference(samples, upscale, (16, 24), 4, 4, 3)
+    out = comfy.utils.tiled_scale_multidim(samples, upscale, tile=(16, 24), overlap=4, upscale_amount=4, out_channels=3, tile_batch=tile_batch)
+    assert torch.allclose(out, expected, atol=1e-5)
+
+
+def test_batches_tiles_of_the_same_size():
+    sizes = []
+
+    def f(x):
+        sizes.append(tuple(x.shape))
+        return upscale(x)
+    samples = torch.randn(2, 4, 40, 40)
+    steps = samples.shape[0] * comfy.utils.get_tiled_scale_steps(40, 40, 16, 16, 4)
+    pbar = comfy.utils.ProgressBar(steps)
+    comfy.utils.tiled_scale_multidim(samples, f, tile=(16, 16), overlap=4, upscale_amount=4, tile_batch=4, pbar=pbar)
+    assert sum(s[0] for s in sizes) == steps
+    assert max(s[0] for s in sizes) == 4
+    assert pbar.current == steps
+
+
+def test_single_tile():
+    samples = torch.randn(3, 4, 8, 8)
+    out = comfy.utils.tiled_scale_multidim(samples, upscale, tile=(16, 16), overlap=4, upscale_amount=4, tile_batch=2)
+    assert torch.allclose(out, upscale(samples), atol=1e-6)
+
+
+def test_blend_mask():
+    mask = comfy.utils.tile_blend_mask((6, 3), (2, 4), torch.device("cpu"))
+    assert mask.shape == (1, 1, 6, 3)
+    assert torch.allclose(mask[0, 0, :, 0], torch.tensor([0.5, 1.0, 1.0, 1.0, 1.0, 0.5]))
+    # Feathers as big as the tile are ignored
+    assert torch.allclose(mask[0, 0, 0], torch.full((3,), 0.5))
+    # Only the small per dimension ramps are cached, on the CPU
+    assert comfy.utils.tile_blend_ramp(6, 2).device.type == "cpu"
+
+
+def test_out_of_memory_halves_tile_batch(monkeypatch):
+    class OutOfMemory(Exception):
+        pass
+    monkeypatch.setattr(comfy.model_management, "OOM_EXCEPTION", OutOfMemory)
+    sizes = []
+
+    def f(x):
+        if x.shape[0] > 2:
+            raise OutOfMemory()
+        sizes.append(x.shape[0])
+        return upscale(x)
+    torch.manual_seed(0)
+    samples = torch.randn(2, 4, 40, 40)
+    out = comfy.utils.tiled_scale_multidim(samples, f, tile=(16, 16), overlap=4, upscale_amount=4, tile_batch=8)
+    assert max(sizes) == 2
+    expected = comfy.utils.tiled_scale_multidim(samples, upscale, tile=(16, 16), overlap=4, upscale_amount=4)
+    assert torch.allclose(out, expected, atol=1e-6)
+
+
+def test_stream_matches_tiled_scale():
+    def decode(x):
+        return torch.nn.functional.interpolate(x[:, :3], scale_factor=(4, 2, 2))[:, :, 3:]
+    torch.manual_seed(0)
+    samples = torch.randn(1, 4, 21, 4, 4)
+    upscale_amount = (lambda a: max(0, a * 4 - 3), 2, 2)
+    expected = comfy.utils.tiled_scale_multidim(samples, decode, tile=(8, 4, 4), overlap=(2, 0, 0), upscale_amount=upscale_amount, out_channels=3, index_formulas=(4, 2, 2))
+    chunks = list(comfy.utils.tiled_scale_stream(samples, decode, tile=8, overlap=2, upscale_amount=upscale_amount[0], index_formula=4))
+    assert len(chunks) > 1
+    assert torch.allclose(torch.cat(chunks, dim=2), expected, atol=1e-6)
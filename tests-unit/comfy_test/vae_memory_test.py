@@ -0,0 +1,113 @@
+import os
+import torch
+
+import comfy.model_management
+import comfy.vae_memory
+from comfy.vae_memory import VAEMemoryModel
+
+MB = 1024 * 1024
+
+
+def test_fit_covers_samples():
+    model = VAEMemoryModel()
+    for size, peak in [(32, 40 * MB), (64, 130 * MB), (96, 290 * MB)]:
+        model.record("AutoencoderKL:1", "decode", torch.float16, (1, 4, size, size), peak)
+    for size, peak in [(32, 40 * MB), (64, 130 * MB), (96, 290 * MB)]:
+        assert model.predict("AutoencoderKL:1", "decode", torch.float16, (1, 4, size, size)) >= peak
+    assert model.predict("AutoencoderKL:1", "decode", torch.float16, (2, 4, 64, 64)) > model.predict("AutoencoderKL:1", "decode", torch.float16, (1, 4, 64, 64))
+    assert model.predict("AutoencoderKL:1", "decode", torch.float32, (1, 4, 64, 64)) is None
+    assert model.predict("AutoencoderKL:1", "encode", torch.float16, (1, 3, 512, 512)) is None
+
+
+def test_batch_size():
+    model = VAEMemoryModel()
+    model.record("a", "decode", torch.float16, (1, 4, 64, 64), 100 * MB)
+    assert model.batch_size("a", "decode", torch.float16, (8, 4, 64, 64), 1000 * MB) == 8
+    batch_size = model.batch_size("a", "decode", torch.float16, (64, 4, 64, 64), 1000 * MB)
+    assert 1 < batch_size < 10
+    assert model.predict("a", "decode", torch.float16, (batch_size, 4, 64, 64)) <= 1000 * MB
+    assert model.batch_size("a", "decode", torch.float16, (1, 4, 128, 128), 300 * MB) == 0
+    assert model.batch_size("b", "decode", torch.float16, (1, 4, 128, 128), 300 * MB) is None
+
+
+def test_out_of_memory_raises_prediction():
+    model = VAEMemoryModel()
+    model.record("a", "decode", torch.float16, (1, 4, 64, 64), 100 * MB)
+    assert model.batch_size("a", "decode", torch.float16, (4, 4, 64, 64), 500 * MB) == 4
+    model.record("a", "decode", torch.float16, (4, 4, 64, 64), 500 * MB, lower_bound=True)
+    assert model.batch_size("a", "decode", torch.float16, (4, 4, 64, 64), 500 * MB) < 4
+    # A lower bound doesn't lower what was measured
+    model.record("a", "decode", torch.float16, (1, 4, 64, 64), 10 * MB, lower_bound=True)
+    assert model.predict("a", "decode", torch.float16, (1, 4, 64, 64)) >= 100 * MB
+
+
+def test_persisted(tmp_path):
+    path = os.path.join(str(tmp_path), "vae_memory.json")
+    model = VAEMemoryModel(path)
+    model.record("a", "encode", torch.bfloat16, (1, 3, 512, 512), 800 * MB)
+    assert not os.path.exists(path)
+    model.save()
+    loaded = VAEMemoryModel(path)
+    assert loaded.predict("a", "encode", torch.bfloat16, (1, 3, 512, 512)) == model.predict("a", "encode", torch.bfloat16, (1, 3, 512, 512))
+    assert loaded.measured("a", "encode", torch.bfloat16, (1, 3, 512, 512))
+    report = loaded.report()["a|encode|bfloat16"]
+    assert report["samples"][0]["peak"] == 800 * MB
+    assert report["samples"][0]["predicted"] >= 800 * MB
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = os.path.join(str(tmp_path), "vae_memory.json")
+    with open(path, "w") as f:
+        f.write("{")
+    assert VAEMemoryModel(path).entries == {}
+
+
+def test_measure_without_peak_stats():
+    comfy.vae_memory.model = VAEMemoryModel()
+    try:
+        with comfy.vae_memory.measure("a", "decode", torch.float32, (1, 4, 8, 8), torch.device("cpu")):
+            pass
+        assert comfy.vae_memory.model.entries == {}
+    finally:
+        comfy.vae_memory.model = None
+
+
+class FakeStats:
+    """Peak memory stats that are only ever raised, like torch.cuda's without reset_peak_memory_stats."""
+    def __init__(self):
+        self.allocated = 100 * MB
+        self.peak = 1000 * MB
+
+    def use(self, nbytes):
+        self.peak = max(self.peak, self.allocated + nbytes)
+
+    def memory_allocated(self, device):
+        return self.allocated
+
+    def max_memory_allocated(self, device):
+        return self.peak
+
+
+def test_measure(monkeypatch):
+    stats = FakeStats()
+    monkeypatch.setattr(comfy.vae_memory, "peak_memory_stats", lambda device: stats)
+    monkeypatch.setattr(comfy.vae_memory, "model", VAEMemoryModel())
+    device = torch.device("cpu")
+    shape = (1, 4, 64, 64)
+
+    # Below the peak some earlier work reached, how much the block used isn't known
+    with comfy.vae_memory.measure("a", "decode", torch.float32, shape, device):
+        stats.use(500 * MB)
+    assert not comfy.vae_memory.model.measured("a", "decode", torch.float32, shape)
+
+    # Other work ran on the device while the block did
+    with comfy.model_management.running_on_device(device):
+        with comfy.vae_memory.measure("a", "decode", torch.float32, shape, device):
+            with comfy.model_management.running_on_device(device):
+                stats.use(1500 * MB)
+    assert not comfy.vae_memory.model.measured("a", "decode", torch.float32, shape)
+
+    with comfy.model_management.running_on_device(device):
+        with comfy.vae_memory.measure("a", "decode", torch.float32, shape, device):
+            stats.use(2000 * MB)
+    assert comfy.vae_memory.model.report()["a|decode|float32"]["samples"][0]["peak"] == 2000 * MB
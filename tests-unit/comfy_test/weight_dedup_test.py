@@ -0,0 +1,72 @@
+import gc
+import torch
+import comfy.utils
+import comfy.weight_dedup
+
+
+class Model(torch.nn.Module):
+    def __init__(self, encoder, decoder):
+        super().__init__()
+        self.encoder = torch.nn.Linear(128, 64)
+        self.decoder = torch.nn.Linear(64, 128)
+        self.encoder.load_state_dict(encoder.state_dict())
+        self.decoder.load_state_dict(decoder.state_dict())
+
+
+def test_identical_weights_share_storage():
+    encoder = torch.nn.Linear(128, 64)
+    a = Model(encoder, torch.nn.Linear(64, 128))
+    b = Model(encoder, torch.nn.Linear(64, 128))
+    store = comfy.weight_dedup.WeightStore()
+    assert store.share(a) == 0
+    assert store.share(b) == a.encoder.weight.nbytes
+    assert a.encoder.weight.data_ptr() == b.encoder.weight.data_ptr()
+    assert a.decoder.weight.data_ptr() != b.decoder.weight.data_ptr()
+    assert comfy.weight_dedup.is_shared(b.encoder.weight)
+    assert not comfy.weight_dedup.is_shared(b.decoder.weight)
+    # Small tensors are left alone
+    assert a.encoder.bias.data_ptr() != b.encoder.bias.data_ptr()
+    # Sharing again finds nothing new
+    assert store.share(b) == 0
+
+
+def test_writing_shared_weight_unshares_it():
+    encoder = torch.nn.Linear(128, 64)
+    a = Model(encoder, torch.nn.Linear(64, 128))
+    b = Model(encoder, torch.nn.Linear(64, 128))
+    store = comfy.weight_dedup.WeightStore()
+    store.share(a)
+    store.share(b)
+    original = a.encoder.weight.detach().clone()
+    comfy.utils.copy_to_param(b, "encoder.weight", torch.zeros(64, 128))
+    assert torch.equal(a.encoder.weight, original)
+    assert torch.equal(b.encoder.weight, torch.zeros(64, 128))
+    comfy.utils.set_attr_param(b, "decoder.weight", torch.zeros(128, 64))
+    assert not torch.equal(a.decoder.weight, torch.zeros(128, 64))
+
+
+def test_store_doesnt_keep_models_alive():
+    encoder = torch.nn.Linear(128, 64)
+    store = comfy.weight_dedup.WeightStore()
+    a = Model(encoder, torch.nn.Linear(64, 128))
+    store.share(a)
+    del a
+    gc.collect()
+    b = Model(encoder, torch.nn.Linear(64, 128))
+    assert store.share(b) == 0
+    c = Model(encoder, torch.nn.Linear(64, 128))
+    assert store.share(c) == c.encoder.weight.nbytes
+
+
+def test_mixed_dtypes():
+    a = torch.nn.Sequential(torch.nn.Linear(128, 64), torch.nn.Linear(64, 128).to(torch.bfloat16), torch.nn.Linear(64, 128).to(torch.float16))
+    b = torch.nn.Sequential(torch.nn.Linear(128, 64), torch.nn.Linear(64, 128).to(torch.bfloat16), torch.nn.Linear(64, 128).to(torch.float16))
+    b[1].load_state_dict(a[1].state_dict())
+    b[2].weight.data.copy_(a[1].weight.data.view(torch.float16))
+    store = comfy.weight_dedup.WeightStore()
+    store.share(a)
+    assert store.share(b) == b[1].weight.nbytes
+    assert a[1].weight.data_ptr() == b[1].weight.data_ptr()
+    # Same bytes in another dtype isn't the same weight
+    assert b[2].weight.data_ptr() not in (a[1].weight.data_ptr(), a[2].weight.data_ptr())
+    assert not comfy.weight_dedup.is_shared(b[0].weight)
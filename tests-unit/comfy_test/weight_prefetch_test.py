@@ -0,0 +1,95 @@
+import torch
+import comfy.model_management as mm
+import comfy.model_patcher
+import comfy.weight_prefetch
+from comfy.weight_prefetch import MB
+
+
+def layers(count, size=512):
+    out = []
+    for i in range(count):
+        layer = torch.nn.Linear(size, size)
+        layer.comfy_cast_weights = True
+        out.append(layer)
+    return out
+
+
+def test_pool_reuses_released_buffers():
+    pool = comfy.weight_prefetch.PinnedBufferPool(4 * MB, pin=False)
+    a = pool.get(MB + 1)
+    assert a.numel() == 2 * MB
+    pool.release(a)
+    assert pool.get(2 * MB) is a
+    assert pool.allocations == 1 and pool.reuses == 1
+    b = pool.get(2 * MB)
+    assert b is not a
+    # Full until a buffer is released
+    assert pool.get(MB) is None
+    pool.release(b)
+    assert pool.get(MB) is not None
+    assert pool.size <= 4 * MB
+
+
+def test_prefetches_next_layers():
+    device = torch.device("cpu")
+    prefetcher = comfy.weight_prefetch.WeightPrefetcher(device, 2, comfy.weight_prefetch.PinnedBufferPool(64 * MB, pin=False))
+    model = layers(6)
+    for step in range(3):
+        for layer in model:
+            weight, bias = prefetcher.get(layer, torch.float16, None)
+            assert weight.dtype == torch.float16 and bias.dtype == torch.float32
+            assert torch.equal(weight, layer.weight.to(torch.float16))
+            assert torch.equal(bias, layer.bias)
+    stats = prefetcher.get_stats()
+    assert stats["layers"] == 6
+    # Only the first pass, before the order of the layers is known, misses
+    assert stats["misses"] == 6
+    assert stats["ready"] == 12
+    assert prefetcher.pool.reuses > 0
+
+
+def test_changed_weights_are_copied_again():
+    prefetcher = comfy.weight_prefetch.WeightPrefetcher(torch.device("cpu"), 1, None)
+    model = layers(2)
+    for layer in model:
+        prefetcher.get(layer, None, None)
+    prefetcher.get(model[0], None, None)  # prefetches model[1]
+    with torch.no_grad():
+        model[1].weight.add_(1)
+    weight, _ = prefetcher.get(model[1], None, None)
+    assert torch.equal(weight, model[1].weight)
+
+
+def test_fully_loaded_layers_are_skipped():
+    prefetcher = comfy.weight_prefetch.WeightPrefetcher(torch.device("cpu"), 1, None)
+    model = layers(2)
+    for layer in model:
+        prefetcher.get(layer, None, None)
+    model[1].comfy_cast_weights = False
+    prefetcher.get(model[0], None, None)
+    assert len(prefetcher.pending) == 0
+    prefetcher.clear()
+    assert prefetcher.order == []
+
+
+def test_prefetch_memory_budget(monkeypatch):
+    model = torch.nn.Sequential(*layers(3, 256), *layers(1, 512), torch.nn.Linear(1024, 1024))
+    patcher = comfy.model_patcher.ModelPatcher(model, load_device=torch.device("cpu"), offload_device=torch.device("cpu"))
+    monkeypatch.setattr(mm.args, "prefetch_weights", 2)
+    # Nothing is prefetched on CPU
+    assert mm.weight_prefetch_memory(patcher, torch.device("cpu")) == 0
+    monkeypatch.setattr(mm, "is_device_cuda", lambda device: True)
+    # The largest layer that casts its weights, not the one that is always loaded
+    assert mm.weight_prefetch_memory(patcher, torch.device("cpu")) == 2 * (512 * 512 + 512) * 4
+    monkeypatch.setattr(mm.args, "prefetch_weights", 0)
+    assert mm.weight_prefetch_memory(patcher, torch.device("cpu")) == 0
+
+
+def test_pinned_size(monkeypatch):
+    monkeypatch.setattr(mm.args, "prefetch_weights_pinned_memory", None)
+    monkeypatch.setattr(mm, "get_free_memory", lambda dev=None, torch_free_too=False: 32 * 1024 * MB)
+    assert mm.weight_prefetch_pinned_size() == mm.WEIGHT_PREFETCH_PINNED_SIZE
+    monkeypatch.setattr(mm, "get_free_memory", lambda dev=None, torch_free_too=False: 2 * 1024 * MB)
+    assert mm.weight_prefetch_pinned_size() == 256 * MB
+    monkeypatch.setattr(mm.args, "prefetch_weights_pinned_memory", 0.5)
+    assert mm.weight_prefetch_pinned_size() == 512 * MB
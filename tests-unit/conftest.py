@@ -0,0 +1,4 @@
+import comfy.cli_args
+
+# comfy.model_management picks its device when it is first imported, the unit tests run on the CPU
+comfy.cli_args.args.cpu = True
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+import comfy_execution.async_loop as async_loop
+
+
+async def get_session():
+    return async_loop.get_session()
+
+
+def test_one_session_closed_on_shutdown():
+    session = async_loop.run(get_session())
+    assert async_loop.run(get_session()) is session
+    with pytest.raises(RuntimeError):
+        asyncio.run(get_session())
+    async_loop.shutdown()
+    assert session.closed
+    # The loop and the session start again when they are needed
+    session = async_loop.run(get_session())
+    assert not session.closed
+    async_loop.shutdown()
+
+
+def test_resolve_results():
+    async def value(x):
+        return x
+    assert async_loop.run(async_loop.resolve_results([1, value(2), 3, value(4)])) == [1, 2, 3, 4]
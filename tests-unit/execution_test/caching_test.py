@@ -0,0 +1,356 @@
+import os
+
+import torch
+import pytest
+
+import comfy.model_management
+import comfy_execution.caching as caching
+import folder_paths
+import nodes
+from comfy_execution.caching import RAMPressureCache, CacheKeySet, CacheKeySetID, CacheKeySetInputSignature, estimate_size, to_hashable
+from comfy_execution.graph import DynamicPrompt
+from comfy_execution.graph_utils import is_link
+
+MB = 1024 * 1024
+
+
+class Patcher:
+    def __init__(self, model, size, loaded):
+        self.model = model
+        self.size = size
+        self.loaded = loaded
+
+    def model_size(self):
+        return self.size
+
+    def loaded_size(self):
+        return self.loaded
+
+
+class CLIP:
+    def __init__(self, patcher):
+        self.patcher = patcher
+
+
+def test_estimate_size_tensors():
+    t = torch.zeros(MB // 4)
+    assert estimate_size(t) == (MB, 0)
+    # Views of one storage are only counted once
+    assert estimate_size([t, t[:10], t.view(2, -1)]) == (MB, 0)
+    assert estimate_size(torch.zeros(MB // 4, device="meta")) == (0, MB)
+
+
+def test_estimate_size_containers():
+    a = torch.zeros(256)
+    b = torch.zeros(512, dtype=torch.float16)
+    value = [[{"samples": a, "noise_mask": b}], ({"pooled_output": a},), [[b, {"list": [a, b]}]]]
+    assert estimate_size(value) == (a.nbytes + b.nbytes, 0)
+    assert estimate_size(["abc"])[0] > 0
+    assert estimate_size([None, 1, 2.0, object()]) == (0, 0)
+
+
+def test_estimate_size_models():
+    model = object()
+    patcher = Patcher(model, 100 * MB, 60 * MB)
+    # Only the weights that aren't loaded on the GPU use RAM, clones of a model are counted once
+    assert estimate_size([patcher]) == (40 * MB, 0)
+    assert estimate_size([patcher, Patcher(model, 100 * MB, 60 * MB), CLIP(patcher)]) == (40 * MB, 0)
+    assert estimate_size([CLIP(Patcher(object(), 10 * MB, 0)), patcher]) == (50 * MB, 0)
+
+
+class FakeMemory:
+    """Free RAM is what is left of total after the tensors the cache holds."""
+    def __init__(self, cache, total):
+        self.cache = cache
+        self.total = total
+        self.calls = 0
+
+    def get_free_memory(self, dev=None, torch_free_too=False):
+        self.calls += 1
+        return self.total - sum(estimate_size(v)[0] for v in self.cache.cache.values())
+
+
+def prompt(*node_ids):
+    return DynamicPrompt({node_id: {"class_type": "Node", "inputs": {}} for node_id in node_ids})
+
+
+def value(size):
+    return [[torch.zeros(size // 4)]]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = RAMPressureCache(CacheKeySetID, min_free_ram=100 * MB)
+    memory = FakeMemory(cache, 250 * MB)
+    monkeypatch.setattr(comfy.model_management, "get_free_memory", memory.get_free_memory)
+    cache.memory = memory
+    return cache
+
+
+def test_evicts_least_recently_used_under_pressure(cache):
+    cache.set_prompt(prompt("1", "2"), ["1", "2"], None)
+    cache.set("1", value(40 * MB))
+    cache.set("2", value(60 * MB))
+    cache.set_prompt(prompt("3", "4"), ["3", "4"], None)
+    cache.set("3", value(10 * MB))
+    cache.clean_unused()
+    assert cache.get("3") is not None
+    assert len(cache.cache) == 3
+
+    cache.set_prompt(prompt("1", "2", "3", "4"), ["3", "4"], None)
+    cache.set("4", value(70 * MB))
+    cache.clean_unused()
+    # 180 MB cached leaves 70 MB free, evicting the biggest of the oldest entries frees enough
+    assert set(cache.cache) == {("1", "Node"), ("3", "Node"), ("4", "Node")}
+    assert cache.memory.get_free_memory() >= 100 * MB
+
+
+def test_entries_of_current_prompt_are_kept(cache):
+    cache.set_prompt(prompt("1", "2", "3"), ["1", "2", "3"], None)
+    for node_id in ("1", "2", "3"):
+        cache.set(node_id, value(60 * MB))
+    cache.clean_unused()
+    assert len(cache.cache) == 3
+    cache.set_prompt(prompt("1", "2", "3"), ["3"], None)
+    cache.clean_unused()
+    assert len(cache.cache) == 2
+    assert ("3", "Node") in cache.cache
+
+
+def test_set_polls_at_most_every_interval(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("comfy_execution.caching.time.monotonic", lambda: now[0])
+    node_ids = [str(i) for i in range(10)]
+    cache.set_prompt(prompt(*node_ids), node_ids, None)
+    cache.set("0", value(MB))
+    calls = cache.memory.calls
+    for node_id in node_ids[1:5]:
+        cache.set(node_id, value(MB))
+    assert cache.memory.calls == calls
+    now[0] += cache.POLL_INTERVAL
+    cache.set("5", value(MB))
+    assert cache.memory.calls > calls
+    # Adding half of the headroom polls right away
+    calls = cache.memory.calls
+    cache.set("6", value(50 * MB))
+    assert cache.memory.calls > calls
+
+
+class Source:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"value": ("FLOAT",)}}
+
+
+class Op:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"a": ("FLOAT",), "b": ("FLOAT",), "scale": ("FLOAT",)}}
+
+
+class Random(Source):
+    NOT_IDEMPOTENT = True
+
+
+class IsChanged(dict):
+    def get(self, node_id):
+        return super().get(node_id, None)
+
+
+class OldCacheKeySetInputSignature(CacheKeySet):
+    """The signatures before they were built incrementally: every ancestor flattened into each node's signature."""
+    def __init__(self, dynprompt, node_ids, is_changed_cache, previous=None):
+        super().__init__(dynprompt, node_ids, is_changed_cache)
+        self.dynprompt = dynprompt
+        self.is_changed_cache = is_changed_cache
+        for node_id in node_ids:
+            self.keys[node_id] = self.get_node_signature(dynprompt, node_id)
+
+    def get_node_signature(self, dynprompt, node_id):
+        ancestors, order_mapping = [], {}
+        self.get_ordered_ancestry(dynprompt, node_id, ancestors, order_mapping)
+        return to_hashable([self.get_immediate_node_signature(dynprompt, x, order_mapping) for x in [node_id] + ancestors])
+
+    def get_immediate_node_signature(self, dynprompt, node_id, order_mapping):
+        node = dynprompt.get_node(node_id)
+        class_def = nodes.NODE_CLASS_MAPPINGS[node["class_type"]]
+        signature = [node["class_type"], self.is_changed_cache.get(node_id)]
+        if getattr(class_def, "NOT_IDEMPOTENT", False):
+            signature.append(node_id)
+        for key in sorted(node["inputs"].keys()):
+            value = node["inputs"][key]
+            if is_link(value):
+                signature.append((key, ("ANCESTOR", order_mapping[value[0]], value[1])))
+            else:
+                signature.append((key, value))
+        return signature
+
+    def get_ordered_ancestry(self, dynprompt, node_id, ancestors, order_mapping):
+        inputs = dynprompt.get_node(node_id)["inputs"]
+        for key in sorted(inputs.keys()):
+            if is_link(inputs[key]) and inputs[key][0] not in order_mapping:
+                ancestors.append(inputs[key][0])
+                order_mapping[inputs[key][0]] = len(ancestors) - 1
+                self.get_ordered_ancestry(dynprompt, inputs[key][0], ancestors, order_mapping)
+
+
+@pytest.fixture
+def signature_nodes(monkeypatch):
+    for name, class_def in [("SigSource", Source), ("SigOp", Op), ("SigRandom", Random)]:
+        monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, name, class_def)
+
+
+def graph(source=1.0, scale=0.5, ids=("1", "2", "3", "4", "5"), swap=False, socket=0, random=None):
+    a, b, c, d, e = ids
+    op_inputs = {"a": [a, socket], "b": [b, 0]}
+    if swap:
+        op_inputs = {"a": [b, 0], "b": [a, socket]}
+    prompt = {
+        a: {"class_type": "SigSource", "inputs": {"value": source}},
+        b: {"class_type": "SigSource" if random is None else "SigRandom", "inputs": {"value": 2.0 if random is None else random}},
+        c: {"class_type": "SigOp", "inputs": dict(op_inputs, scale=scale)},
+        d: {"class_type": "SigOp", "inputs": {"a": [c, 0], "b": [a, 0], "scale": 1.0}},
+        e: {"class_type": "SigOp", "inputs": {"a": [d, 0], "b": [b, 0], "scale": [1.0, 2.0]}},
+    }
+    return DynamicPrompt(prompt)
+
+
+GRAPHS = [
+    graph(),
+    graph(),
+    graph(ids=("10", "20", "30", "40", "50")),
+    graph(source=3.0),
+    graph(scale=0.25),
+    graph(swap=True),
+    graph(socket=1),
+    graph(random=2.0),
+    graph(random=2.0, ids=("10", "20", "30", "40", "50")),
+]
+
+
+def keys(key_class, is_changed=None):
+    out = []
+    for dynprompt in GRAPHS:
+        node_ids = list(dynprompt.all_node_ids())
+        key_set = key_class(dynprompt, node_ids, is_changed or IsChanged())
+        out.extend((key_set.get_data_key(node_id), key_set.get_data_digest(node_id)) for node_id in node_ids)
+    return out
+
+
+def test_signatures_match_old_scheme(signature_nodes):
+    old = [k for k, _ in keys(OldCacheKeySetInputSignature)]
+    new = keys(CacheKeySetInputSignature)
+    for i in range(len(old)):
+        for j in range(len(old)):
+            assert (old[i] == old[j]) == (new[i][0] == new[j][0])
+            # Digests of nodes that can be persisted are equal when the signatures are
+            if new[i][1] is not None and new[j][1] is not None:
+                assert (new[i][1] == new[j][1]) == (new[i][0] == new[j][0])
+
+
+def test_signatures_reused_from_previous_prompt(signature_nodes):
+    node_ids = ["1", "2", "3", "4", "5"]
+    first = CacheKeySetInputSignature(graph(), node_ids, IsChanged())
+    same = CacheKeySetInputSignature(graph(), node_ids, IsChanged(), previous=first)
+    fresh = CacheKeySetInputSignature(graph(), node_ids, IsChanged())
+    for node_id in node_ids:
+        assert same.get_data_key(node_id) is first.get_data_key(node_id)
+        assert same.get_data_key(node_id) == fresh.get_data_key(node_id)
+        assert same.get_data_digest(node_id) == fresh.get_data_digest(node_id)
+
+    # Changing an input of "3" changes it and its descendants only
+    changed = CacheKeySetInputSignature(graph(scale=0.25), node_ids, IsChanged(), previous=same)
+    assert [changed.get_data_key(x) == same.get_data_key(x) for x in node_ids] == [True, True, False, False, False]
+    assert [changed.get_data_digest(x) == same.get_data_digest(x) for x in node_ids] == [True, True, False, False, False]
+    # And back
+    back = CacheKeySetInputSignature(graph(), node_ids, IsChanged(), previous=changed)
+    assert all(back.get_data_key(x) == first.get_data_key(x) for x in node_ids)
+
+    # So does changing the IS_CHANGED result of an ancestor
+    is_changed = CacheKeySetInputSignature(graph(), node_ids, IsChanged({"2": "modified"}), previous=back)
+    assert [is_changed.get_data_key(x) == first.get_data_key(x) for x in node_ids] == [True, False, False, False, False]
+    assert [is_changed.get_data_digest(x) == first.get_data_digest(x) for x in node_ids] == [True, False, False, False, False]
+    is_changed = CacheKeySetInputSignature(graph(), node_ids, IsChanged({"4": 1.0}), previous=is_changed)
+    assert [is_changed.get_data_key(x) == first.get_data_key(x) for x in node_ids] == [True, True, True, False, False]
+    old = OldCacheKeySetInputSignature(graph(), node_ids, IsChanged({"2": "modified"}))
+    old_first = OldCacheKeySetInputSignature(graph(), node_ids, IsChanged())
+    assert [old.get_data_key(x) == old_first.get_data_key(x) for x in node_ids] == [True, False, False, False, False]
+
+
+def test_not_idempotent_nodes_keyed_by_id(signature_nodes):
+    node_ids = ["1", "2", "3", "4", "5"]
+    key_set = CacheKeySetInputSignature(graph(random=2.0), node_ids, IsChanged())
+    other = CacheKeySetInputSignature(graph(random=2.0, ids=("1", "6", "3", "4", "5")), ["1", "6", "3", "4", "5"], IsChanged())
+    assert key_set.get_data_key("2") != other.get_data_key("6")
+    assert key_set.get_data_key("1") == other.get_data_key("1")
+    assert key_set.get_data_digest("2") is None
+
+
+class FileLoader:
+    RETURN_TYPES = ("MODEL",)
+    PREFETCH_FILES = {"name": "test_models"}
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"name": (["a.safetensors"],)}}
+
+
+class UnknownLoader:
+    RETURN_TYPES = ("MODEL",)
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"path": ("STRING",)}}
+
+
+class Encode:
+    RETURN_TYPES = ("CONDITIONING",)
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"model": ("MODEL",), "text": ("STRING",)}}
+
+
+@pytest.fixture
+def loader_nodes(monkeypatch, tmp_path):
+    for name, class_def in [("DigestFileLoader", FileLoader), ("DigestUnknownLoader", UnknownLoader), ("DigestEncode", Encode)]:
+        monkeypatch.setitem(nodes.NODE_CLASS_MAPPINGS, name, class_def)
+    monkeypatch.setattr(caching, "NODE_CLASS_IDENTITY", {})
+    monkeypatch.setitem(folder_paths.folder_names_and_paths, "test_models", ([str(tmp_path)], {".safetensors"}))
+    (tmp_path / "a.safetensors").write_bytes(b"a" * 16)
+    return tmp_path
+
+
+def encode_digest(loader="DigestFileLoader", name="a.safetensors"):
+    prompt = DynamicPrompt({
+        "1": {"class_type": loader, "inputs": {"name": name, "path": name}},
+        "2": {"class_type": "DigestEncode", "inputs": {"model": ["1", 0], "text": "a cat"}},
+    })
+    return CacheKeySetInputSignature(prompt, ["1", "2"], IsChanged()).get_data_digest("2")
+
+
+def test_digest_covers_loaded_files(loader_nodes):
+    digest = encode_digest()
+    assert digest is not None and digest == encode_digest()
+    # The file was replaced under the same name
+    path = loader_nodes / "a.safetensors"
+    path.write_bytes(b"b" * 32)
+    replaced = encode_digest()
+    assert replaced is not None and replaced != digest
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert encode_digest() not in (digest, replaced)
+    assert encode_digest(name="missing.safetensors") is None
+    # Nothing downstream of a loader that doesn't say which files it reads is persisted
+    assert encode_digest(loader="DigestUnknownLoader") is None
+
+
+def test_digest_covers_node_class_version(loader_nodes, monkeypatch):
+    digest = encode_digest()
+    monkeypatch.setattr(Encode, "CACHE_VERSION", 2, raising=False)
+    monkeypatch.setattr(caching, "NODE_CLASS_IDENTITY", {})
+    assert encode_digest() != digest
+    monkeypatch.setattr(caching, "NODE_CLASS_IDENTITY", {})
+    monkeypatch.setattr(caching.comfyui_version, "__version__", "0.0.0")
+    monkeypatch.setattr(Encode, "CACHE_VERSION", None, raising=False)
+    assert encode_digest() != digest
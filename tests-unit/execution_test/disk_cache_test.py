@@ -0,0 +1,114 @@
+import os
+import threading
+
+import torch
+import comfy_execution.disk_cache
+from comfy_execution.disk_cache import DiskCache, is_serializable
+
+
+def test_roundtrip(tmp_path):
+    cache = DiskCache(str(tmp_path), 1024 * 1024)
+    latent = {"samples": torch.randn(1, 4, 8, 8)}
+    conditioning = [[torch.randn(1, 77, 16), {"pooled_output": torch.randn(1, 16)}]]
+    assert cache.set("a", [[latent], [conditioning]])
+    cache.flush()
+
+    value = cache.get("a")
+    assert torch.equal(value[0][0]["samples"], latent["samples"])
+    assert torch.equal(value[1][0][0][1]["pooled_output"], conditioning[0][1]["pooled_output"])
+    assert cache.get("missing") is None
+
+
+def test_unserializable_values_are_skipped(tmp_path):
+    cache = DiskCache(str(tmp_path), 1024 * 1024)
+    assert not is_serializable([[object()]])
+    assert not cache.set("a", [[object()]])
+    assert "a" not in cache
+
+
+def test_views_do_not_store_whole_storage(tmp_path):
+    cache = DiskCache(str(tmp_path), 1024 * 1024)
+    big = torch.zeros(64, 1024)
+    cache.set("a", [[big[:1]]])
+    cache.flush()
+    assert cache.total_size < big.nbytes
+
+
+def test_lru_eviction_and_rescan(tmp_path):
+    tensor_size = 64 * 1024 * 4
+    cache = DiskCache(str(tmp_path), int(tensor_size * 2.5))
+    for key in ("a", "b"):
+        cache.set(key, [[torch.zeros(64 * 1024)]])
+    cache.flush()
+    cache.get("a")
+    cache.set("c", [[torch.zeros(64 * 1024)]])
+    cache.flush()
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert not os.path.exists(os.path.join(cache.directory, "b.pt"))
+
+    reopened = DiskCache(str(tmp_path), int(tensor_size * 2.5))
+    assert "a" in reopened and "c" in reopened
+
+
+def test_other_versions_are_removed(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), 1024 * 1024)
+    cache.set("a", [[torch.zeros(16)]])
+    cache.flush()
+    torch.save([[torch.zeros(16)]], os.path.join(str(tmp_path), "b.pt"))
+    monkeypatch.setattr(comfy_execution.disk_cache, "DISK_CACHE_VERSION", comfy_execution.disk_cache.DISK_CACHE_VERSION + 1)
+    reopened = DiskCache(str(tmp_path), 1024 * 1024)
+    assert "a" not in reopened
+    assert reopened.get("a") is None
+    assert os.listdir(str(tmp_path)) == [os.path.basename(reopened.directory)]
+
+
+def test_writes_in_background(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), 1024 * 1024)
+    release = threading.Event()
+    write = cache._write
+
+    def blocked_write(digest, value):
+        release.wait()
+        return write(digest, value)
+    monkeypatch.setattr(cache, "_write", blocked_write)
+    value = [[torch.ones(16)]]
+    assert cache.set("a", value)
+    # Served from memory until it is written
+    assert "a" in cache
+    assert torch.equal(cache.get("a")[0][0], value[0][0])
+    assert not os.path.exists(os.path.join(cache.directory, "a.pt"))
+    monkeypatch.setattr(comfy_execution.disk_cache, "MAX_PENDING_BYTES", 100)
+    assert not cache.set("b", [[torch.ones(16)]])
+    release.set()
+    cache.flush()
+    assert os.path.exists(os.path.join(cache.directory, "a.pt"))
+    assert cache.total_size == os.path.getsize(os.path.join(cache.directory, "a.pt"))
+
+
+def test_failed_removals_are_retried(tmp_path, monkeypatch):
+    tensor_size = 64 * 1024 * 4
+    cache = DiskCache(str(tmp_path), int(tensor_size * 1.5))
+    cache.set("a", [[torch.zeros(64 * 1024)]])
+    cache.flush()
+    locked = {os.path.join(cache.directory, "a.pt")}
+    remove = os.remove
+
+    def locked_remove(path):
+        if path in locked:
+            raise PermissionError("in use")
+        remove(path)
+    monkeypatch.setattr(comfy_execution.disk_cache.os, "remove", locked_remove)
+    cache.set("b", [[torch.zeros(64 * 1024)]])
+    cache.flush()
+    # "a" is evicted but its file is still there, so it is still counted
+    assert "a" not in cache and cache.get("a") is None
+    assert "a" in cache.removing
+    assert cache.total_size == sum(os.path.getsize(os.path.join(cache.directory, x)) for x in os.listdir(cache.directory))
+    assert not cache.set("a", [[torch.zeros(16)]])
+    locked.clear()
+    cache.set("c", [[torch.zeros(16)]])
+    cache.flush()
+    assert cache.removing == {}
+    assert not os.path.exists(os.path.join(cache.directory, "a.pt"))
+    assert cache.total_size == sum(os.path.getsize(os.path.join(cache.directory, x)) for x in os.listdir(cache.directory))
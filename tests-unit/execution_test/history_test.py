@@ -0,0 +1,55 @@
+import os
+import pytest
+from comfy_execution.history import MemoryHistory, SqliteHistory
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_history(request, tmp_path):
+    def make(max_size=100):
+        if request.param == "memory":
+            return MemoryHistory(max_size)
+        return SqliteHistory(os.path.join(str(tmp_path), "history.db"), max_size)
+    return make
+
+
+def entry(i):
+    return {"prompt": [i, "p{}".format(i), {}, {}, ["1"]], "outputs": {"1": {"text": ["out {}".format(i)]}}, "status": None}
+
+
+def test_add_get_delete(make_history):
+    history = make_history()
+    for i in range(3):
+        history.add("p{}".format(i), entry(i))
+    assert history.get("p1") == entry(1)
+    assert history.get("missing") is None
+    history.delete("p1")
+    assert history.get("p1") is None
+    assert len(history) == 2
+    history.clear()
+    assert len(history) == 0
+
+
+def test_ranges(make_history):
+    history = make_history()
+    for i in range(10):
+        history.add("p{}".format(i), entry(i))
+    assert list(history.get_range()) == ["p{}".format(i) for i in range(10)]
+    assert list(history.get_range(max_items=3)) == ["p7", "p8", "p9"]
+    assert list(history.get_range(max_items=3, offset=2)) == ["p2", "p3", "p4"]
+    assert list(history.get_range(max_items=3, before="p7")) == ["p4", "p5", "p6"]
+    assert list(history.get_range(max_items=3, before="p1")) == ["p0"]
+    assert history.get_range(max_items=3, before="missing") == {}
+    assert history.get_range(max_items=2)["p9"] == entry(9)
+
+
+def test_max_size(make_history):
+    history = make_history(max_size=5)
+    for i in range(8):
+        history.add("p{}".format(i), entry(i))
+    assert list(history.get_range()) == ["p3", "p4", "p5", "p6", "p7"]
+
+
+def test_sqlite_survives_reopen(tmp_path):
+    path = os.path.join(str(tmp_path), "history.db")
+    SqliteHistory(path, 100).add("p0", entry(0))
+    assert SqliteHistory(path, 100).get("p0") == entry(0)
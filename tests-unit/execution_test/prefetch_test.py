@@ -0,0 +1,103 @@
+import os
+import threading
+
+import pytest
+
+import execution
+import folder_paths
+from comfy_execution.prefetch import ModelPrefetcher
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    for folder_name in ("checkpoints", "loras", "vae"):
+        directory = tmp_path / folder_name
+        directory.mkdir()
+        monkeypatch.setitem(folder_paths.folder_names_and_paths, folder_name, ([str(directory)], {".safetensors"}))
+    for path in ("checkpoints/a.safetensors", "checkpoints/b.safetensors", "loras/style.safetensors", "vae/vae.safetensors"):
+        (tmp_path / path).write_bytes(b"0" * 16)
+    return tmp_path
+
+
+def test_get_prefetch_files(models):
+    prompt = {
+        "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "a.safetensors"}},
+        "2": {"class_type": "LoraLoader", "inputs": {"model": ["1", 0], "clip": ["1", 1], "lora_name": "style.safetensors", "strength_model": 1.0, "strength_clip": 1.0}},
+        "3": {"class_type": "VAELoader", "inputs": {"vae_name": "vae.safetensors"}},
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "a.safetensors"}},
+        "5": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "missing.safetensors"}},
+        "6": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": ["7", 0]}},
+        "7": {"class_type": "PrimitiveNode", "inputs": {}},
+        "8": {"class_type": "EmptyLatentImage", "inputs": {"width": 512, "height": 512, "batch_size": 1}},
+        "9": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "b.safetensors"}},
+    }
+    expected = [os.path.join(str(models), p) for p in ("checkpoints/a.safetensors", "loras/style.safetensors", "vae/vae.safetensors", "checkpoints/b.safetensors")]
+    assert execution.get_prefetch_files(prompt) == expected
+    assert execution.get_prefetch_files(prompt, skip=("1", "9")) == expected[1:3] + [expected[0]]
+    assert execution.get_prefetch_files({}) == []
+
+
+class Server:
+    def queue_updated(self):
+        pass
+
+
+def test_peek():
+    queue = execution.PromptQueue(Server())
+    for number, prompt_id in [(2, "b"), (1, "a"), (3, "c")]:
+        queue.put((number, prompt_id, {}, {}, []))
+    assert [x[1] for x in queue.peek()] == ["a"]
+    assert [x[1] for x in queue.peek(2)] == ["a", "b"]
+    assert [x[1] for x in queue.peek(10)] == ["a", "b", "c"]
+    assert queue.get_tasks_remaining() == 3
+    assert queue.get()[0][1] == "a"
+    assert [x[1] for x in queue.peek(10)] == ["b", "c"]
+
+
+class Reads:
+    """Replaces ModelPrefetcher._read, the reads block until released."""
+    def __init__(self, prefetcher):
+        self.paths = []
+        self.done = threading.Condition()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        prefetcher._read = self.read
+
+    def read(self, path, buffer):
+        self.started.set()
+        self.release.wait()
+        with self.done:
+            self.paths.append(path)
+            self.done.notify_all()
+
+    def wait(self, count):
+        with self.done:
+            assert self.done.wait_for(lambda: len(self.paths) >= count, timeout=10)
+        return self.paths
+
+
+def test_files_are_read_once():
+    prefetcher = ModelPrefetcher()
+    reads = Reads(prefetcher)
+    reads.release.set()
+    prefetcher.prefetch(["a", "b"])
+    assert reads.wait(2) == ["a", "b"]
+    prefetcher.prefetch(["a", "b", "c"])
+    prefetcher.prefetch(["c"])
+    assert reads.wait(3) == ["a", "b", "c"]
+    assert prefetcher.pending == type(prefetcher.pending)()
+
+
+def test_first_and_history():
+    prefetcher = ModelPrefetcher(history_size=2)
+    reads = Reads(prefetcher)
+    prefetcher.prefetch(["a"])
+    assert reads.started.wait(timeout=10)
+    # Requests made while "a" is read queue up, and first moves them to the front
+    prefetcher.prefetch(["b", "c"])
+    prefetcher.prefetch(["c", "a"], first=True)
+    reads.release.set()
+    assert reads.wait(3) == ["a", "c", "b"]
+    # Only the last history_size files are remembered
+    prefetcher.prefetch(["a", "b", "c"])
+    assert reads.wait(4) == ["a", "c", "b", "a"]
@@ -0,0 +1,120 @@
+import execution
+
+
+class Server:
+    def __init__(self):
+        self.sent = []
+
+    def queue_updated(self):
+        pass
+
+    def send_sync(self, event, data, sid=None):
+        self.sent.append((event, data, sid))
+
+
+def item(number, prompt_id):
+    return (number, prompt_id, {}, {}, ["1"])
+
+
+def test_delete_only_queued_item_keeps_coalesced():
+    queue = execution.PromptQueue(Server())
+    queue.put(item(0, "running"), signature="a")
+    queue.put(item(1, "duplicate"), signature="a")
+    queue.put(item(2, "queued"), signature="b")
+    (running, task_id) = queue.get()
+    assert running[1] == "running"
+
+    assert queue.delete_queue_item(lambda x: x[1] == "queued")
+    assert queue.queue == []
+    assert [x[1] for x in queue.coalesced["running"]] == ["duplicate"]
+    assert queue.get_tasks_remaining() == 2
+
+    queue.task_done(task_id, {"outputs": {}, "meta": {}}, execution.PromptQueue.ExecutionStatus("success", True, []))
+    assert queue.get_history(prompt_id="duplicate")["duplicate"]["coalesced_with"] == "running"
+
+
+def test_delete_queued_item_requeues_its_duplicate():
+    queue = execution.PromptQueue(Server())
+    queue.put(item(0, "first"), signature="a")
+    queue.put(item(1, "second"), signature="a")
+    assert queue.delete_queue_item(lambda x: x[1] == "first")
+    assert [x[1] for x in queue.queue] == ["second"]
+    assert queue.signatures == {"a": "second"}
+    assert queue.delete_queue_item(lambda x: x[1] == "second")
+    assert queue.get_tasks_remaining() == 0
+    assert not queue.delete_queue_item(lambda x: True)
+
+
+def test_is_changed_kept_until_taken_or_deleted():
+    queue = execution.PromptQueue(Server())
+    queue.put(item(0, "first"), signature="a", is_changed={"1": 1})
+    queue.put(item(1, "duplicate"), signature="a", is_changed={"1": 1})
+    queue.put(item(2, "other"), signature="b", is_changed={"1": 2})
+    assert queue.delete_queue_item(lambda x: x[1] == "other")
+    assert queue.take_is_changed("other") is None
+    assert queue.take_is_changed("first") == {"1": 1}
+    assert queue.take_is_changed("first") is None
+    queue.wipe_queue()
+    assert queue.is_changed == {}
+
+
+class ChangingNode:
+    calls = 0
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"value": ("INT",)}}
+
+    RETURN_TYPES = ("INT",)
+    FUNCTION = "run"
+    OUTPUT_NODE = True
+
+    @classmethod
+    def IS_CHANGED(s, value):
+        ChangingNode.calls += 1
+        return value
+
+    def run(self, value):
+        return (value,)
+
+
+def test_signature_is_changed_reused(monkeypatch):
+    monkeypatch.setitem(execution.nodes.NODE_CLASS_MAPPINGS, "ChangingNode", ChangingNode)
+    prompt = {"1": {"class_type": "ChangingNode", "inputs": {"value": 1}}}
+    is_changed = {}
+    signature = execution.get_prompt_signature(prompt, ["1"], is_changed)
+    assert signature is not None
+    assert ChangingNode.calls == 1
+    cache = execution.IsChangedCache(execution.DynamicPrompt(prompt), None, is_changed)
+    assert cache.get("1") == [1]
+    assert ChangingNode.calls == 1
+
+
+class CredentialNode:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {"required": {"value": ("INT",)}, "hidden": {"auth_token": "AUTH_TOKEN_COMFY_ORG", "extra_pnginfo": "EXTRA_PNGINFO"}}
+
+    RETURN_TYPES = ("INT",)
+    FUNCTION = "run"
+    OUTPUT_NODE = True
+
+    def run(self, value, auth_token=None, extra_pnginfo=None):
+        return (value,)
+
+
+def test_signature_includes_hidden_extra_data(monkeypatch):
+    monkeypatch.setitem(execution.nodes.NODE_CLASS_MAPPINGS, "CredentialNode", CredentialNode)
+    monkeypatch.setitem(execution.nodes.NODE_CLASS_MAPPINGS, "ChangingNode", ChangingNode)
+    prompt = {"1": {"class_type": "CredentialNode", "inputs": {"value": 1}}}
+
+    def signature(prompt, **extra_data):
+        return execution.get_prompt_signature(prompt, ["1"], extra_data=extra_data)
+    first = signature(prompt, auth_token_comfy_org="a", extra_pnginfo={"workflow": {"nodes": [1]}}, client_id="x")
+    assert first is not None
+    assert signature(prompt, auth_token_comfy_org="a", extra_pnginfo={"workflow": {"nodes": [1]}}, client_id="y") == first
+    assert signature(prompt, auth_token_comfy_org="b", extra_pnginfo={"workflow": {"nodes": [1]}}) != first
+    assert signature(prompt, auth_token_comfy_org="a", extra_pnginfo={"workflow": {"nodes": [2]}}) != first
+    # Nodes that don't take them don't depend on them
+    prompt = {"1": {"class_type": "ChangingNode", "inputs": {"value": 1}}}
+    assert signature(prompt, auth_token_comfy_org="a") == signature(prompt, auth_token_comfy_org="b")
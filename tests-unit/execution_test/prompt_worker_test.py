@@ -0,0 +1,85 @@
+import threading
+import concurrent.futures
+import contextvars
+
+import pytest
+import torch
+
+import comfy.model_management as mm
+import comfy_execution.async_loop
+
+
+def run_as_worker(worker_id, function, device=None):
+    """Runs function on a new thread set up like a prompt worker and returns its result."""
+    result = {}
+    def worker():
+        mm.set_current_worker(worker_id)
+        if device is not None:
+            mm.set_thread_torch_device(device)
+        try:
+            result["value"] = function()
+        except Exception as e:
+            result["error"] = e
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+@pytest.fixture
+def workers():
+    yield ("worker_a", "worker_b")
+    mm.interrupt_current_processing(False)
+    for w in ("worker_a", "worker_b"):
+        mm.interrupt_flags.pop(w, None)
+
+
+def test_interrupt_is_per_worker(workers):
+    a, b = workers
+    run_as_worker(a, lambda: None)
+    run_as_worker(b, lambda: None)
+    mm.interrupt_current_processing(worker=b)
+    assert not run_as_worker(a, mm.processing_interrupted)
+    assert run_as_worker(b, mm.processing_interrupted)
+    with pytest.raises(mm.InterruptProcessingException):
+        run_as_worker(b, mm.throw_exception_if_processing_interrupted)
+    # Raising consumed the interrupt
+    assert not run_as_worker(b, mm.processing_interrupted)
+    assert not mm.processing_interrupted()
+
+
+def test_interrupt_outside_of_workers_interrupts_all(workers):
+    a, b = workers
+    run_as_worker(a, lambda: None)
+    run_as_worker(b, lambda: None)
+    mm.interrupt_current_processing()
+    # A worker starting a new prompt only resets its own flag
+    run_as_worker(a, lambda: mm.interrupt_current_processing(False))
+    assert not run_as_worker(a, mm.processing_interrupted)
+    assert run_as_worker(b, mm.processing_interrupted)
+
+
+def test_worker_reaches_node_threads_and_async_nodes(workers):
+    a, _ = workers
+    async def coroutine_node():
+        return mm.current_worker.get(), mm.get_torch_device()
+
+    def execute():
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            threaded = pool.submit(contextvars.copy_context().run, lambda: (mm.current_worker.get(), mm.get_torch_device())).result()
+        return threaded, comfy_execution.async_loop.run(coroutine_node())
+
+    threaded, async_result = run_as_worker(a, execute, device="cpu")
+    assert threaded == (a, torch.device("cpu"))
+    assert async_result == (a, torch.device("cpu"))
+    assert mm.current_worker.get() is None
+
+
+def test_workers_dont_share_devices():
+    assert mm.prompt_worker_devices(1) == [None]
+    assert mm.prompt_worker_devices(2, ["cuda:0", "cuda:1"]) == [torch.device("cuda:0"), torch.device("cuda:1")]
+    assert mm.prompt_worker_devices(3, ["cuda:0", "cuda:1", "cuda:0"]) == [torch.device("cuda:0"), torch.device("cuda:1")]
+    assert mm.prompt_worker_devices(1, ["cpu", "cpu"]) == [torch.device("cpu")]
+    assert mm.prompt_worker_devices(4) == [None]
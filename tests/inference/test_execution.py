@@ -19,6 +19,7 @@ class RunResult:
     def __init__(self, prompt_id: str):
         self.outputs: Dict[str,Dict] = {}
         self.runs: Dict[str,bool] = {}
+        self.progress: Dict[str,list] = {}
         self.prompt_id: str = prompt_id
 
     def get_output(self, node: Node):
@@ -67,6 +68,11 @@ class ComfyClient:
         with urllib.request.urlopen("http://{}/history/{}".format(self.server_address, prompt_id)) as response:
             return json.loads(response.read())
 
+    def interrupt(self, data=b""):
+        req = urllib.request.Request("http://{}/interrupt".format(self.server_address), data=data, method="POST")
+        with urllib.request.urlopen(req) as response:
+            return response.status
+
     def set_test_name(self, name):
         self.test_name = name
 
@@ -89,6 +95,10 @@ class ComfyClient:
                     if data['node'] is None:
                         break
                     result.runs[data['node']] = True
+                elif message['type'] == 'progress':
+                    data = message['data']
+                    if data['prompt_id'] == prompt_id:
+                        result.progress.setdefault(data['node'], []).append(data['value'])
                 elif message['type'] == 'execution_error':
                     raise Exception(message['data'])
                 elif message['type'] == 'execution_cached':
@@ -117,10 +127,11 @@ class TestExecution:
     # Initialize server and client
     #
     @fixture(scope="class", autouse=True, params=[
-        # (use_lru, lru_size)
-        (False, 0),
-        (True, 0),
-        (True, 100),
+        # (use_lru, lru_size, parallel_nodes, coalesce_prompts)
+        (False, 0, 0, False),
+        (True, 0, 0, False),
+        (True, 100, 0, False),
+        (False, 0, 4, True),
     ])
     def _server(self, args_pytest, request):
         # Start server
@@ -131,12 +142,16 @@ class TestExecution:
             '--port', str(args_pytest["port"]),
             '--extra-model-paths-config', 'tests/inference/extra_model_paths.yaml',
         ]
-        use_lru, lru_size = request.param
+        use_lru, lru_size, parallel_nodes, coalesce_prompts = request.param
         if use_lru:
             pargs += ['--cache-lru', str(lru_size)]
+        if parallel_nodes > 0:
+            pargs += ['--parallel-nodes', str(parallel_nodes)]
+        if coalesce_prompts:
+            pargs += ['--coalesce-prompts']
         print("Running server with args:", pargs)  # noqa: T201
         p = subprocess.Popen(pargs)
-        yield
+        yield request.param
         p.kill()
         torch.cuda.empty_cache()
 
@@ -218,6 +233,11 @@ class TestExecution:
         assert not result2.did_run(input1), "Input1 should have been cached"
         assert not result2.did_run(input2), "Input2 should have been cached"
 
+    def test_interrupt_body(self, client: ComfyClient):
+        # Bodies without a prompt id interrupt everything, invalid ones aren't an error
+        for data in [b"", b"not json", b"[1]", json.dumps({"prompt_id": "unknown"}).encode("utf-8")]:
+            assert client.interrupt(data) == 200
+
     def test_error(self, client: ComfyClient, builder: GraphBuilder):
         g = builder
         input1 = g.node("StubImage", content="BLACK", height=512, width=512, batch_size=1)
@@ -478,6 +498,90 @@ class TestExecution:
         assert len(images2) == 1, "Should have 1 image"
 
 
+    def test_parallel_sleep(self, client: ComfyClient, builder: GraphBuilder, _server):
+        g = builder
+        image = g.node("StubImage", content="BLACK", height=512, width=512, batch_size=1)
+        sleep1 = g.node("TestSleep", value=image.out(0), seconds=1.0)
+        sleep2 = g.node("TestSleep", value=image.out(0), seconds=1.0)
+        sleep3 = g.node("TestSleep", value=image.out(0), seconds=1.0)
+        average = g.node("TestVariadicAverage", input1=sleep1.out(0), input2=sleep2.out(0), input3=sleep3.out(0))
+        output = g.node("SaveImage", images=average.out(0))
+
+        start_time = time.time()
+        result = client.run(g)
+        elapsed_time = time.time() - start_time
+
+        images = result.get_images(output)
+        assert len(images) == 1, "Should have 1 image"
+        assert numpy.array(images[0]).max() == 0, "Image should be black"
+        parallel_nodes = _server[2]
+        if parallel_nodes > 0:
+            assert elapsed_time < 2.5, f"Independent sleeps should run in parallel, took {elapsed_time:.2f}s"
+        # The identical sleeps can be cached after the first one is done, but each one that runs shows its progress on itself
+        assert len(result.progress) > 0 and set(result.progress) <= {sleep1.id, sleep2.id, sleep3.id}
+        for values in result.progress.values():
+            assert values == list(range(1, 11)), "Each sleep should report its progress on itself"
+
+    def test_coalesced_prompts(self, client: ComfyClient, builder: GraphBuilder, _server):
+        g = builder
+        image = g.node("StubImage", content="WHITE", height=512, width=512, batch_size=1)
+        sleep = g.node("TestSleep", value=image.out(0), seconds=0.5)
+        output = g.node("SaveImage", images=sleep.out(0), filename_prefix=client.test_name)
+
+        first_prompt_id = client.queue_prompt(g.finalize())['prompt_id']
+        result = client.run(g)
+        images = result.get_images(output)
+        assert len(images) == 1, "Should have 1 image"
+        assert numpy.array(images[0]).min() == 255, "Image should be white"
+
+        history = client.get_history(result.get_prompt_id())[result.get_prompt_id()]
+        first_history = client.get_history(first_prompt_id)[first_prompt_id]
+        coalesce_prompts = _server[3]
+        if coalesce_prompts:
+            assert history.get("coalesced_with") == first_prompt_id, "Identical prompt should have been coalesced"
+            assert history["outputs"] == first_history["outputs"], "Coalesced prompt should get the same outputs"
+        else:
+            assert "coalesced_with" not in history
+
+    def test_async_sleep(self, client: ComfyClient, builder: GraphBuilder):
+        g = builder
+        image = g.node("StubImage", content="BLACK", height=512, width=512, batch_size=1)
+        sleep1 = g.node("TestAsyncSleep", value=image.out(0), seconds=0.9)
+        sleep2 = g.node("TestAsyncSleep", value=image.out(0), seconds=1.0)
+        sleep3 = g.node("TestAsyncSleep", value=image.out(0), seconds=1.1)
+        average = g.node("TestVariadicAverage", input1=sleep1.out(0), input2=sleep2.out(0), input3=sleep3.out(0))
+        output = g.node("SaveImage", images=average.out(0))
+
+        start_time = time.time()
+        result = client.run(g)
+        elapsed_time = time.time() - start_time
+
+        images = result.get_images(output)
+        assert len(images) == 1, "Should have 1 image"
+        assert numpy.array(images[0]).max() == 0, "Image should be black"
+        assert elapsed_time < 2.5, f"Async nodes should wait concurrently, took {elapsed_time:.2f}s"
+        for sleep in (sleep1, sleep2, sleep3):
+            assert result.progress.get(sleep.id) == list(range(1, 11)), "Each sleep should report its progress on itself"
+
+    def test_async_node_methods(self, client: ComfyClient, builder: GraphBuilder):
+        g = builder
+        black = g.node("StubImage", content="BLACK", height=256, width=256, batch_size=1)
+        white = g.node("StubImage", content="WHITE", height=256, width=256, batch_size=1)
+        switch = g.node("TestAsyncLazySwitch", switch=True, on_false=black.out(0), on_true=white.out(0), should_change=False)
+        output = g.node("SaveImage", images=switch.out(0))
+
+        result1 = client.run(g)
+        images = result1.get_images(output)
+        assert len(images) == 1, "Should have 1 image"
+        assert numpy.array(images[0]).min() == 255, "Image should be white"
+        assert not result1.did_run(black), "The lazy input that isn't needed shouldn't run"
+        result2 = client.run(g)
+        assert not result2.did_run(switch), "Switch should have been cached"
+        switch.set_input("should_change", True)
+        client.run(g)
+        result4 = client.run(g)
+        assert result4.did_run(switch), "Switch should run again when IS_CHANGED says it changed"
+
     # This tests that only constant outputs are used in the call to `IS_CHANGED`
     def test_is_changed_with_outputs(self, client: ComfyClient, builder: GraphBuilder):
         g = builder
@@ -1,4 +1,7 @@
+import asyncio
+import time
 import torch
+import comfy.utils
 from .tools import VariantSupport
 from comfy_execution.graph_utils import GraphBuilder
 
@@ -333,6 +336,90 @@ class TestMixedExpansionReturns:
                 "expand": g.finalize(),
             }
 
+class TestSleep:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "value": ("IMAGE",),
+                "seconds": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 60.0, "step": 0.01}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "sleep"
+    THREAD_SAFE = True
+
+    CATEGORY = "Testing/Nodes"
+
+    def sleep(self, value, seconds):
+        pbar = comfy.utils.ProgressBar(10)
+        for _ in range(10):
+            time.sleep(seconds / 10)
+            pbar.update(1)
+        return (value,)
+
+class TestAsyncSleep:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "value": ("IMAGE",),
+                "seconds": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 60.0, "step": 0.01}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "sleep"
+
+    CATEGORY = "Testing/Nodes"
+
+    async def sleep(self, value, seconds):
+        pbar = comfy.utils.ProgressBar(10)
+        for _ in range(10):
+            await asyncio.sleep(seconds / 10)
+            pbar.update(1)
+        return (value,)
+
+class TestAsyncLazySwitch:
+    """A lazy switch with coroutine check_lazy_status, IS_CHANGED and VALIDATE_INPUTS."""
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "switch": ("BOOLEAN",),
+                "on_false": ("IMAGE", {"lazy": True}),
+                "on_true": ("IMAGE", {"lazy": True}),
+                "should_change": ("BOOLEAN", {"default": False}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "switch"
+
+    CATEGORY = "Testing/Nodes"
+
+    async def check_lazy_status(self, switch, on_false=None, on_true=None, should_change=False):
+        await asyncio.sleep(0)
+        if switch and on_true is None:
+            return ["on_true"]
+        if not switch and on_false is None:
+            return ["on_false"]
+        return []
+
+    @classmethod
+    async def IS_CHANGED(cls, should_change=False, **kwargs):
+        await asyncio.sleep(0)
+        return float("NaN") if should_change else False
+
+    @classmethod
+    async def VALIDATE_INPUTS(cls, switch):
+        await asyncio.sleep(0)
+        return True if isinstance(switch, bool) else "switch has to be a boolean"
+
+    async def switch(self, switch, on_false=None, on_true=None, should_change=False):
+        return (on_true if switch else on_false,)
+
 TEST_NODE_CLASS_MAPPINGS = {
     "TestLazyMixImages": TestLazyMixImages,
     "TestVariadicAverage": TestVariadicAverage,
@@ -345,6 +432,9 @@ TEST_NODE_CLASS_MAPPINGS = {
     "TestCustomValidation5": TestCustomValidation5,
     "TestDynamicDependencyCycle": TestDynamicDependencyCycle,
     "TestMixedExpansionReturns": TestMixedExpansionReturns,
+    "TestSleep": TestSleep,
+    "TestAsyncSleep": TestAsyncSleep,
+    "TestAsyncLazySwitch": TestAsyncLazySwitch,
 }
 
 TEST_NODE_DISPLAY_NAME_MAPPINGS = {
@@ -359,4 +449,7 @@ TEST_NODE_DISPLAY_NAME_MAPPINGS = {
     "TestCustomValidation5": "Custom Validation 5",
     "TestDynamicDependencyCycle": "Dynamic Dependency Cycle",
     "TestMixedExpansionReturns": "Mixed Expansion Returns",
+    "TestSleep": "Sleep",
+    "TestAsyncSleep": "Async Sleep",
+    "TestAsyncLazySwitch": "Async Lazy Switch",
 }